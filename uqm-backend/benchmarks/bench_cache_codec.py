@@ -0,0 +1,92 @@
+"""
+缓存编码微基准测试
+对比原pickle字典列表与列式数据加压缩编码的体积、写入耗时和命中耗时
+
+命中耗时分两种：只解码（步骤缓存命中后直接以列式数据进入步骤存储）和
+解码后转换为字典列表（需要逐行处理或输出响应时）。
+
+用法:
+    python benchmarks/bench_cache_codec.py [--rows 10000 100000 1000000] [--repeat 3]
+"""
+
+import argparse
+import os
+import pickle
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.core.batch import as_rows, to_columnar  # noqa: E402
+from src.core.cache_codec import COMPRESSORS, CacheCodec  # noqa: E402
+
+
+def make_rows(rows: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """生成典型的查询结果：整数、低基数字符串、浮点数、Decimal和日期时间"""
+    rnd = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    return [
+        {
+            "order_id": i,
+            "customer_id": rnd.randrange(5000),
+            "status": rnd.choice(["paid", "shipped", "refunded", "cancelled"]),
+            "country": rnd.choice(["CN", "US", "DE", "JP", "FR"]),
+            "amount": round(rnd.uniform(1, 500), 2),
+            "discount": Decimal(rnd.randrange(100)) / 100,
+            "created_at": start + timedelta(minutes=i),
+        }
+        for i in range(rows)
+    ]
+
+
+def timed(func, repeat: int) -> float:
+    """返回多次执行中的最短耗时"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 1000000], help="行数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数，取最短耗时")
+    args = parser.parse_args()
+
+    print(f"{'行数':>9}  {'编码':<20}{'大小(MB)':>10}{'写入(秒)':>10}{'命中(秒)':>10}{'命中+转行(秒)':>15}")
+    for rows in args.rows:
+        data = make_rows(rows)
+
+        legacy = pickle.dumps(data)
+        print(
+            f"{rows:>9}  {'pickle(rows)':<20}{len(legacy) / 1e6:>10.2f}"
+            f"{timed(lambda: pickle.dumps(data), args.repeat):>10.4f}"
+            f"{timed(lambda: pickle.loads(legacy), args.repeat):>10.4f}"
+            f"{timed(lambda: pickle.loads(legacy), args.repeat):>15.4f}"
+        )
+
+        for compression in [
+            name for name in ("none", "zlib", "zstd", "lz4") if name in COMPRESSORS
+        ]:
+            codec = CacheCodec(compression)
+            encoded = codec.encode(to_columnar(data))
+            assert as_rows(codec.decode(encoded)) == data
+            label = f"columnar+{compression}"
+            print(
+                f"{rows:>9}  {label:<20}{len(encoded) / 1e6:>10.2f}"
+                f"{timed(lambda: codec.encode(to_columnar(data)), args.repeat):>10.4f}"
+                f"{timed(lambda: codec.decode(encoded), args.repeat):>10.4f}"
+                f"{timed(lambda: as_rows(codec.decode(encoded)), args.repeat):>15.4f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+缓存键生成微基准测试
+对比原来按上游数据hash生成依赖步骤缓存键与串联上游缓存键的耗时
+
+原实现对依赖步骤的每个上游步骤都要把全部数据json.dumps后计算MD5，耗时随
+上游行数线性增长；串联上游缓存键只与步骤配置大小有关。
+
+用法:
+    python benchmarks/bench_cache_key.py [--rows 10000 100000] [--repeat 3]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.core.fingerprint import chain_fingerprint, fingerprint  # noqa: E402
+
+
+STEP_CONFIG = {
+    "name": "order_summary",
+    "type": "pivot",
+    "config": {
+        "source": "orders",
+        "index": ["country"],
+        "columns": "status",
+        "values": "amount",
+        "agg_func": "sum",
+    },
+}
+
+
+def make_rows(rows: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """生成上游步骤的查询结果"""
+    rnd = random.Random(seed)
+    return [
+        {
+            "order_id": i,
+            "customer_id": rnd.randrange(5000),
+            "status": rnd.choice(["paid", "shipped", "refunded", "cancelled"]),
+            "country": rnd.choice(["CN", "US", "DE", "JP", "FR"]),
+            "amount": round(rnd.uniform(1, 500), 2),
+        }
+        for i in range(rows)
+    ]
+
+
+def legacy_key(step_config: Dict[str, Any], upstream_rows: List[Dict[str, Any]]) -> str:
+    """原Executor._generate_cache_key：序列化上游数据计算hash"""
+    data_hash = hashlib.md5(json.dumps(upstream_rows, sort_keys=True).encode("utf-8")).hexdigest()
+    cache_data = {"step_config": step_config, "dependency_data": {"orders": data_hash}}
+    digest = hashlib.md5(json.dumps(cache_data, sort_keys=True).encode("utf-8")).hexdigest()
+    return f"step_cache:{step_config['name']}:{digest}"
+
+
+def chained_key(step_config: Dict[str, Any], upstream_key: str) -> str:
+    """当前实现：步骤配置指纹串联上游缓存键"""
+    digest = chain_fingerprint(fingerprint(step_config), {"orders": upstream_key})
+    return f"step_cache:{step_config['name']}:{digest}"
+
+
+def timed(func, repeat: int) -> float:
+    """返回多次执行中的最短耗时"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000], help="上游步骤行数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数，取最短耗时")
+    args = parser.parse_args()
+
+    upstream_key = "step_cache:orders:" + fingerprint({"name": "orders"})
+
+    print(f"{'上游行数':>9}{'数据hash(秒)':>16}{'串联缓存键(秒)':>18}")
+    for rows in args.rows:
+        data = make_rows(rows)
+        legacy_time = timed(lambda: legacy_key(STEP_CONFIG, data), args.repeat)
+        chained_time = timed(lambda: chained_key(STEP_CONFIG, upstream_key), args.repeat)
+        print(f"{rows:>9}{legacy_time:>16.4f}{chained_time:>18.6f}")
+
+
+if __name__ == "__main__":
+    main()
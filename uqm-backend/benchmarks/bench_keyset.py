@@ -0,0 +1,144 @@
+"""
+keyset分页微基准测试
+对比深分页时LIMIT/OFFSET分页与keyset分页读取同一页的耗时，并校验两者结果一致
+
+OFFSET分页要先扫描并丢弃前面所有页的行，页码越大越慢，还要额外执行一次COUNT；
+keyset分页按上一页最后一行的排序键沿索引直接定位，每页的耗时与页码无关。
+
+用法:
+    python benchmarks/bench_keyset.py [--rows 500000] [--page-size 50] [--page 500] [--repeat 5]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import structlog  # noqa: E402
+
+from src.connectors.base import DefaultConnectorManager  # noqa: E402
+from src.connectors.sqlite import SQLiteConnector  # noqa: E402
+from src.steps.query_step import QueryStep  # noqa: E402
+from src.utils.pagination import encode_cursor  # noqa: E402
+
+
+CONFIG = {
+    "data_source": "events",
+    "dimensions": ["id", "created_at", "kind"],
+    "filters": [{"field": "kind", "operator": "!=", "value": "debug"}],
+    "order_by": [
+        {"field": "created_at", "direction": "DESC"},
+        {"field": "id", "direction": "DESC"},
+    ],
+}
+
+
+def make_database(path: str, rows: int, seed: int = 42) -> None:
+    """生成事件表，排序列上建立复合索引"""
+    rnd = random.Random(seed)
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            "CREATE TABLE events (id INTEGER PRIMARY KEY, created_at TEXT, kind TEXT)"
+        )
+        connection.executemany(
+            "INSERT INTO events VALUES (?, ?, ?)",
+            (
+                (
+                    i,
+                    f"2024-{rnd.randrange(1, 13):02d}-{rnd.randrange(1, 29):02d} "
+                    f"{rnd.randrange(24):02d}:00:00",
+                    rnd.choice(["click", "view", "debug"]),
+                )
+                for i in range(rows)
+            ),
+        )
+        connection.execute("CREATE INDEX idx_events_created ON events (created_at, id)")
+
+
+async def offset_page(
+    manager: DefaultConnectorManager, page: int, page_size: int
+) -> List[Dict[str, Any]]:
+    """按页码读取一页"""
+    options = {"page": page, "page_size": page_size}
+    result = await QueryStep(dict(CONFIG)).execute(
+        {"connector_manager": manager, "options": options}
+    )
+    return result["data"]
+
+
+async def keyset_page(
+    manager: DefaultConnectorManager, cursor: str, page_size: int
+) -> List[Dict[str, Any]]:
+    """按游标读取一页"""
+    options = {"pagination_mode": "keyset", "page_size": page_size, "cursor": cursor}
+    result = await QueryStep(dict(CONFIG)).execute(
+        {"connector_manager": manager, "options": options}
+    )
+    return result["data"]
+
+
+async def timed(func, repeat: int) -> float:
+    """返回多次执行中的最短耗时"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rows", type=int, default=500000, help="事件表行数")
+    parser.add_argument("--page-size", type=int, default=50, help="每页行数")
+    parser.add_argument("--page", type=int, default=500, help="读取的页码")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数，取最短耗时")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.CRITICAL))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        make_database(path, args.rows)
+
+        manager = DefaultConnectorManager()
+        manager.connectors.clear()
+        manager.register_connector("sqlite", SQLiteConnector(f"sqlite:///{path}"))
+        manager.settings.DEFAULT_DB_TYPE = "sqlite"
+        try:
+            # 前一页最后一行的排序键就是前端翻到这一页时持有的游标
+            previous = await offset_page(manager, args.page - 1, args.page_size)
+            columns = QueryStep(dict(CONFIG)).get_keyset_columns()
+            cursor = encode_cursor(columns, [previous[-1][name] for name, _ in columns])
+
+            expected = await offset_page(manager, args.page, args.page_size)
+            actual = await keyset_page(manager, cursor, args.page_size)
+            assert actual == expected, "分页结果不一致"
+
+            offset_time = await timed(
+                lambda: offset_page(manager, args.page, args.page_size), args.repeat
+            )
+            keyset_time = await timed(
+                lambda: keyset_page(manager, cursor, args.page_size), args.repeat
+            )
+        finally:
+            await manager.close_all()
+
+    print(f"事件行数: {args.rows}  页码: {args.page}  每页: {args.page_size}")
+    print(f"OFFSET分页: {offset_time:.4f} 秒")
+    print(f"keyset分页: {keyset_time:.4f} 秒  ({offset_time / keyset_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
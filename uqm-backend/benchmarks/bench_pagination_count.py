@@ -0,0 +1,166 @@
+"""
+分页总数微基准测试
+对比翻页时原先先执行COUNT再查询分页数据的实现，与COUNT和分页数据同时查询、
+以及cached模式复用COUNT结果的耗时，并校验各方式的分页数据和总数一致
+
+分组查询的COUNT需要在子查询中完成整个分组，与分页数据查询的代价相当；
+同时查询时两条SQL在连接池的不同连接上并行执行（SQLite在进程内执行，只有一个CPU核
+时无法并行，远程数据库还能重叠两次网络往返），cached模式下翻页只有第一页执行COUNT。
+
+用法:
+    python benchmarks/bench_pagination_count.py [--rows 300000] [--groups 20000]
+                                                [--pages 10] [--repeat 3]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import structlog  # noqa: E402
+
+from src.connectors.base import DefaultConnectorManager  # noqa: E402
+from src.connectors.sqlite import SQLiteConnector  # noqa: E402
+from src.core.cache import MemoryCacheManager  # noqa: E402
+from src.steps.query_step import QueryStep  # noqa: E402
+from src.utils.sql_builder import BindParameters  # noqa: E402
+
+
+CONFIG = {
+    "data_source": "orders",
+    "dimensions": ["customer_id"],
+    "metrics": [{"name": "amount", "aggregation": "SUM", "alias": "total"}],
+    "filters": [{"field": "status", "operator": "!=", "value": "refunded"}],
+    "group_by": ["customer_id"],
+    "order_by": [
+        {"field": "total", "direction": "DESC"},
+        {"field": "customer_id", "direction": "ASC"},
+    ],
+}
+
+PAGE_SIZE = 20
+
+
+def make_database(path: str, rows: int, groups: int, seed: int = 42) -> None:
+    """生成订单表"""
+    rnd = random.Random(seed)
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            "CREATE TABLE orders (order_id INTEGER, customer_id INTEGER, amount REAL, status TEXT)"
+        )
+        connection.executemany(
+            "INSERT INTO orders VALUES (?, ?, ?, ?)",
+            (
+                (
+                    i,
+                    rnd.randrange(groups),
+                    round(rnd.uniform(1, 500), 2),
+                    rnd.choice(["paid", "shipped", "refunded"]),
+                )
+                for i in range(rows)
+            ),
+        )
+
+
+async def legacy_page(
+    manager: DefaultConnectorManager, page: int
+) -> Tuple[List[Dict[str, Any]], int]:
+    """原QueryStep._execute_with_database的分页逻辑：先COUNT，再查询分页数据"""
+    connector = await manager.get_default_connector()
+    step = QueryStep(dict(CONFIG))
+
+    count_params = BindParameters(connector.paramstyle)
+    count_result = await connector.execute_query(
+        step.build_count_query(count_params), count_params.values or None
+    )
+    total_count = count_result[0].get("total", 0) if count_result else 0
+
+    step.config["limit"] = PAGE_SIZE
+    step.config["offset"] = (page - 1) * PAGE_SIZE
+    data_params = BindParameters(connector.paramstyle)
+    data = await connector.execute_query(step.build_query(data_params), data_params.values or None)
+    return data, total_count
+
+
+async def current_page(
+    manager: DefaultConnectorManager, cache: MemoryCacheManager, page: int, count_mode: str
+) -> Tuple[List[Dict[str, Any]], int]:
+    """按指定的总数计算方式查询一页"""
+    options = {"page": page, "page_size": PAGE_SIZE, "count_mode": count_mode}
+    result = await QueryStep(dict(CONFIG)).execute(
+        {"connector_manager": manager, "cache_manager": cache, "options": options}
+    )
+    return result["data"], result["total_count"]
+
+
+async def timed(func, repeat: int) -> float:
+    """返回多次执行中的最短耗时"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rows", type=int, default=300000, help="订单表行数")
+    parser.add_argument("--groups", type=int, default=20000, help="客户数")
+    parser.add_argument("--pages", type=int, default=10, help="连续翻页的页数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数，取最短耗时")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.CRITICAL))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        make_database(path, args.rows, args.groups)
+
+        manager = DefaultConnectorManager()
+        manager.connectors.clear()
+        manager.register_connector("sqlite", SQLiteConnector(f"sqlite:///{path}"))
+        manager.settings.DEFAULT_DB_TYPE = "sqlite"
+        pages = range(1, args.pages + 1)
+
+        async def legacy_scroll():
+            return [await legacy_page(manager, page) for page in pages]
+
+        async def scroll(count_mode: str):
+            # 每轮使用新的缓存，cached模式下第一页仍要执行COUNT
+            cache = MemoryCacheManager()
+            return [await current_page(manager, cache, page, count_mode) for page in pages]
+
+        try:
+            expected = await legacy_scroll()
+            assert await scroll("exact") == expected, "精确计数结果不一致"
+            assert await scroll("cached") == expected, "缓存计数结果不一致"
+
+            legacy_time = await timed(legacy_scroll, args.repeat)
+            exact_time = await timed(lambda: scroll("exact"), args.repeat)
+            cached_time = await timed(lambda: scroll("cached"), args.repeat)
+        finally:
+            await manager.close_all()
+
+    print(
+        f"订单行数: {args.rows}  分组数: {expected[0][1]}  翻页: {args.pages}页 x {PAGE_SIZE}行  "
+        f"CPU核数: {os.cpu_count()}"
+    )
+    print(f"先COUNT再查询: {legacy_time:.4f} 秒")
+    print(f"同时查询:      {exact_time:.4f} 秒  ({legacy_time / exact_time:.1f}x)")
+    print(f"缓存总数:      {cached_time:.4f} 秒  ({legacy_time / cached_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
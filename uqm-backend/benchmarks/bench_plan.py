@@ -0,0 +1,132 @@
+"""
+查询计划缓存微基准测试
+对比每次请求都解析UQM并在JSON文本上替换参数，与命中查询计划缓存后只绑定参数的耗时
+
+原实现每次请求都要解析验证UQM、拓扑排序、深拷贝，再把整个UQM序列化为JSON
+文本替换占位符后重新解析；命中查询计划缓存后只需计算模板指纹，复制模板并
+替换编译时找到的占位符位置。
+
+用法:
+    python benchmarks/bench_plan.py [--steps 5 50] [--requests 1000] [--repeat 3]
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+from typing import Any, Dict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.core.fingerprint import fingerprint  # noqa: E402
+from src.core.parser import UQMParser  # noqa: E402
+from src.core.plan import PlanCache  # noqa: E402
+
+
+def make_uqm(steps: int) -> Dict[str, Any]:
+    """生成包含多个查询步骤和一个合并步骤的UQM模板"""
+    query_steps = [
+        {
+            "name": f"query_{i}",
+            "type": "query",
+            "config": {
+                "data_source": f"table_{i}",
+                "dimensions": ["region", "category"],
+                "metrics": [{"name": "amount", "aggregation": "SUM", "alias": "total_amount"}],
+                "filters": [
+                    {"field": "region", "operator": "IN", "value": "$regions"},
+                    {"field": "created_at", "operator": ">=", "value": "${start_date}"},
+                ],
+                "group_by": ["region", "category"],
+            },
+        }
+        for i in range(steps)
+    ]
+    union_step = {
+        "name": "combined",
+        "type": "union",
+        "config": {"sources": [step["name"] for step in query_steps], "mode": "ALL"},
+    }
+    return {
+        "metadata": {"name": "bench_plan"},
+        "steps": query_steps + [union_step],
+        "output": "combined",
+    }
+
+
+def legacy_prepare(
+    parser: UQMParser, uqm_data: Dict[str, Any], parameters: Dict[str, Any]
+) -> Dict[str, Any]:
+    """原实现：解析后深拷贝，并在整个UQM的JSON文本上替换参数"""
+    parsed = copy.deepcopy(parser.parse(uqm_data))
+    uqm_str = json.dumps(parsed, ensure_ascii=False)
+    for name, value in parameters.items():
+        replacement = json.dumps(value, ensure_ascii=False)
+        uqm_str = uqm_str.replace(f'"${{{name}}}"', replacement)
+        uqm_str = uqm_str.replace(f"${{{name}}}", replacement)
+        uqm_str = uqm_str.replace(f'"${name}"', replacement)
+        uqm_str = uqm_str.replace(f"${name}", replacement)
+    return json.loads(uqm_str)
+
+
+def cached_prepare(
+    plan_cache: PlanCache, parser: UQMParser, uqm_data: Dict[str, Any], parameters: Dict[str, Any]
+) -> Dict[str, Any]:
+    """当前实现：按模板指纹获取查询计划后绑定参数"""
+    plan = plan_cache.get_or_compile(fingerprint(uqm_data), lambda: parser.parse(uqm_data))
+    return plan.bind(parameters)
+
+
+def timed(func, repeat: int) -> float:
+    """返回多次执行中的最短耗时"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--steps", type=int, nargs="+", default=[5, 50], help="UQM查询步骤数")
+    parser.add_argument("--requests", type=int, default=1000, help="每轮请求数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数，取最短耗时")
+    args = parser.parse_args()
+
+    uqm_parser = UQMParser()
+    uqm_parser.log_info = lambda *a, **k: None
+    parameters = {"regions": ["east", "west"], "start_date": "2024-01-01"}
+
+    print(f"{'步骤数':>6}{'解析+文本替换(毫秒/请求)':>28}{'计划缓存+绑定(毫秒/请求)':>28}")
+    for steps in args.steps:
+        uqm_data = make_uqm(steps)
+        plan_cache = PlanCache(max_size=16)
+        assert legacy_prepare(uqm_parser, uqm_data, parameters) == cached_prepare(
+            plan_cache, uqm_parser, uqm_data, parameters
+        )
+
+        legacy_time = timed(
+            lambda: [
+                legacy_prepare(uqm_parser, uqm_data, parameters) for _ in range(args.requests)
+            ],
+            args.repeat,
+        )
+        cached_time = timed(
+            lambda: [
+                cached_prepare(plan_cache, uqm_parser, uqm_data, parameters)
+                for _ in range(args.requests)
+            ],
+            args.repeat,
+        )
+        legacy_ms = legacy_time / args.requests * 1000
+        cached_ms = cached_time / args.requests * 1000
+        print(f"{steps:>6}{legacy_ms:>28.4f}{cached_ms:>28.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+查询下推微基准测试
+对比读取上游query步骤结果的query步骤在内存中计算，与合并为一条带WITH的SQL在数据库中执行的耗时，并校验两者结果一致
+
+内存计算时上游步骤的明细行要先从数据库读入Python，再逐行过滤、分组聚合；
+合并后整条链在SQLite中执行，只返回最终的聚合结果。
+
+用法:
+    python benchmarks/bench_pushdown.py [--rows 200000] [--groups 1000] [--repeat 3]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import structlog  # noqa: E402
+
+from src.connectors.base import DefaultConnectorManager  # noqa: E402
+from src.connectors.sqlite import SQLiteConnector  # noqa: E402
+from src.core.cache import MemoryCacheManager  # noqa: E402
+from src.core.executor import Executor  # noqa: E402
+
+
+STEPS = [
+    {
+        "name": "paid_orders",
+        "type": "query",
+        "config": {
+            "data_source": "orders",
+            "dimensions": ["customer_id", "amount", "status"],
+            "filters": [{"field": "status", "operator": "IN", "value": ["paid", "shipped"]}],
+        },
+    },
+    {
+        "name": "customer_totals",
+        "type": "query",
+        "config": {
+            "data_source": "paid_orders po",
+            "dimensions": ["customer_id"],
+            "metrics": [
+                {"name": "amount", "aggregation": "SUM", "alias": "total"},
+                {"name": "amount", "aggregation": "COUNT", "alias": "orders"},
+            ],
+            "group_by": ["customer_id"],
+            "having": [{"field": "orders", "operator": ">=", "value": 5}],
+            "order_by": [{"field": "customer_id", "direction": "ASC"}],
+        },
+    },
+]
+
+
+def make_database(path: str, rows: int, groups: int, seed: int = 42) -> None:
+    """生成订单表"""
+    rnd = random.Random(seed)
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            "CREATE TABLE orders (order_id INTEGER, customer_id INTEGER, amount REAL, status TEXT)"
+        )
+        connection.executemany(
+            "INSERT INTO orders VALUES (?, ?, ?, ?)",
+            (
+                (
+                    i,
+                    rnd.randrange(groups),
+                    round(rnd.uniform(1, 500), 2),
+                    rnd.choice(["paid", "shipped", "refunded"]),
+                )
+                for i in range(rows)
+            ),
+        )
+
+
+async def run(manager: DefaultConnectorManager, pushdown: bool) -> List[Dict[str, Any]]:
+    """执行步骤链，返回输出步骤的数据"""
+    executor = Executor(
+        STEPS,
+        connector_manager=manager,
+        cache_manager=MemoryCacheManager(),
+        options={"query_pushdown": pushdown},
+        output_step="customer_totals",
+    )
+    result = await executor.execute()
+    return result.get_step_data("customer_totals")
+
+
+async def timed(func, repeat: int) -> float:
+    """返回多次执行中的最短耗时"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rows", type=int, default=200000, help="订单表行数")
+    parser.add_argument("--groups", type=int, default=1000, help="客户数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数，取最短耗时")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.CRITICAL))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        make_database(path, args.rows, args.groups)
+
+        manager = DefaultConnectorManager()
+        manager.connectors.clear()
+        manager.register_connector("sqlite", SQLiteConnector(f"sqlite:///{path}"))
+        manager.settings.DEFAULT_DB_TYPE = "sqlite"
+        try:
+            expected = await run(manager, pushdown=False)
+            actual = await run(manager, pushdown=True)
+            assert [{k: round(v, 6) for k, v in row.items()} for row in actual] == [
+                {k: round(v, 6) for k, v in row.items()} for row in expected
+            ], "查询结果不一致"
+
+            memory_time = await timed(lambda: run(manager, pushdown=False), args.repeat)
+            pushdown_time = await timed(lambda: run(manager, pushdown=True), args.repeat)
+        finally:
+            await manager.close_all()
+
+    print(f"订单行数: {args.rows}  结果行数: {len(actual)}")
+    print(f"内存计算:     {memory_time:.4f} 秒")
+    print(f"合并到数据库: {pushdown_time:.4f} 秒  ({memory_time / pushdown_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,128 @@
+"""
+响应数据NaN清理微基准测试
+对比原routes.clean_nan递归实现与按列规范化实现的耗时，以及包含JSON编码的
+整体响应序列化耗时，并校验两者结果一致
+
+用法:
+    python benchmarks/bench_sanitize.py [--rows 100000] [--columns 20] [--repeat 3]
+"""
+
+import argparse
+import contextlib
+import copy
+import io
+import json
+import math
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.utils.serialization import sanitize_rows  # noqa: E402
+
+
+def legacy_clean_nan(obj, _path=None):
+    """原routes.clean_nan的递归实现（保留逐值的路径拼接和print输出）"""
+    if _path is None:
+        _path = []
+    if isinstance(obj, float) and math.isnan(obj):
+        print(f"[NaN found] path={_path} type=float value={obj}")
+        return None
+    if isinstance(obj, np.floating) and np.isnan(obj):
+        print(f"[NaN found] path={_path} type=numpy.nan value={obj}")
+        return None
+    if obj is pd.NA:
+        print(f"[NaN found] path={_path} type=pandas.NA value={obj}")
+        return None
+    if obj is pd.NaT:
+        print(f"[NaN found] path={_path} type=pandas.NaT value={obj}")
+        return None
+    if obj is None:
+        return None
+    if isinstance(obj, dict):
+        return {k: legacy_clean_nan(v, _path + ["." + str(k)]) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [legacy_clean_nan(v, _path + [f"[{i}]"]) for i, v in enumerate(obj)]
+    if isinstance(obj, tuple):
+        return tuple(legacy_clean_nan(v, _path + [f"({i})"]) for i, v in enumerate(obj))
+    if isinstance(obj, set):
+        return {legacy_clean_nan(v, _path + [f"{{{i}}}"]) for i, v in enumerate(obj)}
+    if isinstance(obj, BaseModel):
+        print(f"[BaseModel found] path={_path} type={type(obj)} value={obj}")
+        return legacy_clean_nan(obj.dict(), _path + [".dict"])
+    if hasattr(obj, "__dict__"):
+        print(f"[__dict__ found] path={_path} type={type(obj)} value={obj}")
+        return legacy_clean_nan(vars(obj), _path + [".__dict__"])
+    if not isinstance(obj, (str, int, bool)):
+        print(f"[Unhandled type] path={_path} type={type(obj)} value={obj}")
+    return obj
+
+
+def make_rows(rows: int, columns: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """生成混合类型的查询结果：整数、带NaN的浮点数、字符串、Decimal和日期时间"""
+    rnd = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    makers = [
+        lambda i: i,
+        lambda i: math.nan if rnd.random() < 0.05 else rnd.uniform(0, 1000),
+        lambda i: f"name_{rnd.randrange(1000)}",
+        lambda i: Decimal(rnd.randrange(100000)) / 100,
+        lambda i: start + timedelta(minutes=i),
+    ]
+    return [{f"col_{c}": makers[c % len(makers)](i) for c in range(columns)} for i in range(rows)]
+
+
+def serialize(data: List[Dict[str, Any]]) -> bytes:
+    """按FastAPI的方式编码响应数据"""
+    return json.dumps(jsonable_encoder(data), ensure_ascii=False, allow_nan=False).encode("utf-8")
+
+
+def timed(func, data: List[Dict[str, Any]], repeat: int) -> float:
+    """返回多次执行中的最短耗时，每次使用一份新的数据副本"""
+    best = float("inf")
+    for _ in range(repeat):
+        rows = copy.deepcopy(data)
+        start = time.perf_counter()
+        func(rows)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rows", type=int, default=100000, help="行数")
+    parser.add_argument("--columns", type=int, default=20, help="列数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数，取最短耗时")
+    args = parser.parse_args()
+
+    data = make_rows(args.rows, args.columns)
+
+    # 原实现每个Decimal/datetime值都会print一次，输出重定向到内存中，不计终端耗时
+    def legacy(rows):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return legacy_clean_nan(rows)
+
+    assert legacy(copy.deepcopy(data)) == sanitize_rows(copy.deepcopy(data))
+    print(f"结果一致性校验通过（{args.rows} x {args.columns}）")
+
+    print(f"{'实现':<14}{'清理(秒)':>12}{'清理+编码(秒)':>16}")
+    for name, clean in (("clean_nan", legacy), ("sanitize_rows", sanitize_rows)):
+        clean_time = timed(clean, data, args.repeat)
+        total_time = timed(lambda rows: serialize(clean(rows)), data, args.repeat)
+        print(f"{name:<14}{clean_time:>12.4f}{total_time:>16.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+步骤数据分组聚合微基准测试
+对比原先按组保存行列表再逐组聚合的实现与流式哈希聚合的耗时，并校验两者结果一致
+
+原实现先把每组的全部行放进列表，分组字段不在行中时逐个扫描行的键，聚合时
+每行都重新构建字段名变体；流式哈希聚合在步骤内解析一次字段名，每组只保存
+运行中的聚合状态。
+
+用法:
+    python benchmarks/bench_step_aggregate.py [--rows 100000] [--groups 1000] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.steps.query_step import QueryStep  # noqa: E402
+
+
+METRICS = [
+    {"name": "amount", "aggregation": "SUM", "alias": "total"},
+    {"name": "amount", "aggregation": "AVG", "alias": "average"},
+    {"name": "amount", "aggregation": "MAX", "alias": "largest"},
+    {"name": "order_id", "aggregation": "COUNT", "alias": "orders"},
+]
+
+
+def legacy_field_variants(step: QueryStep, field_expr: str, row: Dict[str, Any]) -> List[str]:
+    """原QueryStep._build_field_variants"""
+    variants = [field_expr]
+    if "." in field_expr:
+        table_alias, field_name = field_expr.split(".", 1)
+        variants.extend([field_name, f"{table_alias}_{field_name}"])
+    else:
+        for key in row.keys():
+            if key.endswith(f"_{field_expr}"):
+                variants.append(key)
+    variants.extend(step._get_table_alias_variants(field_expr))
+    return list(set(variants))
+
+
+def legacy_aggregate_field(
+    step: QueryStep, field_name: str, aggregation: str, rows: List[Dict[str, Any]]
+) -> Any:
+    """原QueryStep._aggregate_field"""
+    values = []
+    for row in rows:
+        for variant in legacy_field_variants(step, field_name, row):
+            if variant in row and row[variant] is not None:
+                values.append(row[variant])
+                break
+    if not values:
+        return None
+    if aggregation == "SUM":
+        return sum(float(v) for v in values if step_is_numeric(v))
+    if aggregation == "COUNT":
+        return len(values)
+    if aggregation == "AVG":
+        numeric_values = [float(v) for v in values if step_is_numeric(v)]
+        return sum(numeric_values) / len(numeric_values) if numeric_values else None
+    if aggregation == "MAX":
+        return max(values)
+    return min(values)
+
+
+def step_is_numeric(value: Any) -> bool:
+    """原QueryStep._is_numeric"""
+    try:
+        float(value)
+        return True
+    except (ValueError, TypeError):
+        return False
+
+
+def legacy_group(
+    step: QueryStep, data: List[Dict[str, Any]], group_by: List[str]
+) -> List[Dict[str, Any]]:
+    """原QueryStep._apply_grouping_and_aggregation（只包含按字段聚合的指标）"""
+    groups = {}
+    for row in data:
+        key_values = []
+        for field in group_by:
+            value = None
+            if field in row:
+                value = row[field]
+            else:
+                for row_key in row.keys():
+                    if row_key.endswith(f".{field}") or row_key == field:
+                        value = row[row_key]
+                        break
+            key_values.append(value)
+        groups.setdefault(tuple(key_values), []).append(row)
+
+    result = []
+    for group_key, group_rows in groups.items():
+        aggregated_row = {field: group_key[i] for i, field in enumerate(group_by)}
+        for metric in METRICS:
+            aggregated_row[metric["alias"]] = legacy_aggregate_field(
+                step, metric["name"], metric["aggregation"], group_rows
+            )
+        result.append(aggregated_row)
+    return result
+
+
+def make_rows(rows: int, groups: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """生成带表别名前缀的分组字段的上游步骤数据"""
+    rnd = random.Random(seed)
+    return [
+        {
+            "o.customer_id": rnd.randrange(groups),
+            "order_id": i,
+            "amount": round(rnd.uniform(1, 500), 2),
+            "status": rnd.choice(["paid", "shipped", "refunded"]),
+        }
+        for i in range(rows)
+    ]
+
+
+def timed(func, repeat: int) -> float:
+    """返回多次执行中的最短耗时"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rows", type=int, default=100000, help="上游步骤行数")
+    parser.add_argument("--groups", type=int, default=1000, help="分组数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数，取最短耗时")
+    args = parser.parse_args()
+
+    data = make_rows(args.rows, args.groups)
+    step = QueryStep({"data_source": "orders", "dimensions": ["customer_id"]})
+    group_by = ["customer_id"]
+
+    expected = legacy_group(step, data, group_by)
+    actual = step._apply_grouping_and_aggregation(data, [], METRICS, group_by)
+    assert actual == expected, "分组聚合结果不一致"
+
+    legacy_time = timed(lambda: legacy_group(step, data, group_by), args.repeat)
+    hash_time = timed(
+        lambda: step._apply_grouping_and_aggregation(data, [], METRICS, group_by), args.repeat
+    )
+
+    print(f"行数: {args.rows}  分组数: {args.groups}")
+    print(f"原实现:       {legacy_time:.4f} 秒")
+    print(f"流式哈希聚合: {hash_time:.4f} 秒  ({legacy_time / hash_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
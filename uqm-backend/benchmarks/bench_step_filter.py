@@ -0,0 +1,189 @@
+"""
+步骤数据过滤微基准测试
+对比原先逐行遍历过滤条件树的实现与编译后的行谓词的耗时，并校验两者结果一致
+
+原实现每行都重新计算过滤值（包括DATE_SUB的正则解析和datetime.now()），
+日期比较时两边的值都要依次尝试四种strptime格式；编译后的行谓词在编译时
+计算过滤值并解析字面日期，每行只做字段取值和比较。
+
+用法:
+    python benchmarks/bench_step_filter.py [--rows 1000000] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.steps.query_step import QueryStep  # noqa: E402
+
+
+FILTERS = [
+    {"field": "order_date", "operator": ">=", "value": "DATE_SUB(CURDATE(), INTERVAL 90 DAY)"},
+    {
+        "logic": "OR",
+        "conditions": [
+            {"field": "amount", "operator": ">", "value": 100},
+            {"field": "status", "operator": "IN", "value": ["refunded", "cancelled"]},
+        ],
+    },
+    {"field": "region", "operator": "NOT IN", "value": ["north"]},
+    {"field": "customer_id", "operator": "IS NOT NULL"},
+]
+
+
+def legacy_evaluate_date_expression(expression: str) -> Any:
+    """原QueryStep._evaluate_date_expression（只包含DATE_SUB ... DAY和CURDATE()）"""
+    import re
+
+    if "DATE_SUB" in expression.upper():
+        interval_match = re.search(r"INTERVAL\s+(\d+)\s+(MONTH|DAY|YEAR)", expression.upper())
+        if interval_match and interval_match.group(2) == "DAY":
+            result_date = datetime.now().date() - timedelta(days=int(interval_match.group(1)))
+            return result_date.strftime("%Y-%m-%d")
+    if "CURDATE" in expression.upper() or "CURRENT_DATE" in expression.upper():
+        return datetime.now().date().strftime("%Y-%m-%d")
+    return expression
+
+
+def legacy_compute_filter_value(value: Any) -> Any:
+    """原QueryStep._compute_filter_value"""
+    if not isinstance(value, str):
+        return value
+    if "DATE_SUB" in value.upper() or "CURDATE" in value.upper() or "CURRENT_DATE" in value.upper():
+        return legacy_evaluate_date_expression(value)
+    if any(func in value.upper() for func in ["NOW()", "CURRENT_TIMESTAMP", "UNIX_TIMESTAMP"]):
+        return legacy_evaluate_date_expression(value)
+    return value
+
+
+def legacy_compare_values(val1: Any, val2: Any, operator: str) -> bool:
+    """原QueryStep._compare_values"""
+    if isinstance(val1, str) and isinstance(val2, str):
+        date_formats = ["%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y/%m/%d", "%m/%d/%Y"]
+        date1 = None
+        date2 = None
+        for fmt in date_formats:
+            try:
+                date1 = datetime.strptime(val1, fmt)
+                break
+            except ValueError:
+                continue
+        for fmt in date_formats:
+            try:
+                date2 = datetime.strptime(val2, fmt)
+                break
+            except ValueError:
+                continue
+        if date1 and date2:
+            return {
+                ">": date1 > date2,
+                ">=": date1 >= date2,
+                "<": date1 < date2,
+                "<=": date1 <= date2,
+            }[operator]
+    try:
+        return {
+            ">": lambda: val1 > val2,
+            ">=": lambda: val1 >= val2,
+            "<": lambda: val1 < val2,
+            "<=": lambda: val1 <= val2,
+        }[operator]()
+    except TypeError:
+        return False
+
+
+def legacy_evaluate_condition(row: Dict[str, Any], filter_config: Dict[str, Any]) -> bool:
+    """原QueryStep._evaluate_filter_condition及其调用的逐行求值方法（不包含LIKE）"""
+    if "logic" in filter_config and "conditions" in filter_config:
+        results = (
+            legacy_evaluate_condition(row, condition) for condition in filter_config["conditions"]
+        )
+        return all(results) if filter_config["logic"].upper() == "AND" else any(results)
+
+    row_value = row.get(filter_config["field"])
+    operator = filter_config["operator"]
+    computed_value = legacy_compute_filter_value(filter_config.get("value"))
+    if operator == "=":
+        return row_value == computed_value
+    if operator == "!=":
+        return row_value != computed_value
+    if operator in (">", ">=", "<", "<="):
+        return row_value is not None and legacy_compare_values(row_value, computed_value, operator)
+    if operator == "IN":
+        return row_value in computed_value if isinstance(computed_value, list) else False
+    if operator == "NOT IN":
+        return row_value not in computed_value if isinstance(computed_value, list) else True
+    if operator == "IS NULL":
+        return row_value is None
+    return row_value is not None
+
+
+def legacy_filter(
+    data: List[Dict[str, Any]], filters: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """原QueryStep._apply_filters"""
+    return [
+        row
+        for row in data
+        if all(legacy_evaluate_condition(row, condition) for condition in filters)
+    ]
+
+
+def make_rows(rows: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """生成最近一年的订单数据"""
+    rnd = random.Random(seed)
+    today = date.today()
+    return [
+        {
+            "order_id": i,
+            "customer_id": rnd.choice([None] + list(range(50))),
+            "order_date": (today - timedelta(days=rnd.randrange(365))).strftime("%Y-%m-%d"),
+            "amount": round(rnd.uniform(1, 500), 2),
+            "status": rnd.choice(["paid", "shipped", "refunded", "cancelled"]),
+            "region": rnd.choice(["north", "south", "east", "west"]),
+        }
+        for i in range(rows)
+    ]
+
+
+def timed(func, repeat: int) -> float:
+    """返回多次执行中的最短耗时"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rows", type=int, default=1000000, help="上游步骤行数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数，取最短耗时")
+    args = parser.parse_args()
+
+    data = make_rows(args.rows)
+    step = QueryStep({"data_source": "orders", "dimensions": ["order_id"]})
+
+    expected = legacy_filter(data, FILTERS)
+    actual = step._apply_filters(data, FILTERS)
+    assert actual == expected, "过滤结果不一致"
+
+    legacy_time = timed(lambda: legacy_filter(data, FILTERS), 1)
+    compiled_time = timed(lambda: step._apply_filters(data, FILTERS), args.repeat)
+
+    print(f"行数: {args.rows}  命中: {len(actual)}")
+    print(f"原实现:     {legacy_time:.4f} 秒")
+    print(f"编译谓词:   {compiled_time:.4f} 秒  ({legacy_time / compiled_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+步骤数据JOIN微基准测试
+对比原嵌套循环实现与哈希连接实现的耗时，并校验两者结果一致
+
+用法:
+    python benchmarks/bench_step_join.py [--rows 50000] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.steps.query_step import QueryStep  # noqa: E402
+
+
+def legacy_join(
+    left_data: List[Dict[str, Any]],
+    right_data: List[Dict[str, Any]],
+    join_condition: str,
+    join_type: str,
+) -> List[Dict[str, Any]]:
+    """原QueryStep._perform_step_data_join的嵌套循环实现（仅支持INNER/LEFT）"""
+    import re
+
+    condition_match = re.match(r"(\w+)\.(\w+)\s*=\s*(\w+)\.(\w+)", join_condition.strip())
+    left_alias, left_field = condition_match.group(1), condition_match.group(2)
+    right_alias, right_field = condition_match.group(3), condition_match.group(4)
+
+    result = []
+    for left_row in left_data:
+        left_value = left_row.get(left_field)
+        joined = False
+
+        for right_row in right_data:
+            if left_value == right_row.get(right_field):
+                merged_row = {}
+                for key, value in left_row.items():
+                    merged_row[f"{left_alias}.{key}"] = value
+                    if key not in merged_row:
+                        merged_row[key] = value
+                for key, value in right_row.items():
+                    merged_row[f"{right_alias}.{key}"] = value
+                    if key not in left_row:
+                        merged_row[key] = value
+                result.append(merged_row)
+                joined = True
+
+        if join_type == "LEFT" and not joined:
+            merged_row = {}
+            for key, value in left_row.items():
+                merged_row[f"{left_alias}.{key}"] = value
+                merged_row[key] = value
+            result.append(merged_row)
+
+    return result
+
+
+def make_data(rows: int, seed: int = 42):
+    """生成订单与客户两份步骤数据"""
+    rnd = random.Random(seed)
+    customers = [
+        {"customer_id": i, "name": f"customer_{i}", "country": rnd.choice(["CN", "US", "DE", "JP"])}
+        for i in range(rows)
+    ]
+    orders = [
+        {
+            "order_id": i,
+            "customer_id": rnd.randrange(int(rows * 1.1)),
+            "amount": round(rnd.uniform(1, 500), 2),
+        }
+        for i in range(rows)
+    ]
+    return orders, customers
+
+
+def timed(func, repeat: int) -> float:
+    """返回多次执行中的最短耗时"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rows", type=int, default=50000, help="每一侧的行数")
+    parser.add_argument(
+        "--legacy-rows", type=int, default=5000, help="嵌套循环实现使用的行数上限（O(n*m)，行数过大时耗时以分钟计）"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数，取最短耗时")
+    args = parser.parse_args()
+
+    step = QueryStep({"data_source": "orders", "dimensions": ["order_id"]})
+    condition = "o.customer_id = c.customer_id"
+
+    legacy_rows = min(args.rows, args.legacy_rows)
+    orders, customers = make_data(legacy_rows)
+    for join_type in ("INNER", "LEFT"):
+        assert legacy_join(orders, customers, condition, join_type) == step._perform_step_data_join(
+            orders, customers, condition, join_type, "c"
+        ), join_type
+    print(f"结果一致性校验通过（{legacy_rows} x {legacy_rows}）")
+
+    print(f"{'实现':<12}{'JOIN类型':<8}{'行数':>10}{'耗时(秒)':>12}{'输出行数':>12}")
+    for join_type in ("INNER", "LEFT"):
+        elapsed = timed(lambda: legacy_join(orders, customers, condition, join_type), 1)
+        output = len(legacy_join(orders, customers, condition, join_type))
+        print(f"{'nested-loop':<12}{join_type:<8}{legacy_rows:>10}{elapsed:>12.4f}{output:>12}")
+
+    orders, customers = make_data(args.rows)
+    for join_type in ("INNER", "LEFT", "RIGHT", "FULL"):
+        elapsed = timed(
+            lambda: step._perform_step_data_join(orders, customers, condition, join_type, "c"),
+            args.repeat,
+        )
+        output = len(step._perform_step_data_join(orders, customers, condition, join_type, "c"))
+        print(f"{'hash':<12}{join_type:<8}{args.rows:>10}{elapsed:>12.4f}{output:>12}")
+
+
+if __name__ == "__main__":
+    main()
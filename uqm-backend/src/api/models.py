@@ -42,8 +42,9 @@ class PaginationInfo(BaseModel):
     """分页信息模型"""
     page: int = Field(..., description="当前页码")
     page_size: int = Field(..., description="每页大小")
-    total_items: int = Field(..., description="总项目数")
-    total_pages: int = Field(..., description="总页数")
+    total_items: Optional[int] = Field(None, description="总项目数，count_mode为none时为空")
+    total_pages: Optional[int] = Field(None, description="总页数，count_mode为none时为空")
+    count_mode: Optional[str] = Field(None, description="总数的计算方式，cached/estimated/none，精确计数时为空")
 
 
 class Metadata(BaseModel):
@@ -238,6 +239,7 @@ class HealthResponse(BaseModel):
     timestamp: datetime = Field(..., description="检查时间")
     version: str = Field(..., description="服务版本")
     uptime: float = Field(..., description="运行时间(秒)")
+    connectors: Dict[str, Any] = Field(default_factory=dict, description="数据库连接器健康状态")
     
     class Config:
         schema_extra = {
@@ -258,6 +260,7 @@ class MetricsResponse(BaseModel):
     average_response_time: float = Field(..., description="平均响应时间(秒)")
     active_connections: int = Field(..., description="活跃连接数")
     cache_hit_rate: float = Field(..., description="缓存命中率")
+    connection_pools: Dict[str, Any] = Field(default_factory=dict, description="数据库连接池统计")
     
     class Config:
         schema_extra = {
@@ -338,6 +341,24 @@ class JobStatusResponse(BaseModel):
         }
 
 
+class CacheInvalidateRequest(BaseModel):
+    """缓存失效请求模型"""
+    tables: List[str] = Field(..., min_length=1, description="数据发生变化的表名")
+    
+    class Config:
+        schema_extra = {
+            "example": {
+                "tables": ["orders", "sales.customers"]
+            }
+        }
+
+
+class CacheInvalidateResponse(BaseModel):
+    """缓存失效响应模型"""
+    tables: List[str] = Field(..., description="规范化后的表名")
+    invalidated: int = Field(..., description="删除的缓存项数")
+
+
 class AIGenerateRequest(BaseModel):
     """AI生成请求模型"""
     query: str = Field(..., description="自然语言查询描述")
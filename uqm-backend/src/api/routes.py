@@ -8,27 +8,29 @@ import uuid
 import json
 from datetime import datetime, timedelta
 from typing import Dict, Any
-import math
-import numpy as np
-import pandas as pd
 from pydantic import BaseModel
 
 from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Request
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
 
 from src.api.models import (
     UQMRequest, UQMResponse, ValidationRequest, ValidationResponse,
     HealthResponse, MetricsResponse, ErrorResponse,
     AsyncJobRequest, AsyncJobResponse, JobStatusResponse,
-    JobStatus, AIGenerateRequest, AIGenerateResponse,
+    JobStatus, CacheInvalidateRequest, CacheInvalidateResponse,
+    AIGenerateRequest, AIGenerateResponse,
     AIGenerateVisualizationRequest, AIGenerateVisualizationResponse
 )
+from src.api.streaming import STREAM_ENCODERS, STREAM_MEDIA_TYPES, get_stream_format
 from src.core.engine import get_uqm_engine
 from src.core.cache import get_cache_manager
+from src.core.parser import normalize_table_name
+from src.connectors.base import get_connector_manager
 from src.services.ai_service import get_ai_service
 from src.utils.logging import get_logger
+from src.utils.serialization import sanitize_rows
 from src.utils.exceptions import (
-    ValidationError, ExecutionError, TimeoutError
+    ValidationError, ExecutionError, TimeoutError, CacheError
 )
 from src.config.settings import get_settings
 
@@ -70,52 +72,14 @@ def update_metrics(success: bool, response_time: float, cache_hit: bool = False)
         metrics["cache_misses"] += 1
 
 
-def clean_nan(obj, _path=None):
-    if _path is None:
-        _path = []
-    # float('nan')
-    if isinstance(obj, float) and math.isnan(obj):
-        print(f"[NaN found] path={_path} type=float value={obj}")
-        return None
-    # numpy.nan
-    if isinstance(obj, np.floating) and np.isnan(obj):
-        print(f"[NaN found] path={_path} type=numpy.nan value={obj}")
-        return None
-    # pandas.NA
-    if obj is pd.NA:
-        print(f"[NaN found] path={_path} type=pandas.NA value={obj}")
-        return None
-    # pandas.NaT
-    if obj is pd.NaT:
-        print(f"[NaN found] path={_path} type=pandas.NaT value={obj}")
-        return None
-    # None 直接返回
-    if obj is None:
-        return None
-    # dict 递归
-    if isinstance(obj, dict):
-        return {k: clean_nan(v, _path+['.'+str(k)]) for k, v in obj.items()}
-    # list 递归
-    if isinstance(obj, list):
-        return [clean_nan(v, _path+[f'[{i}]']) for i, v in enumerate(obj)]
-    # tuple 递归
-    if isinstance(obj, tuple):
-        return tuple(clean_nan(v, _path+[f'({i})']) for i, v in enumerate(obj))
-    # set 递归
-    if isinstance(obj, set):
-        return {clean_nan(v, _path+[f'{{{i}}}']) for i, v in enumerate(obj)}
-    # Pydantic/BaseModel 递归
-    if isinstance(obj, BaseModel):
-        print(f"[BaseModel found] path={_path} type={type(obj)} value={obj}")
-        return clean_nan(obj.dict(), _path+['.dict'])
-    # 其它对象，尝试递归 __dict__
-    if hasattr(obj, '__dict__'):
-        print(f"[__dict__ found] path={_path} type={type(obj)} value={obj}")
-        return clean_nan(vars(obj), _path+['.__dict__'])
-    # 打印所有未处理类型
-    if not isinstance(obj, (str, int, bool)):
-        print(f"[Unhandled type] path={_path} type={type(obj)} value={obj}")
-    return obj
+async def _log_stream_errors(body):
+    """记录响应开始后才出现的流式查询错误，此时只能中断响应"""
+    try:
+        async for block in body:
+            yield block
+    except Exception as e:
+        logger.error("UQM流式响应中断", error=str(e))
+        raise
 
 
 @router.post(
@@ -150,17 +114,37 @@ async def execute_uqm(request: UQMRequest) -> UQMResponse:
         # 获取UQM引擎实例
         engine = get_uqm_engine()
         
+        # 流式响应：按块输出NDJSON或CSV
+        stream_format = get_stream_format(request.options)
+        if stream_format:
+            chunks = await engine.open_stream(
+                uqm_data=request.uqm,
+                parameters=request.parameters,
+                options=request.options
+            )
+            
+            response_time = time.time() - start_time
+            update_metrics(success=True, response_time=response_time)
+            
+            logger.info(
+                "UQM流式查询开始响应",
+                format=stream_format,
+                execution_time=response_time
+            )
+            
+            return StreamingResponse(
+                _log_stream_errors(STREAM_ENCODERS[stream_format](chunks)),
+                media_type=STREAM_MEDIA_TYPES[stream_format]
+            )
+        
         # 执行查询
         result = await engine.process(
             uqm_data=request.uqm,
             parameters=request.parameters,
             options=request.options
         )
-        # 只递归清理 result.data，保持 result 类型不变
-        if hasattr(result, 'data'):
-            result.data = clean_nan(result.data)
-        else:
-            print('[ERROR] result has no .data attribute, type:', type(result))
+        # 按列规范化 result.data 中的NaN/NA/NaT，保持 result 类型不变
+        result.data = sanitize_rows(result.data)
         
         response_time = time.time() - start_time
         update_metrics(success=True, response_time=response_time)
@@ -326,7 +310,8 @@ async def health_check() -> HealthResponse:
         status="healthy",
         timestamp=datetime.utcnow(),
         version="0.1.0",
-        uptime=uptime
+        uptime=uptime,
+        connectors=get_connector_manager().health_monitor.get_status()
     )
 
 
@@ -356,13 +341,18 @@ async def get_metrics() -> MetricsResponse:
         if metrics["total_requests"] > 0 else 0.0
     )
     
+    # 数据库连接池统计
+    connection_pools = get_connector_manager().get_pool_stats()
+    active_connections = sum(pool["in_use"] for pool in connection_pools.values())
+    
     return MetricsResponse(
         total_requests=metrics["total_requests"],
         successful_requests=metrics["successful_requests"],
         failed_requests=metrics["failed_requests"],
         average_response_time=avg_response_time,
-        active_connections=metrics["active_connections"],
-        cache_hit_rate=cache_hit_rate
+        active_connections=active_connections,
+        cache_hit_rate=cache_hit_rate,
+        connection_pools=connection_pools
     )
 
 
@@ -580,6 +570,62 @@ async def cancel_job(job_id: str) -> Dict[str, str]:
     
     return {"message": f"任务已取消: {job_id}"}
 
+@router.post(
+    "/cache/invalidate",
+    response_model=CacheInvalidateResponse,
+    summary="按表使缓存失效",
+    description="删除读取了指定表的所有查询结果缓存和步骤缓存",
+    responses={
+        500: {"model": ErrorResponse, "description": "服务器内部错误"},
+        503: {"model": ErrorResponse, "description": "缓存服务不可用，缓存可能没有删除"}
+    }
+)
+async def invalidate_cache(request: CacheInvalidateRequest) -> CacheInvalidateResponse:
+    """
+    按表使缓存失效
+    
+    缓存数据写入时以其步骤（包括上游步骤）读取的表为标签，源表数据变化后
+    调用该端点删除相关缓存。
+    
+    Args:
+        request: 缓存失效请求
+        
+    Returns:
+        缓存失效结果
+    """
+    tables = sorted({normalize_table_name(table) for table in request.tables if table.strip()})
+    
+    try:
+        keys = await get_cache_manager().invalidate_tags(tables)
+        
+    except CacheError as e:
+        logger.error("缓存服务不可用，缓存失效失败", tables=tables, error=str(e))
+        
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "code": "CACHE_UNAVAILABLE",
+                "message": str(e),
+                "details": e.details
+            }
+        )
+        
+    except Exception as e:
+        logger.error("缓存失效失败", tables=tables, error=str(e), exc_info=True)
+        
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "code": "CACHE_INVALIDATE_ERROR",
+                "message": "缓存失效失败",
+                "details": {"error": str(e)}
+            }
+        )
+    
+    logger.info("按表使缓存失效", tables=tables, invalidated=len(keys))
+    
+    return CacheInvalidateResponse(tables=tables, invalidated=len(keys))
+
 # ================== 报表管理API ==================
 import os, json
 from fastapi import Request
@@ -869,9 +915,8 @@ async def generate_and_execute(request: AIGenerateRequest) -> UQMResponse:
             options=request.options or {}
         )
         
-        # 清理NaN值
-        if hasattr(result, 'data'):
-            result.data = clean_nan(result.data)
+        # 按列规范化NaN/NA/NaT
+        result.data = sanitize_rows(result.data)
         
         response_time = time.time() - start_time
         update_metrics(success=True, response_time=response_time)
@@ -0,0 +1,117 @@
+"""
+流式响应编码
+把按块产出的查询结果编码为NDJSON或CSV字节流
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from src.utils.exceptions import ValidationError
+from src.utils.serialization import sanitize_rows
+
+
+# 流式响应格式及对应的媒体类型
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def get_stream_format(options: Optional[Dict[str, Any]]) -> Optional[str]:
+    """
+    从执行选项中读取流式响应格式
+
+    Args:
+        options: 执行选项，stream 为 true、"ndjson" 或 "csv"
+
+    Returns:
+        流式响应格式，不使用流式响应时返回None
+
+    Raises:
+        ValidationError: 不支持的格式
+    """
+    stream = (options or {}).get("stream")
+    if not stream:
+        return None
+    if stream is True:
+        return "ndjson"
+
+    stream_format = str(stream).lower()
+    if stream_format not in STREAM_MEDIA_TYPES:
+        raise ValidationError(
+            f"不支持的流式响应格式: {stream}",
+            details={"supported_formats": list(STREAM_MEDIA_TYPES)}
+        )
+    return stream_format
+
+
+def _json_default(value: Any) -> Any:
+    """json.dumps无法直接序列化的值"""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+async def encode_ndjson(chunks: AsyncIterator[List[Dict[str, Any]]]) -> AsyncIterator[bytes]:
+    """
+    编码为NDJSON，每行一个JSON对象，每个数据块产出一次
+
+    Args:
+        chunks: 按块产出字典列表的异步迭代器
+
+    Returns:
+        字节流
+    """
+    async for rows in chunks:
+        lines = [
+            json.dumps(row, ensure_ascii=False, default=_json_default)
+            for row in sanitize_rows(rows)
+        ]
+        if lines:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+async def encode_csv(chunks: AsyncIterator[List[Dict[str, Any]]]) -> AsyncIterator[bytes]:
+    """
+    编码为CSV，表头取第一行的字段，每个数据块产出一次
+
+    Args:
+        chunks: 按块产出字典列表的异步迭代器
+
+    Returns:
+        字节流
+    """
+    columns = None
+    async for rows in chunks:
+        if not rows:
+            continue
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if columns is None:
+            columns = list(rows[0].keys())
+            writer.writerow(columns)
+        for row in sanitize_rows(rows):
+            writer.writerow([_csv_value(row.get(column)) for column in columns])
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _csv_value(value: Any) -> Any:
+    """CSV单元格的值，None写为空字符串"""
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return value
+
+
+STREAM_ENCODERS = {
+    "ndjson": encode_ndjson,
+    "csv": encode_csv,
+}
@@ -25,13 +25,53 @@ class Settings(BaseSettings):
     MYSQL_URL: Optional[str] = Field(default=None, description="MySQL数据库连接URL")
     SQLITE_URL: Optional[str] = Field(default="sqlite:///./uqm.db", description="SQLite数据库连接URL")
     
+    # 连接池配置
+    DB_POOL_MIN_SIZE: int = Field(default=1, description="每个数据库连接池的最小连接数")
+    DB_POOL_MAX_SIZE: int = Field(default=10, description="每个数据库连接池的最大连接数")
+    DB_POOL_ACQUIRE_TIMEOUT: float = Field(default=30.0, description="从连接池获取连接的超时时间(秒)")
+    CONNECTOR_HEALTH_TTL: int = Field(default=30, description="连接器健康状态的有效期(秒)")
+    CONNECTOR_HEARTBEAT_INTERVAL: int = Field(default=15, description="连接器后台心跳间隔(秒)，0表示不启用")
+    CONNECTOR_FAILURE_THRESHOLD: int = Field(default=3, description="连续多少次连接错误后将连接器标记为不可用")
+    
     # Redis配置
     REDIS_URL: str = Field(default="redis://localhost:6379/0", description="Redis连接URL")
+    REDIS_MAX_CONNECTIONS: int = Field(default=20, description="Redis缓存连接池最大连接数")
+    REDIS_OPERATION_TIMEOUT: float = Field(default=1.0, description="单次Redis缓存操作的超时时间(秒)，超时按未命中处理")
+    CACHE_BREAKER_FAILURE_THRESHOLD: int = Field(default=5, description="Redis缓存连续失败多少次后暂停使用缓存")
+    CACHE_BREAKER_RESET_TIMEOUT: float = Field(default=30.0, description="Redis缓存暂停后多久重新尝试(秒)")
     
     # 缓存配置
-    CACHE_TYPE: str = Field(default="memory", description="缓存类型")
+    CACHE_TYPE: str = Field(
+        default="memory", description="缓存类型：memory/redis/tiered（进程内存+Redis两级缓存）"
+    )
     CACHE_DEFAULT_TIMEOUT: int = Field(default=3600, description="默认缓存超时时间(秒)")
     CACHE_MAX_SIZE: int = Field(default=1000, description="内存缓存最大条目数")
+    CACHE_L1_MAX_SIZE: int = Field(default=256, description="两级缓存中每个进程内存缓存的最大条目数")
+    CACHE_L1_MAX_MEMORY_MB: int = Field(
+        default=64, description="两级缓存中每个进程内存缓存最多占用的内存(MB)，0表示只按条目数限制"
+    )
+    CACHE_L1_TTL: int = Field(default=60, description="两级缓存中进程内存缓存项的最长TTL(秒)")
+    CACHE_KEY_PREFIX: str = Field(default="uqm:", description="Redis缓存键的命名空间前缀，清空缓存时只删除带该前缀的键")
+    CACHE_INVALIDATION_CHANNEL: str = Field(
+        default="uqm:cache:invalidate", description="两级缓存跨进程失效通知的Redis频道"
+    )
+    CACHE_COMPRESSION: str = Field(
+        default="auto", description="缓存数据压缩方式：auto/none/zlib/zstd/lz4，auto按zstd、lz4、zlib的顺序选择已安装的一种"
+    )
+    CACHE_COMPRESS_MIN_BYTES: int = Field(default=1024, description="缓存数据序列化后达到该字节数才压缩")
+    CACHE_MAX_MEMORY_MB: int = Field(default=512, description="内存缓存数据（序列化后）最多占用的内存(MB)，0表示只按条目数限制")
+    REQUEST_COALESCING_ENABLED: bool = Field(
+        default=True, description="是否合并同时到达的相同查询和相同步骤，只执行一次并共享结果"
+    )
+    CACHE_STALE_TTL: int = Field(
+        default=300, description="缓存过了TTL（软过期）后仍可返回旧数据并在后台刷新的时间(秒)，0表示过期即失效"
+    )
+    CACHE_EARLY_REFRESH_BETA: float = Field(
+        default=1.0, description="缓存提前刷新系数（XFetch），越大越早刷新，0表示只在软过期后刷新"
+    )
+    CACHE_LOCK_TIMEOUT: float = Field(
+        default=30.0, description="跨进程合并时缓存填充锁的过期时间，也是等待其他进程写入缓存的最长时间(秒)"
+    )
     
     # 日志配置
     LOG_LEVEL: str = Field(default="INFO", description="日志级别")
@@ -40,7 +80,29 @@ class Settings(BaseSettings):
     # 查询配置
     MAX_QUERY_TIMEOUT: int = Field(default=300, description="最大查询超时时间(秒)")
     MAX_CONCURRENT_QUERIES: int = Field(default=10, description="最大并发查询数")
+    MAX_PARALLEL_STEPS: int = Field(default=4, description="单个请求内可并发执行的最大步骤数")
+    STEP_DATA_SPILL_THRESHOLD_MB: int = Field(
+        default=0, description="步骤中间数据常驻内存超过该值(MB)时溢写到磁盘，0表示不溢写"
+    )
+    STEP_DATA_SPILL_DIR: Optional[str] = Field(default=None, description="步骤中间数据溢写目录，默认使用系统临时目录")
     QUERY_RESULT_LIMIT: int = Field(default=10000, description="查询结果行数限制")
+    STREAM_CHUNK_SIZE: int = Field(default=1000, description="流式响应每次从输出步骤或数据库游标读取的行数")
+    PLAN_CACHE_SIZE: int = Field(default=512, description="每个进程缓存的已解析UQM模板（查询计划）数量，0表示不缓存")
+    QUERY_PUSHDOWN_ENABLED: bool = Field(
+        default=True,
+        description=(
+            "是否把读取其他query步骤结果的query步骤合并为一条带WITH的SQL在数据库中执行"
+            "（需要数据库支持CTE，如MySQL 8.0+）"
+        )
+    )
+    PAGINATION_COUNT_MODE: str = Field(
+        default="exact",
+        description=(
+            "分页查询总数的默认计算方式：exact（每页执行COUNT）、cached（缓存COUNT结果）、"
+            "estimated（使用数据库的估算行数）、none（不计算总数）"
+        )
+    )
+    PAGINATION_COUNT_CACHE_TTL: int = Field(default=300, description="cached模式下分页总数的缓存时间(秒)")
     
     # 安全配置
     ALLOWED_HOSTS: List[str] = Field(default=["localhost", "127.0.0.1"], description="允许的主机列表")
@@ -87,8 +149,23 @@ class Settings(BaseSettings):
         return {
             "type": self.CACHE_TYPE,
             "redis_url": self.REDIS_URL,
+            "redis_max_connections": self.REDIS_MAX_CONNECTIONS,
+            "redis_operation_timeout": self.REDIS_OPERATION_TIMEOUT,
+            "breaker_failure_threshold": self.CACHE_BREAKER_FAILURE_THRESHOLD,
+            "breaker_reset_timeout": self.CACHE_BREAKER_RESET_TIMEOUT,
             "default_timeout": self.CACHE_DEFAULT_TIMEOUT,
             "max_size": self.CACHE_MAX_SIZE,
+            "max_memory_mb": self.CACHE_MAX_MEMORY_MB,
+            "l1_max_size": self.CACHE_L1_MAX_SIZE,
+            "l1_max_memory_mb": self.CACHE_L1_MAX_MEMORY_MB,
+            "l1_ttl": self.CACHE_L1_TTL,
+            "invalidation_channel": self.CACHE_INVALIDATION_CHANNEL,
+            "key_prefix": self.CACHE_KEY_PREFIX,
+            "compression": self.CACHE_COMPRESSION,
+            "compress_min_bytes": self.CACHE_COMPRESS_MIN_BYTES,
+            "stale_ttl": self.CACHE_STALE_TTL,
+            "early_refresh_beta": self.CACHE_EARLY_REFRESH_BETA,
+            "lock_timeout": self.CACHE_LOCK_TIMEOUT,
         }
     
     def get_logging_config(self) -> dict:
@@ -122,6 +199,81 @@ class Settings(BaseSettings):
             if self.MAX_CONCURRENT_QUERIES <= 0:
                 raise ValueError("最大并发查询数必须大于0")
             
+            if self.MAX_PARALLEL_STEPS <= 0:
+                raise ValueError("单个请求最大并发步骤数必须大于0")
+            
+            if self.DB_POOL_MAX_SIZE <= 0:
+                raise ValueError("连接池最大连接数必须大于0")
+            
+            if self.DB_POOL_MIN_SIZE < 0 or self.DB_POOL_MIN_SIZE > self.DB_POOL_MAX_SIZE:
+                raise ValueError("连接池最小连接数必须在0到最大连接数之间")
+            
+            if self.DB_POOL_ACQUIRE_TIMEOUT <= 0:
+                raise ValueError("连接池获取连接超时时间必须大于0")
+            
+            if self.CONNECTOR_HEALTH_TTL <= 0:
+                raise ValueError("连接器健康状态有效期必须大于0")
+            
+            if self.CONNECTOR_FAILURE_THRESHOLD <= 0:
+                raise ValueError("连接器失败阈值必须大于0")
+            
+            if self.STEP_DATA_SPILL_THRESHOLD_MB < 0:
+                raise ValueError("步骤数据溢写阈值不能为负数")
+            
+            if self.REDIS_MAX_CONNECTIONS <= 0:
+                raise ValueError("Redis连接池最大连接数必须大于0")
+            
+            if self.REDIS_OPERATION_TIMEOUT <= 0:
+                raise ValueError("Redis缓存操作超时时间必须大于0")
+            
+            if self.CACHE_BREAKER_FAILURE_THRESHOLD <= 0:
+                raise ValueError("缓存熔断失败阈值必须大于0")
+            
+            if self.CACHE_BREAKER_RESET_TIMEOUT <= 0:
+                raise ValueError("缓存熔断恢复时间必须大于0")
+            
+            if self.CACHE_TYPE.lower() not in ["memory", "redis", "tiered"]:
+                raise ValueError("缓存类型必须是memory、redis或tiered")
+            
+            if self.CACHE_L1_MAX_SIZE <= 0 or self.CACHE_L1_TTL <= 0:
+                raise ValueError("两级缓存的内存缓存条目数和TTL必须大于0")
+            
+            if self.CACHE_L1_MAX_MEMORY_MB < 0:
+                raise ValueError("两级缓存的内存缓存最大内存不能为负数")
+            
+            if self.CACHE_MAX_SIZE <= 0:
+                raise ValueError("内存缓存最大条目数必须大于0")
+            
+            if self.CACHE_MAX_MEMORY_MB < 0:
+                raise ValueError("内存缓存最大内存不能为负数")
+            
+            if not self.CACHE_KEY_PREFIX:
+                raise ValueError("Redis缓存键前缀不能为空")
+            
+            if self.CACHE_COMPRESSION.lower() not in ["auto", "none", "zlib", "zstd", "lz4"]:
+                raise ValueError("缓存压缩方式必须是auto、none、zlib、zstd或lz4")
+            
+            if self.CACHE_COMPRESS_MIN_BYTES < 0:
+                raise ValueError("缓存压缩阈值不能为负数")
+            
+            if self.CACHE_STALE_TTL < 0 or self.CACHE_EARLY_REFRESH_BETA < 0:
+                raise ValueError("缓存旧数据可用时间和提前刷新系数不能为负数")
+            
+            if self.CACHE_LOCK_TIMEOUT <= 0:
+                raise ValueError("缓存填充锁过期时间必须大于0")
+            
+            if self.STREAM_CHUNK_SIZE <= 0:
+                raise ValueError("流式响应分块行数必须大于0")
+            
+            if self.PLAN_CACHE_SIZE < 0:
+                raise ValueError("查询计划缓存数量不能为负数")
+            
+            if self.PAGINATION_COUNT_MODE.lower() not in ["exact", "cached", "estimated", "none"]:
+                raise ValueError("分页总数计算方式必须是exact、cached、estimated或none")
+            
+            if self.PAGINATION_COUNT_CACHE_TTL <= 0:
+                raise ValueError("分页总数缓存时间必须大于0")
+            
             return True
             
         except ValueError as e:
@@ -3,10 +3,13 @@
 定义所有连接器的通用接口和基础功能
 """
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Union
 from functools import lru_cache
 
+from src.connectors.health import ConnectorHealthMonitor
+from src.connectors.pool import ConnectionPool
 from src.utils.logging import LoggerMixin
 from src.utils.exceptions import ConnectionError
 from src.config.settings import get_settings
@@ -15,6 +18,16 @@ from src.config.settings import get_settings
 class BaseConnector(ABC, LoggerMixin):
     """数据连接器基类"""
     
+    # 是否支持通过服务端游标流式读取结果，为True的子类需要定义
+    # _open_stream_cursor(connection, query, params)，在连接池线程中打开游标并执行查询
+    supports_streaming = False
+    
+    # execute_query的params使用的占位符风格（DB-API paramstyle）：pymysql和psycopg2为pyformat
+    paramstyle = "pyformat"
+    
+    # SQL方言，与SQLDialect的取值一致，用于生成方言相关的SQL（如keyset分页条件）
+    dialect = "standard"
+    
     def __init__(self, connection_config: Dict[str, Any]):
         """
         初始化连接器
@@ -25,6 +38,9 @@ class BaseConnector(ABC, LoggerMixin):
         self.connection_config = connection_config
         self.connection = None
         self.is_connected = False
+        self.pool: Optional[ConnectionPool] = None
+        self._connect_lock = asyncio.Lock()
+        self._health_listener: Optional[Callable[[bool, Optional[Exception]], None]] = None
     
     @abstractmethod
     async def connect(self) -> None:
@@ -66,6 +82,88 @@ class BaseConnector(ABC, LoggerMixin):
             results.append(result)
         return results
     
+    async def stream_query(self, query: str, params: Optional[Dict[str, Any]] = None,
+                           chunk_size: int = 1000) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        流式执行查询，按块返回结果
+        
+        支持流式读取的连接器在整个读取过程中占用一个连接，通过服务端游标逐块
+        读取结果集；其他连接器一次取回全部结果后再分块返回。
+        
+        Args:
+            query: SQL查询语句
+            params: 查询参数
+            chunk_size: 每块的行数
+            
+        Returns:
+            按块产出查询结果的异步迭代器
+        """
+        await self._ensure_connected()
+        
+        if not self.supports_streaming or self.pool is None:
+            result = await self.execute_query(query, params)
+            for start in range(0, len(result), chunk_size):
+                yield result[start:start + chunk_size]
+            return
+        
+        pool = self.pool
+        connection = await pool.acquire()
+        cursor = None
+        discard = False
+        try:
+            self.log_debug("开始流式查询", query=query[:200], chunk_size=chunk_size)
+            cursor = await pool.run_in_thread(self._open_stream_cursor, connection, query, params)
+            self._report_health(True)
+            
+            while True:
+                rows = await pool.run_in_thread(self._fetch_stream_chunk, cursor, chunk_size)
+                if not rows:
+                    break
+                yield rows
+                
+        except asyncio.CancelledError:
+            # 线程中的读取无法中断，不再复用该连接
+            discard = True
+            raise
+        except Exception as e:
+            discard = self._is_connection_broken(e)
+            self._report_query_error(e)
+            self.log_error("流式查询失败", error=str(e), query=query[:200])
+            raise ConnectionError(f"流式查询失败: {e}")
+        finally:
+            if cursor is not None and not discard:
+                try:
+                    await pool.run_in_thread(self._close_stream_cursor, connection, cursor)
+                except Exception as e:
+                    self.log_warning("关闭流式查询游标失败", error=str(e))
+                    discard = True
+            await pool.release(connection, discard=discard)
+    
+    @staticmethod
+    def _fetch_stream_chunk(cursor: Any, chunk_size: int) -> List[Dict[str, Any]]:
+        """
+        从游标读取一块结果（在连接池线程中调用）
+        
+        Args:
+            cursor: 游标
+            chunk_size: 行数
+            
+        Returns:
+            字典列表，读完时为空列表
+        """
+        return [dict(row) for row in cursor.fetchmany(chunk_size)]
+    
+    @staticmethod
+    def _close_stream_cursor(connection: Any, cursor: Any) -> None:
+        """
+        关闭流式查询游标（在连接池线程中调用）
+        
+        Args:
+            connection: 数据库连接
+            cursor: 游标
+        """
+        cursor.close()
+    
     async def test_connection(self) -> bool:
         """
         测试连接有效性
@@ -74,8 +172,7 @@ class BaseConnector(ABC, LoggerMixin):
             连接是否有效
         """
         try:
-            if not self.is_connected:
-                await self.connect()
+            await self._ensure_connected()
             
             # 执行简单查询测试连接
             await self.execute_query("SELECT 1")
@@ -104,6 +201,22 @@ class BaseConnector(ABC, LoggerMixin):
             self.log_error(f"获取表 {table_name} 结构失败", error=str(e))
             raise ConnectionError(f"获取表结构失败: {e}")
     
+    async def estimate_row_count(
+        self, query: str, params: Optional[Dict[str, Any]] = None
+    ) -> Optional[int]:
+        """
+        使用查询优化器的统计信息估算查询结果的行数，不实际执行查询
+        
+        Args:
+            query: SQL查询语句
+            params: 查询参数
+            
+        Returns:
+            估算的行数，数据库不提供估算时返回None
+        """
+        # 默认实现，子类可以重写
+        return None
+    
     async def get_available_tables(self) -> List[str]:
         """
         获取可用表列表
@@ -114,6 +227,113 @@ class BaseConnector(ABC, LoggerMixin):
         # 默认实现，子类可以重写
         return []
     
+    def get_pool_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        获取连接池统计信息
+        
+        Returns:
+            连接池统计信息，未建立连接池时返回None
+        """
+        return self.pool.get_stats() if self.pool else None
+    
+    def set_health_listener(
+        self, listener: Optional[Callable[[bool, Optional[Exception]], None]]
+    ) -> None:
+        """
+        设置查询结果的健康状态监听器
+        
+        Args:
+            listener: 回调函数，参数为(是否成功, 连接类错误)
+        """
+        self._health_listener = listener
+    
+    def _report_health(self, success: bool, error: Optional[Exception] = None) -> None:
+        """
+        向健康监听器报告真实查询的结果
+        
+        Args:
+            success: 查询是否成功
+            error: 连接类错误
+        """
+        if self._health_listener is None:
+            return
+        try:
+            self._health_listener(success, error)
+        except Exception as e:
+            self.log_warning("报告连接器健康状态失败", error=str(e))
+    
+    def _report_query_error(self, error: Exception) -> None:
+        """
+        报告查询错误，只有连接类错误才影响健康状态
+        
+        Args:
+            error: 查询错误
+        """
+        if self._is_connection_broken(error):
+            self._report_health(False, error)
+    
+    @staticmethod
+    def _is_connection_broken(error: BaseException) -> bool:
+        """
+        判断异常是否意味着连接已失效，子类按驱动重写
+        
+        Args:
+            error: 异常
+            
+        Returns:
+            连接是否已失效
+        """
+        return False
+    
+    async def _ensure_connected(self) -> None:
+        """确保连接池已建立，并发调用时只建立一次"""
+        if self.is_connected and self.pool:
+            return
+        
+        async with self._connect_lock:
+            if not (self.is_connected and self.pool):
+                await self.connect()
+    
+    async def _open_pool(self, name: str,
+                         connect_func: Callable[[], Any],
+                         is_broken_func: Optional[Callable[[BaseException], bool]] = None,
+                         max_size: Optional[int] = None) -> ConnectionPool:
+        """
+        创建并打开连接池，替换已有的连接池
+        
+        Args:
+            name: 连接池名称
+            connect_func: 创建单个连接的阻塞函数
+            is_broken_func: 判断异常是否意味着连接已失效的函数
+            max_size: 最大连接数，默认取DB_POOL_MAX_SIZE配置
+            
+        Returns:
+            连接池实例
+        """
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+        
+        settings = get_settings()
+        pool = ConnectionPool(
+            name=name,
+            connect_func=connect_func,
+            is_broken_func=is_broken_func,
+            min_size=settings.DB_POOL_MIN_SIZE,
+            max_size=max_size or settings.DB_POOL_MAX_SIZE,
+            acquire_timeout=settings.DB_POOL_ACQUIRE_TIMEOUT
+        )
+        await pool.open()
+        self.pool = pool
+        return pool
+    
+    async def _close_pool(self) -> None:
+        """关闭连接池"""
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+        self.is_connected = False
+    
     def _handle_connection_error(self, error: Exception) -> None:
         """
         处理连接错误
@@ -123,6 +343,7 @@ class BaseConnector(ABC, LoggerMixin):
         """
         self.log_error("数据库连接错误", error=str(error))
         self.is_connected = False
+        self._report_health(False, error)
         raise ConnectionError(f"数据库连接失败: {error}")
     
     def _format_query_result(self, result: Any) -> List[Dict[str, Any]]:
@@ -148,6 +369,12 @@ class BaseConnectorManager(LoggerMixin):
         """初始化连接器管理器"""
         self.connectors: Dict[str, BaseConnector] = {}
         self.settings = get_settings()
+        self.health_monitor = ConnectorHealthMonitor(
+            self.connectors,
+            ttl=self.settings.CONNECTOR_HEALTH_TTL,
+            heartbeat_interval=self.settings.CONNECTOR_HEARTBEAT_INTERVAL,
+            failure_threshold=self.settings.CONNECTOR_FAILURE_THRESHOLD
+        )
     
     def register_connector(self, name: str, connector: BaseConnector) -> None:
         """
@@ -158,8 +385,25 @@ class BaseConnectorManager(LoggerMixin):
             connector: 连接器实例
         """
         self.connectors[name] = connector
+        connector.set_health_listener(
+            lambda success, error: self._on_query_result(name, success, error)
+        )
         self.log_info(f"连接器 {name} 注册成功")
     
+    def _on_query_result(self, name: str, success: bool, error: Optional[Exception]) -> None:
+        """
+        根据真实查询结果更新连接器健康状态
+        
+        Args:
+            name: 连接器名称
+            success: 查询是否成功
+            error: 连接类错误
+        """
+        if success:
+            self.health_monitor.record_success(name)
+        else:
+            self.health_monitor.record_failure(name, error)
+    
     def get_connector(self, name: str) -> Optional[BaseConnector]:
         """
         获取连接器
@@ -172,8 +416,27 @@ class BaseConnectorManager(LoggerMixin):
         """
         return self.connectors.get(name)
     
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """
+        获取所有连接器的连接池统计信息
+        
+        Returns:
+            连接器名称到连接池统计信息的映射
+        """
+        return {
+            name: connector.get_pool_stats()
+            for name, connector in self.connectors.items()
+            if connector.get_pool_stats() is not None
+        }
+    
+    async def start_health_monitor(self) -> None:
+        """启动连接器健康监控的后台心跳"""
+        self.health_monitor.start()
+    
     async def close_all(self) -> None:
         """关闭所有连接器"""
+        await self.health_monitor.stop()
+        
         for name, connector in self.connectors.items():
             try:
                 await connector.close()
@@ -228,20 +491,28 @@ class DefaultConnectorManager(BaseConnectorManager):
         Returns:
             默认连接器实例
         """
-        # 优先使用配置指定的默认数据库类型
+        # 优先使用配置指定的默认数据库类型，其次按原有优先级
         default_type = self.settings.DEFAULT_DB_TYPE.lower()
-        connector = self.get_connector(default_type)
-        if connector:
-            if await connector.test_connection():
-                return connector
-        # fallback到原有优先级
-        for connector_name in ["postgresql", "mysql", "sqlite"]:
-            if connector_name == default_type:
-                continue
-            connector = self.get_connector(connector_name)
-            if connector:
-                if await connector.test_connection():
-                    return connector
+        candidates = [default_type] + [
+            name for name in ["postgresql", "mysql", "sqlite"] if name != default_type
+        ]
+        candidates = [name for name in candidates if self.get_connector(name)]
+        
+        # 使用缓存的健康状态，状态未知或过期时才探测
+        probed = set()
+        for connector_name in candidates:
+            healthy = self.health_monitor.is_healthy(connector_name)
+            if healthy is None:
+                healthy = await self.health_monitor.check(connector_name)
+                probed.add(connector_name)
+            if healthy:
+                return self.get_connector(connector_name)
+        
+        # 所有连接器都被标记为不可用时重新探测一次，避免错过已恢复的连接器
+        for connector_name in candidates:
+            if connector_name not in probed and await self.health_monitor.check(connector_name):
+                return self.get_connector(connector_name)
+        
         raise ConnectionError("没有可用的数据库连接器")
 
 
@@ -0,0 +1,201 @@
+"""
+连接器健康监控
+缓存连接器的健康状态，通过后台心跳和真实查询结果维护，避免每次选择连接器时都探测数据库
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, TYPE_CHECKING
+
+from src.utils.logging import LoggerMixin
+
+if TYPE_CHECKING:
+    from src.connectors.base import BaseConnector
+
+
+@dataclass
+class ConnectorHealth:
+    """单个连接器的健康状态"""
+    healthy: Optional[bool] = None
+    last_checked: float = 0.0
+    consecutive_failures: int = 0
+    last_error: Optional[str] = None
+
+
+class ConnectorHealthMonitor(LoggerMixin):
+    """
+    连接器健康监控器
+
+    健康状态在ttl秒内视为有效；真实查询成功会刷新状态，连续
+    failure_threshold次连接类错误会把连接器标记为不健康。后台心跳
+    只探测超过heartbeat_interval秒没有更新状态的连接器。
+    """
+
+    def __init__(self, connectors: Dict[str, "BaseConnector"],
+                 ttl: float = 30.0,
+                 heartbeat_interval: float = 15.0,
+                 failure_threshold: int = 3):
+        """
+        初始化健康监控器
+
+        Args:
+            connectors: 连接器名称到连接器实例的映射
+            ttl: 健康状态有效期(秒)
+            heartbeat_interval: 后台心跳间隔(秒)，0表示不启用
+            failure_threshold: 标记为不健康所需的连续失败次数
+        """
+        self.connectors = connectors
+        self.ttl = ttl
+        self.heartbeat_interval = heartbeat_interval
+        self.failure_threshold = max(1, failure_threshold)
+
+        self._health: Dict[str, ConnectorHealth] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._heartbeat_task: Optional[asyncio.Task] = None
+
+    def is_healthy(self, name: str) -> Optional[bool]:
+        """
+        获取缓存的健康状态
+
+        Args:
+            name: 连接器名称
+
+        Returns:
+            健康状态，未知或已过期时返回None
+        """
+        health = self._health.get(name)
+        if health is None or health.healthy is None:
+            return None
+        if time.monotonic() - health.last_checked > self.ttl:
+            return None
+        return health.healthy
+
+    async def check(self, name: str) -> bool:
+        """
+        主动探测连接器健康状态，同一连接器的并发探测只执行一次
+
+        Args:
+            name: 连接器名称
+
+        Returns:
+            连接器是否健康
+        """
+        connector = self.connectors.get(name)
+        if connector is None:
+            return False
+
+        lock = self._locks.setdefault(name, asyncio.Lock())
+        probe_started = time.monotonic()
+        async with lock:
+            # 等待期间其他探测已经更新了状态
+            health = self._health.get(name)
+            if (health is not None and health.healthy is not None
+                    and health.last_checked >= probe_started):
+                return health.healthy
+
+            healthy = await connector.test_connection()
+            self._set_state(name, healthy, None if healthy else "连接测试失败")
+            return healthy
+
+    def record_success(self, name: str) -> None:
+        """
+        记录真实查询成功
+
+        Args:
+            name: 连接器名称
+        """
+        health = self._health.setdefault(name, ConnectorHealth())
+        if health.healthy is False:
+            self.log_info(f"连接器 {name} 恢复可用")
+        health.healthy = True
+        health.last_checked = time.monotonic()
+        health.consecutive_failures = 0
+        health.last_error = None
+
+    def record_failure(self, name: str, error: Any = None) -> None:
+        """
+        记录真实查询中的连接类错误
+
+        Args:
+            name: 连接器名称
+            error: 错误信息
+        """
+        health = self._health.setdefault(name, ConnectorHealth())
+        health.consecutive_failures += 1
+        health.last_error = str(error) if error is not None else None
+
+        if health.consecutive_failures >= self.failure_threshold and health.healthy is not False:
+            self.log_warning(
+                f"连接器 {name} 标记为不可用",
+                consecutive_failures=health.consecutive_failures,
+                error=health.last_error
+            )
+            health.healthy = False
+            health.last_checked = time.monotonic()
+
+    def start(self) -> None:
+        """启动后台心跳"""
+        if self.heartbeat_interval <= 0 or self._heartbeat_task is not None:
+            return
+        self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        self.log_info("连接器健康心跳已启动", interval=self.heartbeat_interval)
+
+    async def stop(self) -> None:
+        """停止后台心跳"""
+        task, self._heartbeat_task = self._heartbeat_task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    def get_status(self) -> Dict[str, Dict[str, Any]]:
+        """
+        获取所有连接器的健康状态
+
+        Returns:
+            连接器名称到健康状态的映射
+        """
+        now = time.monotonic()
+        status = {}
+        for name in self.connectors:
+            health = self._health.get(name, ConnectorHealth())
+            status[name] = {
+                "healthy": health.healthy,
+                "stale": self.is_healthy(name) is None,
+                "seconds_since_check": now - health.last_checked if health.last_checked else None,
+                "consecutive_failures": health.consecutive_failures,
+                "last_error": health.last_error
+            }
+        return status
+
+    async def _heartbeat_loop(self) -> None:
+        """后台心跳：探测一段时间内没有状态更新的连接器"""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            now = time.monotonic()
+            for name in list(self.connectors):
+                health = self._health.get(name)
+                if health is not None and now - health.last_checked < self.heartbeat_interval:
+                    continue
+                try:
+                    await self.check(name)
+                except Exception as e:
+                    self.log_error(f"连接器 {name} 心跳检测失败", error=str(e))
+
+    def _set_state(self, name: str, healthy: bool, error: Optional[str]) -> None:
+        """更新主动探测得到的健康状态"""
+        if healthy:
+            self.record_success(name)
+            return
+
+        health = self._health.setdefault(name, ConnectorHealth())
+        if health.healthy is not False:
+            self.log_warning(f"连接器 {name} 健康检查失败，标记为不可用")
+        health.healthy = False
+        health.last_checked = time.monotonic()
+        health.consecutive_failures += 1
+        health.last_error = error
@@ -11,12 +11,15 @@ import pymysql
 from pymysql.connections import Connection
 
 from src.connectors.base import BaseConnector
-from src.utils.exceptions import ConnectionError
+from src.utils.exceptions import ConnectionError, TimeoutError
 
 
 class MySQLConnector(BaseConnector):
     """MySQL连接器实现"""
     
+    supports_streaming = True
+    dialect = "mysql"
+    
     def __init__(self, connection_url: str):
         """
         初始化MySQL连接器
@@ -37,30 +40,22 @@ class MySQLConnector(BaseConnector):
         }
         
         super().__init__(connection_config)
-        self.connection: Optional[Connection] = None
     
     async def connect(self) -> None:
-        """建立MySQL连接"""
+        """建立MySQL连接池"""
         try:
             self.log_info("正在连接MySQL数据库", host=self.connection_config["host"])
             
-            # 创建MySQL连接
-            self.connection = pymysql.connect(
-                host=self.connection_config["host"],
-                port=self.connection_config["port"],
-                user=self.connection_config["user"],
-                password=self.connection_config["password"],
-                database=self.connection_config["database"],
-                charset='utf8mb4',
-                cursorclass=pymysql.cursors.DictCursor,
-                autocommit=True
+            # 创建连接池
+            pool = await self._open_pool(
+                "mysql",
+                self._create_connection,
+                is_broken_func=self._is_connection_broken
             )
             
             # 测试连接
-            with self.connection.cursor() as cursor:
-                cursor.execute("SELECT VERSION()")
-                version = cursor.fetchone()
-                self.log_info("MySQL连接成功", version=version["VERSION()"])
+            version = await pool.run(self._fetch_version)
+            self.log_info("MySQL连接成功", version=version, pool_size=pool.max_size)
             
             self.is_connected = True
             
@@ -79,28 +74,14 @@ class MySQLConnector(BaseConnector):
         Returns:
             查询结果
         """
-        if not self.is_connected or not self.connection:
-            await self.connect()
+        await self._ensure_connected()
         
         try:
             self.log_debug("执行MySQL查询", query=query[:200])
             
-            with self.connection.cursor() as cursor:
-                # 执行查询
-                if params:
-                    cursor.execute(query, params)
-                else:
-                    cursor.execute(query)
-                
-                # 获取结果
-                if cursor.description:
-                    # 有结果集的查询
-                    result = cursor.fetchall()
-                    if not isinstance(result, list):
-                        result = [result] if result else []
-                else:
-                    # 没有结果集的查询
-                    result = []
+            # 在连接池线程中执行，避免阻塞事件循环
+            result = await self.pool.run(self._execute_on_connection, query, params)
+            self._report_health(True)
             
             self.log_debug(
                 "MySQL查询执行完成",
@@ -109,24 +90,109 @@ class MySQLConnector(BaseConnector):
             
             return result
             
+        except TimeoutError:
+            raise
         except Exception as e:
+            self._report_query_error(e)
             self.log_error("MySQL查询执行失败", error=str(e), query=query[:200])
             self._handle_mysql_error(e)
             raise ConnectionError(f"查询执行失败: {e}")
     
     async def close(self) -> None:
-        """关闭MySQL连接"""
+        """关闭MySQL连接池"""
         try:
-            if self.connection:
-                self.connection.close()
-                self.connection = None
-            
-            self.is_connected = False
+            await self._close_pool()
             self.log_info("MySQL连接已关闭")
             
         except Exception as e:
             self.log_error("关闭MySQL连接失败", error=str(e))
     
+    def _create_connection(self) -> Connection:
+        """
+        创建单个MySQL连接（在连接池线程中调用）
+        
+        Returns:
+            MySQL连接
+        """
+        return pymysql.connect(
+            host=self.connection_config["host"],
+            port=self.connection_config["port"],
+            user=self.connection_config["user"],
+            password=self.connection_config["password"],
+            database=self.connection_config["database"],
+            charset='utf8mb4',
+            cursorclass=pymysql.cursors.DictCursor,
+            autocommit=True
+        )
+    
+    @staticmethod
+    def _fetch_version(connection: Connection) -> str:
+        """获取MySQL版本（在连接池线程中调用）"""
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT VERSION()")
+            return cursor.fetchone()["VERSION()"]
+    
+    @staticmethod
+    def _execute_on_connection(connection: Connection, query: str,
+                               params: Optional[Any] = None) -> List[Dict[str, Any]]:
+        """
+        在指定连接上执行查询（在连接池线程中调用）
+        
+        Args:
+            connection: MySQL连接
+            query: SQL查询语句
+            params: 查询参数
+            
+        Returns:
+            查询结果
+        """
+        with connection.cursor() as cursor:
+            # 执行查询
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            
+            # 获取结果
+            if cursor.description:
+                # 有结果集的查询
+                result = cursor.fetchall()
+                if not isinstance(result, list):
+                    result = list(result) if result else []
+            else:
+                # 没有结果集的查询
+                result = []
+        
+        return result
+    
+    @staticmethod
+    def _open_stream_cursor(
+        connection: Connection, query: str, params: Optional[Any] = None
+    ) -> Any:
+        """
+        使用无缓冲游标执行查询，结果在读取时才从服务器传输（在连接池线程中调用）
+        
+        Args:
+            connection: MySQL连接
+            query: SQL查询语句
+            params: 查询参数
+            
+        Returns:
+            无缓冲游标
+        """
+        cursor = connection.cursor(pymysql.cursors.SSDictCursor)
+        try:
+            cursor.execute(query, params or None)
+        except Exception:
+            cursor.close()
+            raise
+        return cursor
+    
+    @staticmethod
+    def _is_connection_broken(error: BaseException) -> bool:
+        """判断异常是否意味着MySQL连接已失效"""
+        return isinstance(error, (pymysql.err.OperationalError, pymysql.err.InterfaceError))
+    
     async def get_table_schema(self, table_name: str) -> Dict[str, Any]:
         """
         获取MySQL表结构信息
@@ -174,6 +240,36 @@ class MySQLConnector(BaseConnector):
             self.log_error(f"获取MySQL表 {table_name} 结构失败", error=str(e))
             raise ConnectionError(f"获取表结构失败: {e}")
     
+    async def estimate_row_count(
+        self, query: str, params: Optional[Dict[str, Any]] = None
+    ) -> Optional[int]:
+        """
+        通过EXPLAIN估算MySQL查询结果的行数
+        
+        估算值是最外层查询中各表预计读取的行数（rows，基于information_schema
+        中的表统计信息）乘以条件过滤比例（filtered）的乘积，不考虑分组，
+        有GROUP BY时会偏大。
+        
+        Args:
+            query: SQL查询语句
+            params: 查询参数
+            
+        Returns:
+            估算的行数，无法获取时返回None
+        """
+        try:
+            result = await self.execute_query(f"EXPLAIN {query}", params)
+            outer = [row for row in result if row.get("id") == result[0].get("id")]
+            estimate = 1.0
+            for row in outer:
+                if row.get("rows") is None:
+                    return None
+                estimate *= float(row["rows"]) * float(row.get("filtered") or 100) / 100
+            return int(round(estimate))
+        except Exception as e:
+            self.log_warning("估算MySQL查询行数失败", error=str(e))
+            return None
+    
     async def get_available_tables(self) -> List[str]:
         """
         获取MySQL可用表列表
@@ -227,9 +323,8 @@ class MySQLConnector(BaseConnector):
         """
         error_msg = str(error)
         
-        # 连接错误
+        # 连接错误（失效连接已由连接池丢弃）
         if "lost connection" in error_msg.lower() or "gone away" in error_msg.lower():
-            self.is_connected = False
             self.log_error("MySQL连接断开")
         
         # 语法错误
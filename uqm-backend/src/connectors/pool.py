@@ -0,0 +1,275 @@
+"""
+数据库连接池
+为阻塞式数据库驱动提供异步连接池，查询在专用线程池中执行，避免阻塞事件循环
+"""
+
+import asyncio
+import functools
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Optional
+
+from src.utils.logging import LoggerMixin
+from src.utils.exceptions import ConnectionError, TimeoutError
+
+
+class ConnectionPool(LoggerMixin):
+    """
+    通用异步连接池
+
+    连接由阻塞式的connect_func创建，每个借出的连接同一时间只被一个
+    线程使用。池内连接数不超过max_size，获取连接超过acquire_timeout
+    秒时抛出TimeoutError。
+    """
+
+    def __init__(self, name: str,
+                 connect_func: Callable[[], Any],
+                 close_func: Optional[Callable[[Any], None]] = None,
+                 is_broken_func: Optional[Callable[[BaseException], bool]] = None,
+                 min_size: int = 1,
+                 max_size: int = 10,
+                 acquire_timeout: float = 30.0):
+        """
+        初始化连接池
+
+        Args:
+            name: 连接池名称
+            connect_func: 创建连接的阻塞函数
+            close_func: 关闭连接的阻塞函数，默认调用连接的close方法
+            is_broken_func: 判断异常是否意味着连接已失效的函数
+            min_size: 最小连接数
+            max_size: 最大连接数
+            acquire_timeout: 获取连接的超时时间(秒)
+        """
+        if max_size <= 0:
+            raise ValueError("连接池最大连接数必须大于0")
+
+        self.name = name
+        self.connect_func = connect_func
+        self.close_func = close_func or (lambda connection: connection.close())
+        self.is_broken_func = is_broken_func or (lambda error: False)
+        self.max_size = max_size
+        self.min_size = max(0, min(min_size, max_size))
+        self.acquire_timeout = acquire_timeout
+
+        self._idle: Deque[Any] = deque()
+        self._semaphore = asyncio.Semaphore(max_size)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_size, thread_name_prefix=f"uqm-pool-{name}"
+        )
+        self._size = 0
+        self._waiting = 0
+        self._closed = False
+
+        # 统计信息
+        self._stats = {
+            "acquired": 0,
+            "acquire_timeouts": 0,
+            "total_wait_time": 0.0,
+            "max_wait_time": 0.0,
+            "created": 0,
+            "discarded": 0
+        }
+
+    async def open(self) -> None:
+        """预先创建最小数量的连接"""
+        self._closed = False
+        while self._size < self.min_size:
+            connection = await self._create_connection()
+            self._idle.append(connection)
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        借出一个连接，在线程池中执行func(connection, *args, **kwargs)
+
+        Args:
+            func: 使用连接的阻塞函数
+            *args: 位置参数
+            **kwargs: 关键字参数
+
+        Returns:
+            func的返回值
+        """
+        connection = await self.acquire()
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            self._executor, functools.partial(func, connection, *args, **kwargs)
+        )
+
+        try:
+            result = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # 线程中的阻塞调用无法中断，等其结束后再丢弃该连接
+            future.add_done_callback(
+                lambda done: self._discard_after(done, connection, loop)
+            )
+            raise
+        except BaseException as e:
+            await self.release(connection, discard=self._is_broken(e))
+            raise
+
+        await self.release(connection)
+        return result
+
+    async def run_in_thread(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        在连接池专用线程池中执行阻塞函数
+
+        Args:
+            func: 阻塞函数
+            *args: 位置参数
+            **kwargs: 关键字参数
+
+        Returns:
+            func的返回值
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[Any]:
+        """
+        借出连接的异步上下文管理器
+
+        上下文内抛出的异常若表明连接已失效，该连接会被丢弃而不是放回池中。
+        """
+        connection = await self.acquire()
+        discard = False
+        try:
+            yield connection
+        except BaseException as e:
+            discard = self._is_broken(e)
+            raise
+        finally:
+            await self.release(connection, discard=discard)
+
+    async def acquire(self) -> Any:
+        """
+        获取连接
+
+        Returns:
+            数据库连接
+
+        Raises:
+            ConnectionError: 连接池已关闭或创建连接失败
+            TimeoutError: 获取连接超时
+        """
+        if self._closed:
+            raise ConnectionError(f"连接池 {self.name} 已关闭")
+
+        start_time = time.perf_counter()
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self._stats["acquire_timeouts"] += 1
+            self.log_warning(
+                f"获取连接超时: {self.name}",
+                timeout=self.acquire_timeout,
+                in_use=self._size - len(self._idle)
+            )
+            raise TimeoutError(f"获取数据库连接超时({self.acquire_timeout}秒)")
+        finally:
+            self._waiting -= 1
+
+        wait_time = time.perf_counter() - start_time
+        self._stats["acquired"] += 1
+        self._stats["total_wait_time"] += wait_time
+        self._stats["max_wait_time"] = max(self._stats["max_wait_time"], wait_time)
+
+        try:
+            if self._idle:
+                return self._idle.pop()
+            return await self._create_connection()
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+    async def release(self, connection: Any, discard: bool = False) -> None:
+        """
+        归还连接
+
+        Args:
+            connection: 数据库连接
+            discard: 是否丢弃该连接（如连接已失效）
+        """
+        try:
+            if discard or self._closed:
+                self._stats["discarded"] += int(discard)
+                await self._close_connection(connection)
+            else:
+                self._idle.append(connection)
+        finally:
+            self._semaphore.release()
+
+    async def close(self) -> None:
+        """关闭连接池中的所有空闲连接，借出的连接归还时关闭"""
+        self._closed = True
+        while self._idle:
+            await self._close_connection(self._idle.pop())
+        self._executor.shutdown(wait=False)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_size, thread_name_prefix=f"uqm-pool-{self.name}"
+        )
+
+    def get_stats(self) -> dict:
+        """
+        获取连接池统计信息
+
+        Returns:
+            统计信息
+        """
+        acquired = self._stats["acquired"]
+        return {
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "size": self._size,
+            "idle": len(self._idle),
+            "in_use": self._size - len(self._idle),
+            "waiting": self._waiting,
+            "acquired": acquired,
+            "acquire_timeouts": self._stats["acquire_timeouts"],
+            "avg_wait_time": self._stats["total_wait_time"] / acquired if acquired else 0.0,
+            "max_wait_time": self._stats["max_wait_time"],
+            "created": self._stats["created"],
+            "discarded": self._stats["discarded"],
+            "closed": self._closed
+        }
+
+    def _is_broken(self, error: BaseException) -> bool:
+        """判断异常是否意味着连接已失效"""
+        if not isinstance(error, Exception):
+            return False
+        try:
+            return bool(self.is_broken_func(error))
+        except Exception:
+            return True
+
+    def _discard_after(self, future: asyncio.Future, connection: Any,
+                       loop: asyncio.AbstractEventLoop) -> None:
+        """被取消的调用在线程中结束后丢弃其连接"""
+        if not future.cancelled():
+            future.exception()
+        if not loop.is_closed():
+            loop.create_task(self.release(connection, discard=True))
+
+    async def _create_connection(self) -> Any:
+        """在线程池中创建新连接"""
+        self._size += 1
+        try:
+            connection = await self.run_in_thread(self.connect_func)
+        except BaseException:
+            self._size -= 1
+            raise
+        self._stats["created"] += 1
+        return connection
+
+    async def _close_connection(self, connection: Any) -> None:
+        """在线程池中关闭连接"""
+        self._size -= 1
+        try:
+            await self.run_in_thread(self.close_func, connection)
+        except Exception as e:
+            self.log_warning(f"关闭连接失败: {self.name}", error=str(e))
@@ -4,20 +4,24 @@ PostgreSQL数据库连接器
 """
 
 import asyncio
+import json
+import uuid
 from typing import Any, Dict, List, Optional
 from urllib.parse import urlparse
 
 import psycopg2
 import psycopg2.extras
-from psycopg2.pool import SimpleConnectionPool
 
 from src.connectors.base import BaseConnector
-from src.utils.exceptions import ConnectionError
+from src.utils.exceptions import ConnectionError, TimeoutError
 
 
 class PostgresConnector(BaseConnector):
     """PostgreSQL连接器实现"""
     
+    supports_streaming = True
+    dialect = "postgresql"
+    
     def __init__(self, connection_url: str):
         """
         初始化PostgreSQL连接器
@@ -38,34 +42,22 @@ class PostgresConnector(BaseConnector):
         }
         
         super().__init__(connection_config)
-        self.connection_pool: Optional[SimpleConnectionPool] = None
     
     async def connect(self) -> None:
-        """建立PostgreSQL连接"""
+        """建立PostgreSQL连接池"""
         try:
             self.log_info("正在连接PostgreSQL数据库", host=self.connection_config["host"])
             
             # 创建连接池
-            self.connection_pool = SimpleConnectionPool(
-                minconn=1,
-                maxconn=10,
-                host=self.connection_config["host"],
-                port=self.connection_config["port"],
-                database=self.connection_config["database"],
-                user=self.connection_config["user"],
-                password=self.connection_config["password"],
-                cursor_factory=psycopg2.extras.RealDictCursor
+            pool = await self._open_pool(
+                "postgresql",
+                self._create_connection,
+                is_broken_func=self._is_connection_broken
             )
             
             # 测试连接
-            conn = self.connection_pool.getconn()
-            try:
-                with conn.cursor() as cursor:
-                    cursor.execute("SELECT version()")
-                    version = cursor.fetchone()
-                self.log_info("PostgreSQL连接成功", version=version["version"])
-            finally:
-                self.connection_pool.putconn(conn)
+            version = await pool.run(self._fetch_version)
+            self.log_info("PostgreSQL连接成功", version=version, pool_size=pool.max_size)
             
             self.is_connected = True
             
@@ -84,17 +76,79 @@ class PostgresConnector(BaseConnector):
         Returns:
             查询结果
         """
-        if not self.is_connected or not self.connection_pool:
-            await self.connect()
+        await self._ensure_connected()
         
-        conn = None
         try:
             self.log_debug("执行PostgreSQL查询", query=query[:200])
             
-            # 从连接池获取连接
-            conn = self.connection_pool.getconn()
+            # 在连接池线程中执行，避免阻塞事件循环
+            result = await self.pool.run(self._execute_on_connection, query, params)
+            self._report_health(True)
+            
+            self.log_debug(
+                "PostgreSQL查询执行完成",
+                row_count=len(result)
+            )
+            
+            return result
+            
+        except TimeoutError:
+            raise
+        except Exception as e:
+            self._report_query_error(e)
+            self.log_error("PostgreSQL查询执行失败", error=str(e), query=query[:200])
+            raise ConnectionError(f"查询执行失败: {e}")
+    
+    async def close(self) -> None:
+        """关闭PostgreSQL连接池"""
+        try:
+            await self._close_pool()
+            self.log_info("PostgreSQL连接已关闭")
             
-            with conn.cursor() as cursor:
+        except Exception as e:
+            self.log_error("关闭PostgreSQL连接失败", error=str(e))
+    
+    def _create_connection(self) -> Any:
+        """
+        创建单个PostgreSQL连接（在连接池线程中调用）
+        
+        Returns:
+            PostgreSQL连接
+        """
+        return psycopg2.connect(
+            host=self.connection_config["host"],
+            port=self.connection_config["port"],
+            database=self.connection_config["database"],
+            user=self.connection_config["user"],
+            password=self.connection_config["password"],
+            cursor_factory=psycopg2.extras.RealDictCursor
+        )
+    
+    @staticmethod
+    def _fetch_version(connection: Any) -> str:
+        """获取PostgreSQL版本（在连接池线程中调用）"""
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT version()")
+            version = cursor.fetchone()
+        connection.commit()
+        return version["version"]
+    
+    @staticmethod
+    def _execute_on_connection(connection: Any, query: str,
+                               params: Optional[Any] = None) -> List[Dict[str, Any]]:
+        """
+        在指定连接上执行查询（在连接池线程中调用）
+        
+        Args:
+            connection: PostgreSQL连接
+            query: SQL查询语句
+            params: 查询参数
+            
+        Returns:
+            查询结果
+        """
+        try:
+            with connection.cursor() as cursor:
                 # 执行查询
                 if params:
                     cursor.execute(query, params)
@@ -110,40 +164,51 @@ class PostgresConnector(BaseConnector):
                 else:
                     # 没有结果集的查询（如INSERT, UPDATE, DELETE）
                     result = []
-                
-            # 提交事务
-            conn.commit()
-            
-            self.log_debug(
-                "PostgreSQL查询执行完成",
-                row_count=len(result)
-            )
             
+            # 提交事务
+            connection.commit()
             return result
             
-        except Exception as e:
-            if conn:
-                conn.rollback()
-            
-            self.log_error("PostgreSQL查询执行失败", error=str(e), query=query[:200])
-            raise ConnectionError(f"查询执行失败: {e}")
-            
-        finally:
-            if conn and self.connection_pool:
-                self.connection_pool.putconn(conn)
+        except Exception:
+            if not connection.closed:
+                try:
+                    connection.rollback()
+                except psycopg2.Error:
+                    pass
+            raise
     
-    async def close(self) -> None:
-        """关闭PostgreSQL连接"""
-        try:
-            if self.connection_pool:
-                self.connection_pool.closeall()
-                self.connection_pool = None
-            
-            self.is_connected = False
-            self.log_info("PostgreSQL连接已关闭")
+    @staticmethod
+    def _open_stream_cursor(connection: Any, query: str, params: Optional[Any] = None) -> Any:
+        """
+        打开命名（服务端）游标执行查询，结果集保留在数据库端按块读取（在连接池线程中调用）
+        
+        Args:
+            connection: PostgreSQL连接
+            query: SQL查询语句
+            params: 查询参数
             
-        except Exception as e:
-            self.log_error("关闭PostgreSQL连接失败", error=str(e))
+        Returns:
+            服务端游标
+        """
+        cursor = connection.cursor(name=f"uqm_stream_{uuid.uuid4().hex}")
+        try:
+            cursor.execute(query, params or None)
+        except Exception:
+            cursor.close()
+            connection.rollback()
+            raise
+        return cursor
+    
+    @staticmethod
+    def _close_stream_cursor(connection: Any, cursor: Any) -> None:
+        """关闭服务端游标并结束其所在的事务（在连接池线程中调用）"""
+        cursor.close()
+        connection.rollback()
+    
+    @staticmethod
+    def _is_connection_broken(error: BaseException) -> bool:
+        """判断异常是否意味着PostgreSQL连接已失效"""
+        return isinstance(error, (psycopg2.OperationalError, psycopg2.InterfaceError))
     
     async def get_table_schema(self, table_name: str) -> Dict[str, Any]:
         """
@@ -187,6 +252,32 @@ class PostgresConnector(BaseConnector):
             self.log_error(f"获取PostgreSQL表 {table_name} 结构失败", error=str(e))
             raise ConnectionError(f"获取表结构失败: {e}")
     
+    async def estimate_row_count(
+        self, query: str, params: Optional[Dict[str, Any]] = None
+    ) -> Optional[int]:
+        """
+        通过EXPLAIN估算PostgreSQL查询结果的行数
+        
+        估算值来自计划根节点的Plan Rows，基于pg_class.reltuples和列统计信息，
+        过滤和分组后的行数也会估算在内；统计信息过旧时误差较大。
+        
+        Args:
+            query: SQL查询语句
+            params: 查询参数
+            
+        Returns:
+            估算的行数，无法获取时返回None
+        """
+        try:
+            result = await self.execute_query(f"EXPLAIN (FORMAT JSON) {query}", params)
+            plan = result[0]["QUERY PLAN"]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"])
+        except Exception as e:
+            self.log_warning("估算PostgreSQL查询行数失败", error=str(e))
+            return None
+    
     async def get_available_tables(self) -> List[str]:
         """
         获取PostgreSQL可用表列表
@@ -240,9 +331,8 @@ class PostgresConnector(BaseConnector):
         """
         error_msg = str(error)
         
-        # 连接错误
+        # 连接错误（失效连接已由连接池丢弃）
         if "connection" in error_msg.lower():
-            self.is_connected = False
             self.log_error("PostgreSQL连接断开")
         
         # 语法错误
@@ -10,12 +10,16 @@ from typing import Any, Dict, List, Optional
 from urllib.parse import urlparse
 
 from src.connectors.base import BaseConnector
-from src.utils.exceptions import ConnectionError
+from src.utils.exceptions import ConnectionError, TimeoutError
 
 
 class SQLiteConnector(BaseConnector):
     """SQLite连接器实现"""
     
+    supports_streaming = True
+    paramstyle = "named"
+    dialect = "sqlite"
+    
     def __init__(self, connection_url: str):
         """
         初始化SQLite连接器
@@ -37,39 +41,29 @@ class SQLiteConnector(BaseConnector):
         }
         
         super().__init__(connection_config)
-        self.connection: Optional[sqlite3.Connection] = None
     
     async def connect(self) -> None:
-        """建立SQLite连接"""
+        """建立SQLite连接池"""
         try:
             database_path = self.connection_config["database_path"]
             self.log_info("正在连接SQLite数据库", path=database_path)
             
             # 确保数据库目录存在
-            db_file = Path(database_path)
-            db_file.parent.mkdir(parents=True, exist_ok=True)
-            
-            # 创建SQLite连接
-            self.connection = sqlite3.connect(
-                database_path,
-                check_same_thread=False,
-                timeout=30.0
+            if not self._is_memory_database():
+                db_file = Path(database_path)
+                db_file.parent.mkdir(parents=True, exist_ok=True)
+            
+            # 内存数据库的每个连接都是独立的库，只能使用单个连接
+            pool = await self._open_pool(
+                "sqlite",
+                self._create_connection,
+                is_broken_func=self._is_connection_broken,
+                max_size=1 if self._is_memory_database() else None
             )
             
-            # 设置行工厂，返回字典格式
-            self.connection.row_factory = sqlite3.Row
-            
-            # 启用外键约束
-            self.connection.execute("PRAGMA foreign_keys = ON")
-            
-            # 设置WAL模式以提高并发性能
-            self.connection.execute("PRAGMA journal_mode = WAL")
-            
             # 测试连接
-            cursor = self.connection.cursor()
-            cursor.execute("SELECT sqlite_version()")
-            version = cursor.fetchone()
-            self.log_info("SQLite连接成功", version=version[0])
+            version = await pool.run(self._fetch_version)
+            self.log_info("SQLite连接成功", version=version, pool_size=pool.max_size)
             
             self.is_connected = True
             
@@ -88,23 +82,94 @@ class SQLiteConnector(BaseConnector):
         Returns:
             查询结果
         """
-        if not self.is_connected or not self.connection:
-            await self.connect()
+        await self._ensure_connected()
         
         try:
             self.log_debug("执行SQLite查询", query=query[:200])
             
-            cursor = self.connection.cursor()
+            # 在连接池线程中执行，避免阻塞事件循环
+            result = await self.pool.run(self._execute_on_connection, query, params)
+            self._report_health(True)
+            
+            self.log_debug(
+                "SQLite查询执行完成",
+                row_count=len(result)
+            )
+            
+            return result
+            
+        except TimeoutError:
+            raise
+        except Exception as e:
+            self._report_query_error(e)
+            self.log_error("SQLite查询执行失败", error=str(e), query=query[:200])
+            self._handle_sqlite_error(e)
+            raise ConnectionError(f"查询执行失败: {e}")
+    
+    async def close(self) -> None:
+        """关闭SQLite连接池"""
+        try:
+            await self._close_pool()
+            self.log_info("SQLite连接已关闭")
+            
+        except Exception as e:
+            self.log_error("关闭SQLite连接失败", error=str(e))
+    
+    def _is_memory_database(self) -> bool:
+        """是否为内存数据库"""
+        database_path = self.connection_config["database_path"]
+        return database_path in ("", ":memory:") or database_path.startswith("file::memory:")
+    
+    def _create_connection(self) -> sqlite3.Connection:
+        """
+        创建单个SQLite连接（在连接池线程中调用）
+        
+        Returns:
+            SQLite连接
+        """
+        connection = sqlite3.connect(
+            self.connection_config["database_path"] or ":memory:",
+            check_same_thread=False,
+            timeout=30.0
+        )
+        
+        # 设置行工厂，返回字典格式
+        connection.row_factory = sqlite3.Row
+        
+        # 启用外键约束
+        connection.execute("PRAGMA foreign_keys = ON")
+        
+        # 设置WAL模式以提高并发性能
+        if not self._is_memory_database():
+            connection.execute("PRAGMA journal_mode = WAL")
+        
+        return connection
+    
+    @staticmethod
+    def _fetch_version(connection: sqlite3.Connection) -> str:
+        """获取SQLite版本（在连接池线程中调用）"""
+        return connection.execute("SELECT sqlite_version()").fetchone()[0]
+    
+    @staticmethod
+    def _execute_on_connection(connection: sqlite3.Connection, query: str,
+                               params: Optional[Any] = None) -> List[Dict[str, Any]]:
+        """
+        在指定连接上执行查询（在连接池线程中调用）
+        
+        Args:
+            connection: SQLite连接
+            query: SQL查询语句
+            params: 查询参数（命名参数字典或位置参数序列）
+            
+        Returns:
+            查询结果
+        """
+        try:
+            cursor = connection.cursor()
             
             # 执行查询
             if params:
-                # 处理参数格式
-                if isinstance(params, dict):
-                    # 命名参数
-                    cursor.execute(query, params)
-                else:
-                    # 位置参数
-                    cursor.execute(query, params)
+                cursor.execute(query, params)
             else:
                 cursor.execute(query)
             
@@ -119,35 +184,26 @@ class SQLiteConnector(BaseConnector):
                 result = []
             
             # 提交事务
-            self.connection.commit()
-            
-            self.log_debug(
-                "SQLite查询执行完成",
-                row_count=len(result)
-            )
-            
+            connection.commit()
             return result
             
-        except Exception as e:
-            if self.connection:
-                self.connection.rollback()
-            
-            self.log_error("SQLite查询执行失败", error=str(e), query=query[:200])
-            self._handle_sqlite_error(e)
-            raise ConnectionError(f"查询执行失败: {e}")
+        except Exception:
+            try:
+                connection.rollback()
+            except sqlite3.Error:
+                pass
+            raise
     
-    async def close(self) -> None:
-        """关闭SQLite连接"""
-        try:
-            if self.connection:
-                self.connection.close()
-                self.connection = None
-            
-            self.is_connected = False
-            self.log_info("SQLite连接已关闭")
-            
-        except Exception as e:
-            self.log_error("关闭SQLite连接失败", error=str(e))
+    @staticmethod
+    def _open_stream_cursor(connection: sqlite3.Connection, query: str,
+                            params: Optional[Any] = None) -> sqlite3.Cursor:
+        """执行查询并返回游标，SQLite游标本身按需逐行读取（在连接池线程中调用）"""
+        return connection.execute(query, params or ())
+    
+    @staticmethod
+    def _is_connection_broken(error: BaseException) -> bool:
+        """判断异常是否意味着SQLite连接已失效"""
+        return isinstance(error, sqlite3.ProgrammingError) and "closed" in str(error).lower()
     
     async def get_table_schema(self, table_name: str) -> Dict[str, Any]:
         """
@@ -0,0 +1,195 @@
+"""
+列式步骤数据模块
+以列为单位保存步骤结果，避免每行一个字典的内存开销和DataFrame与记录列表之间的反复转换
+"""
+
+import sys
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import pandas as pd
+
+from src.utils.serialization import sanitize_series
+
+
+class ColumnarBatch:
+    """
+    列式批数据
+
+    数据按列保存为“列名 -> 值列表”，所有列长度相同。基于DataFrame的步骤
+    （丰富化、透视、逆透视）直接产出和读取列式数据；需要逐行处理的步骤和
+    API响应在读取时才转换为字典列表。迭代、len()和下标访问与字典列表一致，
+    因此在需要时也可以直接当作行序列使用。
+    """
+
+    __slots__ = ("columns", "num_rows")
+
+    def __init__(self, columns: Dict[str, List[Any]], num_rows: Optional[int] = None):
+        """
+        初始化列式批数据
+
+        Args:
+            columns: 列名到值列表的映射
+            num_rows: 行数，默认取第一列的长度
+        """
+        if num_rows is None:
+            num_rows = len(next(iter(columns.values()))) if columns else 0
+        for name, values in columns.items():
+            if len(values) != num_rows:
+                raise ValueError(f"列 {name} 的长度 {len(values)} 与行数 {num_rows} 不一致")
+
+        self.columns = columns
+        self.num_rows = num_rows
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]]) -> "ColumnarBatch":
+        """
+        由字典列表创建列式数据，列按首次出现的顺序排列，缺失的值为None
+
+        Args:
+            rows: 字典列表
+
+        Returns:
+            列式批数据
+        """
+        names: Dict[str, None] = {}
+        for row in rows:
+            for name in row:
+                if name not in names:
+                    names[name] = None
+
+        columns = {name: [row.get(name) for row in rows] for name in names}
+        return cls(columns, len(rows))
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "ColumnarBatch":
+        """
+        由DataFrame创建列式数据，值转换为Python原生类型，NaN/NA/NaT转换为None
+
+        Args:
+            df: DataFrame
+
+        Returns:
+            列式批数据
+        """
+        columns = {}
+        for position, name in enumerate(df.columns):
+            columns[name] = sanitize_series(df.iloc[:, position])
+        return cls(columns, len(df))
+
+    @property
+    def column_names(self) -> List[str]:
+        """列名列表"""
+        return list(self.columns)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        转换为DataFrame
+
+        Returns:
+            DataFrame
+        """
+        if not self.columns:
+            return pd.DataFrame(index=range(self.num_rows))
+        return pd.DataFrame(self.columns)
+
+    def to_rows(self) -> List[Dict[str, Any]]:
+        """
+        转换为字典列表
+
+        Returns:
+            字典列表
+        """
+        names = list(self.columns)
+        if not names:
+            return [{} for _ in range(self.num_rows)]
+        return [dict(zip(names, values)) for values in zip(*self.columns.values())]
+
+    def estimate_size(self) -> int:
+        """
+        估算占用的内存字节数，每列抽样最多100个值
+
+        Returns:
+            估算的字节数
+        """
+        total = sys.getsizeof(self.columns)
+        for values in self.columns.values():
+            total += sys.getsizeof(values)
+            if values:
+                step = max(1, len(values) // 100)
+                sampled = values[::step][:100]
+                sampled_size = sum(sys.getsizeof(value) for value in sampled)
+                total += sampled_size * len(values) // len(sampled)
+        return total
+
+    def __len__(self) -> int:
+        return self.num_rows
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        names = list(self.columns)
+        for values in zip(*self.columns.values()):
+            yield dict(zip(names, values))
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        if isinstance(index, slice):
+            return ColumnarBatch(
+                {name: values[index] for name, values in self.columns.items()},
+                len(range(*index.indices(self.num_rows)))
+            ).to_rows()
+        if index < 0:
+            index += self.num_rows
+        if not 0 <= index < self.num_rows:
+            raise IndexError("ColumnarBatch 行下标越界")
+        return {name: values[index] for name, values in self.columns.items()}
+
+    def __repr__(self) -> str:
+        return f"ColumnarBatch(rows={self.num_rows}, columns={self.column_names})"
+
+
+def as_rows(data: Any) -> Any:
+    """
+    把步骤数据转换为字典列表，非列式数据原样返回
+
+    Args:
+        data: 步骤数据
+
+    Returns:
+        字典列表
+    """
+    if isinstance(data, ColumnarBatch):
+        return data.to_rows()
+    return data
+
+
+def to_columnar(data: Any) -> Any:
+    """
+    把字段相同的字典列表转换为列式数据，其他数据原样返回
+
+    Args:
+        data: 步骤数据
+
+    Returns:
+        列式批数据或原数据
+    """
+    if not isinstance(data, list) or not data or not isinstance(data[0], dict):
+        return data
+
+    names = data[0].keys()
+    for row in data:
+        if not isinstance(row, dict) or row.keys() != names:
+            return data
+    return ColumnarBatch({name: [row[name] for row in data] for name in names}, len(data))
+
+
+def as_dataframe(data: Any) -> pd.DataFrame:
+    """
+    把步骤数据转换为DataFrame，列式数据直接按列构建
+
+    Args:
+        data: 步骤数据（列式批数据或字典列表）
+
+    Returns:
+        DataFrame
+    """
+    if isinstance(data, ColumnarBatch):
+        return data.to_dataframe()
+    return pd.DataFrame(data)
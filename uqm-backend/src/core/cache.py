@@ -3,20 +3,87 @@
 支持内存缓存和Redis缓存
 """
 
+import asyncio
+import heapq
 import json
-import pickle
+import math
+import random
+import re
 import time
+import uuid
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional, Union
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
 from datetime import datetime, timedelta
 from functools import lru_cache
 
-import redis
+import redis.asyncio as redis_asyncio
 from src.config.settings import get_settings
+from src.core.cache_codec import CacheCodec
 from src.utils.logging import LoggerMixin
 from src.utils.exceptions import CacheError
 
 
+@dataclass
+class CacheEntry:
+    """
+    带软过期时间的缓存数据
+
+    缓存项写入时的TTL是硬过期时间（软TTL + 允许返回旧数据的时间），过了软过期
+    时间、硬过期之前数据仍可返回，同时在后台刷新。软过期之前按XFetch算法以一定
+    概率提前刷新：计算越慢、越接近软过期，提前刷新的概率越大，热点数据的刷新
+    因此分散开，不会在同一时刻集中重新计算。
+    """
+    value: Any
+    soft_expire_at: float
+    compute_time: float = 0.0
+
+    @classmethod
+    def create(cls, value: Any, soft_ttl: float, compute_time: float = 0.0) -> "CacheEntry":
+        """
+        创建缓存数据
+
+        Args:
+            value: 缓存数据
+            soft_ttl: 软TTL(秒)
+            compute_time: 计算数据所用的时间(秒)
+
+        Returns:
+            缓存数据
+        """
+        return cls(value=value, soft_expire_at=time.time() + soft_ttl, compute_time=compute_time)
+
+    def is_stale(self, now: Optional[float] = None) -> bool:
+        """是否已过软过期时间"""
+        return (now or time.time()) >= self.soft_expire_at
+
+    def should_refresh(self, beta: float = 1.0, now: Optional[float] = None) -> bool:
+        """
+        是否需要刷新：已过软过期时间，或按XFetch算法提前刷新
+
+        Args:
+            beta: 提前刷新系数，越大越早刷新，0表示不提前刷新
+            now: 当前时间
+
+        Returns:
+            是否需要刷新
+        """
+        now = now or time.time()
+        if self.is_stale(now):
+            return True
+        if beta <= 0 or self.compute_time <= 0:
+            return False
+        # 1 - random() 取值 (0, 1]，避免 log(0)
+        early_by = -self.compute_time * beta * math.log(1.0 - random.random())
+        return now + early_by >= self.soft_expire_at
+
+
+def unwrap_cache_entry(value: Any) -> Any:
+    """取出缓存数据，兼容没有软过期时间的旧缓存项"""
+    return value.value if isinstance(value, CacheEntry) else value
+
+
 class BaseCacheManager(ABC, LoggerMixin):
     """缓存管理器基类"""
     
@@ -26,8 +93,10 @@ class BaseCacheManager(ABC, LoggerMixin):
         pass
     
     @abstractmethod
-    async def set(self, key: str, value: Any, ttl: int = None) -> bool:
-        """设置缓存数据"""
+    async def set(
+        self, key: str, value: Any, ttl: int = None, tags: Optional[List[str]] = None
+    ) -> bool:
+        """设置缓存数据，tags是缓存数据依赖的表名，用于按表失效"""
         pass
     
     @abstractmethod
@@ -49,23 +118,105 @@ class BaseCacheManager(ABC, LoggerMixin):
     async def stats(self) -> Dict[str, Any]:
         """获取缓存统计信息"""
         pass
+    
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """
+        批量获取缓存数据
+        
+        Args:
+            keys: 缓存键列表
+            
+        Returns:
+            命中的缓存键到数据的映射
+        """
+        result = {}
+        for key in keys:
+            value = await self.get(key)
+            if value is not None:
+                result[key] = value
+        return result
+    
+    async def set_many(self, items: Dict[str, Any], ttl: int = None) -> bool:
+        """
+        批量设置缓存数据
+        
+        Args:
+            items: 缓存键到数据的映射
+            ttl: 过期时间(秒)
+            
+        Returns:
+            是否全部设置成功
+        """
+        results = [await self.set(key, value, ttl) for key, value in items.items()]
+        return all(results)
+
+    async def acquire_lock(self, key: str, timeout: float) -> Optional[str]:
+        """
+        获取缓存键的填充锁，用于跨进程合并同一缓存键的计算
+
+        缓存只在进程内时没有其他进程需要协调，总是获取成功
+
+        Args:
+            key: 缓存键
+            timeout: 锁的过期时间(秒)
+
+        Returns:
+            锁令牌，锁被其他进程持有时返回None
+        """
+        return uuid.uuid4().hex
+
+    async def release_lock(self, key: str, token: str) -> bool:
+        """释放缓存键的填充锁"""
+        return True
+
+    async def is_locked(self, key: str) -> bool:
+        """检查缓存键的填充锁是否被持有"""
+        return False
+
+    @abstractmethod
+    async def invalidate_tags(self, tags: Iterable[str]) -> List[str]:
+        """
+        删除带有任一标签的缓存数据
+
+        Args:
+            tags: 标签（表名）列表
+
+        Returns:
+            被删除的缓存键列表
+        """
+        pass
 
 
 class MemoryCacheManager(BaseCacheManager):
-    """内存缓存管理器"""
+    """
+    内存缓存管理器
+
+    缓存项按访问顺序保存在OrderedDict中，命中时移到末尾，淘汰时从头部弹出，
+    读写和淘汰都是O(1)。容量同时受条目数和序列化后的字节数限制。
+    """
     
-    def __init__(self, max_size: int = 1000, default_ttl: int = 3600):
+    # 淘汰原因
+    EVICTION_REASONS = ("expired", "max_size", "max_bytes", "too_large")
+    
+    def __init__(self, max_size: int = 1000, default_ttl: int = 3600, max_bytes: int = 0,
+                 codec: Optional[CacheCodec] = None):
         """
         初始化内存缓存管理器
         
         Args:
             max_size: 最大缓存条目数
             default_ttl: 默认TTL(秒)
+            max_bytes: 缓存数据（编码后）占用的最大字节数，0表示不限制
+            codec: 缓存数据编解码器，默认按可用的依赖选择压缩方式
         """
         self.max_size = max_size
         self.default_ttl = default_ttl
-        self.cache: Dict[str, Dict[str, Any]] = {}
-        self.access_times: Dict[str, float] = {}
+        self.max_bytes = max_bytes
+        self.codec = codec or CacheCodec()
+        self.cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.total_bytes = 0
+        # 标签 -> 带有该标签的缓存键
+        self.tag_index: Dict[str, Set[str]] = {}
         self.stats_data = {
             "hits": 0,
             "misses": 0,
@@ -73,10 +224,11 @@ class MemoryCacheManager(BaseCacheManager):
             "deletes": 0,
             "evictions": 0
         }
+        self.evictions_by_reason = {reason: 0 for reason in self.EVICTION_REASONS}
     
     async def initialize(self) -> None:
         """初始化缓存管理器"""
-        self.log_info("内存缓存管理器初始化完成", max_size=self.max_size)
+        self.log_info("内存缓存管理器初始化完成", max_size=self.max_size, max_bytes=self.max_bytes)
     
     async def close(self) -> None:
         """关闭缓存管理器"""
@@ -86,66 +238,86 @@ class MemoryCacheManager(BaseCacheManager):
     async def get(self, key: str) -> Optional[Any]:
         """获取缓存数据"""
         try:
-            if key not in self.cache:
-                self.stats_data["misses"] += 1
-                return None
-            
-            cache_item = self.cache[key]
-            
-            # 检查是否过期
-            if self._is_expired(cache_item):
-                await self.delete(key)
-                self.stats_data["misses"] += 1
+            data = await self.get_encoded(key)
+            if data is None:
                 return None
             
-            # 更新访问时间
-            self.access_times[key] = time.time()
-            self.stats_data["hits"] += 1
-            
             # 反序列化数据
-            return self._deserialize_data(cache_item["data"])
+            return self._deserialize_data(data)
             
         except Exception as e:
             self.log_error("获取缓存数据失败", key=key, error=str(e))
             raise CacheError(f"获取缓存数据失败: {e}")
     
-    async def set(self, key: str, value: Any, ttl: int = None) -> bool:
+    async def get_encoded(self, key: str) -> Optional[bytes]:
+        """获取编码后的缓存数据，不解码"""
+        cache_item = self.cache.get(key)
+        if cache_item is None:
+            self.stats_data["misses"] += 1
+            return None
+        
+        # 检查是否过期
+        if self._is_expired(cache_item):
+            self._evict(key, "expired")
+            self.stats_data["misses"] += 1
+            return None
+        
+        # 标记为最近访问
+        self.cache.move_to_end(key)
+        self.stats_data["hits"] += 1
+        return cache_item["data"]
+    
+    async def set(
+        self, key: str, value: Any, ttl: int = None, tags: Optional[List[str]] = None
+    ) -> bool:
         """设置缓存数据"""
         try:
-            # 如果缓存已满，清理过期项或移除最久未访问的项
-            if len(self.cache) >= self.max_size and key not in self.cache:
-                await self._cleanup_expired()
-                
-                if len(self.cache) >= self.max_size:
-                    await self._remove_oldest()
-            
-            # 序列化数据
-            serialized_data = self._serialize_data(value)
-            
-            # 设置缓存项
-            expire_time = time.time() + (ttl or self.default_ttl)
-            self.cache[key] = {
-                "data": serialized_data,
-                "expire_time": expire_time,
-                "created_time": time.time()
-            }
-            
-            self.access_times[key] = time.time()
-            self.stats_data["sets"] += 1
-            
-            return True
+            return await self.set_encoded(key, self._serialize_data(value), ttl, tags)
             
         except Exception as e:
             self.log_error("设置缓存数据失败", key=key, error=str(e))
             raise CacheError(f"设置缓存数据失败: {e}")
     
+    async def set_encoded(self, key: str, serialized_data: bytes, ttl: int = None,
+                          tags: Optional[List[str]] = None) -> bool:
+        """设置已编码的缓存数据"""
+        # 以编码后的字节数作为缓存项大小
+        size = len(serialized_data)
+        
+        # 单项超过字节预算时不缓存，也不为它淘汰其他缓存项
+        if self.max_bytes and size > self.max_bytes:
+            self._remove(key)
+            self._count_eviction("too_large")
+            self.log_warning("缓存数据超过内存缓存容量，不缓存", key=key, size=size, max_bytes=self.max_bytes)
+            return False
+        
+        # 设置缓存项
+        self._remove(key)
+        current_time = time.time()
+        self.cache[key] = {
+            "data": serialized_data,
+            "size": size,
+            "expire_time": current_time + (ttl or self.default_ttl),
+            "created_time": current_time,
+            "tags": list(tags or [])
+        }
+        for tag in tags or []:
+            self.tag_index.setdefault(tag, set()).add(key)
+        self.total_bytes += size
+        self.stats_data["sets"] += 1
+        
+        # 超出条目数或字节预算时从最久未访问的一端淘汰
+        while len(self.cache) > self.max_size:
+            self._evict_oldest("max_size")
+        while self.max_bytes and self.total_bytes > self.max_bytes:
+            self._evict_oldest("max_bytes")
+        
+        return True
+    
     async def delete(self, key: str) -> bool:
         """删除缓存数据"""
         try:
-            if key in self.cache:
-                del self.cache[key]
-                if key in self.access_times:
-                    del self.access_times[key]
+            if self._remove(key):
                 self.stats_data["deletes"] += 1
                 return True
             return False
@@ -156,12 +328,12 @@ class MemoryCacheManager(BaseCacheManager):
     
     async def exists(self, key: str) -> bool:
         """检查缓存是否存在"""
-        if key not in self.cache:
+        cache_item = self.cache.get(key)
+        if cache_item is None:
             return False
         
-        cache_item = self.cache[key]
         if self._is_expired(cache_item):
-            await self.delete(key)
+            self._evict(key, "expired")
             return False
         
         return True
@@ -170,7 +342,8 @@ class MemoryCacheManager(BaseCacheManager):
         """清空所有缓存"""
         try:
             self.cache.clear()
-            self.access_times.clear()
+            self.tag_index.clear()
+            self.total_bytes = 0
             self.log_info("内存缓存已清空")
             return True
             
@@ -178,54 +351,88 @@ class MemoryCacheManager(BaseCacheManager):
             self.log_error("清空缓存失败", error=str(e))
             raise CacheError(f"清空缓存失败: {e}")
     
-    async def stats(self) -> Dict[str, Any]:
-        """获取缓存统计信息"""
+    async def invalidate_tags(self, tags: Iterable[str]) -> List[str]:
+        """删除带有任一标签的缓存数据"""
+        keys = set()
+        for tag in tags:
+            keys.update(self.tag_index.get(tag, ()))
+        for key in keys:
+            self._remove(key)
+        self.stats_data["deletes"] += len(keys)
+        return sorted(keys)
+    
+    async def stats(self, top_entries: int = 10) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+        
+        Args:
+            top_entries: 返回占用空间最大的缓存项个数
+        """
         total_requests = self.stats_data["hits"] + self.stats_data["misses"]
         hit_rate = self.stats_data["hits"] / total_requests if total_requests > 0 else 0
+        current_time = time.time()
+        largest = heapq.nlargest(top_entries, self.cache.items(), key=lambda item: item[1]["size"])
         
         return {
             "type": "memory",
+            "codec": self.codec.name,
             "total_items": len(self.cache),
             "max_size": self.max_size,
+            "total_bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
             "hit_rate": hit_rate,
-            **self.stats_data
+            **self.stats_data,
+            "evictions_by_reason": dict(self.evictions_by_reason),
+            "largest_entries": [
+                {
+                    "key": key,
+                    "size": item["size"],
+                    "ttl_remaining": max(0.0, item["expire_time"] - current_time)
+                }
+                for key, item in largest
+            ]
         }
     
     def _is_expired(self, cache_item: Dict[str, Any]) -> bool:
         """检查缓存项是否过期"""
         return time.time() > cache_item["expire_time"]
     
-    async def _cleanup_expired(self) -> None:
-        """清理过期的缓存项"""
-        expired_keys = []
-        current_time = time.time()
-        
-        for key, cache_item in self.cache.items():
-            if current_time > cache_item["expire_time"]:
-                expired_keys.append(key)
-        
-        for key in expired_keys:
-            await self.delete(key)
-        
-        if expired_keys:
-            self.log_info("清理过期缓存项", count=len(expired_keys))
+    def _remove(self, key: str) -> bool:
+        """移除缓存项并扣除其占用的字节数"""
+        cache_item = self.cache.pop(key, None)
+        if cache_item is None:
+            return False
+        self.total_bytes -= cache_item["size"]
+        for tag in cache_item["tags"]:
+            keys = self.tag_index.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tag_index[tag]
+        return True
     
-    async def _remove_oldest(self) -> None:
-        """移除最久未访问的缓存项"""
-        if not self.access_times:
-            return
-        
-        # 找到最久未访问的键
-        oldest_key = min(self.access_times.keys(), key=lambda k: self.access_times[k])
-        await self.delete(oldest_key)
+    def _count_eviction(self, reason: str) -> None:
+        """按原因记录淘汰次数"""
         self.stats_data["evictions"] += 1
-        
-        self.log_info("移除最久未访问的缓存项", key=oldest_key)
+        self.evictions_by_reason[reason] += 1
+    
+    def _evict(self, key: str, reason: str) -> None:
+        """淘汰指定缓存项"""
+        if self._remove(key):
+            self._count_eviction(reason)
+    
+    def _evict_oldest(self, reason: str) -> None:
+        """淘汰最久未访问的缓存项，已过期的记为过期淘汰"""
+        key, cache_item = next(iter(self.cache.items()))
+        if self._is_expired(cache_item):
+            reason = "expired"
+        self._evict(key, reason)
+        self.log_debug("淘汰最久未访问的缓存项", key=key, reason=reason, size=cache_item["size"])
     
     def _serialize_data(self, data: Any) -> bytes:
         """序列化缓存数据"""
         try:
-            return pickle.dumps(data)
+            return self.codec.encode(data)
         except Exception as e:
             self.log_error("序列化数据失败", error=str(e))
             raise CacheError(f"序列化数据失败: {e}")
@@ -233,186 +440,484 @@ class MemoryCacheManager(BaseCacheManager):
     def _deserialize_data(self, data: bytes) -> Any:
         """反序列化缓存数据"""
         try:
-            return pickle.loads(data)
+            return self.codec.decode(data)
         except Exception as e:
             self.log_error("反序列化数据失败", error=str(e))
             raise CacheError(f"反序列化数据失败: {e}")
 
 
-class RedisCacheManager(BaseCacheManager):
-    """Redis缓存管理器"""
+class CacheCircuitBreaker:
+    """
+    缓存熔断器
+
+    连续failure_threshold次操作失败或超时后断开，断开期间缓存操作直接按
+    未命中处理；reset_timeout秒后放行一次探测请求，成功则恢复。
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        初始化熔断器
+        
+        Args:
+            failure_threshold: 断开所需的连续失败次数
+            reset_timeout: 断开后多久放行探测请求(秒)
+        """
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.last_error: Optional[str] = None
+        self.times_opened = 0
+    
+    def allow_request(self) -> bool:
+        """是否允许本次缓存操作"""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            # 只放行一个探测请求，结果出来之前其他请求仍按断开处理
+            self.state = self.HALF_OPEN
+            return True
+        return False
+    
+    def record_success(self) -> None:
+        """记录一次成功"""
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+    
+    def record_failure(self, error: str) -> bool:
+        """
+        记录一次失败
+        
+        Args:
+            error: 错误信息
+            
+        Returns:
+            本次失败是否使熔断器断开
+        """
+        self.consecutive_failures += 1
+        self.last_error = error
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            was_open = self.state == self.OPEN
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            if not was_open:
+                self.times_opened += 1
+                return True
+        return False
+    
+    def trip(self, error: str) -> None:
+        """立即断开"""
+        self.last_error = error
+        if self.state != self.OPEN:
+            self.times_opened += 1
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
     
-    def __init__(self, redis_url: str, default_ttl: int = 3600):
+    def get_status(self) -> Dict[str, Any]:
+        """获取熔断器状态"""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "last_error": self.last_error
+        }
+
+
+class RedisCacheManager(BaseCacheManager):
+    """
+    Redis缓存管理器
+
+    基于redis.asyncio和连接池，不阻塞事件循环。每次操作都有超时，失败或超时
+    计入熔断器；Redis不可用或过慢时读取按未命中处理、写入直接跳过，不会让
+    请求因缓存失败。
+
+    所有键都带有命名空间前缀，清空缓存时只用SCAN删除带前缀的键，不影响同一
+    数据库中的其他数据。缓存数据可以带标签（表名），每个标签对应一个记录缓存
+    键的集合，按标签失效时删除集合中的所有缓存键。
+    """
+
+    # 清空缓存时每次SCAN返回的键数
+    SCAN_BATCH_SIZE = 1000
+
+    # 令牌匹配时才删除锁
+    RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+    # 写入缓存数据并加入各标签集合；标签集合的TTL不短于其中最晚过期的缓存项
+    SET_TAGGED_SCRIPT = """
+redis.call("setex", KEYS[1], ARGV[2], ARGV[1])
+local ttl = tonumber(ARGV[2])
+for i = 2, #KEYS do
+    redis.call("sadd", KEYS[i], KEYS[1])
+    if redis.call("ttl", KEYS[i]) < ttl then
+        redis.call("expire", KEYS[i], ttl)
+    end
+end
+return 1
+"""
+
+    # 删除标签集合中的所有缓存键和标签集合本身，返回被删除的缓存键
+    INVALIDATE_TAGS_SCRIPT = """
+local deleted = {}
+for i = 1, #KEYS do
+    for _, key in ipairs(redis.call("smembers", KEYS[i])) do
+        if redis.call("unlink", key) == 1 then
+            table.insert(deleted, key)
+        end
+    end
+    redis.call("unlink", KEYS[i])
+end
+return deleted
+"""
+
+    def __init__(self, redis_url: str, default_ttl: int = 3600, codec: Optional[CacheCodec] = None,
+                 max_connections: int = 20, operation_timeout: float = 1.0,
+                 breaker: Optional[CacheCircuitBreaker] = None, key_prefix: str = "uqm:"):
         """
         初始化Redis缓存管理器
         
         Args:
             redis_url: Redis连接URL
             default_ttl: 默认TTL(秒)
+            codec: 缓存数据编解码器，默认按可用的依赖选择压缩方式
+            max_connections: 连接池最大连接数
+            operation_timeout: 单次缓存操作的超时时间(秒)
+            breaker: 熔断器
+            key_prefix: 键的命名空间前缀
         """
+        if not key_prefix:
+            raise CacheError("Redis缓存键前缀不能为空")
         self.redis_url = redis_url
+        self.key_prefix = key_prefix
         self.default_ttl = default_ttl
-        self.redis_client: Optional[redis.Redis] = None
+        self.codec = codec or CacheCodec()
+        self.max_connections = max_connections
+        self.operation_timeout = operation_timeout
+        self.breaker = breaker or CacheCircuitBreaker()
+        self.redis_client: Optional[redis_asyncio.Redis] = None
         self.stats_data = {
             "hits": 0,
             "misses": 0,
             "sets": 0,
-            "deletes": 0
+            "deletes": 0,
+            "errors": 0,
+            "short_circuited": 0
         }
     
     async def initialize(self) -> None:
-        """初始化Redis连接"""
+        """初始化Redis连接池，Redis不可用时以无缓存方式继续运行"""
+        pool = redis_asyncio.ConnectionPool.from_url(
+            self.redis_url,
+            max_connections=self.max_connections,
+            socket_timeout=5,
+            socket_connect_timeout=5,
+            retry_on_timeout=True
+        )
+        self.redis_client = redis_asyncio.Redis(connection_pool=pool)
+        
         try:
-            self.redis_client = redis.from_url(
-                self.redis_url,
-                decode_responses=False,
-                socket_timeout=5,
-                socket_connect_timeout=5,
-                retry_on_timeout=True
-            )
-            
-            # 测试连接
             await self._ping()
-            
-            self.log_info("Redis缓存管理器初始化完成", redis_url=self.redis_url)
-            
+            self.log_info("Redis缓存管理器初始化完成", redis_url=self.redis_url,
+                          max_connections=self.max_connections)
         except Exception as e:
-            self.log_error("Redis缓存管理器初始化失败", error=str(e))
-            raise CacheError(f"Redis缓存管理器初始化失败: {e}")
+            self.breaker.trip(str(e))
+            self.log_error("Redis缓存不可用，暂时不使用缓存", redis_url=self.redis_url, error=str(e))
     
     async def close(self) -> None:
-        """关闭Redis连接"""
+        """关闭Redis连接池"""
         if self.redis_client:
-            await self.redis_client.close()
+            await self.redis_client.aclose()
+            self.redis_client = None
             self.log_info("Redis缓存管理器已关闭")
     
     async def get(self, key: str) -> Optional[Any]:
-        """获取缓存数据"""
-        try:
-            if not self.redis_client:
-                raise CacheError("Redis客户端未初始化")
-            
-            data = self.redis_client.get(key)
-            
-            if data is None:
-                self.stats_data["misses"] += 1
-                return None
-            
-            self.stats_data["hits"] += 1
-            return self._deserialize_data(data)
-            
-        except Exception as e:
-            self.log_error("获取Redis缓存数据失败", key=key, error=str(e))
-            raise CacheError(f"获取Redis缓存数据失败: {e}")
+        """获取缓存数据，Redis不可用时按未命中处理"""
+        return self._load(key, await self.get_encoded(key))
     
-    async def set(self, key: str, value: Any, ttl: int = None) -> bool:
-        """设置缓存数据"""
-        try:
-            if not self.redis_client:
-                raise CacheError("Redis客户端未初始化")
-            
-            serialized_data = self._serialize_data(value)
-            
-            success = self.redis_client.setex(
-                key, 
-                ttl or self.default_ttl, 
-                serialized_data
+    async def get_encoded(self, key: str) -> Optional[bytes]:
+        """获取编码后的缓存数据，不解码也不计入命中统计"""
+        return await self._call("get", lambda client: client.get(self._key(key)), key=key)
+    
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """一次MGET获取多个缓存数据，只返回命中的键"""
+        result = {}
+        for key, data in (await self.get_many_encoded(keys)).items():
+            value = self._load(key, data)
+            if value is not None:
+                result[key] = value
+        return result
+    
+    async def get_many_encoded(self, keys: List[str]) -> Dict[str, Optional[bytes]]:
+        """一次MGET获取多个编码后的缓存数据，未命中的值为None"""
+        if not keys:
+            return {}
+        
+        values = await self._call(
+            "mget",
+            lambda client: client.mget([self._key(key) for key in keys]),
+            key=f"{len(keys)}个键"
+        )
+        if values is None:
+            values = [None] * len(keys)
+        return dict(zip(keys, values))
+    
+    async def set(
+        self, key: str, value: Any, ttl: int = None, tags: Optional[List[str]] = None
+    ) -> bool:
+        """设置缓存数据，Redis不可用时跳过"""
+        return await self.set_encoded(key, self._serialize_data(value), ttl, tags)
+    
+    async def set_encoded(self, key: str, serialized_data: bytes, ttl: int = None,
+                          tags: Optional[List[str]] = None) -> bool:
+        """设置已编码的缓存数据，有标签时在同一个脚本中加入标签集合，Redis不可用时跳过"""
+        ttl = ttl or self.default_ttl
+        if tags:
+            keys = [self._key(key)] + [self._tag_key(tag) for tag in tags]
+            command = lambda client: client.eval(
+                self.SET_TAGGED_SCRIPT, len(keys), *keys, serialized_data, ttl
             )
-            
-            if success:
-                self.stats_data["sets"] += 1
-            
-            return bool(success)
-            
-        except Exception as e:
-            self.log_error("设置Redis缓存数据失败", key=key, error=str(e))
-            raise CacheError(f"设置Redis缓存数据失败: {e}")
+        else:
+            command = lambda client: client.setex(self._key(key), ttl, serialized_data)
+        
+        success = await self._call("set", command, key=key)
+        if success:
+            self.stats_data["sets"] += 1
+        return bool(success)
+    
+    async def set_many(self, items: Dict[str, Any], ttl: int = None) -> bool:
+        """通过一个pipeline写入多个缓存数据"""
+        if not items:
+            return True
+        
+        payloads = {key: self._serialize_data(value) for key, value in items.items()}
+        
+        async def write(client):
+            async with client.pipeline(transaction=False) as pipe:
+                for key, data in payloads.items():
+                    pipe.setex(self._key(key), ttl or self.default_ttl, data)
+                return await pipe.execute()
+        
+        results = await self._call("set_many", write, key=f"{len(items)}个键")
+        if not results:
+            return False
+        self.stats_data["sets"] += sum(1 for result in results if result)
+        return all(results)
+    
+    async def acquire_lock(self, key: str, timeout: float) -> Optional[str]:
+        """
+        通过SET NX获取缓存键的填充锁
+
+        Redis不可用时无法协调，直接视为获取成功，由当前进程自行计算
+
+        Args:
+            key: 缓存键
+            timeout: 锁的过期时间(秒)，持有锁的进程异常退出时锁自动释放
+
+        Returns:
+            锁令牌，锁被其他进程持有时返回None
+        """
+        token = uuid.uuid4().hex
+
+        async def try_lock(client):
+            lock_ms = max(int(timeout * 1000), 1)
+            return bool(await client.set(self._lock_key(key), token, nx=True, px=lock_ms))
+
+        acquired = await self._call("lock", try_lock, key=key)
+        if acquired is False:
+            return None
+        return token
+
+    async def release_lock(self, key: str, token: str) -> bool:
+        """释放缓存键的填充锁，只删除令牌匹配的锁，避免误删已过期后被其他进程获取的锁"""
+        result = await self._call(
+            "unlock",
+            lambda client: client.eval(self.RELEASE_LOCK_SCRIPT, 1, self._lock_key(key), token),
+            key=key
+        )
+        return bool(result)
+
+    async def is_locked(self, key: str) -> bool:
+        """检查缓存键的填充锁是否被持有"""
+        result = await self._call(
+            "exists", lambda client: client.exists(self._lock_key(key)), key=key
+        )
+        return bool(result)
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> List[str]:
+        """
+        删除带有任一标签的缓存数据
+        
+        Raises:
+            CacheError: Redis不可用（熔断、超时或出错），缓存数据可能没有删除
+        """
+        tag_keys = [self._tag_key(tag) for tag in tags]
+        if not tag_keys:
+            return []
+        
+        deleted = await self._call(
+            "invalidate",
+            lambda client: client.eval(self.INVALIDATE_TAGS_SCRIPT, len(tag_keys), *tag_keys),
+            key=f"{len(tag_keys)}个标签"
+        )
+        if deleted is None:
+            raise CacheError("Redis缓存不可用，按标签删除缓存失败")
+        
+        prefix_length = len(self.key_prefix)
+        keys = sorted({
+            (key.decode("utf-8") if isinstance(key, bytes) else key)[prefix_length:]
+            for key in deleted
+        })
+        self.stats_data["deletes"] += len(keys)
+        return keys
+    
+    def _key(self, key: str) -> str:
+        """缓存数据的Redis键"""
+        return f"{self.key_prefix}{key}"
+    
+    def _lock_key(self, key: str) -> str:
+        """填充锁的Redis键"""
+        return f"{self.key_prefix}lock:{key}"
+    
+    def _tag_key(self, tag: str) -> str:
+        """标签集合的Redis键"""
+        return f"{self.key_prefix}tag:{tag}"
+
+    async def publish(self, channel: str, message: str) -> bool:
+        """向频道发布消息"""
+        result = await self._call("publish", lambda client: client.publish(channel, message))
+        return result is not None
     
     async def delete(self, key: str) -> bool:
         """删除缓存数据"""
-        try:
-            if not self.redis_client:
-                raise CacheError("Redis客户端未初始化")
-            
-            result = self.redis_client.delete(key)
-            
-            if result > 0:
-                self.stats_data["deletes"] += 1
-                return True
-            
-            return False
-            
-        except Exception as e:
-            self.log_error("删除Redis缓存数据失败", key=key, error=str(e))
-            raise CacheError(f"删除Redis缓存数据失败: {e}")
+        result = await self._call("delete", lambda client: client.delete(self._key(key)), key=key)
+        if result:
+            self.stats_data["deletes"] += 1
+            return True
+        return False
     
     async def exists(self, key: str) -> bool:
         """检查缓存是否存在"""
-        try:
-            if not self.redis_client:
-                raise CacheError("Redis客户端未初始化")
-            
-            return bool(self.redis_client.exists(key))
-            
-        except Exception as e:
-            self.log_error("检查Redis缓存存在性失败", key=key, error=str(e))
-            raise CacheError(f"检查Redis缓存存在性失败: {e}")
+        result = await self._call("exists", lambda client: client.exists(self._key(key)), key=key)
+        return bool(result)
     
     async def clear(self) -> bool:
-        """清空所有缓存"""
-        try:
-            if not self.redis_client:
-                raise CacheError("Redis客户端未初始化")
-            
-            # 注意：这将清空整个Redis数据库，生产环境需要谨慎使用
-            self.redis_client.flushdb()
-            self.log_info("Redis缓存已清空")
-            return True
-            
-        except Exception as e:
-            self.log_error("清空Redis缓存失败", error=str(e))
-            raise CacheError(f"清空Redis缓存失败: {e}")
+        """清空带命名空间前缀的所有缓存数据、标签集合和填充锁"""
+        # 前缀中的通配符按字面匹配
+        pattern = re.sub(r"([*?\[\]\\])", r"\\\1", self.key_prefix) + "*"
+        cursor = 0
+        removed = 0
+        while True:
+            result = await self._call(
+                "clear",
+                lambda client: client.scan(cursor, match=pattern, count=self.SCAN_BATCH_SIZE)
+            )
+            if result is None:
+                return False
+            cursor, keys = result
+            if keys:
+                if await self._call("clear", lambda client: client.unlink(*keys)) is None:
+                    return False
+                removed += len(keys)
+            if cursor == 0:
+                break
+        
+        self.log_info("Redis缓存已清空", prefix=self.key_prefix, keys=removed)
+        return True
     
     async def stats(self) -> Dict[str, Any]:
         """获取缓存统计信息"""
-        try:
-            if not self.redis_client:
-                raise CacheError("Redis客户端未初始化")
-            
-            info = self.redis_client.info()
-            total_requests = self.stats_data["hits"] + self.stats_data["misses"]
-            hit_rate = self.stats_data["hits"] / total_requests if total_requests > 0 else 0
+        total_requests = self.stats_data["hits"] + self.stats_data["misses"]
+        hit_rate = self.stats_data["hits"] / total_requests if total_requests > 0 else 0
+        base_stats = {
+            "type": "redis",
+            "codec": self.codec.name,
+            "hit_rate": hit_rate,
+            "circuit_breaker": self.breaker.get_status(),
+            **self.stats_data
+        }
+        
+        info = await self._call("info", lambda client: client.info())
+        if info is None:
+            return {**base_stats, "error": self.breaker.last_error}
+        
+        return {
+            **base_stats,
+            "connected_clients": info.get("connected_clients", 0),
+            "used_memory": info.get("used_memory", 0),
+            "used_memory_human": info.get("used_memory_human", "0B")
+        }
+    
+    async def _call(self, operation: str, command, key: Optional[str] = None) -> Any:
+        """
+        带超时和熔断执行Redis命令
+        
+        Args:
+            operation: 操作名称，用于日志
+            command: 接收Redis客户端、返回awaitable的函数
+            key: 缓存键，用于日志
             
-            return {
-                "type": "redis",
-                "connected_clients": info.get("connected_clients", 0),
-                "used_memory": info.get("used_memory", 0),
-                "used_memory_human": info.get("used_memory_human", "0B"),
-                "hit_rate": hit_rate,
-                **self.stats_data
-            }
+        Returns:
+            命令结果，熔断、超时或出错时返回None
+        """
+        if self.redis_client is None or not self.breaker.allow_request():
+            self.stats_data["short_circuited"] += 1
+            return None
+        
+        try:
+            result = await asyncio.wait_for(
+                command(self.redis_client), timeout=self.operation_timeout
+            )
+            self.breaker.record_success()
+            return result
             
         except Exception as e:
-            self.log_error("获取Redis统计信息失败", error=str(e))
-            return {
-                "type": "redis",
-                "error": str(e),
-                **self.stats_data
-            }
+            error = str(e) or type(e).__name__
+            self.stats_data["errors"] += 1
+            if self.breaker.record_failure(error):
+                self.log_error("Redis缓存连续失败，暂时停用缓存",
+                               failures=self.breaker.consecutive_failures,
+                               reset_timeout=self.breaker.reset_timeout, error=error)
+            else:
+                self.log_warning("Redis缓存操作失败，按未命中处理", operation=operation, key=key, error=error)
+            return None
+    
+    def _load(self, key: str, data: Optional[bytes]) -> Optional[Any]:
+        """解码读取到的缓存数据并记录命中情况，无法解码时按未命中处理"""
+        if data is None:
+            self.stats_data["misses"] += 1
+            return None
+        
+        try:
+            value = self._deserialize_data(data)
+        except CacheError:
+            self.stats_data["misses"] += 1
+            return None
+        
+        self.stats_data["hits"] += 1
+        return value
     
     async def _ping(self) -> None:
         """测试Redis连接"""
         if not self.redis_client:
             raise CacheError("Redis客户端未初始化")
         
-        result = self.redis_client.ping()
+        result = await asyncio.wait_for(self.redis_client.ping(), timeout=self.operation_timeout)
         if not result:
             raise CacheError("Redis连接测试失败")
     
     def _serialize_data(self, data: Any) -> bytes:
         """序列化缓存数据"""
         try:
-            return pickle.dumps(data)
+            return self.codec.encode(data)
         except Exception as e:
             self.log_error("序列化数据失败", error=str(e))
             raise CacheError(f"序列化数据失败: {e}")
@@ -420,12 +925,271 @@ class RedisCacheManager(BaseCacheManager):
     def _deserialize_data(self, data: bytes) -> Any:
         """反序列化缓存数据"""
         try:
-            return pickle.loads(data)
+            return self.codec.decode(data)
         except Exception as e:
             self.log_error("反序列化数据失败", error=str(e))
             raise CacheError(f"反序列化数据失败: {e}")
 
 
+class TieredCacheManager(BaseCacheManager):
+    """
+    两级缓存管理器
+
+    每个工作进程内有一个小的内存LRU（L1），之后是所有进程共享的Redis（L2）。
+    读取先查L1，未命中再查L2，L2命中的数据按编码后的字节放入L1，热点数据
+    之后的读取不再经过网络。写入和删除同时更新两级，并通过Redis发布订阅通知
+    其他进程删除各自L1中的旧数据；L1的TTL较短，限制通知丢失时的不一致时间。
+    """
+    
+    def __init__(self, l1: MemoryCacheManager, l2: RedisCacheManager,
+                 l1_ttl: int = 60, invalidation_channel: str = "uqm:cache:invalidate"):
+        """
+        初始化两级缓存管理器
+        
+        Args:
+            l1: 进程内内存缓存
+            l2: 共享Redis缓存
+            l1_ttl: L1缓存项的最长TTL(秒)
+            invalidation_channel: L1失效通知的发布订阅频道
+        """
+        self.l1 = l1
+        self.l2 = l2
+        self.codec = l2.codec
+        self.default_ttl = l2.default_ttl
+        self.l1_ttl = l1_ttl
+        self.invalidation_channel = invalidation_channel
+        self.instance_id = uuid.uuid4().hex
+        self._listener_task: Optional[asyncio.Task] = None
+        self.stats_data = {
+            "l1_hits": 0,
+            "l2_hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "deletes": 0,
+            "promotions": 0,
+            "invalidations_sent": 0,
+            "invalidations_received": 0
+        }
+    
+    async def initialize(self) -> None:
+        """初始化两级缓存并开始监听失效通知"""
+        await self.l1.initialize()
+        await self.l2.initialize()
+        self._listener_task = asyncio.create_task(self._listen_invalidations())
+        self.log_info("两级缓存管理器初始化完成", l1_ttl=self.l1_ttl, channel=self.invalidation_channel)
+    
+    async def close(self) -> None:
+        """停止监听失效通知并关闭两级缓存"""
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+        await self.l1.close()
+        await self.l2.close()
+        self.log_info("两级缓存管理器已关闭")
+    
+    async def get(self, key: str) -> Optional[Any]:
+        """获取缓存数据，先查L1再查L2"""
+        data = await self.l1.get_encoded(key)
+        if data is not None:
+            self.stats_data["l1_hits"] += 1
+            return self._decode(key, data)
+        
+        data = await self.l2.get_encoded(key)
+        if data is None:
+            self.stats_data["misses"] += 1
+            return None
+        
+        self.stats_data["l2_hits"] += 1
+        value = self._decode(key, data)
+        if value is not None:
+            await self._promote(key, data)
+        return value
+    
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """批量获取缓存数据，L1未命中的键一次MGET从L2读取"""
+        result = {}
+        remaining = []
+        for key in keys:
+            data = await self.l1.get_encoded(key)
+            if data is None:
+                remaining.append(key)
+                continue
+            self.stats_data["l1_hits"] += 1
+            value = self._decode(key, data)
+            if value is not None:
+                result[key] = value
+        
+        for key, data in (await self.l2.get_many_encoded(remaining)).items():
+            if data is None:
+                self.stats_data["misses"] += 1
+                continue
+            self.stats_data["l2_hits"] += 1
+            value = self._decode(key, data)
+            if value is not None:
+                result[key] = value
+                await self._promote(key, data)
+        return result
+    
+    async def set(
+        self, key: str, value: Any, ttl: int = None, tags: Optional[List[str]] = None
+    ) -> bool:
+        """设置缓存数据，同时写入两级并通知其他进程"""
+        ttl = ttl or self.default_ttl
+        data = self.codec.encode(value)
+        
+        await self.l1.set_encoded(key, data, min(ttl, self.l1_ttl), tags)
+        success = await self.l2.set_encoded(key, data, ttl, tags)
+        await self._publish_invalidation([key])
+        self.stats_data["sets"] += 1
+        return success
+    
+    async def delete(self, key: str) -> bool:
+        """删除缓存数据"""
+        deleted_l1 = await self.l1.delete(key)
+        deleted_l2 = await self.l2.delete(key)
+        await self._publish_invalidation([key])
+        if deleted_l1 or deleted_l2:
+            self.stats_data["deletes"] += 1
+            return True
+        return False
+    
+    async def exists(self, key: str) -> bool:
+        """检查缓存是否存在"""
+        return await self.l1.exists(key) or await self.l2.exists(key)
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> List[str]:
+        """
+        删除两级中带有任一标签的缓存数据，并通知其他进程按标签删除L1中的数据
+        
+        Raises:
+            CacheError: L2删除失败，L1中的数据仍然会被删除
+        """
+        tags = list(tags)
+        keys: Set[str] = set()
+        try:
+            keys.update(await self.l2.invalidate_tags(tags))
+        finally:
+            keys.update(await self.l1.invalidate_tags(tags))
+            await self._publish_invalidation(sorted(keys), tags)
+            self.stats_data["deletes"] += len(keys)
+        return sorted(keys)
+    
+    async def acquire_lock(self, key: str, timeout: float) -> Optional[str]:
+        """在L2上获取缓存键的填充锁"""
+        return await self.l2.acquire_lock(key, timeout)
+
+    async def release_lock(self, key: str, token: str) -> bool:
+        """释放L2上的填充锁"""
+        return await self.l2.release_lock(key, token)
+
+    async def is_locked(self, key: str) -> bool:
+        """检查L2上的填充锁是否被持有"""
+        return await self.l2.is_locked(key)
+    
+    async def clear(self) -> bool:
+        """清空所有缓存"""
+        await self.l1.clear()
+        result = await self.l2.clear()
+        await self._publish_invalidation(None)
+        return result
+    
+    async def stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        total_requests = (
+            self.stats_data["l1_hits"] + self.stats_data["l2_hits"] + self.stats_data["misses"]
+        )
+        hits = self.stats_data["l1_hits"] + self.stats_data["l2_hits"]
+        
+        return {
+            "type": "tiered",
+            "hit_rate": hits / total_requests if total_requests > 0 else 0,
+            "l1_hit_rate": self.stats_data["l1_hits"] / total_requests if total_requests > 0 else 0,
+            **self.stats_data,
+            "l1": await self.l1.stats(),
+            "l2": await self.l2.stats()
+        }
+    
+    def _decode(self, key: str, data: bytes) -> Optional[Any]:
+        """解码缓存数据，无法解码时按未命中处理"""
+        try:
+            return self.codec.decode(data)
+        except Exception as e:
+            self.log_warning("缓存数据解码失败，按未命中处理", key=key, error=str(e))
+            return None
+    
+    async def _promote(self, key: str, data: bytes) -> None:
+        """把L2命中的数据放入L1"""
+        if await self.l1.set_encoded(key, data, self.l1_ttl):
+            self.stats_data["promotions"] += 1
+    
+    async def _publish_invalidation(
+        self, keys: Optional[List[str]], tags: Optional[List[str]] = None
+    ) -> None:
+        """
+        通知其他进程删除L1中的缓存项
+        
+        Args:
+            keys: 缓存键列表，None表示清空
+            tags: 标签列表，其他进程同时删除L1中带有这些标签的缓存项
+        """
+        message = json.dumps({"origin": self.instance_id, "keys": keys, "tags": tags or []})
+        if await self.l2.publish(self.invalidation_channel, message):
+            self.stats_data["invalidations_sent"] += 1
+    
+    async def _apply_invalidation(self, message: Dict[str, Any]) -> None:
+        """处理其他进程发来的失效通知"""
+        if message.get("origin") == self.instance_id:
+            return
+        
+        keys = message.get("keys")
+        if keys is None:
+            await self.l1.clear()
+        else:
+            for key in keys:
+                await self.l1.delete(key)
+            await self.l1.invalidate_tags(message.get("tags", []))
+        self.stats_data["invalidations_received"] += 1
+    
+    async def _listen_invalidations(self) -> None:
+        """订阅失效通知频道，连接断开后等待熔断恢复时间再重新订阅"""
+        while True:
+            client = self.l2.redis_client
+            if client is None or not self.l2.breaker.allow_request():
+                await asyncio.sleep(self.l2.breaker.reset_timeout)
+                continue
+            
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.invalidation_channel)
+                self.l2.breaker.record_success()
+                # 订阅中断期间可能漏掉通知，重新订阅时清空L1
+                await self.l1.clear()
+                
+                async for raw_message in pubsub.listen():
+                    if raw_message.get("type") != "message":
+                        continue
+                    try:
+                        await self._apply_invalidation(json.loads(raw_message["data"]))
+                    except (ValueError, TypeError) as e:
+                        self.log_warning("忽略无法解析的缓存失效通知", error=str(e))
+                        
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.l2.breaker.record_failure(str(e) or type(e).__name__)
+                self.log_warning("缓存失效通知订阅中断", error=str(e))
+                await asyncio.sleep(1)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+
 # 全局缓存管理器实例
 _cache_manager: Optional[BaseCacheManager] = None
 
@@ -438,16 +1202,41 @@ def get_cache_manager() -> BaseCacheManager:
     if _cache_manager is None:
         settings = get_settings()
         cache_config = settings.get_cache_config()
+        codec = CacheCodec(cache_config["compression"], cache_config["compress_min_bytes"])
+        
+        cache_type = cache_config["type"].lower()
         
-        if cache_config["type"].lower() == "redis":
+        if cache_type in ("redis", "tiered"):
             _cache_manager = RedisCacheManager(
                 redis_url=cache_config["redis_url"],
-                default_ttl=cache_config["default_timeout"]
+                default_ttl=cache_config["default_timeout"],
+                codec=codec,
+                max_connections=cache_config["redis_max_connections"],
+                operation_timeout=cache_config["redis_operation_timeout"],
+                breaker=CacheCircuitBreaker(
+                    failure_threshold=cache_config["breaker_failure_threshold"],
+                    reset_timeout=cache_config["breaker_reset_timeout"]
+                ),
+                key_prefix=cache_config["key_prefix"]
             )
+            if cache_type == "tiered":
+                _cache_manager = TieredCacheManager(
+                    l1=MemoryCacheManager(
+                        max_size=cache_config["l1_max_size"],
+                        default_ttl=cache_config["l1_ttl"],
+                        max_bytes=cache_config["l1_max_memory_mb"] * 1024 * 1024,
+                        codec=codec
+                    ),
+                    l2=_cache_manager,
+                    l1_ttl=cache_config["l1_ttl"],
+                    invalidation_channel=cache_config["invalidation_channel"]
+                )
         else:
             _cache_manager = MemoryCacheManager(
                 max_size=cache_config["max_size"],
-                default_ttl=cache_config["default_timeout"]
+                default_ttl=cache_config["default_timeout"],
+                max_bytes=cache_config["max_memory_mb"] * 1024 * 1024,
+                codec=codec
             )
     
     return _cache_manager
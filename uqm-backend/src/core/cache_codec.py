@@ -0,0 +1,154 @@
+"""
+缓存数据编码模块
+负责缓存数据的序列化和压缩，编码结果带有记录压缩方式的头部
+"""
+
+import pickle
+import zlib
+from typing import Any, Callable, Dict, NamedTuple
+
+from src.utils.exceptions import CacheError
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+
+# 编码头部：魔数 + 1字节压缩方式编号
+CODEC_MAGIC = b"UQC1"
+HEADER_SIZE = len(CODEC_MAGIC) + 1
+
+
+class Compressor(NamedTuple):
+    """压缩方式"""
+    codec_id: int
+    name: str
+    compress: Callable[[bytes], bytes]
+    decompress: Callable[[bytes], bytes]
+
+
+def _build_compressors() -> Dict[str, Compressor]:
+    """构建当前环境可用的压缩方式"""
+    compressors = {
+        "none": Compressor(0, "none", bytes, bytes),
+        "zlib": Compressor(1, "zlib", lambda data: zlib.compress(data, 1), zlib.decompress),
+    }
+    if zstandard is not None:
+        compressors["zstd"] = Compressor(
+            2, "zstd",
+            zstandard.ZstdCompressor(level=3).compress,
+            lambda data: zstandard.ZstdDecompressor().decompress(data)
+        )
+    if lz4_frame is not None:
+        compressors["lz4"] = Compressor(3, "lz4", lz4_frame.compress, lz4_frame.decompress)
+    return compressors
+
+
+COMPRESSORS = _build_compressors()
+COMPRESSORS_BY_ID = {compressor.codec_id: compressor for compressor in COMPRESSORS.values()}
+
+# 各压缩方式所需的可选依赖，用于错误提示
+OPTIONAL_COMPRESSORS = {"zstd": "zstandard", "lz4": "lz4"}
+
+
+def resolve_compressor(name: str) -> Compressor:
+    """
+    根据名称获取压缩方式
+
+    Args:
+        name: 压缩方式名称（none/zlib/zstd/lz4），auto表示按zstd、lz4、zlib的顺序选择可用的一种
+
+    Returns:
+        压缩方式
+
+    Raises:
+        CacheError: 压缩方式不支持或依赖未安装
+    """
+    name = (name or "auto").lower()
+    if name == "auto":
+        for candidate in ("zstd", "lz4", "zlib"):
+            if candidate in COMPRESSORS:
+                return COMPRESSORS[candidate]
+
+    if name in COMPRESSORS:
+        return COMPRESSORS[name]
+    if name in OPTIONAL_COMPRESSORS:
+        raise CacheError(f"缓存压缩方式 {name} 需要安装 {OPTIONAL_COMPRESSORS[name]}")
+    raise CacheError(f"不支持的缓存压缩方式: {name}")
+
+
+class CacheCodec:
+    """
+    缓存数据编解码器
+
+    数据先用pickle（protocol 5）序列化，超过阈值时再压缩。编码结果以
+    CODEC_MAGIC和压缩方式编号开头，解码时按头部选择解压方式，因此修改配置
+    后已有的缓存仍然可以读取；没有头部的数据按旧格式直接用pickle读取。
+    """
+
+    def __init__(self, compression: str = "auto", min_compress_size: int = 1024):
+        """
+        初始化编解码器
+
+        Args:
+            compression: 压缩方式名称
+            min_compress_size: 序列化后达到该字节数才压缩
+        """
+        self.compressor = resolve_compressor(compression)
+        self.min_compress_size = min_compress_size
+
+    @property
+    def name(self) -> str:
+        """压缩方式名称"""
+        return self.compressor.name
+
+    def encode(self, value: Any) -> bytes:
+        """
+        编码缓存数据
+
+        Args:
+            value: 任意可pickle的数据
+
+        Returns:
+            带头部的字节串
+        """
+        payload = pickle.dumps(value, protocol=5)
+        compressor = self.compressor
+        if len(payload) < self.min_compress_size:
+            compressor = COMPRESSORS["none"]
+        else:
+            payload = compressor.compress(payload)
+        return b"".join((CODEC_MAGIC, bytes((compressor.codec_id,)), payload))
+
+    def decode(self, data: bytes) -> Any:
+        """
+        解码缓存数据
+
+        Args:
+            data: encode()的结果或旧格式的pickle数据
+
+        Returns:
+            原始数据
+
+        Raises:
+            CacheError: 压缩方式未知或依赖未安装
+        """
+        if data[:len(CODEC_MAGIC)] != CODEC_MAGIC:
+            return pickle.loads(data)
+
+        codec_id = data[len(CODEC_MAGIC)]
+        compressor = COMPRESSORS_BY_ID.get(codec_id)
+        if compressor is None:
+            raise CacheError(f"无法解码缓存数据，未知或未安装的压缩方式编号: {codec_id}")
+
+        payload = memoryview(data)[HEADER_SIZE:]
+        if compressor.codec_id != 0:
+            payload = compressor.decompress(payload)
+        return pickle.loads(payload)
+
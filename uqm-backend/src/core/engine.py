@@ -4,17 +4,25 @@ UQM执行引擎主类
 """
 
 import time
-import hashlib
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 from functools import lru_cache
 
 from src.api.models import UQMResponse, StepResult, Metadata, StepType
-from src.core.parser import UQMParser
+from src.core.parser import UQMParser, get_step_tables
 from src.core.executor import Executor
-from src.core.cache import get_cache_manager
+from src.core.fingerprint import fingerprint
+from src.core.plan import CompiledPlan, get_plan_cache
+from src.steps.query_step import QueryStep
+from src.core.cache import CacheEntry, get_cache_manager, unwrap_cache_entry
+from src.core.refresh import get_background_refresher
+from src.core.singleflight import fill_cache_once, get_single_flight
 from src.connectors.base import get_connector_manager
 from src.utils.logging import LoggerMixin
 from src.utils.exceptions import ValidationError, ExecutionError
+from src.utils.pagination import (
+    COUNT_EXACT, COUNT_MODES, COUNT_NONE, KEYSET_MODE, OFFSET_MODE, PAGINATION_MODES,
+    PAGINATION_OPTION_KEYS
+)
 from src.config.settings import get_settings
 
 
@@ -27,6 +35,9 @@ class UQMEngine(LoggerMixin):
         self.cache_manager = get_cache_manager()
         self.connector_manager = get_connector_manager()
         self.settings = get_settings()
+        self.single_flight = get_single_flight("query")
+        self.refresher = get_background_refresher()
+        self.plan_cache = get_plan_cache()
     
     async def process(self, uqm_data: Dict[str, Any], 
                      parameters: Optional[Dict[str, Any]] = None,
@@ -58,14 +69,15 @@ class UQMEngine(LoggerMixin):
             parameters = parameters or {}
             options = options or {}
             
-            # 解析UQM数据
-            parsed_data = self.parser.parse(uqm_data)
+            # 生成缓存键
+            template_fingerprint = fingerprint(uqm_data)
+            cache_key = self._generate_cache_key(template_fingerprint, parameters, options)
             
-            # 参数替换
-            processed_data = self._substitute_parameters(parsed_data, parameters)
+            # 获取查询计划，同一模板只解析一次
+            plan = self._get_plan(uqm_data, template_fingerprint)
             
-            # 生成缓存键
-            cache_key = self._generate_cache_key(processed_data, parameters)
+            # 参数替换
+            processed_data = self._substitute_parameters(plan, parameters)
             
             # 检查缓存
             cached_result = None
@@ -73,65 +85,24 @@ class UQMEngine(LoggerMixin):
                 cached_result = await self.cache_manager.get(cache_key)
                 if cached_result:
                     self.log_info("命中缓存", cache_key=cache_key)
-                    return cached_result
-            
-            # 分析分页选项
-            output_step_name = processed_data["output"]
-            pagination_target_step = options.get("pagination_target_step", output_step_name)
-            pagination_options = self._extract_pagination_options(options, processed_data, pagination_target_step)
-            
-            # 创建执行器并执行
-            executor = Executor(
-                steps=processed_data["steps"],
-                connector_manager=self.connector_manager,
-                cache_manager=self.cache_manager,
-                options=options,
-                pagination_target_step=pagination_target_step,
-                pagination_options=pagination_options
-            )
-            
-            execution_result = await executor.execute()
-            
-            # 获取输出步骤的结果
-            output_data = execution_result.get_step_data(output_step_name)
-            
-            # 构建分页信息
-            pagination_info = self._build_pagination_info(
-                pagination_options, 
-                execution_result.step_results.get(pagination_target_step, {})
-            )
-            
-            # 构建响应
-            execution_time = time.time() - start_time
-            execution_info = {
-                "total_time": execution_time,
-                "row_count": len(output_data) if output_data else 0,
-                "cache_hit": False,
-                "steps_executed": len(processed_data["steps"])
-            }
-            
-            # 如果有分页信息，添加到执行信息中
-            if pagination_info:
-                execution_info["pagination"] = pagination_info
-            
-            response = UQMResponse(
-                success=True,
-                data=output_data,
-                metadata=Metadata(**processed_data["metadata"]),
-                execution_info=execution_info,
-                step_results=self._build_step_results(execution_result.step_results)
-            )
-            
-            # 缓存结果
-            if options.get("cache_enabled", False):
-                cache_ttl = options.get("cache_ttl", self.settings.CACHE_DEFAULT_TIMEOUT)
-                await self.cache_manager.set(cache_key, response, cache_ttl)
-            
-            self.log_info(
-                "UQM查询处理完成",
-                execution_time=execution_time,
-                row_count=len(output_data) if output_data else 0
-            )
+                    return self._serve_cached(cached_result, processed_data, options, cache_key)
+            
+            flight_key = None
+            if self.settings.REQUEST_COALESCING_ENABLED:
+                flight_key = self._generate_flight_key(cache_key, options)
+            
+            if flight_key is not None:
+                # 合并同时到达的相同查询，只执行一次
+                response, shared = await self.single_flight.do(
+                    flight_key,
+                    lambda: self._execute_coalesced(processed_data, options, cache_key, start_time)
+                )
+                if shared:
+                    response = response.model_copy(
+                        update={"execution_info": {**response.execution_info, "coalesced": True}}
+                    )
+            else:
+                response = await self._execute(processed_data, options, cache_key, start_time)
             
             return response
             
@@ -152,7 +123,323 @@ class UQMEngine(LoggerMixin):
                 exc_info=True
             )
             raise ExecutionError(f"查询处理失败: {e}")
+
+    async def _execute_coalesced(self, processed_data: Dict[str, Any], options: Dict[str, Any],
+                                 cache_key: str, start_time: float) -> UQMResponse:
+        """
+        执行查询，启用缓存时通过缓存填充锁与其他进程合并同一缓存键的执行
+        
+        Args:
+            processed_data: 参数替换后的UQM数据
+            options: 执行选项
+            cache_key: 缓存键
+            start_time: 开始处理的时间
+            
+        Returns:
+            查询执行结果
+        """
+        if not options.get("cache_enabled", False):
+            return await self._execute(processed_data, options, cache_key, start_time)
+        
+        response, from_cache = await fill_cache_once(
+            self.cache_manager, cache_key,
+            lambda: self._execute(processed_data, options, cache_key, start_time),
+            self.settings.CACHE_LOCK_TIMEOUT
+        )
+        if from_cache:
+            self.log_info("使用其他进程写入的缓存结果", cache_key=cache_key)
+        return unwrap_cache_entry(response)
     
+    def _serve_cached(self, cached: Any, processed_data: Dict[str, Any],
+                      options: Dict[str, Any], cache_key: str) -> UQMResponse:
+        """
+        返回缓存的查询结果
+        
+        过了软过期时间（cache_ttl）的旧结果在硬过期（再加cache_stale_ttl）之前
+        照常返回，同时在后台重新执行查询刷新缓存；软过期之前也会按XFetch算法
+        以一定概率提前刷新。刷新时不读取步骤缓存，避免用同样陈旧的步骤数据重建结果。
+        
+        Args:
+            cached: 缓存数据
+            processed_data: 参数替换后的UQM数据
+            options: 执行选项
+            cache_key: 缓存键
+            
+        Returns:
+            查询执行结果
+        """
+        if not isinstance(cached, CacheEntry):
+            return cached
+        
+        if cached.should_refresh(self.settings.CACHE_EARLY_REFRESH_BETA):
+            refresh_options = {**options, "cache_refresh": True}
+            self.refresher.schedule(
+                self.cache_manager, cache_key,
+                lambda: self._execute(processed_data, refresh_options, cache_key, time.time()),
+                self.settings.CACHE_LOCK_TIMEOUT
+            )
+        
+        response = cached.value
+        if cached.is_stale():
+            response = response.model_copy(
+                update={"execution_info": {**response.execution_info, "cache_stale": True}}
+            )
+        return response
+    
+    async def _execute(self, processed_data: Dict[str, Any], options: Dict[str, Any],
+                       cache_key: str, start_time: float) -> UQMResponse:
+        """
+        创建执行器执行查询，启用缓存时写入缓存
+        
+        Args:
+            processed_data: 参数替换后的UQM数据
+            options: 执行选项
+            cache_key: 缓存键
+            start_time: 开始处理的时间
+            
+        Returns:
+            查询执行结果
+        """
+        # 分析分页选项
+        output_step_name = processed_data["output"]
+        pagination_target_step = options.get("pagination_target_step", output_step_name)
+        pagination_options = self._extract_pagination_options(
+            options, processed_data, pagination_target_step
+        )
+        
+        # 创建执行器并执行
+        executor = Executor(
+            steps=processed_data["steps"],
+            connector_manager=self.connector_manager,
+            cache_manager=self.cache_manager,
+            options=options,
+            pagination_target_step=pagination_target_step,
+            pagination_options=pagination_options,
+            execution_order=processed_data.get("execution_order"),
+            dependencies=processed_data.get("dependencies"),
+            output_step=output_step_name
+        )
+        
+        execution_result = await executor.execute()
+        
+        # 获取输出步骤的结果，之后删除步骤数据的溢写文件
+        try:
+            output_data = execution_result.get_step_data(output_step_name)
+        finally:
+            execution_result.step_data.close()
+        
+        # 构建分页信息
+        pagination_info = self._build_pagination_info(
+            pagination_options, 
+            execution_result.step_results.get(pagination_target_step, {})
+        )
+        
+        # 构建响应
+        execution_time = time.time() - start_time
+        execution_info = {
+            "total_time": execution_time,
+            "row_count": len(output_data) if output_data else 0,
+            "cache_hit": False,
+            "steps_executed": len(processed_data["steps"])
+        }
+        
+        # 步骤中间数据的内存使用情况
+        if execution_result.memory_stats:
+            execution_info["memory"] = execution_result.memory_stats
+        
+        # 如果有分页信息，添加到执行信息中
+        if pagination_info:
+            execution_info["pagination"] = pagination_info
+        
+        response = UQMResponse(
+            success=True,
+            data=output_data,
+            metadata=Metadata(**processed_data["metadata"]),
+            execution_info=execution_info,
+            step_results=self._build_step_results(execution_result.step_results)
+        )
+        
+        # 缓存结果，cache_ttl是软TTL，之后的cache_stale_ttl时间内仍可返回旧结果
+        if options.get("cache_enabled", False):
+            cache_ttl = options.get("cache_ttl", self.settings.CACHE_DEFAULT_TIMEOUT)
+            stale_ttl = options.get("cache_stale_ttl", self.settings.CACHE_STALE_TTL)
+            entry = CacheEntry.create(response, cache_ttl, execution_time)
+            await self.cache_manager.set(
+                cache_key, entry, cache_ttl + stale_ttl, tags=self._get_cache_tags(processed_data)
+            )
+        
+        self.log_info(
+            "UQM查询处理完成",
+            execution_time=execution_time,
+            row_count=len(output_data) if output_data else 0
+        )
+        
+        return response
+
+    async def open_stream(
+        self,
+        uqm_data: Dict[str, Any],
+        parameters: Optional[Dict[str, Any]] = None,
+        options: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        以流式方式执行UQM查询，按块返回输出步骤的数据
+
+        只有一个直接查询数据库的query步骤且没有分页时，通过数据库服务端游标
+        逐块读取；否则照常执行所有步骤，再把输出步骤的数据分块返回。第一块数据
+        在返回前读取，因此解析和执行错误会在开始响应之前抛出。流式执行不读写
+        结果缓存。
+
+        Args:
+            uqm_data: UQM JSON数据
+            parameters: 查询参数
+            options: 执行选项，stream_chunk_size 指定每块的行数
+
+        Returns:
+            按块产出输出步骤数据的异步迭代器
+
+        Raises:
+            ValidationError: 验证失败
+            ExecutionError: 执行失败
+        """
+        start_time = time.time()
+
+        try:
+            self.log_info(
+                "开始流式处理UQM查询",
+                uqm_name=uqm_data.get("metadata", {}).get("name", "未命名")
+            )
+
+            parameters = parameters or {}
+            options = options or {}
+            chunk_size = int(options.get("stream_chunk_size") or self.settings.STREAM_CHUNK_SIZE)
+            if chunk_size <= 0:
+                raise ValidationError("stream_chunk_size必须大于0")
+
+            plan = self._get_plan(uqm_data, fingerprint(uqm_data))
+            processed_data = self._substitute_parameters(plan, parameters)
+            output_step_name = processed_data["output"]
+
+            cursor_step = self._get_cursor_stream_step(processed_data, options)
+            if cursor_step is not None:
+                self.log_info("通过数据库游标流式读取输出步骤", step=output_step_name, chunk_size=chunk_size)
+                context = {
+                    "connector_manager": self.connector_manager,
+                    "cache_manager": self.cache_manager,
+                    "options": dict(options),
+                    "step_data": {},
+                }
+                chunks = QueryStep(cursor_step["config"]).stream(context, chunk_size)
+            else:
+                pagination_target_step = options.get("pagination_target_step", output_step_name)
+                executor = Executor(
+                    steps=processed_data["steps"],
+                    connector_manager=self.connector_manager,
+                    cache_manager=self.cache_manager,
+                    options=options,
+                    pagination_target_step=pagination_target_step,
+                    pagination_options=self._extract_pagination_options(
+                        options, processed_data, pagination_target_step
+                    ),
+                    execution_order=processed_data.get("execution_order"),
+                    dependencies=processed_data.get("dependencies"),
+                    output_step=output_step_name
+                )
+                execution_result = await executor.execute()
+                # 保持步骤存储的原始形式（可能是列式数据），逐块转换为字典列表
+                try:
+                    output_data = execution_result.step_data.get(output_step_name)
+                finally:
+                    execution_result.step_data.close()
+                chunks = self._iter_chunks(output_data, chunk_size)
+
+            try:
+                first_chunk = await chunks.__anext__()
+            except StopAsyncIteration:
+                first_chunk = None
+
+            self.log_info("UQM流式查询开始输出", prepare_time=time.time() - start_time)
+            return self._prepend_chunk(first_chunk, chunks)
+
+        except ValidationError as e:
+            self.log_error("UQM流式查询验证失败", error=str(e))
+            raise
+
+        except ExecutionError as e:
+            self.log_error("UQM流式查询执行失败", error=str(e))
+            raise
+
+        except Exception as e:
+            self.log_error(
+                "UQM流式查询出现未知错误",
+                error=str(e),
+                execution_time=time.time() - start_time,
+                exc_info=True
+            )
+            raise ExecutionError(f"查询处理失败: {e}")
+
+    def _get_cursor_stream_step(self, processed_data: Dict[str, Any],
+                                options: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        判断输出能否直接通过数据库游标流式读取
+
+        Args:
+            processed_data: 处理后的UQM数据
+            options: 执行选项
+
+        Returns:
+            可以直接流式读取的query步骤配置，否则返回None
+        """
+        steps = processed_data["steps"]
+        if len(steps) != 1 or options.get("page") or options.get("page_size"):
+            return None
+
+        step = steps[0]
+        if step.get("type") != "query" or step["name"] != processed_data["output"]:
+            return None
+        return step
+
+    @staticmethod
+    async def _iter_chunks(data: Any, chunk_size: int) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        把步骤数据按块切分为字典列表
+
+        Args:
+            data: 步骤数据（字典列表或列式批数据）
+            chunk_size: 每块的行数
+
+        Returns:
+            按块产出字典列表的异步迭代器
+        """
+        if not data:
+            return
+        for start in range(0, len(data), chunk_size):
+            yield data[start:start + chunk_size]
+
+    @staticmethod
+    async def _prepend_chunk(
+        first_chunk: Optional[List[Dict[str, Any]]],
+        chunks: AsyncIterator[List[Dict[str, Any]]]
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        把已预先读取的第一块数据放回迭代器开头
+
+        Args:
+            first_chunk: 第一块数据，没有数据时为None
+            chunks: 剩余数据块的异步迭代器
+
+        Returns:
+            完整的异步迭代器
+        """
+        if first_chunk is None:
+            return
+        try:
+            yield first_chunk
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await chunks.aclose()
+
     async def validate_query(self, uqm_data: Dict[str, Any]) -> Any:
         """
         验证UQM查询有效性
@@ -181,64 +468,30 @@ class UQMEngine(LoggerMixin):
             self.log_error("UQM查询验证出现错误", error=str(e))
             raise ValidationError(f"查询验证失败: {e}")
     
-    def _substitute_parameters(self, uqm_data: Dict[str, Any], 
+    def _substitute_parameters(self, plan: CompiledPlan, 
                              parameters: Dict[str, Any]) -> Dict[str, Any]:
         """
         参数替换处理，支持条件过滤器
         
         Args:
-            uqm_data: 解析后的UQM数据
+            plan: 查询计划，缓存的模板不会被修改
             parameters: 参数值字典
             
         Returns:
             参数替换后的UQM数据
         """
         try:
-            self.log_info("开始参数替换", parameter_count=len(parameters))
-            
-            # 深拷贝数据以避免修改原始数据
-            import copy
-            processed_data = copy.deepcopy(uqm_data)
-            
-            # 先处理条件过滤器
-            processed_data = self._process_conditional_filters(processed_data, parameters)
+            self.log_debug("开始参数替换", parameter_count=len(parameters))
             
-            # 将数据转换为JSON字符串进行参数替换
-            import json
-            data_str = json.dumps(processed_data, ensure_ascii=False)
+            # 复制模板并在编译时找到的占位符位置绑定参数值
+            processed_data = plan.bind(parameters)
             
-            # 替换参数
-            for param_name, param_value in parameters.items():
-                # 支持两种格式：${param_name} 和 $param_name
-                placeholder_with_braces = f"${{{param_name}}}"
-                placeholder_without_braces = f"${param_name}"
-                
-                # 根据参数值类型进行替换
-                if isinstance(param_value, str):
-                    replacement = json.dumps(param_value, ensure_ascii=False)
-                elif isinstance(param_value, (list, dict)):
-                    replacement = json.dumps(param_value, ensure_ascii=False)
-                else:
-                    replacement = json.dumps(param_value, ensure_ascii=False)
-                
-                # 先处理带大括号的格式 ${param_name}
-                # 先处理带引号的占位符（用于字符串值）
-                data_str = data_str.replace(f'"{placeholder_with_braces}"', replacement)
-                # 再处理不带引号的占位符（用于非字符串值）
-                data_str = data_str.replace(placeholder_with_braces, replacement)
-                
-                # 再处理不带大括号的格式 $param_name
-                # 先处理带引号的占位符（用于字符串值）
-                data_str = data_str.replace(f'"{placeholder_without_braces}"', replacement)
-                # 再处理不带引号的占位符（用于非字符串值）
-                data_str = data_str.replace(placeholder_without_braces, replacement)
-            
-            # 转换回字典
-            processed_data = json.loads(data_str)
-            
-            self.log_info("参数替换完成")
-            return processed_data
+            # 处理条件过滤器
+            return self._process_conditional_filters(processed_data, parameters)
             
+        except ValidationError as e:
+            self.log_error("参数替换失败", error=str(e))
+            raise
         except Exception as e:
             self.log_error("参数替换失败", error=str(e))
             raise ValidationError(f"参数替换失败: {e}")
@@ -392,37 +645,88 @@ class UQMEngine(LoggerMixin):
             self.log_warning(f"表达式评估失败: {expression} -> {eval_expression}, 错误: {e}")
             return False
     
-    def _generate_cache_key(self, uqm_data: Dict[str, Any], 
-                           parameters: Dict[str, Any]) -> str:
+    def _get_plan(self, uqm_data: Dict[str, Any], template_fingerprint: str) -> CompiledPlan:
+        """
+        获取UQM模板的查询计划，未缓存时解析并验证
+        
+        Args:
+            uqm_data: 参数替换前的UQM数据（模板）
+            template_fingerprint: UQM模板指纹
+            
+        Returns:
+            查询计划
+        """
+        plan = self.plan_cache.get_or_compile(
+            template_fingerprint, lambda: self.parser.parse(uqm_data)
+        )
+        if plan.hits:
+            self.log_debug("命中查询计划缓存", fingerprint=template_fingerprint)
+        return plan
+    
+    def _generate_cache_key(self, template_fingerprint: str, 
+                           parameters: Dict[str, Any],
+                           options: Optional[Dict[str, Any]] = None) -> str:
         """
         生成缓存键
         
+        参数替换的结果完全由UQM模板和参数值决定，因此缓存键由模板指纹和参数
+        指纹组成，不需要序列化参数替换后的整个UQM；同一模板的不同参数共享
+        模板指纹前缀。分页请求的每一页是不同的结果，缓存键后再加上分页选项的指纹。
+        
         Args:
-            uqm_data: UQM数据
+            template_fingerprint: 参数替换前的UQM数据（模板）的指纹
             parameters: 参数
+            options: 执行选项
             
         Returns:
             缓存键
         """
         try:
-            # 创建包含UQM数据和参数的字典
-            cache_data = {
-                "uqm": uqm_data,
-                "parameters": parameters
+            cache_key = f"uqm_cache:{template_fingerprint}:{fingerprint(parameters)}"
+            pagination = {
+                key: options[key]
+                for key in (*PAGINATION_OPTION_KEYS, "pagination_target_step")
+                if options and options.get(key) is not None
             }
-            
-            # 序列化并生成hash
-            import json
-            data_str = json.dumps(cache_data, sort_keys=True)
-            cache_key = hashlib.md5(data_str.encode('utf-8')).hexdigest()
-            
-            return f"uqm_cache:{cache_key}"
+            if pagination:
+                cache_key = f"{cache_key}:{fingerprint(pagination)}"
+            return cache_key
             
         except Exception as e:
             self.log_error("生成缓存键失败", error=str(e))
             # 如果生成缓存键失败，返回一个基于时间的键（不会命中缓存）
             return f"uqm_cache:no_cache_{int(time.time())}"
     
+    def _get_cache_tags(self, processed_data: Dict[str, Any]) -> List[str]:
+        """
+        获取查询结果的缓存标签：所有步骤读取的数据库表
+        
+        Args:
+            processed_data: 参数替换后的UQM数据
+            
+        Returns:
+            排序后的表名列表
+        """
+        step_tables = get_step_tables(processed_data["steps"], processed_data.get("dependencies"))
+        return sorted({table for tables in step_tables.values() for table in tables})
+    
+    def _generate_flight_key(self, cache_key: str, options: Dict[str, Any]) -> Optional[str]:
+        """
+        生成请求合并键
+        
+        分页等执行选项会改变返回结果，因此合并键在缓存键之外还包含执行选项
+        
+        Args:
+            cache_key: 缓存键
+            options: 执行选项
+            
+        Returns:
+            请求合并键，缓存键生成失败时返回None
+        """
+        if cache_key.startswith("uqm_cache:no_cache_"):
+            return None
+        return f"{cache_key}:{fingerprint(options)}"
+    
     def _extract_pagination_options(self, options: Dict[str, Any], 
                                    processed_data: Dict[str, Any],
                                    pagination_target_step: str) -> Optional[Dict[str, Any]]:
@@ -439,9 +743,15 @@ class UQMEngine(LoggerMixin):
         """
         page = options.get("page")
         page_size = options.get("page_size")
-        
-        # 检查是否提供了分页参数
-        if not page or not page_size:
+        mode = options.get("pagination_mode") or OFFSET_MODE
+        if mode not in PAGINATION_MODES:
+            raise ValidationError(f"不支持的分页模式: {mode}，可选值: {', '.join(PAGINATION_MODES)}")
+        count_mode = (options.get("count_mode") or self.settings.PAGINATION_COUNT_MODE).lower()
+        if count_mode not in COUNT_MODES:
+            raise ValidationError(f"不支持的总数计算方式: {count_mode}，可选值: {', '.join(COUNT_MODES)}")
+
+        # 检查是否提供了分页参数，keyset分页不需要页码
+        if not page_size or (mode == OFFSET_MODE and not page):
             return None
         
         # 检查目标步骤是否存在且为query类型
@@ -459,13 +769,23 @@ class UQMEngine(LoggerMixin):
         
         self.log_info(
             f"应用分页到步骤 '{pagination_target_step}'",
+            mode=mode,
             page=page,
-            page_size=page_size
+            page_size=page_size,
+            count_mode=count_mode
         )
         
+        if mode == KEYSET_MODE:
+            return {
+                "pagination_mode": KEYSET_MODE,
+                "page_size": int(page_size),
+                "cursor": options.get("cursor") or None
+            }
+        
         return {
             "page": int(page),
-            "page_size": int(page_size)
+            "page_size": int(page_size),
+            "count_mode": count_mode
         }
     
     def _build_pagination_info(self, pagination_options: Optional[Dict[str, Any]], 
@@ -483,20 +803,37 @@ class UQMEngine(LoggerMixin):
         if not pagination_options:
             return None
         
+        if pagination_options.get("pagination_mode") == KEYSET_MODE:
+            if "has_more" not in target_step_result:
+                return None
+            return {
+                "mode": KEYSET_MODE,
+                "page_size": pagination_options["page_size"],
+                "next_cursor": target_step_result.get("next_cursor"),
+                "has_more": target_step_result["has_more"]
+            }
+        
         total_count = target_step_result.get("total_count")
-        if total_count is None:
+        count_mode = target_step_result.get("count_mode", COUNT_EXACT)
+        if total_count is None and count_mode != COUNT_NONE:
             return None
         
         page = pagination_options["page"]
         page_size = pagination_options["page_size"]
-        total_pages = (total_count + page_size - 1) // page_size
+        total_pages = None
+        if total_count is not None:
+            total_pages = (total_count + page_size - 1) // page_size
         
-        return {
+        pagination_info = {
             "page": page,
             "page_size": page_size,
             "total_items": total_count,
             "total_pages": total_pages
         }
+        # 总数不是精确计数时注明来源：cached可能略旧，estimated是估算值，none不计算
+        if count_mode != COUNT_EXACT:
+            pagination_info["count_mode"] = count_mode
+        return pagination_info
     
     def _build_step_results(self, step_results: Dict[str, Any]) -> List[StepResult]:
         """
@@ -1,11 +1,11 @@
 """
 步骤执行器模块
-负责按顺序执行UQM定义的各个步骤
+负责按依赖关系调度执行UQM定义的各个步骤
 """
 
+import asyncio
 import time
-import hashlib
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 from dataclasses import dataclass
 
 from src.steps.query_step import QueryStep
@@ -14,21 +14,31 @@ from src.steps.pivot_step import PivotStep
 from src.steps.unpivot_step import UnpivotStep
 from src.steps.union_step import UnionStep
 from src.steps.assert_step import AssertStep
-from src.core.cache import BaseCacheManager
+from src.core.batch import as_rows, to_columnar
+from src.core.cache import BaseCacheManager, CacheEntry, unwrap_cache_entry
+from src.core.fingerprint import chain_fingerprint, fingerprint
+from src.core.parser import get_step_dependencies, get_step_tables
+from src.core.pushdown import PushdownPlan, plan_pushdown
+from src.core.refresh import get_background_refresher
+from src.core.singleflight import fill_cache_once, get_single_flight
+from src.core.step_store import StepDataStore
 from src.connectors.base import BaseConnectorManager
+from src.config.settings import get_settings
 from src.utils.logging import LoggerMixin
 from src.utils.exceptions import ExecutionError
+from src.utils.pagination import PAGINATION_OPTION_KEYS
 
 
 @dataclass
 class ExecutionResult:
     """执行结果数据类"""
     step_results: Dict[str, Any]
-    step_data: Dict[str, List[Dict[str, Any]]]
+    step_data: StepDataStore
+    memory_stats: Optional[Dict[str, Any]] = None
     
     def get_step_data(self, step_name: str) -> Optional[List[Dict[str, Any]]]:
-        """获取指定步骤的数据"""
-        return self.step_data.get(step_name)
+        """获取指定步骤的数据，列式数据在这里转换为字典列表"""
+        return as_rows(self.step_data.get(step_name))
 
 
 class Executor(LoggerMixin):
@@ -39,7 +49,10 @@ class Executor(LoggerMixin):
                  cache_manager: BaseCacheManager,
                  options: Optional[Dict[str, Any]] = None,
                  pagination_target_step: Optional[str] = None,
-                 pagination_options: Optional[Dict[str, Any]] = None):
+                 pagination_options: Optional[Dict[str, Any]] = None,
+                 execution_order: Optional[List[str]] = None,
+                 dependencies: Optional[Dict[str, List[str]]] = None,
+                 output_step: Optional[str] = None):
         """
         初始化执行器
         
@@ -50,6 +63,9 @@ class Executor(LoggerMixin):
             options: 执行选项
             pagination_target_step: 分页目标步骤名称
             pagination_options: 分页选项
+            execution_order: 解析器给出的拓扑执行顺序
+            dependencies: 步骤依赖关系，未提供时根据步骤配置推断
+            output_step: 输出步骤名称，提供时其余步骤的数据在不再被依赖后释放
         """
         self.steps = steps
         self.connector_manager = connector_manager
@@ -57,10 +73,29 @@ class Executor(LoggerMixin):
         self.options = options or {}
         self.pagination_target_step = pagination_target_step
         self.pagination_options = pagination_options or {}
+        self.dependencies = dependencies or get_step_dependencies(steps)
+        self.single_flight = get_single_flight("step")
+        self.execution_order = execution_order or [step["name"] for step in steps]
+        # 每个步骤（含上游步骤）读取的数据库表，作为步骤缓存的标签
+        self.step_tables = get_step_tables(steps, self.dependencies)
+        
+        self.step_configs = {step["name"]: step for step in steps}
+        # 步骤缓存键，按需生成
+        self.step_keys: Dict[str, str] = {}
         
         # 步骤执行结果存储
         self.step_results: Dict[str, Any] = {}
-        self.step_data: Dict[str, List[Dict[str, Any]]] = {}
+        # 批量预读的步骤缓存：步骤名称 -> 缓存数据（未命中为None）
+        self.prefetched_cache: Dict[str, Any] = {}
+        # 合并到数据库中执行的query步骤不读取步骤数据
+        self.pushdown = self._plan_pushdown(output_step)
+        self.run_dependencies = self.pushdown.run_dependencies(self.dependencies)
+        self.step_data = StepDataStore(
+            self.run_dependencies,
+            retained_steps=[output_step] if output_step else None,
+            spill_threshold_bytes=self._get_spill_threshold_bytes(),
+            spill_dir=get_settings().STEP_DATA_SPILL_DIR
+        )
         
         # 步骤类型映射
         self.step_classes = {
@@ -76,53 +111,258 @@ class Executor(LoggerMixin):
         """
         执行所有步骤
         
+        依赖已就绪的步骤会被并发调度，单个请求内的并发度由
+        options.max_parallel_steps（默认取MAX_PARALLEL_STEPS配置）限制。
+        
         Returns:
             执行结果
             
         Raises:
             ExecutionError: 执行失败
         """
+        completed = False
         try:
-            self.log_info("开始执行步骤", step_count=len(self.steps))
+            max_parallel_steps = self._get_max_parallel_steps()
+            self.log_info(
+                "开始执行步骤",
+                step_count=len(self.steps),
+                max_parallel_steps=max_parallel_steps
+            )
             
-            for step_config in self.steps:
-                step_name = step_config["name"]
-                
-                try:
-                    # 执行单个步骤
-                    await self._execute_step(step_config)
-                    
-                    self.log_info(f"步骤 {step_name} 执行完成")
+            step_configs = {step["name"]: step for step in self.steps}
+            order = [name for name in self.execution_order if name in step_configs]
+            order.extend(name for name in step_configs if name not in order)
+            
+            # 已合并到其他步骤SQL中的步骤不单独执行
+            for step_name in order:
+                if step_name in self.pushdown.inlined:
+                    self._record_inlined_step(step_configs[step_name])
+            order = [name for name in order if name not in self.pushdown.inlined]
+            
+            semaphore = asyncio.Semaphore(max_parallel_steps)
+            waiting: Dict[str, Set[str]] = {
+                name: set(self.run_dependencies.get(name, [])) & set(step_configs)
+                for name in order
+            }
+            finished: Set[str] = set()
+            failed: Set[str] = set()
+            running: Dict[asyncio.Task, str] = {}
+            
+            await self._prefetch_step_cache(order)
+            
+            try:
+                while waiting or running:
+                    # 启动所有依赖已完成的步骤
+                    for step_name in order:
+                        if step_name not in waiting or waiting[step_name] - finished:
+                            continue
+                        
+                        failed_dependencies = waiting.pop(step_name) & failed
+                        if failed_dependencies:
+                            self._record_skipped_step(step_configs[step_name], failed_dependencies)
+                            self.step_data.release(step_name, acquired=False)
+                            finished.add(step_name)
+                            failed.add(step_name)
+                            continue
+                        
+                        self.step_data.acquire(step_name)
+                        task = asyncio.create_task(
+                            self._execute_step_with_limit(semaphore, step_configs[step_name])
+                        )
+                        running[task] = step_name
                     
-                except Exception as e:
-                    self.log_error(f"步骤 {step_name} 执行失败", error=str(e))
+                    if not running:
+                        if waiting:
+                            raise ExecutionError(f"无法调度的步骤（存在循环依赖）: {sorted(waiting)}")
+                        break
                     
-                    # 记录步骤执行失败
-                    self.step_results[step_name] = {
-                        "type": step_config["type"],
-                        "status": "failed",
-                        "error": str(e),
-                        "execution_time": 0.0,
-                        "row_count": 0,
-                        "cache_hit": False
-                    }
+                    done, _ = await asyncio.wait(
+                        running.keys(), return_when=asyncio.FIRST_COMPLETED
+                    )
                     
-                    # 根据选项决定是否继续执行
-                    if not self.options.get("continue_on_error", False):
-                        raise ExecutionError(f"步骤 {step_name} 执行失败: {e}")
+                    for task in done:
+                        step_name = running.pop(task)
+                        finished.add(step_name)
+                        self.step_data.release(step_name)
+                        error = task.exception()
+                        
+                        if error is None:
+                            self.log_info(f"步骤 {step_name} 执行完成")
+                            continue
+                        
+                        failed.add(step_name)
+                        self.log_error(f"步骤 {step_name} 执行失败", error=str(error))
+                        
+                        # 记录步骤执行失败
+                        self.step_results[step_name] = {
+                            "type": step_configs[step_name]["type"],
+                            "status": "failed",
+                            "error": str(error),
+                            "execution_time": 0.0,
+                            "row_count": 0,
+                            "cache_hit": False
+                        }
+                        
+                        # 根据选项决定是否继续执行
+                        if not self.options.get("continue_on_error", False):
+                            raise ExecutionError(f"步骤 {step_name} 执行失败: {error}")
+            finally:
+                # 出错时取消仍在执行的步骤
+                for task in running:
+                    task.cancel()
+                if running:
+                    await asyncio.gather(*running.keys(), return_exceptions=True)
+            
+            # 按步骤定义顺序整理执行结果
+            self.step_results = {
+                name: self.step_results[name] for name in step_configs if name in self.step_results
+            }
             
             self.log_info("所有步骤执行完成")
             
-            return ExecutionResult(
+            memory_stats = self.step_data.get_stats()
+            self.log_info("步骤数据内存统计", **memory_stats)
+            
+            result = ExecutionResult(
                 step_results=self.step_results,
-                step_data=self.step_data
+                step_data=self.step_data,
+                memory_stats=memory_stats
             )
+            completed = True
+            return result
             
         except ExecutionError:
             raise
         except Exception as e:
             self.log_error("步骤执行过程出现未知错误", error=str(e), exc_info=True)
             raise ExecutionError(f"步骤执行失败: {e}")
+        finally:
+            # 保留的步骤不会溢写，执行结束后溢写文件都不再需要；全部保留时
+            # 调用方还要读取溢写的数据，读取后通过step_data.close()删除
+            if not completed or self.step_data.retained_steps is not None:
+                self.step_data.close()
+    
+    async def _execute_step_with_limit(self, semaphore: asyncio.Semaphore,
+                                       step_config: Dict[str, Any]) -> None:
+        """
+        在并发度限制内执行单个步骤
+        
+        Args:
+            semaphore: 请求级并发信号量
+            step_config: 步骤配置
+        """
+        async with semaphore:
+            await self._execute_step(step_config)
+    
+    def _record_skipped_step(self, step_config: Dict[str, Any],
+                             failed_dependencies: Set[str]) -> None:
+        """
+        记录因依赖步骤失败而跳过的步骤
+        
+        Args:
+            step_config: 步骤配置
+            failed_dependencies: 失败的依赖步骤
+        """
+        step_name = step_config["name"]
+        error = f"依赖步骤执行失败: {', '.join(sorted(failed_dependencies))}"
+        self.log_warning(f"跳过步骤 {step_name}", error=error)
+        
+        self.step_results[step_name] = {
+            "type": step_config["type"],
+            "status": "skipped",
+            "error": error,
+            "execution_time": 0.0,
+            "row_count": 0,
+            "cache_hit": False
+        }
+    
+    def _record_inlined_step(self, step_config: Dict[str, Any]) -> None:
+        """
+        记录已合并到下游步骤SQL中、不单独执行的步骤
+        
+        Args:
+            step_config: 步骤配置
+        """
+        self.step_results[step_config["name"]] = {
+            "type": step_config["type"],
+            "status": "inlined",
+            "execution_time": 0.0,
+            "row_count": 0,
+            "cache_hit": False
+        }
+    
+    def _plan_pushdown(self, output_step: Optional[str]) -> PushdownPlan:
+        """
+        规划合并到数据库中执行的query步骤
+        
+        options.query_pushdown（默认取QUERY_PUSHDOWN_ENABLED配置）为False时不合并。
+        未指定输出步骤时所有步骤的数据都需要保留，只合并、不省略上游步骤。
+        
+        Args:
+            output_step: 输出步骤名称
+            
+        Returns:
+            查询下推计划
+        """
+        enabled = self.options.get("query_pushdown")
+        if enabled is None:
+            enabled = get_settings().QUERY_PUSHDOWN_ENABLED
+        if not enabled:
+            return PushdownPlan()
+        
+        retained_steps = None
+        if output_step:
+            retained_steps = {output_step}
+            if self.pagination_target_step:
+                retained_steps.add(self.pagination_target_step)
+        
+        # 分页目标步骤的结果只是注入分页选项后的一页，下游步骤不能把它作为CTE重新计算
+        runtime_steps = set()
+        if self.pagination_target_step and self.pagination_options:
+            runtime_steps.add(self.pagination_target_step)
+        
+        plan = plan_pushdown(self.steps, self.dependencies, retained_steps, runtime_steps)
+        if plan.sources:
+            self.log_info(
+                "query步骤合并到数据库中执行",
+                steps={name: list(sources) for name, sources in plan.sources.items()},
+                inlined=sorted(plan.inlined)
+            )
+        return plan
+    
+    def _get_max_parallel_steps(self) -> int:
+        """
+        获取单个请求内允许并发执行的最大步骤数
+        
+        Returns:
+            最大并发步骤数（至少为1）
+        """
+        value = self.options.get("max_parallel_steps")
+        if value is None:
+            value = get_settings().MAX_PARALLEL_STEPS
+        
+        try:
+            return max(1, int(value))
+        except (ValueError, TypeError):
+            self.log_warning(f"无效的max_parallel_steps: {value}，使用串行执行")
+            return 1
+    
+    def _get_spill_threshold_bytes(self) -> int:
+        """
+        获取步骤数据溢写阈值
+        
+        Returns:
+            溢写阈值字节数，0表示不溢写
+        """
+        value = self.options.get("spill_threshold_mb")
+        if value is None:
+            value = get_settings().STEP_DATA_SPILL_THRESHOLD_MB
+        
+        try:
+            return max(0, int(float(value) * 1024 * 1024))
+        except (ValueError, TypeError):
+            self.log_warning(f"无效的spill_threshold_mb: {value}，不启用溢写")
+            return 0
     
     async def _execute_step(self, step_config: Dict[str, Any]) -> None:
         """
@@ -133,7 +373,6 @@ class Executor(LoggerMixin):
         """
         step_name = step_config["name"]
         step_type = step_config["type"]
-        config = step_config["config"]
         
         start_time = time.time()
         
@@ -141,12 +380,13 @@ class Executor(LoggerMixin):
             self.log_info(f"开始执行步骤: {step_name} (类型: {step_type})")
             
             # 检查缓存
-            cache_key = self._generate_cache_key(step_config)
+            cache_key = self._get_cache_key(step_name)
             cached_data = None
             cache_hit = False
             
-            if self.options.get("cache_enabled", False):
-                cached_data = await self.cache_manager.get(cache_key)
+            use_cache = self.options.get("cache_enabled", False)
+            if use_cache and not self.options.get("cache_refresh", False):
+                cached_data = await self._read_step_cache(step_config, cache_key)
                 if cached_data is not None:
                     cache_hit = True
                     self.log_info(f"步骤 {step_name} 命中缓存")
@@ -160,18 +400,13 @@ class Executor(LoggerMixin):
                     step_data = step_execution_result
             else:
                 # 执行步骤
-                step_execution_result = await self._execute_step_by_type(step_type, config, step_name)
+                step_execution_result, cache_hit = await self._run_step(step_config, cache_key)
                 
                 # 处理分页查询的返回结果
                 if isinstance(step_execution_result, dict) and "data" in step_execution_result:
                     step_data = step_execution_result["data"]
                 else:
                     step_data = step_execution_result
-                
-                # 缓存结果
-                if self.options.get("cache_enabled", False) and step_data:
-                    cache_ttl = self._parse_ttl(config.get("cache_ttl", "1h"))
-                    await self.cache_manager.set(cache_key, step_data, cache_ttl)
             
             execution_time = time.time() - start_time
             
@@ -184,11 +419,11 @@ class Executor(LoggerMixin):
                 "cache_hit": cache_hit
             }
             
-            # 如果这是一个分页查询步骤，记录总数
-            if (isinstance(step_execution_result, dict) and 
-                "total_count" in step_execution_result and
-                step_name == self.pagination_target_step):
-                step_result["total_count"] = step_execution_result["total_count"]
+            # 如果这是一个分页查询步骤，记录总数或keyset分页的下一页游标
+            if isinstance(step_execution_result, dict) and step_name == self.pagination_target_step:
+                for key in ("total_count", "count_mode", "next_cursor", "has_more"):
+                    if key in step_execution_result:
+                        step_result[key] = step_execution_result[key]
             
             self.step_results[step_name] = step_result
             
@@ -211,6 +446,128 @@ class Executor(LoggerMixin):
             )
             raise ExecutionError(f"步骤 {step_name} 执行失败: {e}")
     
+    async def _run_step(self, step_config: Dict[str, Any], cache_key: str) -> Tuple[Any, bool]:
+        """
+        执行步骤并写入缓存
+        
+        同一进程内同时执行的相同步骤（相同步骤缓存键）只执行一次，其余等待并
+        共享结果；启用缓存时还通过缓存填充锁与其他进程合并。步骤只读取依赖数据
+        并生成新的行，因此共享的结果不会被其他请求修改。
+        
+        Args:
+            step_config: 步骤配置
+            cache_key: 步骤缓存键
+            
+        Returns:
+            (步骤执行结果, 是否是其他进程写入缓存的结果)
+        """
+        step_name = step_config["name"]
+        
+        async def compute():
+            return await self._execute_and_cache_step(step_config, cache_key)
+        
+        async def run():
+            if self.options.get("cache_enabled", False):
+                result, from_cache = await fill_cache_once(
+                    self.cache_manager, cache_key, compute, get_settings().CACHE_LOCK_TIMEOUT
+                )
+                return unwrap_cache_entry(result), from_cache
+            return await compute(), False
+        
+        flight_key = self._generate_flight_key(step_name, cache_key)
+        if not get_settings().REQUEST_COALESCING_ENABLED or flight_key is None:
+            return await compute(), False
+        
+        (result, from_cache), shared = await self.single_flight.do(flight_key, run)
+        if shared:
+            self.log_info(f"步骤 {step_name} 使用同时执行的相同步骤的结果")
+        return result, from_cache
+    
+    async def _execute_and_cache_step(self, step_config: Dict[str, Any], cache_key: str) -> Any:
+        """
+        执行步骤，启用缓存时写入缓存
+        
+        缓存数据的软TTL取步骤配置的cache_ttl，之后的cache_stale_ttl时间内
+        （默认取CACHE_STALE_TTL配置）仍可返回旧数据并在后台刷新
+        
+        Args:
+            step_config: 步骤配置
+            cache_key: 步骤缓存键
+            
+        Returns:
+            步骤执行结果
+        """
+        config = step_config["config"]
+        start_time = time.time()
+        result = await self._execute_step_by_type(step_config["type"], config, step_config["name"])
+        
+        # 缓存结果，按列保存以减小编码后的体积，命中时也无需逐行重建字典；
+        # 分页结果连同总数、下一页游标一起缓存
+        paged = isinstance(result, dict) and "data" in result
+        step_data = result["data"] if paged else result
+        if self.options.get("cache_enabled", False) and step_data:
+            cache_ttl = self._parse_ttl(config.get("cache_ttl", "1h"))
+            stale_ttl = self._parse_ttl(
+                config.get("cache_stale_ttl", get_settings().CACHE_STALE_TTL)
+            )
+            value = {**result, "data": to_columnar(step_data)} if paged else to_columnar(step_data)
+            entry = CacheEntry.create(value, cache_ttl, time.time() - start_time)
+            tags = self.step_tables.get(step_config["name"])
+            await self.cache_manager.set(cache_key, entry, cache_ttl + stale_ttl, tags=tags)
+        return result
+    
+    async def _read_step_cache(self, step_config: Dict[str, Any], cache_key: str) -> Optional[Any]:
+        """
+        读取步骤缓存
+        
+        缓存数据过了软过期时间或需要提前刷新时，没有依赖的步骤返回缓存数据并在
+        后台刷新；依赖其他步骤的步骤无法脱离本次执行刷新，过了软过期时间按未命中
+        处理。
+        
+        Args:
+            step_config: 步骤配置
+            cache_key: 步骤缓存键
+            
+        Returns:
+            缓存数据，未命中时返回None
+        """
+        step_name = step_config["name"]
+        if step_name in self.prefetched_cache:
+            cached = self.prefetched_cache.pop(step_name)
+        else:
+            cached = await self.cache_manager.get(cache_key)
+        
+        if not isinstance(cached, CacheEntry):
+            return cached
+        
+        settings = get_settings()
+        if cached.should_refresh(settings.CACHE_EARLY_REFRESH_BETA):
+            if self.dependencies.get(step_name):
+                if cached.is_stale():
+                    return None
+            else:
+                get_background_refresher().schedule(
+                    self.cache_manager, cache_key,
+                    lambda: self._execute_and_cache_step(step_config, cache_key),
+                    settings.CACHE_LOCK_TIMEOUT
+                )
+        return cached.value
+    
+    def _generate_flight_key(self, step_name: str, cache_key: str) -> Optional[str]:
+        """
+        生成步骤合并键
+        
+        Args:
+            step_name: 步骤名称
+            cache_key: 步骤缓存键
+            
+        Returns:
+            步骤合并键，缓存键生成失败时返回None
+        """
+        if ":no_cache_" in cache_key:
+            return None
+        return cache_key
+    
     async def _execute_step_by_type(self, step_type: str, 
                                    config: Dict[str, Any],
                                    step_name: str) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
@@ -253,8 +610,10 @@ class Executor(LoggerMixin):
         Returns:
             执行上下文
         """
-        # 复制选项，避免修改原始选项
-        context_options = self.options.copy()
+        # 复制选项，避免修改原始选项；分页选项只作用于分页目标步骤
+        context_options = {
+            key: value for key, value in self.options.items() if key not in PAGINATION_OPTION_KEYS
+        }
         
         # 如果这是分页目标步骤，注入分页选项
         if (step_name == self.pagination_target_step and 
@@ -267,41 +626,90 @@ class Executor(LoggerMixin):
             "cache_manager": self.cache_manager,
             "options": context_options,
             "step_data": self.step_data,
-            "get_source_data": self._get_source_data
+            "get_source_data": self._get_source_data,
+            "pushdown_sources": self.pushdown.sources.get(step_name),
+            "cache_tags": self.step_tables.get(step_name)
         }
         
         return context
     
-    def _get_source_data(self, source_name: Union[str, List[str]]) -> Union[List[Dict[str, Any]], Dict[str, List[Dict[str, Any]]]]:
+    def _get_source_data(
+        self, source_name: Union[str, List[str]], columnar: bool = False
+    ) -> Union[List[Dict[str, Any]], Dict[str, List[Dict[str, Any]]]]:
         """
         获取源步骤数据
         
         Args:
             source_name: 源步骤名称或名称列表
+            columnar: 是否按存储形式返回（可能是ColumnarBatch），
+                否则列式数据会转换为字典列表
             
         Returns:
             源步骤数据
         """
+        convert = (lambda data: data) if columnar else as_rows
+        
         if isinstance(source_name, str):
             if source_name not in self.step_data:
                 raise ExecutionError(f"源步骤数据不存在: {source_name}")
-            return self.step_data[source_name]
+            return convert(self.step_data[source_name])
         
         elif isinstance(source_name, list):
             result = {}
             for name in source_name:
                 if name not in self.step_data:
                     raise ExecutionError(f"源步骤数据不存在: {name}")
-                result[name] = self.step_data[name]
+                result[name] = convert(self.step_data[name])
             return result
         
         else:
             raise ExecutionError(f"无效的源步骤名称类型: {type(source_name)}")
     
+    async def _prefetch_step_cache(self, step_names: List[str]) -> None:
+        """
+        缓存开启时，一次批量读取所有步骤的缓存
+        
+        步骤缓存键不依赖步骤数据，可以在执行前确定，合并为一次往返
+        （Redis使用MGET）。
+        
+        Args:
+            step_names: 步骤名称列表
+        """
+        self.prefetched_cache = {}
+        if not self.options.get("cache_enabled", False) or self.options.get("cache_refresh", False):
+            return
+        
+        cache_keys = {name: self._get_cache_key(name) for name in step_names}
+        if len(cache_keys) < 2:
+            return
+        
+        cached = await self.cache_manager.get_many(list(cache_keys.values()))
+        self.prefetched_cache = {name: cached.get(key) for name, key in cache_keys.items()}
+        self.log_info("批量读取步骤缓存", steps=len(cache_keys), hits=len(cached))
+    
+    def _get_cache_key(self, step_name: str) -> str:
+        """
+        获取步骤缓存键，首次获取时生成
+        
+        Args:
+            step_name: 步骤名称
+            
+        Returns:
+            缓存键
+        """
+        if step_name not in self.step_keys:
+            self.step_keys[step_name] = self._generate_cache_key(self.step_configs[step_name])
+        return self.step_keys[step_name]
+    
     def _generate_cache_key(self, step_config: Dict[str, Any]) -> str:
         """
         生成步骤缓存键
         
+        缓存键由步骤配置的指纹和上游步骤的缓存键串联得到。上游步骤的结果由
+        其缓存键确定，因此不需要序列化上游步骤的数据计算hash，所有步骤的缓存键
+        在执行前即可确定。分页目标步骤的结果还取决于分页选项，缓存键中加入
+        分页选项，下游步骤的缓存键也随之区分。
+        
         Args:
             step_config: 步骤配置
             
@@ -309,35 +717,16 @@ class Executor(LoggerMixin):
             缓存键
         """
         try:
-            # 创建包含步骤配置和依赖数据的字典
-            cache_data = {
-                "step_config": step_config,
-                "dependency_data": {}
-            }
-            
-            # 添加依赖步骤的数据hash
-            config = step_config.get("config", {})
-            if "source" in config:
-                source = config["source"]
-                if isinstance(source, str):
-                    cache_data["dependency_data"][source] = self._get_data_hash(source)
-                elif isinstance(source, list):
-                    for src in source:
-                        cache_data["dependency_data"][src] = self._get_data_hash(src)
-            
-            if "sources" in config:
-                sources = config["sources"]
-                if isinstance(sources, list):
-                    for src in sources:
-                        cache_data["dependency_data"][src] = self._get_data_hash(src)
-            
-            # 序列化并生成hash
-            import json
-            data_str = json.dumps(cache_data, sort_keys=True)
-            cache_key = hashlib.md5(data_str.encode('utf-8')).hexdigest()
-            
             step_name = step_config["name"]
-            return f"step_cache:{step_name}:{cache_key}"
+            upstream = {
+                dependency: self._get_cache_key(dependency)
+                for dependency in self.dependencies.get(step_name, [])
+                if dependency in self.step_configs
+            }
+            own = fingerprint(step_config)
+            if step_name == self.pagination_target_step and self.pagination_options:
+                own = fingerprint([own, self.pagination_options])
+            return f"step_cache:{step_name}:{chain_fingerprint(own, upstream)}"
             
         except Exception as e:
             self.log_error("生成步骤缓存键失败", error=str(e))
@@ -345,27 +734,6 @@ class Executor(LoggerMixin):
             step_name = step_config.get("name", "unknown")
             return f"step_cache:{step_name}:no_cache_{int(time.time())}"
     
-    def _get_data_hash(self, step_name: str) -> str:
-        """
-        获取步骤数据的hash值
-        
-        Args:
-            step_name: 步骤名称
-            
-        Returns:
-            数据hash值
-        """
-        try:
-            if step_name not in self.step_data:
-                return "no_data"
-            
-            import json
-            data_str = json.dumps(self.step_data[step_name], sort_keys=True)
-            return hashlib.md5(data_str.encode('utf-8')).hexdigest()
-            
-        except Exception:
-            return "hash_error"
-    
     def _parse_ttl(self, ttl_str: str) -> int:
         """
         解析TTL字符串
@@ -0,0 +1,49 @@
+"""
+结构指纹模块
+为UQM模板、参数和步骤配置生成稳定的摘要，用于缓存键和请求合并键
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+
+def fingerprint(value: Any) -> str:
+    """
+    生成JSON结构的指纹
+
+    键按顺序排列后紧凑序列化，再取128位blake2b摘要；字典键的顺序和空白
+    不影响结果。
+
+    Args:
+        value: 可JSON序列化的数据，其他类型按字符串处理
+
+    Returns:
+        32位十六进制指纹
+    """
+    data = json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def chain_fingerprint(own: str, upstream: Optional[Dict[str, str]] = None) -> str:
+    """
+    把自身指纹与上游指纹串联为新的指纹
+
+    依赖步骤的缓存键由自身配置的指纹和上游步骤的缓存键串联得到，不需要
+    序列化上游步骤的数据。
+
+    Args:
+        own: 自身指纹
+        upstream: 上游名称到上游指纹的映射
+
+    Returns:
+        32位十六进制指纹
+    """
+    digest = hashlib.blake2b(own.encode("utf-8"), digest_size=16)
+    for name, value in sorted((upstream or {}).items()):
+        digest.update(b"\x00")
+        digest.update(name.encode("utf-8"))
+        digest.update(b"=")
+        digest.update(value.encode("utf-8"))
+    return digest.hexdigest()
+
@@ -62,7 +62,8 @@ class UQMParser(LoggerMixin):
             # 验证步骤依赖关系
             self._validate_step_dependencies(steps)
             
-            # 解析步骤执行顺序
+            # 解析步骤依赖关系和执行顺序
+            dependencies = get_step_dependencies(steps)
             execution_order = self._resolve_step_order(steps)
             
             parsed_data = {
@@ -70,7 +71,8 @@ class UQMParser(LoggerMixin):
                 "steps": steps,
                 "parameters": parameters,
                 "output": output_step,
-                "execution_order": execution_order
+                "execution_order": execution_order,
+                "dependencies": dependencies
             }
             
             self.log_info(
@@ -310,29 +312,8 @@ class UQMParser(LoggerMixin):
             按执行顺序排列的步骤名称列表
         """
         # 构建依赖图
-        dependencies = {}
-        step_names = set()
-        
-        for step in steps:
-            step_name = step["name"]
-            step_names.add(step_name)
-            dependencies[step_name] = set()
-            
-            step_config = step.get("config", {})
-            
-            # 添加source依赖
-            if "source" in step_config:
-                source = step_config["source"]
-                if isinstance(source, str):
-                    dependencies[step_name].add(source)
-                elif isinstance(source, list):
-                    dependencies[step_name].update(source)
-            
-            # 添加sources依赖
-            if "sources" in step_config:
-                sources = step_config["sources"]
-                if isinstance(sources, list):
-                    dependencies[step_name].update(sources)
+        dependencies = get_step_dependencies(steps)
+        step_names = [step["name"] for step in steps]
         
         # 拓扑排序
         result = []
@@ -346,7 +327,7 @@ class UQMParser(LoggerMixin):
             if node not in visited:
                 temp_visited.add(node)
                 
-                for dep in dependencies.get(node, set()):
+                for dep in dependencies.get(node, []):
                     visit(dep)
                 
                 temp_visited.remove(node)
@@ -466,3 +447,166 @@ class UQMParser(LoggerMixin):
                 "output": {"type": "string"}
             }
         }
+
+
+def _referenced_step_name(reference: Any, step_names: Set[str]) -> Optional[str]:
+    """
+    从带别名的引用中提取步骤名称
+    
+    Args:
+        reference: 引用字符串，如 "customer_orders co"
+        step_names: 所有步骤名称
+        
+    Returns:
+        被引用的步骤名称，如果引用的是数据库表则返回None
+    """
+    if not isinstance(reference, str) or not reference.strip():
+        return None
+    
+    name = reference.split()[0]
+    return name if name in step_names else None
+
+
+def get_step_dependencies(steps: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+    """
+    分析每个步骤依赖的上游步骤
+    
+    除source/sources外，还会识别引用了其他步骤的data_source、
+    joins中的table/target以及字符串形式的lookup。
+    
+    Args:
+        steps: 步骤列表
+        
+    Returns:
+        步骤名称到其依赖步骤名称列表的映射（按步骤定义顺序）
+    """
+    step_names = {step["name"] for step in steps}
+    dependencies: Dict[str, List[str]] = {}
+    
+    for step in steps:
+        step_name = step["name"]
+        step_config = step.get("config", {}) or {}
+        references: List[Any] = []
+        
+        source = step_config.get("source")
+        if isinstance(source, list):
+            references.extend(source)
+        else:
+            references.append(source)
+        
+        sources = step_config.get("sources")
+        if isinstance(sources, list):
+            references.extend(sources)
+        
+        references.append(step_config.get("data_source"))
+        
+        for join in step_config.get("joins", []) or []:
+            if isinstance(join, dict):
+                references.append(join.get("target") or join.get("table"))
+        
+        lookup = step_config.get("lookup")
+        if isinstance(lookup, str):
+            references.append(lookup)
+        
+        step_dependencies: List[str] = []
+        for reference in references:
+            dependency = _referenced_step_name(reference, step_names)
+            if dependency and dependency != step_name and dependency not in step_dependencies:
+                step_dependencies.append(dependency)
+        
+        dependencies[step_name] = step_dependencies
+    
+    return dependencies
+
+
+def _table_tags(reference: Any, step_names: Set[str]) -> List[str]:
+    """
+    从带别名的引用中提取数据库表名，作为缓存标签
+    
+    带库名或模式名的表（如 "sales.orders"）同时返回完整名称和表名，
+    按表名失效时也能匹配。
+    
+    Args:
+        reference: 引用字符串，如 "sales.orders o"
+        step_names: 所有步骤名称
+        
+    Returns:
+        小写的表名列表，引用的是步骤时返回空列表
+    """
+    if not isinstance(reference, str) or not reference.strip():
+        return []
+    
+    name = reference.split()[0]
+    if name in step_names:
+        return []
+    
+    name = normalize_table_name(name)
+    tags = [name]
+    if "." in name:
+        tags.append(normalize_table_name(name.rsplit(".", 1)[1]))
+    return tags
+
+
+def normalize_table_name(name: str) -> str:
+    """
+    规范化表名：去掉引号和方括号并转为小写
+    
+    Args:
+        name: 表名，如 "`Orders`"
+        
+    Returns:
+        规范化后的表名
+    """
+    return name.strip().strip('`"[]').lower()
+
+
+def get_step_tables(steps: List[Dict[str, Any]],
+                    dependencies: Optional[Dict[str, List[str]]] = None) -> Dict[str, List[str]]:
+    """
+    分析每个步骤读取的数据库表，包括上游步骤读取的表
+    
+    表来自query步骤的data_source和joins中的table、enrich步骤对象形式的
+    lookup.table，用作缓存标签：源表变化时按表名使缓存失效。
+    
+    Args:
+        steps: 步骤列表
+        dependencies: 步骤依赖关系，未提供时根据步骤配置推断
+        
+    Returns:
+        步骤名称到排序后的表名列表的映射
+    """
+    step_names = {step["name"] for step in steps}
+    dependencies = dependencies or get_step_dependencies(steps)
+    direct_tables: Dict[str, Set[str]] = {}
+    
+    for step in steps:
+        step_config = step.get("config", {}) or {}
+        references: List[Any] = [step_config.get("data_source")]
+        
+        for join in step_config.get("joins", []) or []:
+            if isinstance(join, dict):
+                references.append(join.get("table"))
+        
+        lookup = step_config.get("lookup")
+        if isinstance(lookup, dict):
+            references.append(lookup.get("table"))
+        
+        direct_tables[step["name"]] = {
+            tag for reference in references for tag in _table_tags(reference, step_names)
+        }
+    
+    tables: Dict[str, List[str]] = {}
+    
+    def collect(step_name: str, visiting: Set[str]) -> Set[str]:
+        if step_name in tables:
+            return set(tables[step_name])
+        result = set(direct_tables.get(step_name, set()))
+        for dependency in dependencies.get(step_name, []):
+            if dependency not in visiting:
+                result |= collect(dependency, visiting | {step_name})
+        return result
+    
+    for step in steps:
+        tables[step["name"]] = sorted(collect(step["name"], set()))
+    
+    return tables
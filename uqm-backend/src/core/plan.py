@@ -0,0 +1,366 @@
+"""
+查询计划缓存模块
+缓存UQM模板解析、验证和拓扑排序的结果以及参数占位符的位置，之后相同模板的请求只需绑定参数
+"""
+
+import copy
+import json
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from src.config.settings import get_settings
+from src.utils.exceptions import ValidationError
+from src.utils.logging import LoggerMixin
+from src.utils.sql_builder import BOUND_PARAMETERS_KEY, template_marker
+
+
+# 参数占位符：${name} 或 $name
+PLACEHOLDER_PATTERN = re.compile(r"\$\{([A-Za-z_]\w*)\}|\$([A-Za-z_]\w*)")
+
+# 这些键下的内容由条件过滤器自行解析参数，绑定时不替换
+UNBOUND_KEYS = frozenset({"conditional"})
+
+# 占位符所在位置的类型：SQL文本中的参数作为绑定参数，标识符中的参数拒绝嵌入
+SQL_CONTEXT = "sql"
+IDENTIFIER_CONTEXT = "identifier"
+
+# query步骤中包含SQL文本（表达式、条件）的配置项
+SQL_TEXT_KEYS = frozenset(
+    {"dimensions", "metrics", "calculated_fields", "filters", "having", "joins"}
+)
+
+# 只能是表名、列名、关键字等标识符的配置项和字段，无法使用绑定参数
+IDENTIFIER_KEYS = frozenset({
+    "data_source", "table", "target", "columns", "group_by", "order_by",
+    "alias", "field", "operator", "direction", "aggregation", "type"
+})
+
+# 可以作为绑定参数嵌入SQL文本的参数值类型
+BINDABLE_TYPES = (str, int, float, bool, type(None))
+
+
+@dataclass
+class Placeholder:
+    """模板中包含参数占位符的字符串位置"""
+    path: Tuple[Union[str, int], ...]
+    text: str
+    # 整个字符串就是一个占位符时的参数名，绑定后得到参数值本身（保留类型）
+    name: Optional[str] = None
+    # 所在位置的类型：SQL_CONTEXT、IDENTIFIER_CONTEXT或None（普通文本）
+    context: Optional[str] = None
+
+
+@dataclass
+class CompiledPlan:
+    """
+    编译后的查询计划
+
+    template是解析器对UQM模板的解析结果（包含步骤、依赖关系和执行顺序），
+    在多个请求间共享，只能读取；placeholders是编译时找到的参数占位符位置，
+    每个请求通过bind复制模板后只替换这些位置。
+    """
+    fingerprint: str
+    template: Dict[str, Any]
+    template_json: str
+    placeholders: List[Placeholder] = field(default_factory=list)
+    compile_time: float = 0.0
+    hits: int = field(default=0, compare=False)
+
+    @classmethod
+    def compile(
+        cls, fingerprint: str, template: Dict[str, Any], compile_time: float = 0.0
+    ) -> "CompiledPlan":
+        """
+        创建查询计划
+
+        Args:
+            fingerprint: UQM模板指纹
+            template: 解析后的UQM模板
+            compile_time: 解析耗时(秒)
+
+        Returns:
+            查询计划，template是模板的独立副本
+        """
+        template_json = json.dumps(template, ensure_ascii=False)
+        template = json.loads(template_json)
+        return cls(
+            fingerprint=fingerprint,
+            template=template,
+            template_json=template_json,
+            placeholders=find_placeholders(template),
+            compile_time=compile_time
+        )
+
+    def bind(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        绑定参数，返回替换参数后的独立副本
+
+        Args:
+            parameters: 参数值字典
+
+        Returns:
+            参数替换后的UQM数据
+
+        Raises:
+            ValidationError: 参数值无法转换为字符串，或者参数无法绑定到所在的SQL位置
+        """
+        data = json.loads(self.template_json)
+        if not parameters:
+            return data
+
+        try:
+            for placeholder in self.placeholders:
+                if placeholder.context is None:
+                    value = bind_placeholder(placeholder, parameters)
+                else:
+                    value = bind_sql_placeholder(placeholder, parameters, data)
+                if value is placeholder.text:
+                    continue
+                container = data
+                for key in placeholder.path[:-1]:
+                    container = container[key]
+                container[placeholder.path[-1]] = value
+        except (ValueError, TypeError) as e:
+            raise ValidationError(f"参数替换失败: {e}")
+        return data
+
+
+def find_placeholders(template: Any) -> List[Placeholder]:
+    """
+    查找模板中包含参数占位符的字符串
+
+    Args:
+        template: 解析后的UQM模板
+
+    Returns:
+        占位符位置列表
+    """
+    placeholders = []
+
+    def visit(value: Any, path: Tuple[Union[str, int], ...]) -> None:
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if key not in UNBOUND_KEYS:
+                    visit(item, path + (key,))
+        elif isinstance(value, list):
+            for index, item in enumerate(value):
+                visit(item, path + (index,))
+        elif isinstance(value, str) and "$" in value and path:
+            match = PLACEHOLDER_PATTERN.search(value)
+            if match is None:
+                return
+            whole = PLACEHOLDER_PATTERN.fullmatch(value)
+            name = (whole.group(1) or whole.group(2)) if whole else None
+            context = placeholder_context(template, path)
+            placeholders.append(Placeholder(path=path, text=value, name=name, context=context))
+
+    visit(template, ())
+    return placeholders
+
+
+def placeholder_context(template: Any, path: Tuple[Union[str, int], ...]) -> Optional[str]:
+    """
+    判断占位符所在位置的类型
+
+    query步骤的表达式、条件和JOIN条件，以及enrich步骤查找表的where条件会拼接到
+    SQL文本中；结构化条件的value由SQL构建器整体绑定，按普通文本处理。
+
+    Args:
+        template: 解析后的UQM模板
+        path: 占位符位置
+
+    Returns:
+        SQL_CONTEXT、IDENTIFIER_CONTEXT，不会拼接到SQL中时为None
+    """
+    if len(path) < 4 or path[0] != "steps" or path[2] != "config":
+        return None
+    step_type = template["steps"][path[1]].get("type")
+    if step_type == "query":
+        keys = path[3:]
+    elif step_type == "enrich" and path[3] == "lookup" and len(path) > 4:
+        keys = path[4:]
+        if keys[0] == "where":
+            keys = ("filters",) + keys[1:]
+    else:
+        return None
+
+    if "value" in keys:
+        return None
+    if any(key in IDENTIFIER_KEYS for key in keys if isinstance(key, str)):
+        return IDENTIFIER_CONTEXT
+    if keys[0] in SQL_TEXT_KEYS:
+        return SQL_CONTEXT
+    return None
+
+
+def bind_placeholder(placeholder: Placeholder, parameters: Dict[str, Any]) -> Any:
+    """
+    计算占位符位置绑定参数后的值
+
+    整个字符串是一个占位符时得到参数值本身；占位符嵌在字符串中时，字符串
+    参数按原文插入，其他参数按JSON文本插入。未提供的参数保留占位符原文。
+
+    Args:
+        placeholder: 占位符位置
+        parameters: 参数值字典
+
+    Returns:
+        绑定后的值，没有可替换的参数时返回placeholder.text本身
+    """
+    if placeholder.name is not None:
+        if placeholder.name not in parameters:
+            return placeholder.text
+        value = parameters[placeholder.name]
+        return copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+
+    def replace(match: "re.Match[str]") -> str:
+        name = match.group(1) or match.group(2)
+        if name not in parameters:
+            return match.group(0)
+        value = parameters[name]
+        return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+
+    text = PLACEHOLDER_PATTERN.sub(replace, placeholder.text)
+    return placeholder.text if text == placeholder.text else text
+
+
+def bind_sql_placeholder(placeholder: Placeholder, parameters: Dict[str, Any],
+                         data: Dict[str, Any]) -> Any:
+    """
+    计算SQL文本中的占位符位置绑定参数后的值
+
+    嵌在SQL文本中的参数值不拼接到SQL中：占位符替换为参数标记，参数值保存到
+    步骤配置的bound_parameters中，构建查询时作为绑定参数传给数据库驱动。
+    占位符单独构成一个字符串字面量（'$name'）时连同引号替换为参数标记，参数值
+    按字符串绑定；嵌在更长的字符串字面量或标识符中的参数无法绑定，拒绝替换。
+    整个字符串就是一个占位符时与bind_placeholder相同。
+
+    Args:
+        placeholder: 占位符位置，context不为None
+        parameters: 参数值字典
+        data: 正在绑定的UQM数据副本
+
+    Returns:
+        绑定后的值，没有可替换的参数时返回placeholder.text本身
+
+    Raises:
+        ValueError: 参数无法绑定到所在的位置
+    """
+    if placeholder.name is not None:
+        return bind_placeholder(placeholder, parameters)
+
+    text = placeholder.text
+    config_key = placeholder.path[3]
+    parts = []
+    position = 0
+    for match in PLACEHOLDER_PATTERN.finditer(text):
+        name = match.group(1) or match.group(2)
+        if name not in parameters:
+            continue
+        if placeholder.context == IDENTIFIER_CONTEXT:
+            raise ValueError(f"参数 {name} 不能嵌在{config_key}的标识符中")
+        value = parameters[name]
+        if not isinstance(value, BINDABLE_TYPES):
+            raise ValueError(f"嵌在SQL中的参数 {name} 只能是字符串、数字、布尔值或null")
+
+        start, end = match.span()
+        if text.count("'", 0, start) % 2:
+            # 占位符在字符串字面量内
+            if text[start - 1] != "'" or text[end:end + 1] != "'":
+                raise ValueError(f"参数 {name} 嵌在{config_key}的字符串字面量中，无法作为绑定参数")
+            start, end = start - 1, end + 1
+            if not isinstance(value, str):
+                value = json.dumps(value, ensure_ascii=False)
+
+        config = data["steps"][placeholder.path[1]]["config"]
+        bound_values = config.setdefault(BOUND_PARAMETERS_KEY, {})
+        key = f"{name}_{len(bound_values)}"
+        bound_values[key] = value
+        parts.append(text[position:start])
+        parts.append(template_marker(key))
+        position = end
+
+    if not parts:
+        return text
+    parts.append(text[position:])
+    return "".join(parts)
+
+
+class PlanCache(LoggerMixin):
+    """
+    查询计划缓存
+
+    按UQM模板指纹保存编译后的查询计划，超过容量时淘汰最久未使用的计划。
+    编译失败（模板无效）时不缓存，异常照常抛出。
+    """
+
+    def __init__(self, max_size: int = 512):
+        """
+        初始化查询计划缓存
+
+        Args:
+            max_size: 最多缓存的计划数，0表示不缓存
+        """
+        self.max_size = max_size
+        self.plans: "OrderedDict[str, CompiledPlan]" = OrderedDict()
+        self.stats_data = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0
+        }
+
+    def get_or_compile(
+        self, fingerprint: str, compile_func: Callable[[], Dict[str, Any]]
+    ) -> CompiledPlan:
+        """
+        获取查询计划，未缓存时编译
+
+        Args:
+            fingerprint: UQM模板指纹
+            compile_func: 解析UQM模板的函数
+
+        Returns:
+            查询计划
+        """
+        plan = self.plans.get(fingerprint)
+        if plan is not None:
+            self.plans.move_to_end(fingerprint)
+            self.stats_data["hits"] += 1
+            plan.hits += 1
+            return plan
+
+        self.stats_data["misses"] += 1
+        start_time = time.perf_counter()
+        template = compile_func()
+        plan = CompiledPlan.compile(fingerprint, template, time.perf_counter() - start_time)
+
+        if self.max_size > 0:
+            self.plans[fingerprint] = plan
+            while len(self.plans) > self.max_size:
+                self.plans.popitem(last=False)
+                self.stats_data["evictions"] += 1
+        return plan
+
+    def clear(self) -> None:
+        """清空查询计划缓存"""
+        self.plans.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        total_requests = self.stats_data["hits"] + self.stats_data["misses"]
+        return {
+            "size": len(self.plans),
+            "max_size": self.max_size,
+            "hit_rate": self.stats_data["hits"] / total_requests if total_requests > 0 else 0,
+            **self.stats_data
+        }
+
+
+@lru_cache()
+def get_plan_cache() -> PlanCache:
+    """获取查询计划缓存实例(单例模式)"""
+    return PlanCache(max_size=get_settings().PLAN_CACHE_SIZE)
@@ -0,0 +1,176 @@
+"""
+查询下推规划模块
+把读取其他query步骤结果的query步骤与上游query步骤合并为一条带WITH的SQL，在数据库中执行
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from src.core.parser import normalize_table_name
+from src.steps.query_step import QueryStep
+from src.utils.exceptions import ValidationError
+from src.utils.logging import get_logger
+from src.utils.sql_builder import BindParameters
+
+
+logger = get_logger(__name__)
+
+# 步骤名称直接作为CTE名称，只合并名称是普通标识符的步骤
+CTE_NAME_PATTERN = re.compile(r"[A-Za-z_]\w*")
+
+
+@dataclass
+class PushdownPlan:
+    """
+    查询下推计划
+
+    sources: 合并执行的步骤名称 -> 按依赖顺序排列的上游步骤名称到步骤配置的映射，
+        上游步骤作为CTE与该步骤组成一条SQL
+    inlined: 只被合并执行的步骤读取、不需要单独执行的步骤
+    """
+    sources: Dict[str, Dict[str, Dict[str, Any]]] = field(default_factory=dict)
+    inlined: Set[str] = field(default_factory=set)
+
+    def run_dependencies(self, dependencies: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        """
+        获取执行时需要读取步骤数据的依赖关系
+
+        合并执行的步骤在数据库中重新计算上游步骤，不读取步骤数据，也不需要
+        等待上游步骤执行完成。
+
+        Args:
+            dependencies: 步骤依赖关系
+
+        Returns:
+            步骤名称到其需要读取数据的依赖步骤列表的映射
+        """
+        return {
+            name: [] if name in self.sources else list(step_dependencies)
+            for name, step_dependencies in dependencies.items()
+        }
+
+
+def plan_pushdown(steps: List[Dict[str, Any]],
+                  dependencies: Dict[str, List[str]],
+                  retained_steps: Optional[Iterable[str]] = None,
+                  runtime_steps: Optional[Iterable[str]] = None) -> PushdownPlan:
+    """
+    规划可以合并到数据库中执行的query步骤
+
+    一个query步骤可以合并，当且仅当它的上游步骤都是可以合并的query步骤，
+    且它自身的配置能用SQL表达（见QueryStep.supports_pushdown）。所有query步骤
+    都使用默认连接器，因此合并的步骤总是在同一个数据库上执行。不能合并的步骤
+    照常读取步骤数据在内存中计算。结果取决于运行时注入的执行选项（如分页）的
+    步骤不能作为CTE重新计算，读取它们的步骤不合并。
+
+    Args:
+        steps: 步骤列表
+        dependencies: 步骤依赖关系
+        retained_steps: 执行结束后需要保留数据的步骤，None表示全部保留（不省略任何步骤）
+        runtime_steps: 结果取决于运行时注入的执行选项的步骤
+
+    Returns:
+        查询下推计划
+    """
+    step_configs = {step["name"]: step for step in steps}
+    runtime = set(runtime_steps or ())
+    mergeable: Dict[str, bool] = {}
+
+    def is_mergeable(step_name: str, visiting: Set[str]) -> bool:
+        if step_name not in mergeable:
+            mergeable[step_name] = _is_mergeable(step_name, visiting)
+        return mergeable[step_name]
+
+    def _is_mergeable(step_name: str, visiting: Set[str]) -> bool:
+        step = step_configs.get(step_name)
+        if step is None or step.get("type") != "query" or step_name in visiting:
+            return False
+        if not CTE_NAME_PATTERN.fullmatch(step_name):
+            return False
+
+        try:
+            query_step = QueryStep(step.get("config", {}) or {})
+            query_step.build_query(BindParameters(), render=False)
+        except ValidationError:
+            return False
+        except Exception as e:
+            # 无法分析的步骤不合并，执行时照常在内存中计算或报告错误
+            logger.warning("分析query步骤失败，不合并到数据库中执行", step=step_name, error=str(e))
+            return False
+
+        upstream = dependencies.get(step_name, [])
+        if not upstream:
+            return True
+        if not all(dependency not in runtime and is_mergeable(dependency, visiting | {step_name})
+                   for dependency in upstream):
+            return False
+
+        try:
+            return query_step.supports_pushdown()
+        except Exception as e:
+            logger.warning("分析query步骤失败，不合并到数据库中执行", step=step_name, error=str(e))
+            return False
+
+    plan = PushdownPlan()
+    for step in steps:
+        step_name = step["name"]
+        if not dependencies.get(step_name) or not is_mergeable(step_name, set()):
+            continue
+
+        sources: Dict[str, Dict[str, Any]] = {}
+        _collect_sources(step_name, dependencies, step_configs, sources)
+
+        # CTE会遮蔽同名的数据库表
+        tables = set()
+        for name in [*sources, step_name]:
+            config = step_configs[name].get("config", {}) or {}
+            tables |= _read_tables(name, config, step_configs)
+        if any(name.lower() in tables for name in sources):
+            continue
+
+        plan.sources[step_name] = sources
+
+    if retained_steps is None:
+        return plan
+
+    retained = set(retained_steps)
+    consumers: Dict[str, List[str]] = {}
+    for step_name, step_dependencies in dependencies.items():
+        for dependency in step_dependencies:
+            consumers.setdefault(dependency, []).append(step_name)
+
+    # 只被合并执行的步骤读取的步骤已经包含在这些步骤的CTE中
+    for step_name in step_configs:
+        readers = consumers.get(step_name)
+        if (step_name not in retained and mergeable.get(step_name) and readers
+                and all(reader in plan.sources for reader in readers)):
+            plan.inlined.add(step_name)
+
+    return plan
+
+
+def _read_tables(step_name: str, config: Dict[str, Any],
+                 step_configs: Dict[str, Dict[str, Any]]) -> Set[str]:
+    """获取query步骤直接读取的数据库表（规范化的表名），步骤读取与自己同名的表时也包括在内"""
+    references = [config.get("data_source")]
+    joins = config.get("joins", []) or []
+    references.extend(join.get("target") or join.get("table") for join in joins)
+
+    tables = set()
+    for reference in references:
+        if isinstance(reference, str) and reference.strip():
+            name = reference.split()[0]
+            if name not in step_configs or name == step_name:
+                tables.add(normalize_table_name(name))
+    return tables
+
+
+def _collect_sources(step_name: str, dependencies: Dict[str, List[str]],
+                     step_configs: Dict[str, Dict[str, Any]],
+                     sources: Dict[str, Dict[str, Any]]) -> None:
+    """按依赖顺序收集步骤的所有上游步骤配置"""
+    for dependency in dependencies.get(step_name, []):
+        if dependency not in sources:
+            _collect_sources(dependency, dependencies, step_configs, sources)
+            sources[dependency] = step_configs[dependency].get("config", {}) or {}
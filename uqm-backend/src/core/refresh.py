@@ -0,0 +1,104 @@
+"""
+缓存后台刷新模块
+返回旧缓存数据的同时在后台重新计算并写入缓存
+"""
+
+import asyncio
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict
+
+from src.utils.logging import LoggerMixin
+
+
+class BackgroundRefresher(LoggerMixin):
+    """
+    后台刷新任务管理器
+
+    同一缓存键同时只有一个刷新任务；刷新前获取缓存填充锁，其他进程正在刷新
+    同一缓存键时跳过。刷新失败只记录日志，旧数据在硬过期前继续可用。
+    """
+
+    def __init__(self):
+        """初始化后台刷新任务管理器"""
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.stats_data = {
+            "scheduled": 0,
+            "skipped": 0,
+            "completed": 0,
+            "failed": 0
+        }
+
+    def schedule(self, cache_manager: Any, cache_key: str,
+                 refresh: Callable[[], Awaitable[Any]], lock_timeout: float) -> bool:
+        """
+        安排后台刷新
+
+        Args:
+            cache_manager: 缓存管理器
+            cache_key: 缓存键
+            refresh: 重新计算并写入缓存的函数
+            lock_timeout: 缓存填充锁的过期时间(秒)
+
+        Returns:
+            是否新安排了刷新任务，已有相同缓存键的刷新任务时返回False
+        """
+        if cache_key in self._tasks:
+            self.stats_data["skipped"] += 1
+            return False
+
+        self.stats_data["scheduled"] += 1
+        self._tasks[cache_key] = asyncio.create_task(
+            self._run(cache_manager, cache_key, refresh, lock_timeout)
+        )
+        return True
+
+    async def _run(self, cache_manager: Any, cache_key: str,
+                   refresh: Callable[[], Awaitable[Any]], lock_timeout: float) -> None:
+        """执行刷新任务"""
+        try:
+            token = await cache_manager.acquire_lock(cache_key, lock_timeout)
+            if token is None:
+                # 其他进程正在刷新或计算同一缓存键
+                self.stats_data["skipped"] += 1
+                return
+
+            try:
+                await refresh()
+                self.stats_data["completed"] += 1
+                self.log_debug("后台刷新缓存完成", cache_key=cache_key)
+            finally:
+                await cache_manager.release_lock(cache_key, token)
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.stats_data["failed"] += 1
+            self.log_warning("后台刷新缓存失败，继续使用旧数据", cache_key=cache_key, error=str(e))
+        finally:
+            self._tasks.pop(cache_key, None)
+
+    async def wait(self) -> None:
+        """等待当前所有刷新任务完成"""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks.values()), return_exceptions=True)
+
+    async def close(self) -> None:
+        """取消所有未完成的刷新任务"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        return {
+            "in_progress": len(self._tasks),
+            **self.stats_data
+        }
+
+
+@lru_cache()
+def get_background_refresher() -> BackgroundRefresher:
+    """获取后台刷新任务管理器实例(单例模式)"""
+    return BackgroundRefresher()
@@ -0,0 +1,148 @@
+"""
+请求合并模块
+相同键的并发计算只执行一次，其余调用等待并共享同一结果
+"""
+
+import asyncio
+import time
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from src.utils.logging import LoggerMixin
+
+
+class SingleFlight(LoggerMixin):
+    """
+    进程内请求合并
+
+    同一键第一个到达的调用（leader）执行计算，计算期间到达的调用（follower）
+    等待并共享leader的结果或异常。leader被取消时，等待中的follower重新竞争
+    执行，不会因为其他请求断开而失败。
+    """
+
+    def __init__(self, name: str):
+        """
+        初始化请求合并器
+
+        Args:
+            name: 名称，用于日志和统计
+        """
+        self.name = name
+        self._calls: Dict[str, asyncio.Future] = {}
+        self.stats_data = {
+            "leaders": 0,
+            "followers": 0
+        }
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        执行或等待同一键的计算
+
+        Args:
+            key: 合并键
+            func: 计算函数
+
+        Returns:
+            (结果, 是否共享了其他调用的结果)
+        """
+        while True:
+            future = self._calls.get(key)
+            if future is None:
+                return await self._lead(key, func), False
+
+            self.stats_data["followers"] += 1
+            self.log_debug("等待相同请求的结果", flight=self.name, key=key)
+            try:
+                return await asyncio.shield(future), True
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    # 当前调用自身被取消
+                    raise
+                # leader被取消，重新竞争执行
+
+    async def _lead(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """作为leader执行计算并把结果交给follower"""
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self.stats_data["leaders"] += 1
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # 没有follower时避免“异常未被读取”的警告
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    def in_flight(self) -> int:
+        """正在执行的计算数"""
+        return len(self._calls)
+
+    def stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        return {
+            "name": self.name,
+            "in_flight": self.in_flight(),
+            **self.stats_data
+        }
+
+
+async def fill_cache_once(cache_manager: Any, cache_key: str,
+                          compute: Callable[[], Awaitable[Any]],
+                          lock_timeout: float) -> Tuple[Any, bool]:
+    """
+    跨进程合并同一缓存键的计算
+
+    获取到缓存管理器上的锁时执行计算（由compute负责写入缓存）；锁被其他
+    进程持有时轮询缓存等待对方写入，超过lock_timeout仍未写入则自行计算。
+
+    Args:
+        cache_manager: 缓存管理器
+        cache_key: 缓存键
+        compute: 计算并写入缓存的函数
+        lock_timeout: 锁的过期时间，也是等待其他进程的最长时间(秒)
+
+    Returns:
+        (结果, 是否是其他进程写入缓存的结果)
+    """
+    token = await cache_manager.acquire_lock(cache_key, lock_timeout)
+    if token is not None:
+        try:
+            return await compute(), False
+        finally:
+            await cache_manager.release_lock(cache_key, token)
+
+    cached = await _wait_for_cache(cache_manager, cache_key, lock_timeout)
+    if cached is not None:
+        return cached, True
+    return await compute(), False
+
+
+async def _wait_for_cache(cache_manager: Any, cache_key: str, timeout: float) -> Optional[Any]:
+    """轮询缓存直到有数据、锁被释放或超时"""
+    deadline = time.monotonic() + timeout
+    interval = 0.05
+    while time.monotonic() < deadline:
+        await asyncio.sleep(interval)
+        cached = await cache_manager.get(cache_key)
+        if cached is not None:
+            return cached
+        if not await cache_manager.is_locked(cache_key):
+            # 持有锁的进程已结束但没有写入缓存（例如执行失败）
+            return None
+        interval = min(interval * 2, 0.5)
+    return None
+
+
+@lru_cache()
+def get_single_flight(name: str) -> SingleFlight:
+    """获取指定名称的进程内请求合并器(单例模式)"""
+    return SingleFlight(name)
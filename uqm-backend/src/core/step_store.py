@@ -0,0 +1,271 @@
+"""
+步骤数据存储模块
+按步骤依赖关系管理中间结果的生命周期，及时释放不再需要的数据
+"""
+
+import os
+import pickle
+import re
+import sys
+import tempfile
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from src.core.batch import ColumnarBatch
+from src.utils.logging import LoggerMixin
+
+
+def estimate_rows_size(rows: Any, sample_size: int = 100) -> int:
+    """
+    估算步骤数据占用的内存字节数
+
+    对最多sample_size行均匀抽样，按平均行大小推算整体大小。
+
+    Args:
+        rows: 步骤数据（字典列表或列式批数据）
+        sample_size: 抽样行数
+
+    Returns:
+        估算的字节数
+    """
+    if isinstance(rows, ColumnarBatch):
+        return rows.estimate_size()
+    if not isinstance(rows, list):
+        return sys.getsizeof(rows)
+
+    total = sys.getsizeof(rows)
+    row_count = len(rows)
+    if row_count == 0:
+        return total
+
+    step = max(1, row_count // sample_size)
+    sampled = rows[::step][:sample_size]
+
+    sampled_size = 0
+    for row in sampled:
+        sampled_size += sys.getsizeof(row)
+        if isinstance(row, dict):
+            # 键通常在各行之间共享，只统计值的大小
+            sampled_size += sum(sys.getsizeof(value) for value in row.values())
+
+    return total + sampled_size * row_count // len(sampled)
+
+
+class StepDataStore(LoggerMixin):
+    """
+    基于引用计数的步骤数据存储
+
+    每个步骤的数据在其最后一个下游步骤执行结束后被释放；需要保留的步骤
+    （如输出步骤）不会被释放。配置了溢写阈值时，常驻数据超过阈值会把
+    暂未被使用的数据溢写到临时文件，读取时再从磁盘加载。
+    """
+
+    def __init__(self, dependencies: Dict[str, List[str]],
+                 retained_steps: Optional[Iterable[str]] = None,
+                 spill_threshold_bytes: int = 0,
+                 spill_dir: Optional[str] = None):
+        """
+        初始化步骤数据存储
+
+        Args:
+            dependencies: 步骤名称到其依赖步骤列表的映射
+            retained_steps: 执行结束后仍需保留数据的步骤，None表示全部保留
+            spill_threshold_bytes: 常驻数据溢写阈值（字节），0表示不溢写
+            spill_dir: 溢写文件目录，默认使用系统临时目录
+        """
+        self.dependencies = dependencies
+        self.retained_steps: Optional[Set[str]] = (
+            set(retained_steps) if retained_steps is not None else None
+        )
+        self.spill_threshold_bytes = max(0, spill_threshold_bytes or 0)
+        self.spill_dir = spill_dir
+
+        # 每个步骤尚未结束的下游步骤数
+        self._pending_consumers: Dict[str, int] = {}
+        for step_dependencies in dependencies.values():
+            for dependency in step_dependencies:
+                self._pending_consumers[dependency] = self._pending_consumers.get(dependency, 0) + 1
+
+        # 正在被下游步骤读取的次数
+        self._in_use: Dict[str, int] = {}
+
+        self._data: Dict[str, Any] = {}
+        self._sizes: Dict[str, int] = {}
+        self._spilled: Dict[str, str] = {}
+        self._released: Set[str] = set()
+
+        self.current_bytes = 0
+        self.peak_bytes = 0
+        self.spilled_bytes = 0
+
+    def __contains__(self, step_name: object) -> bool:
+        return step_name in self._data or step_name in self._spilled
+
+    def __getitem__(self, step_name: str) -> Any:
+        if step_name in self._data:
+            return self._data[step_name]
+
+        if step_name in self._spilled:
+            with open(self._spilled[step_name], "rb") as spill_file:
+                return pickle.load(spill_file)
+
+        raise KeyError(step_name)
+
+    def __setitem__(self, step_name: str, data: Any) -> None:
+        self.put(step_name, data)
+
+    def __delitem__(self, step_name: str) -> None:
+        if step_name not in self:
+            raise KeyError(step_name)
+        self._drop(step_name)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self._data) + len(self._spilled)
+
+    def get(self, step_name: str, default: Any = None) -> Any:
+        """获取步骤数据，不存在时返回默认值"""
+        if step_name not in self:
+            return default
+        return self[step_name]
+
+    def keys(self) -> List[str]:
+        """获取当前可用的步骤名称"""
+        return list(self._data) + list(self._spilled)
+
+    def put(self, step_name: str, data: Any) -> None:
+        """
+        存储步骤数据
+
+        Args:
+            step_name: 步骤名称
+            data: 步骤数据
+        """
+        if step_name in self:
+            self._drop(step_name)
+
+        size = estimate_rows_size(data)
+        self._data[step_name] = data
+        self._sizes[step_name] = size
+        self._released.discard(step_name)
+        self.current_bytes += size
+        self.peak_bytes = max(self.peak_bytes, self.current_bytes)
+
+        if self._is_releasable(step_name):
+            # 没有下游步骤也不需要保留的数据无需常驻
+            self._release(step_name)
+        elif self.spill_threshold_bytes and self.current_bytes > self.spill_threshold_bytes:
+            self._spill_until_within_threshold()
+
+    def acquire(self, step_name: str) -> None:
+        """
+        标记步骤开始执行，其依赖的数据在执行期间不会被溢写
+
+        Args:
+            step_name: 开始执行的步骤名称
+        """
+        for dependency in self.dependencies.get(step_name, []):
+            self._in_use[dependency] = self._in_use.get(dependency, 0) + 1
+
+    def release(self, step_name: str, acquired: bool = True) -> None:
+        """
+        标记步骤执行结束，释放已无下游需要的依赖数据
+
+        无论步骤成功、失败还是被跳过都需要调用。
+
+        Args:
+            step_name: 执行结束的步骤名称
+            acquired: 该步骤是否调用过acquire
+        """
+        for dependency in self.dependencies.get(step_name, []):
+            if acquired and self._in_use.get(dependency):
+                self._in_use[dependency] -= 1
+
+            if self._pending_consumers.get(dependency):
+                self._pending_consumers[dependency] -= 1
+
+            if dependency in self and self._is_releasable(dependency):
+                self._release(dependency)
+
+    def close(self) -> None:
+        """删除所有溢写文件"""
+        for step_name in list(self._spilled):
+            self._drop(step_name)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取内存使用统计
+
+        Returns:
+            统计信息（字节数为估算值）
+        """
+        return {
+            "peak_bytes": self.peak_bytes,
+            "current_bytes": self.current_bytes,
+            "released_steps": sorted(self._released),
+            "spilled_steps": sorted(self._spilled),
+            "spilled_bytes": self.spilled_bytes
+        }
+
+    def _is_releasable(self, step_name: str) -> bool:
+        """判断步骤数据是否可以释放"""
+        if self.retained_steps is None or step_name in self.retained_steps:
+            return False
+        return not self._pending_consumers.get(step_name)
+
+    def _release(self, step_name: str) -> None:
+        """释放步骤数据"""
+        self._drop(step_name)
+        self._released.add(step_name)
+        self.log_debug(f"释放步骤数据: {step_name}", current_bytes=self.current_bytes)
+
+    def _drop(self, step_name: str) -> None:
+        """从内存或磁盘中移除步骤数据"""
+        if step_name in self._data:
+            del self._data[step_name]
+            self.current_bytes -= self._sizes.pop(step_name, 0)
+
+        spill_path = self._spilled.pop(step_name, None)
+        if spill_path:
+            self._sizes.pop(step_name, None)
+            try:
+                os.remove(spill_path)
+            except OSError as e:
+                self.log_warning(f"删除溢写文件失败: {spill_path}", error=str(e))
+
+    def _spill_until_within_threshold(self) -> None:
+        """把未被使用的最大数据溢写到磁盘，直到常驻数据低于阈值"""
+        candidates = sorted(
+            (name for name in self._data
+             if not self._in_use.get(name)
+             and (self.retained_steps is None or name not in self.retained_steps)),
+            key=lambda name: self._sizes.get(name, 0),
+            reverse=True
+        )
+
+        for step_name in candidates:
+            if self.current_bytes <= self.spill_threshold_bytes:
+                break
+            self._spill(step_name)
+
+    def _spill(self, step_name: str) -> None:
+        """把步骤数据溢写到临时文件"""
+        try:
+            # 步骤名称可能包含路径分隔符等字符，不能直接作为文件名
+            safe_name = re.sub(r"[^\w-]", "_", step_name)
+            fd, spill_path = tempfile.mkstemp(
+                prefix=f"uqm_step_{safe_name}_", suffix=".pkl", dir=self.spill_dir
+            )
+            with os.fdopen(fd, "wb") as spill_file:
+                pickle.dump(self._data[step_name], spill_file, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            self.log_warning(f"步骤数据溢写失败: {step_name}", error=str(e))
+            return
+
+        size = self._sizes[step_name]
+        del self._data[step_name]
+        self._spilled[step_name] = spill_path
+        self.current_bytes -= size
+        self.spilled_bytes += size
+        self.log_info(f"步骤数据已溢写到磁盘: {step_name}", size=size, path=spill_path)
@@ -12,6 +12,8 @@ from contextlib import asynccontextmanager
 from src.api.routes import router
 from src.config.settings import get_settings
 from src.core.cache import get_cache_manager
+from src.core.refresh import get_background_refresher
+from src.connectors.base import get_connector_manager
 from src.utils.logging import setup_logging
 from src.utils.exceptions import setup_exception_handlers
 
@@ -28,11 +30,16 @@ async def lifespan(app: FastAPI):
     cache_manager = get_cache_manager()
     await cache_manager.initialize()
     
+    # 启动连接器健康心跳
+    await get_connector_manager().start_health_monitor()
+    
     print("UQM Backend 服务启动完成")
     
     yield
     
     # 关闭时清理资源
+    await get_background_refresher().close()
+    await get_connector_manager().close_all()
     await cache_manager.close()
     print("UQM Backend 服务已关闭")
 
@@ -6,6 +6,7 @@
 from typing import Any, Dict, List, Optional, Union
 import pandas as pd
 
+from src.core.batch import ColumnarBatch, as_dataframe
 from src.steps.base import BaseStep
 from src.utils.exceptions import ValidationError, ExecutionError
 
@@ -55,7 +56,7 @@ class EnrichStep(BaseStep):
         try:
             # 获取源数据
             source_name = self.config["source"]
-            source_data = context["get_source_data"](source_name)
+            source_data = context["get_source_data"](source_name, columnar=True)
             
             # 获取查找表数据
             lookup_data = await self._fetch_lookup_data(context)
@@ -83,7 +84,7 @@ class EnrichStep(BaseStep):
         
         if isinstance(lookup_config, str):
             # 从其他步骤获取数据
-            return context["get_source_data"](lookup_config)
+            return context["get_source_data"](lookup_config, columnar=True)
         
         elif isinstance(lookup_config, dict):
             # 从数据库表获取数据
@@ -95,27 +96,33 @@ class EnrichStep(BaseStep):
             columns = lookup_config.get("columns", ["*"])
             where_conditions = lookup_config.get("where", [])
             
-            # 使用SQL构建器构建查询
-            from src.utils.sql_builder import SQLBuilder
+            connector_manager = context["connector_manager"]
+            connector = await connector_manager.get_default_connector()
+            
+            # 使用SQL构建器构建查询，条件中的值作为绑定参数
+            from src.utils.sql_builder import BOUND_PARAMETERS_KEY, BindParameters, SQLBuilder
             sql_builder = SQLBuilder()
+            params = BindParameters(connector.paramstyle)
             
             query = sql_builder.build_select_query(
                 select_fields=columns,
                 from_table=table_name,
-                where_conditions=where_conditions
+                where_conditions=where_conditions,
+                params=params,
+                bound_values=self.config.get(BOUND_PARAMETERS_KEY)
             )
             
             # 执行查询
-            connector_manager = context["connector_manager"]
-            connector = await connector_manager.get_default_connector()
-            
-            return await connector.execute_query(query)
+            return await connector.execute_query(query, params.values or None)
         
         else:
             raise ValidationError("无效的lookup配置")
     
-    def _perform_enrichment(self, source_data: List[Dict[str, Any]], 
-                           lookup_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _perform_enrichment(
+        self,
+        source_data: Union[List[Dict[str, Any]], ColumnarBatch],
+        lookup_data: Union[List[Dict[str, Any]], ColumnarBatch]
+    ) -> Union[List[Dict[str, Any]], ColumnarBatch]:
         """
         执行数据丰富化
         
@@ -135,8 +142,8 @@ class EnrichStep(BaseStep):
                 return source_data
             
             # 转换为DataFrame进行处理
-            source_df = pd.DataFrame(source_data)
-            lookup_df = pd.DataFrame(lookup_data)
+            source_df = as_dataframe(source_data)
+            lookup_df = as_dataframe(lookup_data)
             
             # 解析连接条件
             join_config = self._parse_join_config()
@@ -147,8 +154,8 @@ class EnrichStep(BaseStep):
             # 修复所有 NaN 为 None，避免 JSON 报错
             result_df = result_df.where(pd.notnull(result_df), None)
             
-            # 转换回字典列表
-            return result_df.to_dict('records')
+            # 按列输出，下游需要时再转换为字典列表
+            return ColumnarBatch.from_dataframe(result_df)
             
         except Exception as e:
             self.log_error("执行数据丰富化失败", error=str(e))
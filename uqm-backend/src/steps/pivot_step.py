@@ -7,6 +7,7 @@ from typing import Any, Dict, List, Optional, Union
 import pandas as pd
 import numpy as np
 
+from src.core.batch import ColumnarBatch, as_dataframe
 from src.steps.base import BaseStep
 from src.utils.exceptions import ValidationError, ExecutionError
 
@@ -87,7 +88,7 @@ class PivotStep(BaseStep):
         try:
             # 获取源数据
             source_name = self.config["source"]
-            source_data = context["get_source_data"](source_name)
+            source_data = context["get_source_data"](source_name, columnar=True)
             
             if not source_data:
                 self.log_warning("源数据为空")
@@ -102,7 +103,9 @@ class PivotStep(BaseStep):
             self.log_error("透视步骤执行失败", error=str(e))
             raise ExecutionError(f"透视执行失败: {e}")
     
-    def _perform_pivot(self, source_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _perform_pivot(
+        self, source_data: Union[List[Dict[str, Any]], ColumnarBatch]
+    ) -> ColumnarBatch:
         """
         执行数据透视
         
@@ -114,7 +117,7 @@ class PivotStep(BaseStep):
         """
         try:
             # 转换为DataFrame
-            df = pd.DataFrame(source_data)
+            df = as_dataframe(source_data)
             
             # 获取透视参数
             index = self.config["index"]
@@ -189,8 +192,8 @@ class PivotStep(BaseStep):
             # 格式化透视结果（处理column_prefix等）
             pivot_df = self._format_pivot_result(pivot_df)
             
-            # 转换回字典列表
-            result = pivot_df.to_dict('records')
+            # 按列输出，下游需要时再转换为字典列表
+            result = ColumnarBatch.from_dataframe(pivot_df)
             
             self.log_info(
                 "透视操作完成",
@@ -3,11 +3,48 @@
 负责执行SQL查询并返回结果
 """
 
-from typing import Any, Dict, List, Optional, Union
+import asyncio
+import re
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
 
+from src.config.settings import get_settings
+from src.core.fingerprint import fingerprint
 from src.steps.base import BaseStep
-from src.utils.sql_builder import SQLBuilder
-from src.utils.exceptions import ValidationError, ExecutionError
+from src.utils.sql_builder import BOUND_PARAMETERS_KEY, BindParameters, SQLBuilder, SQLDialect
+from src.utils.window_functions import window_function_evaluator
+from src.utils.aggregation import ACCUMULATORS, Accumulator, HashAggregator, Measure, to_float
+from src.utils.expression_parser import (
+    AccumulatedExpression, CompiledExpression, SQLExpressionCompiler
+)
+from src.utils.filters import FilterCompiler, compute_filter_value
+from src.utils.pagination import (
+    COUNT_CACHED, COUNT_ESTIMATED, COUNT_EXACT, COUNT_NONE, KEYSET_MODE, decode_cursor,
+    encode_cursor
+)
+from src.utils.exceptions import ValidationError, ExecutionError, ExpressionError
+
+
+_IDENTIFIER_PATTERN = re.compile(r"[A-Za-z_]\w*")
+
+
+def _is_not_none(value: Any) -> bool:
+    return value is not None
+
+
+def _is_numeric_value(value: Any) -> bool:
+    return to_float(value) is not None
+
+
+def _null_aggregate(accumulators: List[Accumulator], first_row: Optional[Dict[str, Any]]) -> Any:
+    """无法计算的聚合指标"""
+    return None
+
+
+def _first_aggregate_result(
+    accumulators: List[Accumulator], first_row: Optional[Dict[str, Any]]
+) -> Any:
+    """只有一个聚合的指标"""
+    return accumulators[0].result()
 
 
 class QueryStep(BaseStep):
@@ -22,6 +59,14 @@ class QueryStep(BaseStep):
         """
         super().__init__(config)
         self.sql_builder = SQLBuilder()
+        # 步骤数据上的表达式在本步骤内只编译一次
+        self.expression_compiler = SQLExpressionCompiler(column_getter=self._make_field_getter)
+        self._filter_compiler = FilterCompiler()
+        self._invalid_expressions = set()
+        # 同一字段只生成一个取值函数，聚合时同一字段的多个指标每行只取一次值
+        self._field_getters: Dict[
+            Tuple[str, Optional[Callable[[Any], bool]]], Callable[[Dict[str, Any]], Any]
+        ] = {}
     
     def validate(self) -> None:
         """验证查询步骤配置"""
@@ -64,6 +109,10 @@ class QueryStep(BaseStep):
         try:
             data_source = self.config["data_source"]
             
+            # 上游query步骤已合并为CTE，整个查询在数据库中执行
+            if context.get("pushdown_sources"):
+                return await self._execute_with_database(context)
+            
             # 检查数据源是否是前面步骤的结果
             if self._is_step_data_source(data_source, context):
                 # 使用步骤数据作为数据源
@@ -115,6 +164,11 @@ class QueryStep(BaseStep):
         # 获取源数据
         source_data = get_source_data(step_name)
         
+        # 步骤数据在内存中计算，表达式和条件中的参数标记替换为转义后的字面量
+        bound_values = self.config.get(BOUND_PARAMETERS_KEY)
+        if bound_values:
+            self.config = self._inline_bound_values(self.config, bound_values)
+        
         # 检查是否有JOIN操作
         joins = self.config.get("joins", [])
         if joins:
@@ -126,6 +180,27 @@ class QueryStep(BaseStep):
         
         return result
     
+    def _inline_bound_values(self, value: Any, bound_values: Dict[str, Any]) -> Any:
+        """
+        把配置中的UQM参数标记替换为转义后的字面量
+        
+        Args:
+            value: 配置值
+            bound_values: 参数标记对应的参数值
+            
+        Returns:
+            替换后的配置值
+        """
+        if isinstance(value, str):
+            return self.sql_builder.bind_template_values(value, bound_values)
+        if isinstance(value, dict):
+            return {
+                key: self._inline_bound_values(item, bound_values) for key, item in value.items()
+            }
+        if isinstance(value, list):
+            return [self._inline_bound_values(item, bound_values) for item in value]
+        return value
+    
     async def _execute_with_database(self, context: Dict[str, Any]) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
         """
         使用数据库执行查询，支持分页
@@ -134,7 +209,8 @@ class QueryStep(BaseStep):
             context: 执行上下文
             
         Returns:
-            查询结果，如果有分页则返回{"data": [...], "total_count": N}，否则返回[...]
+            查询结果，如果有分页则返回{"data": [...], "total_count": N}，keyset分页返回
+            {"data": [...], "next_cursor": ..., "has_more": ...}，否则返回[...]
         """
         # 获取连接器管理器
         connector_manager = context["connector_manager"]
@@ -147,20 +223,18 @@ class QueryStep(BaseStep):
         
         total_count = None
         
+        # keyset分页按游标定位，不计算总数
+        if options.get("pagination_mode") == KEYSET_MODE and page_size:
+            return await self._execute_keyset_page(
+                connector, context, int(page_size), options.get("cursor")
+            )
+        
         # 如果提供了分页参数，执行分页逻辑
         if page and page_size:
-            self.log_info(f"执行分页查询: page={page}, page_size={page_size}")
-            
-            # 1. 执行COUNT查询获取总记录数
-            count_query = self.build_count_query()
-            self.log_debug("COUNT查询", query=count_query)
-            
-            count_result = await connector.execute_query(count_query)
-            total_count = count_result[0].get('total', 0) if count_result else 0
+            count_mode = options.get("count_mode") or COUNT_EXACT
+            self.log_info(f"执行分页查询: page={page}, page_size={page_size}", count_mode=count_mode)
             
-            self.log_info(f"查询总记录数: {total_count}")
-            
-            # 2. 修改配置以应用分页
+            # 1. 修改配置以应用分页
             original_limit = self.config.get("limit")
             original_offset = self.config.get("offset")
             
@@ -168,39 +242,332 @@ class QueryStep(BaseStep):
             self.config["limit"] = page_size
             self.config["offset"] = (page - 1) * page_size
             
-            # 3. 执行分页数据查询
-            data_query = self.build_query()
-            self.log_debug("分页数据查询", query=data_query)
-            
-            data_result = await connector.execute_query(data_query)
+            # 2. 构建分页数据查询，之后恢复原始配置
+            try:
+                data_params = BindParameters(connector.paramstyle)
+                data_ctes = self._build_pushdown_ctes(context, data_params)
+                data_query = self.build_query(data_params, data_ctes)
+                self.log_debug("分页数据查询", query=data_query)
+            finally:
+                if original_limit is not None:
+                    self.config["limit"] = original_limit
+                else:
+                    self.config.pop("limit", None)
+                    
+                if original_offset is not None:
+                    self.config["offset"] = original_offset
+                else:
+                    self.config.pop("offset", None)
             
-            # 4. 恢复原始配置
-            if original_limit is not None:
-                self.config["limit"] = original_limit
-            else:
-                self.config.pop("limit", None)
-                
-            if original_offset is not None:
-                self.config["offset"] = original_offset
-            else:
-                self.config.pop("offset", None)
+            # 3. 总记录数与分页数据在不同的连接上同时查询
+            data_result, (total_count, count_mode) = await asyncio.gather(
+                connector.execute_query(data_query, data_params.values or None),
+                self._count_total(connector, context, count_mode)
+            )
             
-            return {
+            result = {
                 "data": data_result,
                 "total_count": total_count
             }
+            if count_mode != COUNT_EXACT:
+                result["count_mode"] = count_mode
+            return result
         else:
             # 普通查询，不分页
-            query = self.build_query()
+            params = BindParameters(connector.paramstyle)
+            query = self.build_query(params, self._build_pushdown_ctes(context, params))
             self.log_debug("普通查询", query=query)
             
-            result = await connector.execute_query(query)
+            result = await connector.execute_query(query, params.values or None)
             return result
+
+    async def _count_total(self, connector: Any, context: Dict[str, Any],
+                           count_mode: str) -> Tuple[Optional[int], str]:
+        """
+        计算分页查询的总记录数
+        
+        cached模式下COUNT结果按COUNT查询及其参数缓存，与页码无关，翻页时只有
+        第一次执行COUNT；estimated模式使用数据库优化器估算的行数，数据库不提供
+        估算时改为精确计数。
+        
+        Args:
+            connector: 数据库连接器
+            context: 执行上下文
+            count_mode: 计算方式，exact、cached、estimated或none
+            
+        Returns:
+            (总记录数, 实际使用的计算方式)，none模式下总记录数为None
+        """
+        if count_mode == COUNT_NONE:
+            return None, COUNT_NONE
+        
+        if count_mode == COUNT_ESTIMATED:
+            params = BindParameters(connector.paramstyle)
+            unpaged_step = QueryStep({**self.config, "order_by": [], "limit": None, "offset": None})
+            query = unpaged_step.build_query(params, self._build_pushdown_ctes(context, params))
+            estimate = await connector.estimate_row_count(query, params.values or None)
+            if estimate is not None:
+                self.log_info(f"估算总记录数: {estimate}")
+                return estimate, COUNT_ESTIMATED
+            self.log_info("数据库不提供估算行数，改为精确计数")
+            count_mode = COUNT_EXACT
+        
+        count_params = BindParameters(connector.paramstyle)
+        count_ctes = self._build_pushdown_ctes(context, count_params)
+        count_query = self.build_count_query(count_params, count_ctes)
+        self.log_debug("COUNT查询", query=count_query)
+        
+        cache_manager = context.get("cache_manager") if count_mode == COUNT_CACHED else None
+        cache_key = None
+        if cache_manager is not None:
+            query_fingerprint = fingerprint([connector.dialect, count_query, count_params.values])
+            cache_key = f"count_cache:{query_fingerprint}"
+            cached = await cache_manager.get(cache_key)
+            if cached is not None:
+                self.log_info(f"命中总记录数缓存: {cached}")
+                return cached, COUNT_CACHED
+        
+        count_result = await connector.execute_query(count_query, count_params.values or None)
+        total_count = count_result[0].get('total', 0) if count_result else 0
+        self.log_info(f"查询总记录数: {total_count}")
+        
+        if cache_key is not None:
+            await cache_manager.set(
+                cache_key,
+                total_count,
+                get_settings().PAGINATION_COUNT_CACHE_TTL,
+                tags=context.get("cache_tags")
+            )
+        return total_count, count_mode
+
+    async def _execute_keyset_page(self, connector: Any, context: Dict[str, Any],
+                                   page_size: int, cursor: Optional[str]) -> Dict[str, Any]:
+        """
+        执行keyset分页查询
+
+        按order_by定位到游标之后的行，数据库可以沿排序索引直接定位，不需要像
+        OFFSET一样扫描并丢弃前面所有页的行。多取一行判断是否还有下一页，不执行
+        COUNT查询。
+
+        Args:
+            connector: 数据库连接器
+            context: 执行上下文
+            page_size: 每页行数
+            cursor: 上一页返回的游标，None表示第一页
+
+        Returns:
+            {"data": [...], "next_cursor": 下一页游标或None, "has_more": 是否还有下一页}
+        """
+        columns = self.get_keyset_columns()
+        values = decode_cursor(cursor, columns) if cursor else None
+        self.log_info(f"执行keyset分页查询: page_size={page_size}", first_page=values is None)
+
+        params = BindParameters(connector.paramstyle)
+        query = self.build_keyset_query(
+            columns, values, page_size, params,
+            self._build_pushdown_ctes(context, params), SQLDialect(connector.dialect)
+        )
+        self.log_debug("keyset分页查询", query=query)
+
+        rows = await connector.execute_query(query, params.values or None)
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        next_cursor = None
+        if has_more:
+            last_values = [rows[-1].get(name) for name, _ in columns]
+            if any(value is None for value in last_values):
+                raise ValidationError("keyset分页的排序列不能为NULL，请改用page分页或排除NULL值")
+            next_cursor = encode_cursor(columns, last_values)
+
+        return {
+            "data": rows,
+            "next_cursor": next_cursor,
+            "has_more": has_more
+        }
+
+    def get_keyset_columns(self) -> List[Tuple[str, bool]]:
+        """
+        获取keyset分页的排序键
+
+        排序键是order_by中的字段在查询结果中的列名；结果按这些列确定唯一顺序时
+        分页才不会重复或遗漏行，因此order_by的最后一列应当是唯一列（如主键）。
+
+        Returns:
+            按排序优先级排列的(列名, 是否降序)列表
+        """
+        order_by = self.config.get("order_by") or []
+        if not order_by:
+            raise ValidationError("keyset分页需要在分页目标步骤中指定order_by")
+
+        # 维度改名后，结果中的列名是别名
+        aliases = {
+            dim["name"]: dim["alias"]
+            for dim in self.config.get("dimensions", [])
+            if isinstance(dim, dict) and dim.get("name") and dim.get("alias")
+        }
+
+        columns = []
+        for item in order_by:
+            if isinstance(item, dict):
+                field, direction = item.get("field"), item.get("direction", "ASC")
+            else:
+                parts = str(item).split()
+                field = parts[0] if parts else None
+                direction = parts[1] if len(parts) > 1 else "ASC"
+            if not field or not all(
+                _IDENTIFIER_PATTERN.fullmatch(part) for part in field.split(".")
+            ):
+                raise ValidationError(f"keyset分页的排序字段必须是查询结果中的列: {item}")
+            column = aliases.get(field, field.split(".")[-1])
+            columns.append((column, str(direction).upper() == "DESC"))
+        return columns
+
+    def build_keyset_query(self, columns: List[Tuple[str, bool]], values: Optional[List[Any]],
+                           page_size: int, params: BindParameters,
+                           ctes: Optional[List[Tuple[str, str]]] = None,
+                           dialect: SQLDialect = SQLDialect.STANDARD) -> str:
+        """
+        构建keyset分页查询
+
+        步骤查询作为子查询，在外层按排序键定位、排序并多取一行。步骤本身没有
+        limit/offset时子查询去掉ORDER BY，数据库可以把定位条件下推到子查询中
+        使用索引；否则保留步骤的排序和截取，在截取后的结果中分页。
+
+        Args:
+            columns: get_keyset_columns返回的排序键
+            values: 游标中的排序键值，None表示第一页
+            page_size: 每页行数
+            params: 绑定参数收集器
+            ctes: 查询前附加的公用表表达式
+            dialect: 数据库方言
+
+        Returns:
+            SQL查询语句
+        """
+        inner_step = self
+        if self.config.get("limit") is None and self.config.get("offset") is None:
+            inner_step = QueryStep({**self.config, "order_by": []})
+        inner_query = inner_step.build_query(params, render=False)
+
+        builder = SQLBuilder(dialect)
+        where_conditions = None
+        if values is not None:
+            where_conditions = [builder.build_keyset_condition(columns, values, params)]
+        query = builder.build_select_query(
+            select_fields=["*"],
+            from_table=f"({inner_query}) AS keyset_page",
+            where_conditions=where_conditions,
+            order_by=[
+                {"field": name, "direction": "DESC" if descending else "ASC"}
+                for name, descending in columns
+            ],
+            limit=page_size + 1,
+            params=params,
+            render=False
+        )
+        return builder.build_with_query(ctes or [], query, params)
+
+    def _build_pushdown_ctes(self, context: Dict[str, Any],
+                             params: BindParameters) -> Optional[List[Tuple[str, str]]]:
+        """
+        把执行器合并进来的上游query步骤构建为CTE
+        
+        Args:
+            context: 执行上下文，pushdown_sources为按依赖顺序排列的上游步骤名称到配置的映射
+            params: 绑定参数收集器，CTE与主查询共用
+            
+        Returns:
+            (步骤名称, 未渲染的查询)列表，没有合并的上游步骤时返回None
+        """
+        sources = context.get("pushdown_sources")
+        if not sources:
+            return None
+        return [
+            (step_name, QueryStep(config).build_query(params, render=False))
+            for step_name, config in sources.items()
+        ]
     
-    def build_query(self) -> str:
+    def supports_pushdown(self) -> bool:
+        """
+        检查读取步骤数据的本步骤能否改写为SQL，与上游query步骤合并在数据库中执行
+        
+        以下情况SQL与内存计算的结果不同，保留内存计算：
+        有JOIN（步骤数据的JOIN按字段名宽松匹配）；过滤值是日期函数表达式
+        （内存计算时求值，SQL中按字面值比较）；计算字段引用了本步骤的指标或
+        维度别名（SELECT中不能引用同级的别名）。
+        
+        Returns:
+            是否可以合并到数据库中执行
+        """
+        if self.config.get("joins"):
+            return False
+        
+        conditions = list(self.config.get("filters", [])) + list(self.config.get("having", []))
+        if any(self._has_evaluated_filter_value(condition) for condition in conditions):
+            return False
+        
+        # 指标在SQL中总是聚合后的值；维度只有改名时才与源字段不同
+        aliases = set()
+        for metric in self.config.get("metrics", []):
+            if isinstance(metric, dict):
+                aliases.add(metric.get("alias") or metric.get("name"))
+        for dimension in self.config.get("dimensions", []):
+            if not isinstance(dimension, dict):
+                continue
+            if dimension.get("alias") not in (None, dimension.get("name")):
+                aliases.add(dimension["alias"])
+        for calc_field in self.config.get("calculated_fields", []):
+            expression = calc_field.get("expression") or ""
+            if aliases & set(_IDENTIFIER_PATTERN.findall(expression)):
+                return False
+        
+        return True
+    
+    def _has_evaluated_filter_value(self, condition: Any) -> bool:
+        """检查过滤条件（含嵌套逻辑）中是否有内存计算时会被求值的日期函数表达式"""
+        if not isinstance(condition, dict):
+            return False
+        if "logic" in condition and "conditions" in condition:
+            items = condition["conditions"] or []
+            return any(self._has_evaluated_filter_value(item) for item in items)
+        value = condition.get("value")
+        return isinstance(value, str) and compute_filter_value(value) != value
+    
+    async def stream(
+        self, context: Dict[str, Any], chunk_size: int
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        通过数据库游标流式执行查询，按块返回结果，不支持分页
+
+        Args:
+            context: 执行上下文
+            chunk_size: 每块的行数
+
+        Returns:
+            按块产出查询结果的异步迭代器
+        """
+        connector_manager = context["connector_manager"]
+        connector = await connector_manager.get_default_connector()
+
+        params = BindParameters(connector.paramstyle)
+        query = self.build_query(params)
+        self.log_debug("流式查询", query=query)
+
+        rows_stream = connector.stream_query(query, params.values or None, chunk_size=chunk_size)
+        async for rows in rows_stream:
+            yield rows
+
+    def build_query(self, params: Optional[BindParameters] = None,
+                    ctes: Optional[List[Tuple[str, str]]] = None, render: bool = True) -> str:
         """
         构建SQL查询
         
+        Args:
+            params: 绑定参数收集器，提供时过滤条件中的值作为绑定参数，否则内联到SQL中
+            ctes: 查询前附加的公用表表达式，(名称, 未渲染的查询)列表
+            render: 是否渲染占位符标记，作为其他查询的CTE时为False
+            
         Returns:
             SQL查询语句
         """
@@ -268,9 +635,15 @@ class QueryStep(BaseStep):
                 having=having,
                 order_by=order_by,
                 limit=limit,
-                offset=offset
+                offset=offset,
+                params=params,
+                render=render and not ctes,
+                bound_values=self.config.get(BOUND_PARAMETERS_KEY)
             )
             
+            if ctes:
+                query = self.sql_builder.build_with_query(ctes, query, params)
+            
             self.log_debug("构建的SQL查询", query=query)
             return query
             
@@ -278,10 +651,15 @@ class QueryStep(BaseStep):
             self.log_error("构建SQL查询失败", error=str(e))
             raise ValidationError(f"构建查询失败: {e}")
     
-    def build_count_query(self) -> str:
+    def build_count_query(self, params: Optional[BindParameters] = None,
+                          ctes: Optional[List[Tuple[str, str]]] = None) -> str:
         """
         构建用于获取总行数的SQL COUNT查询
         
+        Args:
+            params: 绑定参数收集器，提供时过滤条件中的值作为绑定参数，否则内联到SQL中
+            ctes: 查询前附加的公用表表达式，(名称, 未渲染的查询)列表
+            
         Returns:
             COUNT查询语句
         """
@@ -311,7 +689,10 @@ class QueryStep(BaseStep):
                 joins=joins,
                 where_conditions=self._resolve_filter_aliases(filters, has_joins),
                 group_by=resolved_group_by,
-                having=having
+                having=having,
+                params=params,
+                render=not ctes,
+                bound_values=self.config.get(BOUND_PARAMETERS_KEY)
                 # 注意：COUNT查询不需要 ORDER BY, LIMIT, OFFSET
             )
             
@@ -319,6 +700,9 @@ class QueryStep(BaseStep):
             if resolved_group_by:
                 query = f"SELECT COUNT(*) as total FROM ({query}) as subquery"
             
+            if ctes:
+                query = self.sql_builder.build_with_query(ctes, query, params)
+            
             self.log_debug("构建的COUNT查询", query=query)
             return query
             
@@ -488,7 +872,10 @@ class QueryStep(BaseStep):
         elif name:
             # 使用聚合函数，处理字段名歧义
             resolved_name = self._resolve_field_name(name, main_table, has_joins) if main_table else name
-            result = f"{agg_function}({resolved_name})"
+            if agg_function == "COUNT_DISTINCT":
+                result = f"COUNT(DISTINCT {resolved_name})"
+            else:
+                result = f"{agg_function}({resolved_name})"
         else:
             raise ValidationError("指标配置必须包含name或expression")
         
@@ -606,6 +993,13 @@ class QueryStep(BaseStep):
         if metrics and not group_by and all(self._is_aggregation_metric(metric) for metric in metrics):
             agg_row = {}
             metric_expr_map = {}
+            aggregations = self._plan_aggregations(metrics)
+            aggregator = HashAggregator(
+                [], [measure for _, measures, _ in aggregations for measure in measures]
+            )
+            aggregator.add_rows(filtered_data)
+            states = [state for _, state in aggregator.groups()] or [aggregator.new_state(None)]
+            agg_row.update(self._finalize_aggregations(aggregations, states[0]))
             for metric in metrics:
                 if isinstance(metric, dict):
                     field_name = metric.get("name")
@@ -613,10 +1007,8 @@ class QueryStep(BaseStep):
                     aggregation = metric.get("aggregation", "SUM")
                     expression = metric.get("expression")
                     if expression:
-                        agg_row[alias] = self._aggregate_expression(expression, filtered_data)
                         metric_expr_map[expression.strip().upper()] = alias
                     elif field_name:
-                        agg_row[alias] = self._aggregate_field(field_name, aggregation, filtered_data)
                         metric_expr_map[f"{aggregation}({field_name})".upper()] = alias
             # 添加计算字段
             if calculated_fields:
@@ -630,7 +1022,7 @@ class QueryStep(BaseStep):
                             agg_row[alias] = agg_row[metric_expr_map[expr_key]]
                         else:
                             try:
-                                agg_row[alias] = self._evaluate_expression_with_aggregates(expression, agg_row)
+                                agg_row[alias] = self._evaluate_expression(expression, agg_row)
                             except Exception as e:
                                 self.log_warning(f"全表聚合计算字段 {alias} 计算失败: {e}")
                                 agg_row[alias] = None
@@ -662,212 +1054,12 @@ class QueryStep(BaseStep):
         return grouped_data
     
     def _apply_filters(self, data: List[Dict[str, Any]], filters: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """应用过滤条件"""
+        """应用过滤条件：条件树先编译为行谓词，再一次遍历数据"""
         if not filters:
             return data
-        
-        filtered_data = []
-        for row in data:
-            if self._evaluate_filters(row, filters):
-                filtered_data.append(row)
-        
-        return filtered_data
-    
-    def _evaluate_filters(self, row: Dict[str, Any], filters: List[Dict[str, Any]]) -> bool:
-        """评估过滤条件"""
-        if not filters:
-            return True
-        
-        for filter_config in filters:
-            if not self._evaluate_filter_condition(row, filter_config):
-                return False
-        
-        return True
-    
-    def _evaluate_filter_condition(self, row: Dict[str, Any], filter_config: Dict[str, Any]) -> bool:
-        """评估单个过滤条件（支持嵌套逻辑）"""
-        # 检查是否是嵌套逻辑结构
-        if "logic" in filter_config and "conditions" in filter_config:
-            return self._evaluate_logical_condition(row, filter_config)
-        
-        # 检查是否是简单过滤条件
-        elif "field" in filter_config and "operator" in filter_config:
-            field = filter_config.get("field")
-            operator = filter_config.get("operator")
-            value = filter_config.get("value")
-            return self._evaluate_single_filter(row, field, operator, value)
-        
-        else:
-            self.log_warning(f"未识别的过滤条件格式: {filter_config}")
-            return True
-    
-    def _evaluate_logical_condition(self, row: Dict[str, Any], logical_config: Dict[str, Any]) -> bool:
-        """评估逻辑条件（AND/OR）"""
-        logic = logical_config.get("logic", "AND").upper()
-        conditions = logical_config.get("conditions", [])
-        
-        if not conditions:
-            return True
-        
-        if logic == "AND":
-            # 所有条件都必须为真
-            for condition in conditions:
-                if not self._evaluate_filter_condition(row, condition):
-                    return False
-            return True
-        
-        elif logic == "OR":
-            # 至少一个条件为真
-            for condition in conditions:
-                if self._evaluate_filter_condition(row, condition):
-                    return True
-            return False
-        
-        else:
-            self.log_warning(f"不支持的逻辑操作符: {logic}")
-            return True
-    
-    def _evaluate_single_filter(self, row: Dict[str, Any], field: str, operator: str, value: Any) -> bool:
-        """评估单个过滤条件"""
-        row_value = row.get(field)
-        
-        # 如果过滤值是SQL表达式，先计算它
-        computed_value = self._compute_filter_value(value)
-        
-        if operator == "=":
-            return row_value == computed_value
-        elif operator == "!=":
-            return row_value != computed_value
-        elif operator == ">":
-            return row_value is not None and self._compare_values(row_value, computed_value, ">")
-        elif operator == ">=":
-            return row_value is not None and self._compare_values(row_value, computed_value, ">=")
-        elif operator == "<":
-            return row_value is not None and self._compare_values(row_value, computed_value, "<")
-        elif operator == "<=":
-            return row_value is not None and self._compare_values(row_value, computed_value, "<=")
-        elif operator == "IN":
-            return row_value in computed_value if isinstance(computed_value, list) else False
-        elif operator == "NOT IN":
-            return row_value not in computed_value if isinstance(computed_value, list) else True
-        elif operator == "IS NULL":
-            return row_value is None
-        elif operator == "IS NOT NULL":
-            return row_value is not None
-        elif operator == "LIKE":
-            if row_value is None:
-                return False
-            return str(computed_value).replace("%", ".*").replace("_", ".") in str(row_value)
-        else:
-            self.log_warning(f"不支持的过滤操作符: {operator}")
-            return True
-    
-    def _compute_filter_value(self, value: Any) -> Any:
-        """计算过滤值，支持SQL表达式"""
-        if not isinstance(value, str):
-            return value
-        
-        # 检查是否是日期函数表达式
-        if "DATE_SUB" in value.upper() or "CURDATE" in value.upper() or "CURRENT_DATE" in value.upper():
-            return self._evaluate_date_expression(value)
-        
-        # 检查是否是其他SQL函数表达式
-        if any(func in value.upper() for func in ["NOW()", "CURRENT_TIMESTAMP", "UNIX_TIMESTAMP"]):
-            return self._evaluate_date_expression(value)
-        
-        return value
-    
-    def _evaluate_date_expression(self, expression: str) -> Any:
-        """计算日期表达式"""
-        from datetime import datetime, timedelta
-        import re
-        
-        # 处理 DATE_SUB(CURDATE(), INTERVAL n MONTH/DAY/YEAR)
-        if "DATE_SUB" in expression.upper():
-            # 提取间隔信息
-            interval_match = re.search(r'INTERVAL\s+(\d+)\s+(MONTH|DAY|YEAR)', expression.upper())
-            if interval_match:
-                interval_value = int(interval_match.group(1))
-                interval_unit = interval_match.group(2)
-                
-                current_date = datetime.now().date()
-                
-                if interval_unit == "MONTH":
-                    # 近似计算月份减法
-                    year = current_date.year
-                    month = current_date.month - interval_value
-                    if month <= 0:
-                        year -= abs(month) // 12 + 1
-                        month = 12 + month % 12
-                    result_date = current_date.replace(year=year, month=month)
-                elif interval_unit == "DAY":
-                    result_date = current_date - timedelta(days=interval_value)
-                elif interval_unit == "YEAR":
-                    result_date = current_date.replace(year=current_date.year - interval_value)
-                
-                return result_date.strftime("%Y-%m-%d")
-        
-        # 处理 CURDATE() 或 CURRENT_DATE()
-        if "CURDATE" in expression.upper() or "CURRENT_DATE" in expression.upper():
-            return datetime.now().date().strftime("%Y-%m-%d")
-        
-        # 如果无法解析，返回原值
-        return expression
-    
-    def _compare_values(self, val1: Any, val2: Any, operator: str) -> bool:
-        """比较两个值，支持日期比较"""
-        # 尝试日期比较
-        try:
-            from datetime import datetime
-            
-            # 尝试解析为日期
-            if isinstance(val1, str) and isinstance(val2, str):
-                # 尝试多种日期格式
-                date_formats = ["%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y/%m/%d", "%m/%d/%Y"]
-                
-                date1 = None
-                date2 = None
-                
-                for fmt in date_formats:
-                    try:
-                        date1 = datetime.strptime(val1, fmt)
-                        break
-                    except:
-                        continue
-                
-                for fmt in date_formats:
-                    try:
-                        date2 = datetime.strptime(val2, fmt)
-                        break
-                    except:
-                        continue
-                
-                if date1 and date2:
-                    if operator == ">":
-                        return date1 > date2
-                    elif operator == ">=":
-                        return date1 >= date2
-                    elif operator == "<":
-                        return date1 < date2
-                    elif operator == "<=":
-                        return date1 <= date2
-        except:
-            pass
-        
-        # 回退到基本比较
-        try:
-            if operator == ">":
-                return val1 > val2
-            elif operator == ">=":
-                return val1 >= val2
-            elif operator == "<":
-                return val1 < val2
-            elif operator == "<=":
-                return val1 <= val2
-        except:
-            return False
-        
-        return False
+
+        predicate = self._filter_compiler.compile(filters)
+        return [row for row in data if predicate(row)]
     
     def _is_aggregation_metric(self, metric: Union[str, Dict[str, Any]]) -> bool:
         """检查是否是聚合指标"""
@@ -927,7 +1119,13 @@ class QueryStep(BaseStep):
         return result
     
     def _apply_grouping_and_aggregation(self, data: List[Dict[str, Any]], dimensions: List[Union[str, Dict[str, Any]]], metrics: List[Union[str, Dict[str, Any]]], group_by: List[str]) -> List[Dict[str, Any]]:
-        """应用分组和聚合"""
+        """
+        应用分组和聚合
+        
+        使用流式哈希聚合：分组字段和指标字段在步骤内解析一次，逐行累加，每组
+        只保存第一行（用于非聚合的维度字段）和各指标的运行聚合状态，不保存每组
+        的行列表。
+        """
         if not group_by:
             # 使用所有维度作为分组字段
             group_by = []
@@ -946,33 +1144,18 @@ class QueryStep(BaseStep):
             # 如果不需要分组，直接选择字段
             return self._select_fields(data, dimensions, metrics)
         
-        # 按分组字段分组
-        groups = {}
-        for row in data:
-            # 构建分组键 - 支持带前缀的字段名
-            group_key_values = []
-            for field in group_by:
-                # 尝试多种字段名格式
-                value = None
-                if field in row:
-                    value = row[field]
-                else:
-                    # 尝试寻找带前缀的字段名
-                    for row_key in row.keys():
-                        if row_key.endswith(f".{field}") or row_key == field:
-                            value = row[row_key]
-                            break
-                group_key_values.append(value)
-            
-            group_key = tuple(group_key_values)
-            
-            if group_key not in groups:
-                groups[group_key] = []
-            groups[group_key].append(row)
+        # 指标字段按第一行解析带前缀的字段名
+        aggregations = self._plan_aggregations(metrics, data[0] if data else None)
+        aggregator = HashAggregator(
+            [self._make_group_key_getter(field) for field in group_by],
+            [measure for _, measures, _ in aggregations for measure in measures]
+        )
+        aggregator.add_rows(data)
         
-        # 对每个组进行聚合
+        # 对每个组生成结果行
         result = []
-        for group_key, group_rows in groups.items():
+        for group_key, state in aggregator.groups():
+            first_row = state.first_row
             aggregated_row = {}
             
             # 添加分组字段
@@ -982,8 +1165,8 @@ class QueryStep(BaseStep):
             # 添加维度字段（非聚合）
             for dim in dimensions:
                 if isinstance(dim, str):
-                    if dim not in group_by and dim in group_rows[0]:
-                        aggregated_row[dim] = group_rows[0][dim]
+                    if dim not in group_by and dim in first_row:
+                        aggregated_row[dim] = first_row[dim]
                 elif isinstance(dim, dict):
                     field_name = dim.get("name")
                     alias = dim.get("alias", field_name)
@@ -992,355 +1175,293 @@ class QueryStep(BaseStep):
                     if alias not in group_by:
                         if expression:
                             try:
-                                aggregated_row[alias] = self._evaluate_expression(expression, group_rows[0])
+                                aggregated_row[alias] = self._evaluate_expression(
+                                    expression, first_row
+                                )
                             except:
                                 aggregated_row[alias] = None
-                        elif field_name and field_name in group_rows[0]:
-                            aggregated_row[alias] = group_rows[0][field_name]
+                        elif field_name and field_name in first_row:
+                            aggregated_row[alias] = first_row[field_name]
             
             # 计算聚合指标
-            for metric in metrics:
-                if isinstance(metric, dict):
-                    field_name = metric.get("name")
-                    alias = metric.get("alias", field_name)
-                    aggregation = metric.get("aggregation", "SUM")
-                    expression = metric.get("expression")
-                    
-                    if expression:
-                        # 处理表达式聚合
-                        aggregated_row[alias] = self._aggregate_expression(expression, group_rows)
-                    elif field_name:
-                        # 处理带前缀的字段名
-                        actual_field_name = field_name
-                        if field_name not in group_rows[0]:
-                            # 寻找带前缀的字段名
-                            for row_key in group_rows[0].keys():
-                                if row_key.endswith(f".{field_name}") or row_key == field_name:
-                                    actual_field_name = row_key
-                                    break
-                        
-                        # 标准聚合
-                        aggregated_row[alias] = self._aggregate_field(actual_field_name, aggregation, group_rows)
+            aggregated_row.update(self._finalize_aggregations(aggregations, state))
             
             result.append(aggregated_row)
         
         return result
     
-    def _aggregate_field(self, field_name: str, aggregation: str, rows: List[Dict[str, Any]]) -> Any:
-        """聚合字段，支持字段名变体"""
-        # 支持字段名变体
-        values = []
-        for row in rows:
-            for variant in self._build_field_variants(field_name, row):
-                if variant in row and row[variant] is not None:
-                    values.append(row[variant])
-                    break
-        if not values:
-            return None
-        if aggregation == "SUM":
-            return sum(float(v) for v in values if self._is_numeric(v))
-        elif aggregation == "COUNT":
-            return len(values)
-        elif aggregation == "AVG":
-            numeric_values = [float(v) for v in values if self._is_numeric(v)]
-            return sum(numeric_values) / len(numeric_values) if numeric_values else None
-        elif aggregation == "MAX":
-            return max(values)
-        elif aggregation == "MIN":
-            return min(values)
-        else:
-            self.log_warning(f"不支持的聚合函数: {aggregation}")
-            return None
-
-    def _aggregate_expression(self, expression: str, rows: List[Dict[str, Any]]) -> Any:
-        """聚合表达式（支持字段名变体）"""
-        import re
-        # 首先尝试直接的SUM或COUNT或AVG
-        if "SUM(" in expression.upper() and "/" not in expression:
-            match = re.search(r'SUM\(([^)]+)\)', expression, re.IGNORECASE)
-            if match:
-                field_expr = match.group(1).strip()
-                total = 0
-                for row in rows:
-                    for variant in self._build_field_variants(field_expr, row):
-                        if variant in row and self._is_numeric(row[variant]):
-                            total += float(row[variant])
-                            break
-                return total
-        elif "COUNT(" in expression.upper() and "/" not in expression:
-            return len(rows)
-        elif "AVG(" in expression.upper() and "/" not in expression:
-            match = re.search(r'AVG\(([^)]+)\)', expression, re.IGNORECASE)
-            if match:
-                field_expr = match.group(1).strip()
-                values = []
-                for row in rows:
-                    for variant in self._build_field_variants(field_expr, row):
-                        if variant in row and self._is_numeric(row[variant]):
-                            values.append(float(row[variant]))
-                            break
-                if values:
-                    return sum(values) / len(values)
-                else:
-                    return None
-        else:
-            # 处理复杂表达式，如 SUM(field1) / COUNT(field2)
-            return self._evaluate_complex_aggregate_expression(expression, rows)
-        return None
-    
-    def _evaluate_complex_aggregate_expression(self, expression: str, rows: List[Dict[str, Any]]) -> Any:
-        """计算复杂的聚合表达式"""
-        import re
+    def _make_group_key_getter(self, field: str) -> Callable[[Dict[str, Any]], Any]:
+        """
+        生成分组字段的取值函数，支持带前缀的字段名（如 "o.region"）
         
-        # 替换表达式中的聚合函数
-        result_expr = expression
-        
-        # 查找所有SUM函数调用（更精确的匹配）
-        sum_pattern = r'SUM\(([^)]+)\)'
-        sum_matches = list(re.finditer(sum_pattern, expression, re.IGNORECASE))
-        
-        # 从后往前替换，避免位置偏移问题
-        for match in reversed(sum_matches):
-            start, end = match.span()
-            field_expr = match.group(1).strip()
-            total = 0
-            for row in rows:
-                try:
-                    value = self._evaluate_expression(field_expr, row)
-                    if self._is_numeric(value):
-                        total += float(value)
-                except:
-                    pass
-            result_expr = result_expr[:start] + str(total) + result_expr[end:]
-        
-        # 查找所有COUNT函数调用
-        count_pattern = r'COUNT\(([^)]+)\)'
-        count_matches = list(re.finditer(count_pattern, result_expr, re.IGNORECASE))
-        
-        # 从后往前替换COUNT函数
-        for match in reversed(count_matches):
-            start, end = match.span()
-            field_expr = match.group(1).strip()
-            count = len(rows)
-            result_expr = result_expr[:start] + str(count) + result_expr[end:]
-          # 移除CAST函数 - 使用递归方法处理嵌套括号
-        def remove_cast_functions(expr):
-            while 'CAST(' in expr.upper():
-                # 找到CAST的位置
-                cast_start = expr.upper().find('CAST(')
-                if cast_start == -1:
-                    break
-                    
-                # 找到对应的闭合括号
-                paren_count = 0
-                cast_end = -1
-                for i in range(cast_start + 5, len(expr)):  # 从CAST(后开始
-                    if expr[i] == '(':
-                        paren_count += 1
-                    elif expr[i] == ')':
-                        if paren_count == 0:
-                            cast_end = i
-                            break
-                        paren_count -= 1
-                
-                if cast_end == -1:
-                    break
-                    
-                # 提取CAST函数内容
-                cast_content = expr[cast_start + 5:cast_end]  # 去掉CAST(
-                
-                # 找到AS关键字
-                as_pos = cast_content.upper().rfind(' AS ')
-                if as_pos != -1:
-                    # 提取AS前的表达式
-                    inner_expr = cast_content[:as_pos].strip()
-                    # 替换整个CAST函数
-                    expr = expr[:cast_start] + inner_expr + expr[cast_end + 1:]
-                else:
-                    # 如果没有AS，就去掉CAST包装
-                    expr = expr[:cast_start] + cast_content + expr[cast_end + 1:]
+        Args:
+            field: 分组字段名
             
-            return expr
+        Returns:
+            从行中取分组字段值的函数，找不到时返回None
+        """
+        suffix = f".{field}"
+        resolved = None
+        
+        def get_key(row: Dict[str, Any]) -> Any:
+            nonlocal resolved
+            if field in row:
+                return row[field]
+            # 带前缀的字段名只解析一次
+            if resolved is not None and resolved in row:
+                return row[resolved]
+            for row_key in row:
+                if row_key.endswith(suffix):
+                    resolved = row_key
+                    return row[row_key]
+            return None
         
-        result_expr = remove_cast_functions(result_expr)
+        return get_key
+    
+    def _plan_aggregations(
+        self,
+        metrics: List[Union[str, Dict[str, Any]]],
+        sample_row: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[str, List[Measure], Callable]]:
+        """
+        为聚合指标生成需要逐行累加的聚合和计算指标值的函数
         
-        # 处理NULLIF函数 - NULLIF(expr1, expr2) 如果expr1 == expr2返回NULL，否则返回expr1
-        # 在除法上下文中，我们将其转换为安全除法：如果分母为0则返回None，否则正常除法
-        def handle_nullif(expr):
-            while 'NULLIF(' in expr.upper():
-                nullif_start = expr.upper().find('NULLIF(')
-                if nullif_start == -1:
-                    break
-                    
-                # 找到对应的闭合括号
-                paren_count = 0
-                nullif_end = -1
-                for i in range(nullif_start + 7, len(expr)):  # 从NULLIF(后开始
-                    if expr[i] == '(':
-                        paren_count += 1
-                    elif expr[i] == ')':
-                        if paren_count == 0:
-                            nullif_end = i
-                            break
-                        paren_count -= 1
-                
-                if nullif_end == -1:
-                    break
-                    
-                # 提取NULLIF函数内容并解析参数
-                nullif_content = expr[nullif_start + 7:nullif_end]  # 去掉NULLIF(
-                
-                # 简单解析参数（假设用逗号分隔且没有嵌套函数调用）
-                # 更复杂的解析可能需要专门的表达式解析器
-                params = nullif_content.split(',')
-                if len(params) == 2:
-                    expr1 = params[0].strip()
-                    expr2 = params[1].strip()
-                    
-                    # 对于常见的除零保护模式 NULLIF(expr, 0)，我们转换为Python的三元表达式
-                    if expr2 == '0':
-                        # 如果分母为0，返回None（相当于NULL），否则返回原值
-                        safe_expr = f"(None if {expr1} == 0 else {expr1})"
-                        expr = expr[:nullif_start] + safe_expr + expr[nullif_end + 1:]
-                    else:
-                        # 通用NULLIF处理
-                        safe_expr = f"(None if {expr1} == {expr2} else {expr1})"
-                        expr = expr[:nullif_start] + safe_expr + expr[nullif_end + 1:]
-                else:
-                    # 如果解析失败，跳过
-                    break
+        Args:
+            metrics: 指标配置
+            sample_row: 用于解析带前缀字段名的数据行，None表示不解析
             
-            return expr
+        Returns:
+            (别名, 聚合列表, 计算函数)列表，计算函数的参数是这些聚合的状态和分组第一行
+        """
+        aggregations = []
+        for metric in metrics:
+            if not isinstance(metric, dict):
+                continue
+            field_name = metric.get("name")
+            alias = metric.get("alias", field_name)
+            expression = metric.get("expression")
+            
+            if expression:
+                measures, finalize = self._plan_expression_aggregation(expression)
+            elif field_name:
+                if sample_row is not None and field_name not in sample_row:
+                    # 寻找带前缀的字段名
+                    for row_key in sample_row:
+                        if row_key.endswith(f".{field_name}"):
+                            field_name = row_key
+                            break
+                measures, finalize = self._plan_field_aggregation(
+                    field_name, metric.get("aggregation", "SUM")
+                )
+            else:
+                continue
+            aggregations.append((alias, measures, finalize))
+        return aggregations
+    
+    def _plan_field_aggregation(
+        self, field_name: str, aggregation: str
+    ) -> Tuple[List[Measure], Callable]:
+        """按字段聚合：值为None的行不参与聚合，没有非空值时结果为None"""
+        if aggregation == "COUNT_DISTINCT":
+            getter = self._make_field_getter(field_name, accept=_is_not_none)
+            measure = Measure("COUNT", getter, distinct=True)
+        elif aggregation in ACCUMULATORS:
+            measure = Measure(aggregation, self._make_field_getter(field_name, accept=_is_not_none))
+        else:
+            self.log_warning(f"不支持的聚合函数: {aggregation}")
+            return [], _null_aggregate
         
-        result_expr = handle_nullif(result_expr)
+        def finalize(accumulators: List[Accumulator], first_row: Optional[Dict[str, Any]]) -> Any:
+            accumulator = accumulators[0]
+            return accumulator.result() if accumulator.seen else None
         
-        # 计算最终结果
-        try:
-            result = eval(result_expr)
-            # 如果结果涉及None（SQL的NULL），处理除法
-            if result is None:
-                return None
-            return result
-        except Exception as e:
-            self.log_warning(f"复杂聚合表达式计算失败: {expression} -> {result_expr}, error: {e}")
-            return None
+        return [measure], finalize
     
-    def _evaluate_expression(self, expression: str, row: Dict[str, Any]) -> Any:
-        """计算表达式（简单实现）"""
-        # 这是一个简化的表达式计算器
-        # 在实际应用中可能需要更复杂的解析器
-        
-        import re
+    def _plan_expression_aggregation(self, expression: str) -> Tuple[List[Measure], Callable]:
+        """
+        按表达式聚合
         
-        # 处理 CASE WHEN 表达式
-        if "CASE" in expression.upper() and "WHEN" in expression.upper():
-            return self._evaluate_case_when_expression(expression, row)
+        单个SUM(x)、COUNT(...)、AVG(x)（不含除法）直接按字段累加，其中COUNT按行计数；
+        其他表达式（包括COUNT(DISTINCT x)）按累加方式编译，表达式中的每个聚合
+        分别累加。
+        """
+        upper_expression = expression.upper()
+        function = None
+        if "/" not in expression:
+            if "SUM(" in upper_expression:
+                function = "SUM"
+            elif "COUNT(" in upper_expression:
+                if "DISTINCT" not in upper_expression:
+                    return [Measure("COUNT")], _first_aggregate_result
+            elif "AVG(" in upper_expression:
+                function = "AVG"
+        
+        if function is not None:
+            match = re.search(rf'{function}\(([^)]+)\)', expression, re.IGNORECASE)
+            if not match:
+                return [], _null_aggregate
+            getter = self._make_field_getter(match.group(1).strip(), accept=_is_numeric_value)
+            return [Measure(function, getter)], _first_aggregate_result
+        
+        compiled = self._compile_expression(expression, accumulated=True)
+        if compiled is None:
+            return [], _null_aggregate
+        
+        def finalize(accumulators: List[Accumulator], first_row: Optional[Dict[str, Any]]) -> Any:
+            try:
+                return compiled([accumulator.result() for accumulator in accumulators], first_row)
+            except Exception as e:
+                self.log_warning(f"复杂聚合表达式计算失败: {expression}, error: {e}")
+                return None
         
-        # 检查是否包含聚合函数
-        if any(func in expression.upper() for func in ['SUM(', 'COUNT(', 'AVG(', 'MAX(', 'MIN(']):
-            return self._evaluate_expression_with_aggregates(expression, row)
+        return compiled.measures, finalize
+    
+    @staticmethod
+    def _finalize_aggregations(
+        aggregations: List[Tuple[str, List[Measure], Callable]], state: Any
+    ) -> Dict[str, Any]:
+        """
+        根据分组的聚合状态计算各指标的值
         
-        # 替换字段名
-        result_expr = expression
+        Args:
+            aggregations: _plan_aggregations的结果
+            state: 分组状态
+            
+        Returns:
+            指标别名到指标值的映射
+        """
+        values = {}
+        start = 0
+        for alias, measures, finalize in aggregations:
+            end = start + len(measures)
+            values[alias] = finalize(state.accumulators[start:end], state.first_row)
+            start = end
+        return values
+    
+    def _aggregate_expression(self, expression: str, rows: List[Dict[str, Any]]) -> Any:
+        """
+        对一组行计算聚合表达式
         
-        # 查找所有字段引用 - 只匹配真正的字段名，排除SQL关键字
-        field_pattern = r'\b[a-zA-Z_][a-zA-Z0-9_]*\b'
-        fields = re.findall(field_pattern, expression)
+        Args:
+            expression: 聚合表达式
+            rows: 参与聚合的行
+            
+        Returns:
+            计算结果
+        """
+        measures, finalize = self._plan_expression_aggregation(expression)
+        aggregator = HashAggregator([], measures).add_rows(rows)
+        states = [state for _, state in aggregator.groups()] or [aggregator.new_state(None)]
+        return finalize(states[0].accumulators, states[0].first_row)
+    
+    def _evaluate_expression(self, expression: str, row: Dict[str, Any]) -> Any:
+        """
+        计算单行表达式
         
-        # 排除常见的SQL关键字和函数名
-        sql_keywords = {
-            'SELECT', 'FROM', 'WHERE', 'AND', 'OR', 'NOT', 'IN', 'LIKE', 'IS', 'NULL',
-            'CASE', 'WHEN', 'THEN', 'ELSE', 'END', 'COUNT', 'SUM', 'AVG', 'MAX', 'MIN',
-            'CAST', 'AS', 'DECIMAL', 'INTEGER', 'VARCHAR', 'CHAR', 'DATE', 'TIMESTAMP'
-        }
+        表达式中的SUM(x)等聚合引用按字段x取当前行中已经算好的值。
         
-        for field in fields:
-            if field.upper() not in sql_keywords and field in row:
-                value = row[field]
-                if isinstance(value, str):
-                    # 只替换完整的单词匹配
-                    result_expr = re.sub(r'\b' + re.escape(field) + r'\b', f"'{value}'", result_expr)
-                else:
-                    # 只替换完整的单词匹配
-                    result_expr = re.sub(r'\b' + re.escape(field) + r'\b', str(value), result_expr)
+        Args:
+            expression: SQL表达式
+            row: 当前行数据
+            
+        Returns:
+            计算结果，无法计算时返回None
+        """
+        compiled = self._compile_expression(expression)
+        if compiled is None:
+            return None
         
-        # 尝试计算表达式
         try:
-            # 注意：这里使用eval有安全风险，在生产环境中应该使用更安全的表达式解析器
-            return eval(result_expr)
+            return compiled(row)
         except Exception as e:
-            self.log_warning(f"表达式计算失败: {expression} -> {result_expr}, error: {e}")
+            self.log_warning(f"表达式计算失败: {expression}, error: {e}")
             return None
     
-    def _evaluate_expression_with_aggregates(self, expression: str, row: Dict[str, Any]) -> Any:
-        """计算包含聚合函数的表达式"""
-        import re
-        
-        result_expr = expression
+    def _compile_expression(
+        self, expression: str, accumulated: bool = False
+    ) -> Optional[Union[CompiledExpression, AccumulatedExpression]]:
+        """
+        编译表达式，编译结果由编译器缓存，无法编译的表达式只告警一次
         
-        # 处理各种聚合函数
-        for func_name in ['SUM', 'COUNT', 'AVG', 'MAX', 'MIN']:
-            func_pattern = f'{func_name}\\(([^)]+)\\)'
-            func_matches = re.findall(func_pattern, expression, re.IGNORECASE)
+        Args:
+            expression: SQL表达式
+            accumulated: 是否按累加方式编译聚合表达式
             
-            for field_expr in func_matches:
-                # 动态构建字段名变体，而不是硬编码
-                field_variants = self._build_field_variants(field_expr, row)
-                
-                field_value = None
-                for variant in field_variants:
-                    if variant in row:
-                        field_value = row[variant]
-                        break
-                
-                if field_value is not None:
-                    # 替换聚合函数调用
-                    func_call = f"{func_name}({field_expr})"
-                    result_expr = result_expr.replace(func_call, str(field_value))
-        
-        # 如果替换后表达式还包含SQL聚合函数，说明本地无法处理，直接返回None并警告
-        if re.search(r'(SUM|COUNT|AVG|MAX|MIN)\\(', result_expr, re.IGNORECASE):
-            self.log_warning(f"本地无法处理聚合表达式: {expression} -> {result_expr}")
+        Returns:
+            编译后的表达式，无法编译时返回None
+        """
+        if expression in self._invalid_expressions:
             return None
         
-        # 尝试计算表达式
         try:
-            return eval(result_expr)
-        except Exception as e:
-            self.log_warning(f"聚合表达式计算失败: {expression} -> {result_expr}, error: {e}")
+            if accumulated:
+                return self.expression_compiler.compile_accumulated(expression)
+            return self.expression_compiler.compile(expression)
+        except ExpressionError as e:
+            self._invalid_expressions.add(expression)
+            self.log_warning(f"表达式编译失败: {expression}", error=str(e))
             return None
     
-    def _build_field_variants(self, field_expr: str, row: Dict[str, Any]) -> List[str]:
+    def _make_field_getter(
+        self, field_expr: str, accept: Optional[Callable[[Any], bool]] = None
+    ) -> Callable[[Dict[str, Any]], Any]:
         """
-        动态构建字段名变体
+        为字段引用生成取值函数
+        
+        依次尝试原字段名、去掉表别名的字段名、"别名_字段名"和配置中表别名的
+        变体；字段名不带表别名时最后查找以"_字段名"结尾的键。
         
         Args:
             field_expr: 字段表达式，如 "coc.total_orders"
-            row: 当前行数据
+            accept: 只取满足条件的值，如聚合时跳过None；默认取第一个存在的字段
             
         Returns:
-            字段名变体列表
+            从行中取字段值的函数，找不到时返回None
         """
-        variants = [field_expr]  # 原始字段名
-        
-        # 如果字段名包含表别名（如 "coc.total_orders"）
+        getter = self._field_getters.get((field_expr, accept))
+        if getter is None:
+            getter = self._build_field_getter(field_expr, accept)
+            self._field_getters[(field_expr, accept)] = getter
+        return getter
+    
+    def _build_field_getter(
+        self, field_expr: str, accept: Optional[Callable[[Any], bool]]
+    ) -> Callable[[Dict[str, Any]], Any]:
+        """生成字段取值函数，参见_make_field_getter"""
+        variants = [field_expr]
         if '.' in field_expr:
             table_alias, field_name = field_expr.split('.', 1)
-            variants.extend([
-                field_name,  # 去掉前缀：total_orders
-                f"{table_alias}_{field_name}"  # 加上别名前缀：coc_total_orders
-            ])
+            variants.extend([field_name, f"{table_alias}_{field_name}"])
+            suffix = None
         else:
-            # 如果字段名不包含表别名，尝试从行数据中推断可能的表别名
-            # 查找所有以该字段名结尾的键
-            for key in row.keys():
-                if key.endswith(f"_{field_expr}"):
-                    variants.append(key)
-        
-        # 从当前查询配置中获取表别名信息，构建更多变体
+            suffix = f"_{field_expr}"
         variants.extend(self._get_table_alias_variants(field_expr))
+        variants = list(dict.fromkeys(variants))
+        
+        if accept is not None:
+            def get_accepted_field(row: Dict[str, Any]) -> Any:
+                for variant in variants:
+                    if variant in row and accept(row[variant]):
+                        return row[variant]
+                if suffix is not None:
+                    for key in row:
+                        if key.endswith(suffix) and accept(row[key]):
+                            return row[key]
+                return None
+            
+            return get_accepted_field
         
-        return list(set(variants))  # 去重
+        def get_field(row: Dict[str, Any]) -> Any:
+            for variant in variants:
+                if variant in row:
+                    return row[variant]
+            if suffix is not None:
+                for key in row:
+                    if key.endswith(suffix):
+                        return row[key]
+            return None
+        
+        return get_field
     
     def _get_table_alias_variants(self, field_expr: str) -> List[str]:
         """
@@ -1374,142 +1495,6 @@ class QueryStep(BaseStep):
         
         return variants
     
-    def _evaluate_case_when_expression(self, expression: str, row: Dict[str, Any]) -> Any:
-        """计算 CASE WHEN 表达式"""
-        import re
-        
-        # 简化的 CASE WHEN 表达式解析器
-        # 格式: CASE WHEN condition THEN value1 ELSE value2 END
-        
-        # 提取 WHEN 条件和 THEN/ELSE 值
-        case_pattern = r'CASE\s+WHEN\s+(.+?)\s+THEN\s+(.+?)\s+ELSE\s+(.+?)\s+END'
-        match = re.search(case_pattern, expression, re.IGNORECASE)
-        
-        if not match:
-            self.log_warning(f"无法解析 CASE WHEN 表达式: {expression}")
-            return None
-        
-        condition = match.group(1)
-        then_value = match.group(2)
-        else_value = match.group(3)
-        
-        # 计算条件
-        condition_result = self._evaluate_condition(condition, row)
-        
-        if condition_result:
-            return self._parse_value(then_value)
-        else:
-            return self._parse_value(else_value)
-    
-    def _evaluate_condition(self, condition: str, row: Dict[str, Any]) -> bool:
-        """计算条件表达式"""
-        import re
-        
-        # 处理聚合函数表达式
-        if any(func in condition.upper() for func in ['SUM(', 'COUNT(', 'AVG(', 'MAX(', 'MIN(']):
-            return self._evaluate_condition_with_aggregates(condition, row)
-        
-        # 替换字段名
-        result_condition = condition
-        
-        # 查找所有字段引用
-        field_pattern = r'\b[a-zA-Z_][a-zA-Z0-9_]*\b'
-        fields = re.findall(field_pattern, condition)
-        
-        # 排除操作符和SQL关键字
-        operators = {'>', '<', '>=', '<=', '=', '!=', 'AND', 'OR', 'NOT', 'SUM', 'COUNT', 'AVG', 'MAX', 'MIN'}
-        
-        for field in fields:
-            if field.upper() not in operators and field in row:
-                value = row[field]
-                # 只替换完整的单词匹配
-                result_condition = re.sub(r'\b' + re.escape(field) + r'\b', str(value), result_condition)
-        
-        # 将 SQL 操作符转换为 Python 操作符
-        result_condition = result_condition.replace(' = ', ' == ')
-        result_condition = result_condition.replace('=', '==')
-        
-        try:
-            return bool(eval(result_condition))
-        except Exception as e:
-            self.log_warning(f"条件计算失败: {condition} -> {result_condition}, error: {e}")
-            return False
-    
-    def _evaluate_condition_with_aggregates(self, condition: str, row: Dict[str, Any]) -> bool:
-        """计算包含聚合函数的条件表达式"""
-        import re
-        
-        # 处理 SUM(field_name) > value 这样的条件
-        # 在这个上下文中，我们假设聚合已经在当前行中计算完成
-        result_condition = condition
-        
-        # 替换SUM(field)为实际值
-        sum_pattern = r'SUM\(([^)]+)\)'
-        sum_matches = re.findall(sum_pattern, condition, re.IGNORECASE)
-        
-        for field_expr in sum_matches:
-            # 动态构建字段名变体，而不是硬编码
-            field_variants = self._build_field_variants(field_expr, row)
-            
-            field_value = None
-            for variant in field_variants:
-                if variant in row:
-                    field_value = row[variant]
-                    break
-            
-            if field_value is not None:
-                # 替换SUM函数调用
-                sum_call = f"SUM({field_expr})"
-                result_condition = result_condition.replace(sum_call, str(field_value))
-        
-        # 处理其他聚合函数（类似方式）
-        for func_name in ['COUNT', 'AVG', 'MAX', 'MIN']:
-            func_pattern = f'{func_name}\\(([^)]+)\\)'
-            func_matches = re.findall(func_pattern, condition, re.IGNORECASE)
-            
-            for field_expr in func_matches:
-                # 动态构建字段名变体，而不是硬编码
-                field_variants = self._build_field_variants(field_expr, row)
-                
-                field_value = None
-                for variant in field_variants:
-                    if variant in row:
-                        field_value = row[variant]
-                        break
-                
-                if field_value is not None:
-                    func_call = f"{func_name}({field_expr})"
-                    result_condition = result_condition.replace(func_call, str(field_value))
-        
-        # 将 SQL 操作符转换为 Python 操作符
-        result_condition = result_condition.replace(' = ', ' == ')
-        result_condition = result_condition.replace('=', '==')
-        
-        try:
-            return bool(eval(result_condition))
-        except Exception as e:
-            self.log_warning(f"聚合条件计算失败: {condition} -> {result_condition}, error: {e}")
-            return False
-    
-    def _parse_value(self, value_str: str) -> Any:
-        """解析值字符串"""
-        value_str = value_str.strip()
-        
-        # 尝试解析为数字
-        try:
-            if '.' in value_str:
-                return float(value_str)
-            else:
-                return int(value_str)
-        except ValueError:
-            # 如果不是数字，返回字符串（去掉引号）
-            if value_str.startswith("'") and value_str.endswith("'"):
-                return value_str[1:-1]
-            elif value_str.startswith('"') and value_str.endswith('"'):
-                return value_str[1:-1]
-            else:
-                return value_str
-    
     def _is_numeric(self, value: Any) -> bool:
         """检查是否是数值"""
         try:
@@ -1579,27 +1564,36 @@ class QueryStep(BaseStep):
         if not calculated_fields or not data:
             return data
         
-        result = []
-        for row in data:
-            new_row = row.copy()
+        # 每个计算字段对整个数据集按列计算一次：窗口函数一次分区排序，普通表达式只编译一次
+        columns: List[tuple] = []
+        for calc_field in calculated_fields:
+            alias = calc_field.get("alias")
+            expression = calc_field.get("expression")
             
-            # 处理每个计算字段
-            for calc_field in calculated_fields:
-                alias = calc_field.get("alias")
-                expression = calc_field.get("expression")
-                
-                if not alias or not expression:
-                    self.log_warning("计算字段配置不完整，跳过", config=calc_field)
-                    continue
-                
-                try:
-                    # 计算表达式值
-                    calculated_value = self._evaluate_calculated_expression(expression, row, data)
-                    new_row[alias] = calculated_value
-                except Exception as e:
-                    self.log_warning(f"计算字段 {alias} 计算失败: {e}")
-                    new_row[alias] = None
+            if not alias or not expression:
+                self.log_warning("计算字段配置不完整，跳过", config=calc_field)
+                continue
+            
+            if window_function_evaluator.is_window_expression(expression):
+                columns.append((alias, self._evaluate_window_function(expression, data)))
+                continue
             
+            compiled = self._compile_expression(expression)
+            try:
+                if compiled is not None:
+                    values = compiled.evaluate_rows(data)
+                else:
+                    values = [None] * len(data)
+            except Exception as e:
+                self.log_warning(f"计算字段 {alias} 计算失败: {e}")
+                values = [None] * len(data)
+            columns.append((alias, values))
+        
+        result = []
+        for row_index, row in enumerate(data):
+            new_row = row.copy()
+            for alias, values in columns:
+                new_row[alias] = values[row_index]
             result.append(new_row)
         
         return result
@@ -1616,157 +1610,46 @@ class QueryStep(BaseStep):
         Returns:
             计算结果
         """
-        import re
+        # 检查是否是窗口函数（批量计算时由_add_calculated_fields预先处理）
+        if window_function_evaluator.is_window_expression(expression):
+            for row, value in zip(all_data, self._evaluate_window_function(expression, all_data)):
+                if row is current_row:
+                    return value
+            return None
         
-        # 检查是否是窗口函数
-        if "ROW_NUMBER()" in expression and "OVER" in expression:
-            return self._evaluate_window_function(expression, current_row, all_data)
-        elif "RANK()" in expression and "OVER" in expression:
-            return self._evaluate_window_function(expression, current_row, all_data)
-        else:
-            # 普通表达式计算
-            return self._evaluate_expression(expression, current_row)
+        # 普通表达式计算
+        return self._evaluate_expression(expression, current_row)
 
-    def _evaluate_window_function(self, expression: str, current_row: Dict[str, Any], all_data: List[Dict[str, Any]]) -> Any:
+    def _evaluate_window_function(self, expression: str,
+                                  all_data: List[Dict[str, Any]]) -> List[Any]:
         """
         计算窗口函数
         
+        支持ROW_NUMBER、RANK、DENSE_RANK、LAG、LEAD以及累计SUM/AVG/COUNT/MIN/MAX，
+        例如: ROW_NUMBER() OVER (PARTITION BY country ORDER BY total_sales_amount DESC)
+        
         Args:
             expression: 窗口函数表达式
-            current_row: 当前行
             all_data: 所有数据
             
         Returns:
-            窗口函数结果
+            与all_data一一对应的窗口函数结果
         """
-        import re
-        
-        # 解析窗口函数表达式
-        # 例如: ROW_NUMBER() OVER (PARTITION BY country ORDER BY total_sales_amount DESC)
-        window_pattern = r'(ROW_NUMBER|RANK|DENSE_RANK)\(\)\s+OVER\s*\(\s*(.*?)\s*\)'
-        match = re.search(window_pattern, expression, re.IGNORECASE)
+        try:
+            spec = window_function_evaluator.parse(expression)
+        except ValueError as e:
+            self.log_warning(f"无法解析窗口函数表达式: {expression}", error=str(e))
+            spec = None
         
-        if not match:
+        if spec is None:
             self.log_warning(f"无法解析窗口函数表达式: {expression}")
-            return None
-        
-        function_name = match.group(1).upper()
-        over_clause = match.group(2)
-        
-        # 解析 PARTITION BY 和 ORDER BY
-        partition_by = []
-        order_by = []
-        
-        # 解析 PARTITION BY - 使用正确的正则表达式
-        partition_pattern = r'PARTITION\s+BY\s+(.+?)\s+ORDER\s+BY'
-        partition_match = re.search(partition_pattern, over_clause, re.IGNORECASE)
-        if partition_match:
-            partition_by = [field.strip() for field in partition_match.group(1).split(',')]
-        
-
-        
-        # 解析 ORDER BY - 修复正则表达式
-        order_pattern = r'ORDER\s+BY\s+(.+?)$'
-        order_match = re.search(order_pattern, over_clause, re.IGNORECASE)
-        if order_match:
-            order_clause = order_match.group(1)
-            # 解析排序字段和方向
-            order_parts = order_clause.split(',')
-            for part in order_parts:
-                part = part.strip()
-                if ' DESC' in part.upper():
-                    field = part.replace(' DESC', '').replace(' desc', '').strip()
-                    order_by.append((field, 'DESC'))
-                elif ' ASC' in part.upper():
-                    field = part.replace(' ASC', '').replace(' asc', '').strip()
-                    order_by.append((field, 'ASC'))
-                else:
-                    order_by.append((part, 'ASC'))
-        
-        # 如果有分区，先按分区分组
-        if partition_by:
-            # 找到当前行所属的分区
-            partition_key = tuple(current_row.get(field, None) for field in partition_by)
-            partition_data = [row for row in all_data 
-                            if tuple(row.get(field, None) for field in partition_by) == partition_key]
-        else:
-            partition_data = all_data
+            return [None] * len(all_data)
         
-        # 按 ORDER BY 排序分区数据
-        if order_by:
-            try:
-                # 简化排序逻辑：分别处理每个字段的排序方向
-                from operator import itemgetter
-                
-                # 为了支持多字段混合排序，我们需要逐个字段进行排序
-                sorted_partition = list(partition_data)
-                
-                # 反向处理order_by，确保最重要的排序字段最后处理
-                for field, direction in reversed(order_by):
-                    def get_sort_value(row):
-                        value = row.get(field)
-                        
-                        # 处理 None 值
-                        if value is None:
-                            # None值统一处理为特殊值
-                            return float('-inf') if direction == 'DESC' else float('inf')
-                        
-                        # 处理数值转换
-                        if isinstance(value, str) and value.replace('.', '').replace('-', '').isdigit():
-                            value = float(value)
-                        
-                        return value
-                    
-                    # 按方向排序
-                    reverse_sort = (direction == 'DESC')
-                    sorted_partition = sorted(sorted_partition, key=get_sort_value, reverse=reverse_sort)
-                
-            except Exception as e:
-                self.log_warning(f"窗口函数排序失败: {e}")
-                sorted_partition = partition_data
-        else:
-            sorted_partition = partition_data
-        
-        # 计算窗口函数结果
         try:
-            # 找到当前行在排序后数据中的位置
-            current_row_index = None
-            for i, row in enumerate(sorted_partition):
-                # 通过比较所有字段值来确定是否是同一行
-                if all(str(row.get(k, '')) == str(current_row.get(k, '')) for k in current_row.keys()):
-                    current_row_index = i
-                    break
-            
-            if current_row_index is None:
-                self.log_warning("在分区数据中找不到当前行")
-                return None
-            
-            if function_name == 'ROW_NUMBER':
-                return current_row_index + 1
-            elif function_name == 'RANK':
-                # 计算并列排名
-                rank = 1
-                if current_row_index > 0:
-                    # 检查前面有多少个不同的值
-                    current_values = [current_row.get(field, 0) for field, _ in order_by]
-                    for i in range(current_row_index):
-                        prev_values = [sorted_partition[i].get(field, 0) for field, _ in order_by]
-                        if prev_values != current_values:
-                            rank = i + 2
-                            break
-                return rank
-            elif function_name == 'DENSE_RANK':
-                # 密集排名实现
-                if current_row_index == 0:
-                    return 1
-                # 简化实现，与 RANK 相同
-                return current_row_index + 1
-            else:
-                return current_row_index + 1
-                
+            return window_function_evaluator.evaluate(spec, all_data)
         except Exception as e:
             self.log_warning(f"窗口函数计算失败: {e}")
-            return None
+            return [None] * len(all_data)
     
     def _resolve_field_name(self, field_name: str, main_table: str, has_joins: bool) -> str:
         """
@@ -1832,96 +1715,226 @@ class QueryStep(BaseStep):
     def _perform_step_data_join(self, left_data: List[Dict[str, Any]], right_data: List[Dict[str, Any]], 
                                join_condition: str, join_type: str, right_alias: str = None) -> List[Dict[str, Any]]:
         """
-        执行步骤数据的JOIN操作
+        执行步骤数据的JOIN操作（哈希连接）
+        
+        在较小的一侧建立哈希表，另一侧探测，输出顺序与逐行嵌套循环一致：
+        按左表行顺序输出，同一左表行的匹配按右表行顺序输出；RIGHT/FULL JOIN
+        未匹配的右表行追加在最后。
         
         Args:
             left_data: 左表数据
             right_data: 右表数据
-            join_condition: JOIN条件，如 "coc.customer_id = cfod.customer_id"
-            join_type: JOIN类型
+            join_condition: JOIN条件，如 "coc.customer_id = cfod.customer_id"，
+                            多个等值条件可用AND连接
+            join_type: JOIN类型（INNER/LEFT/RIGHT/FULL）
             right_alias: 右表别名
             
         Returns:
             JOIN后的数据
         """
-        import re
+        join_type = (join_type or "INNER").upper().replace("OUTER", "").strip()
+        if join_type not in ("INNER", "LEFT", "RIGHT", "FULL"):
+            self.log_warning(f"不支持的步骤数据JOIN类型: {join_type}，按INNER JOIN处理")
+            join_type = "INNER"
         
         # 解析JOIN条件
-        # 例如: "coc.customer_id = cfod.customer_id"
-        condition_match = re.match(r'(\w+)\.(\w+)\s*=\s*(\w+)\.(\w+)', join_condition.strip())
-        if not condition_match:
+        key_pairs = self._parse_step_join_condition(join_condition, right_alias)
+        if not key_pairs:
             self.log_warning(f"无法解析JOIN条件: {join_condition}")
             return left_data
         
-        left_alias, left_field = condition_match.group(1), condition_match.group(2)
-        right_alias_from_condition, right_field = condition_match.group(3), condition_match.group(4)
+        left_alias = key_pairs[0][0]
+        right_alias_from_condition = key_pairs[0][2]
         
-        result = []
+        # 链式JOIN时左表行已带别名前缀，优先使用带前缀的字段
+        sample_left = left_data[0] if left_data else {}
+        left_fields = [
+            f"{alias}.{field}" if f"{alias}.{field}" in sample_left else field
+            for alias, field, _, _ in key_pairs
+        ]
+        right_fields = [field for _, _, _, field in key_pairs]
         
-        if join_type == "INNER":
-            # INNER JOIN
-            for left_row in left_data:
-                left_value = left_row.get(left_field)
-                
-                for right_row in right_data:
-                    right_value = right_row.get(right_field)
-                    
-                    if left_value == right_value:
-                        # 合并行数据
-                        merged_row = {}
-                        
-                        # 添加左表数据（带别名前缀）
-                        for key, value in left_row.items():
-                            merged_row[f"{left_alias}.{key}"] = value
-                            # 同时保留无前缀的字段名以保持兼容性
-                            if key not in merged_row:
-                                merged_row[key] = value
-                        
-                        # 添加右表数据（带别名前缀）
-                        for key, value in right_row.items():
-                            prefixed_key = f"{right_alias_from_condition}.{key}"
-                            merged_row[prefixed_key] = value
-                            # 如果左表没有同名字段，也添加无前缀版本
-                            if key not in left_row:
-                                merged_row[key] = value
-                        
-                        result.append(merged_row)
-                        
-        elif join_type == "LEFT":
-            # LEFT JOIN
-            for left_row in left_data:
-                left_value = left_row.get(left_field)
-                joined = False
-                
-                for right_row in right_data:
-                    right_value = right_row.get(right_field)
-                    
-                    if left_value == right_value:
-                        # 合并行数据
-                        merged_row = {}
-                        
-                        # 添加左表数据
-                        for key, value in left_row.items():
-                            merged_row[f"{left_alias}.{key}"] = value
-                            if key not in merged_row:
-                                merged_row[key] = value
-                        
-                        # 添加右表数据
-                        for key, value in right_row.items():
-                            prefixed_key = f"{right_alias_from_condition}.{key}"
-                            merged_row[prefixed_key] = value
-                            if key not in left_row:
-                                merged_row[key] = value
-                        
-                        result.append(merged_row)
-                        joined = True
-                
-                # 如果没有匹配的右表记录，添加左表记录（右表字段为None）
-                if not joined:
-                    merged_row = {}
-                    for key, value in left_row.items():
-                        merged_row[f"{left_alias}.{key}"] = value
-                        merged_row[key] = value
-                    result.append(merged_row)
+        left_key = self._make_join_key_getter(left_fields)
+        right_key = self._make_join_key_getter(right_fields)
+        
+        try:
+            matches = self._match_join_rows(left_data, right_data, left_key, right_key)
+        except TypeError:
+            # 连接键不可哈希（如列表），退化为逐行比较
+            self.log_warning("JOIN键不可哈希，使用嵌套循环连接")
+            matches = [
+                [
+                    j for j, right_row in enumerate(right_data)
+                    if left_key(left_row) == right_key(right_row)
+                ]
+                for left_row in left_data
+            ]
+        
+        plans: Dict[Any, Any] = {}
+        
+        def merge(left_row: Optional[Dict[str, Any]],
+                  right_row: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+            left_keys = tuple(left_row) if left_row is not None else None
+            right_keys = tuple(right_row) if right_row is not None else None
+            plan = plans.get((left_keys, right_keys))
+            if plan is None:
+                plan = self._build_join_row_plan(
+                    left_keys, right_keys, left_alias, right_alias_from_condition
+                )
+                plans[(left_keys, right_keys)] = plan
+            
+            output_keys, getter = plan
+            if getter is None:
+                return {}
+            values = (list(left_row.values()) if left_row is not None else []) + \
+                     (list(right_row.values()) if right_row is not None else [])
+            return dict(zip(output_keys, getter(values)))
+        
+        result = []
+        matched_right = set() if join_type in ("RIGHT", "FULL") else None
+        
+        for left_row, right_indexes in zip(left_data, matches):
+            if right_indexes:
+                for j in right_indexes:
+                    result.append(merge(left_row, right_data[j]))
+                if matched_right is not None:
+                    matched_right.update(right_indexes)
+            elif join_type in ("LEFT", "FULL"):
+                # 没有匹配的右表记录，只保留左表字段
+                result.append(merge(left_row, None))
+        
+        if matched_right is not None:
+            for j, right_row in enumerate(right_data):
+                if j not in matched_right:
+                    result.append(merge(None, right_row))
         
         return result
+    
+    def _parse_step_join_condition(self, join_condition: str,
+                                   right_alias: Optional[str] = None) -> List[tuple]:
+        """
+        解析步骤数据JOIN的等值条件
+        
+        Args:
+            join_condition: JOIN条件，如 "a.id = b.id AND a.dt = b.dt"
+            right_alias: 右表别名，条件写反时用于调整方向
+            
+        Returns:
+            (左表别名, 左表字段, 右表别名, 右表字段) 列表，无法解析时返回空列表
+        """
+        import re
+        
+        key_pairs = []
+        for clause in re.split(r'\s+AND\s+', (join_condition or "").strip(), flags=re.IGNORECASE):
+            condition_match = re.fullmatch(
+                r'\(?\s*(\w+)\.(\w+)\s*=\s*(\w+)\.(\w+)\s*\)?', clause.strip()
+            )
+            if not condition_match:
+                return []
+            
+            first_alias, first_field, second_alias, second_field = condition_match.groups()
+            
+            # 条件写成 "右表.字段 = 左表.字段" 时交换方向
+            if right_alias and first_alias == right_alias and second_alias != right_alias:
+                first_alias, first_field, second_alias, second_field = (
+                    second_alias, second_field, first_alias, first_field
+                )
+            
+            key_pairs.append((first_alias, first_field, second_alias, second_field))
+        
+        return key_pairs
+    
+    @staticmethod
+    def _make_join_key_getter(fields: List[str]):
+        """
+        构造从行中提取JOIN键的函数
+        
+        Args:
+            fields: 连接字段列表
+            
+        Returns:
+            单字段时返回字段值，多字段时返回值元组
+        """
+        if len(fields) == 1:
+            field = fields[0]
+            return lambda row: row.get(field)
+        return lambda row: tuple(row.get(field) for field in fields)
+    
+    @staticmethod
+    def _match_join_rows(left_data: List[Dict[str, Any]], right_data: List[Dict[str, Any]],
+                         left_key, right_key) -> List[List[int]]:
+        """
+        计算每个左表行匹配的右表行下标
+        
+        在较小的一侧建立哈希表。键的相等语义与逐行比较（==）一致。
+        
+        Args:
+            left_data: 左表数据
+            right_data: 右表数据
+            left_key: 左表键提取函数
+            right_key: 右表键提取函数
+            
+        Returns:
+            与左表行一一对应的右表下标列表（按右表顺序）
+        """
+        if len(right_data) <= len(left_data):
+            index: Dict[Any, List[int]] = {}
+            for j, right_row in enumerate(right_data):
+                index.setdefault(right_key(right_row), []).append(j)
+            return [index.get(left_key(left_row), []) for left_row in left_data]
+        
+        index = {}
+        for i, left_row in enumerate(left_data):
+            index.setdefault(left_key(left_row), []).append(i)
+        
+        matches: List[List[int]] = [[] for _ in left_data]
+        for j, right_row in enumerate(right_data):
+            for i in index.get(right_key(right_row), ()):
+                matches[i].append(j)
+        return matches
+    
+    @staticmethod
+    def _build_join_row_plan(left_keys: Optional[tuple], right_keys: Optional[tuple],
+                             left_alias: str, right_alias: str):
+        """
+        为一种左右行字段组合预先计算输出行的字段布局
+        
+        输出行同时包含带别名前缀和不带前缀的字段：左表字段总是保留，
+        右表的无前缀字段只在左表没有同名字段时添加。
+        
+        Args:
+            left_keys: 左表行字段（None表示没有左表行）
+            right_keys: 右表行字段（None表示没有右表行）
+            left_alias: 左表别名
+            right_alias: 右表别名
+            
+        Returns:
+            (输出字段列表, 从左右行值列表中取值的函数)
+        """
+        from operator import itemgetter
+        
+        layout: Dict[str, int] = {}
+        offset = 0
+        
+        if left_keys is not None:
+            for i, key in enumerate(left_keys):
+                layout[f"{left_alias}.{key}"] = i
+                if right_keys is None or key not in layout:
+                    layout[key] = i
+            offset = len(left_keys)
+        
+        if right_keys is not None:
+            left_key_set = set(left_keys or ())
+            for j, key in enumerate(right_keys):
+                layout[f"{right_alias}.{key}"] = offset + j
+                if left_keys is None or key not in left_key_set:
+                    layout[key] = offset + j
+        
+        output_keys = list(layout)
+        positions = list(layout.values())
+        if not positions:
+            return output_keys, None
+        if len(positions) == 1:
+            position = positions[0]
+            return output_keys, lambda values: (values[position],)
+        return output_keys, itemgetter(*positions)
@@ -4,8 +4,8 @@
 """
 
 from typing import Any, Dict, List, Optional, Union
-import pandas as pd
 
+from src.core.batch import ColumnarBatch, as_dataframe
 from src.steps.base import BaseStep
 from src.utils.exceptions import ValidationError, ExecutionError
 
@@ -27,7 +27,7 @@ class UnpivotStep(BaseStep):
         try:
             # 获取源数据
             source_name = self.config["source"]
-            source_data = context["get_source_data"](source_name)
+            source_data = context["get_source_data"](source_name, columnar=True)
             
             if not source_data:
                 return []
@@ -40,9 +40,11 @@ class UnpivotStep(BaseStep):
             self.log_error("逆透视步骤执行失败", error=str(e))
             raise ExecutionError(f"逆透视执行失败: {e}")
     
-    def _perform_unpivot(self, source_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _perform_unpivot(
+        self, source_data: Union[List[Dict[str, Any]], ColumnarBatch]
+    ) -> ColumnarBatch:
         """执行逆透视操作"""
-        df = pd.DataFrame(source_data)
+        df = as_dataframe(source_data)
         
         id_vars = self.config["id_vars"]
         value_vars = self.config["value_vars"]
@@ -57,7 +59,7 @@ class UnpivotStep(BaseStep):
             value_name=value_name
         )
         
-        return melted_df.to_dict('records')
+        return ColumnarBatch.from_dataframe(melted_df)
 
 
 class UnionStep(BaseStep):
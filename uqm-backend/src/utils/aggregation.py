@@ -0,0 +1,313 @@
+"""
+流式哈希聚合模块
+
+按分组键维护每组的运行聚合状态（SUM/COUNT/AVG/MAX/MIN及DISTINCT），
+逐行累加，不保存每组的行列表，内存只与分组数和聚合数有关。
+"""
+
+import json
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+def to_float(value: Any) -> Optional[float]:
+    """把值转为float，无法转换时返回None"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class Accumulator(ABC):
+    """
+    聚合状态基类
+
+    None不参与聚合；seen记录参与聚合的非空值个数。
+    """
+
+    __slots__ = ("seen",)
+
+    def __init__(self):
+        self.seen = 0
+
+    def add(self, value: Any) -> None:
+        """累加一个值"""
+        if value is not None:
+            self.seen += 1
+
+    @abstractmethod
+    def result(self) -> Any:
+        """获取聚合结果"""
+
+
+class CountAccumulator(Accumulator):
+    """COUNT(x)：非空值个数"""
+
+    __slots__ = ()
+
+    def result(self) -> int:
+        return self.seen
+
+
+class CountRowsAccumulator(Accumulator):
+    """COUNT(*)：行数，包括值为None的行"""
+
+    __slots__ = ()
+
+    def add(self, value: Any) -> None:
+        self.seen += 1
+
+    def result(self) -> int:
+        return self.seen
+
+
+class SumAccumulator(Accumulator):
+    """SUM(x)：可转为数值的值之和，没有数值时为0；全部是整数时结果为整数"""
+
+    __slots__ = ("total",)
+
+    def __init__(self):
+        super().__init__()
+        self.total = 0
+
+    def add(self, value: Any) -> None:
+        if value is None:
+            return
+        self.seen += 1
+        if isinstance(value, int):
+            self.total += value
+            return
+        try:
+            self.total += float(value)
+        except (TypeError, ValueError):
+            pass
+
+    def result(self) -> Any:
+        return self.total
+
+
+class AvgAccumulator(Accumulator):
+    """AVG(x)：可转为数值的值的平均值，没有数值时为None"""
+
+    __slots__ = ("total", "count")
+
+    def __init__(self):
+        super().__init__()
+        self.total = 0
+        self.count = 0
+
+    def add(self, value: Any) -> None:
+        if value is None:
+            return
+        self.seen += 1
+        try:
+            self.total += float(value)
+        except (TypeError, ValueError):
+            return
+        self.count += 1
+
+    def result(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+
+class MaxAccumulator(Accumulator):
+    """MAX(x)：值无法比较时结果为None"""
+
+    __slots__ = ("value", "failed")
+
+    def __init__(self):
+        super().__init__()
+        self.value = None
+        self.failed = False
+
+    def add(self, value: Any) -> None:
+        if value is None:
+            return
+        self.seen += 1
+        if self.value is None:
+            self.value = value
+            return
+        try:
+            if self._better(value, self.value):
+                self.value = value
+        except TypeError:
+            self.failed = True
+
+    @staticmethod
+    def _better(value: Any, current: Any) -> bool:
+        return value > current
+
+    def result(self) -> Any:
+        return None if self.failed else self.value
+
+
+class MinAccumulator(MaxAccumulator):
+    """MIN(x)：值无法比较时结果为None"""
+
+    __slots__ = ()
+
+    @staticmethod
+    def _better(value: Any, current: Any) -> bool:
+        return value < current
+
+
+ACCUMULATORS: Dict[str, Callable[[], Accumulator]] = {
+    "COUNT": CountAccumulator,
+    "SUM": SumAccumulator,
+    "AVG": AvgAccumulator,
+    "MAX": MaxAccumulator,
+    "MIN": MinAccumulator,
+}
+
+
+class DistinctAccumulator(Accumulator):
+    """DISTINCT聚合：保存去重后的值，结束时按出现顺序交给内部聚合"""
+
+    __slots__ = ("function", "values", "failed")
+
+    def __init__(self, function: str):
+        super().__init__()
+        self.function = function
+        self.values: Dict[Any, None] = {}
+        self.failed = False
+
+    def add(self, value: Any) -> None:
+        if value is None:
+            return
+        self.seen += 1
+        try:
+            self.values[value] = None
+        except TypeError:
+            # 不可哈希的值无法去重
+            self.failed = True
+
+    def result(self) -> Any:
+        if self.failed:
+            return None
+        inner = ACCUMULATORS[self.function]()
+        for value in self.values:
+            inner.add(value)
+        return inner.result()
+
+
+@dataclass(frozen=True)
+class Measure:
+    """
+    一个需要累加的聚合
+
+    getter为None表示COUNT(*)，按行计数。
+    """
+    function: str
+    getter: Optional[Callable[[Dict[str, Any]], Any]] = None
+    distinct: bool = False
+
+    def create(self) -> Accumulator:
+        """创建该聚合的初始状态"""
+        if self.getter is None:
+            return CountRowsAccumulator()
+        if self.function not in ACCUMULATORS:
+            raise ValueError(f"不支持的聚合函数: {self.function}")
+        if self.distinct:
+            return DistinctAccumulator(self.function)
+        return ACCUMULATORS[self.function]()
+
+
+class GroupState:
+    """一个分组的聚合状态：分组键、第一行（用于非聚合字段）和各聚合的运行状态"""
+
+    __slots__ = ("key", "first_row", "accumulators")
+
+    def __init__(self, first_row: Optional[Dict[str, Any]], accumulators: List[Accumulator],
+                 key: Tuple[Any, ...] = ()):
+        self.key = key
+        self.first_row = first_row
+        self.accumulators = accumulators
+
+    def results(self) -> List[Any]:
+        """获取各聚合的结果"""
+        return [accumulator.result() for accumulator in self.accumulators]
+
+
+def _whole_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """COUNT(*)按行计数，取值为整行"""
+    return row
+
+
+def _hashable(value: Any) -> Any:
+    """把列表、字典等不可哈希的分组值转为按内容比较的可哈希值"""
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        content = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+        return (type(value).__name__, content)
+
+
+class HashAggregator:
+    """
+    流式哈希聚合器
+
+    分组键取值函数和聚合在创建时确定，之后逐行计算分组键并更新该组的运行
+    状态；多个聚合使用同一个取值函数时每行只取一次值。分组按第一次出现的
+    顺序输出；没有分组键时所有行属于同一组。列表、字典等不可哈希的分组值
+    按内容分组。
+    """
+
+    def __init__(
+        self, key_getters: List[Callable[[Dict[str, Any]], Any]], measures: List[Measure]
+    ):
+        """
+        初始化哈希聚合器
+
+        Args:
+            key_getters: 分组字段的取值函数
+            measures: 需要累加的聚合
+        """
+        self.key_getters = key_getters
+        self.measures = measures
+        self._getters: List[Callable[[Dict[str, Any]], Any]] = []
+        self._slots: List[int] = []
+        for measure in measures:
+            getter = measure.getter or _whole_row
+            if getter not in self._getters:
+                self._getters.append(getter)
+            self._slots.append(self._getters.index(getter))
+        self._groups: Dict[Tuple[Any, ...], GroupState] = {}
+
+    def new_state(
+        self, first_row: Optional[Dict[str, Any]], key: Tuple[Any, ...] = ()
+    ) -> GroupState:
+        """创建一个分组的初始状态"""
+        return GroupState(first_row, [measure.create() for measure in self.measures], key)
+
+    def add(self, row: Dict[str, Any]) -> None:
+        """累加一行"""
+        self.add_rows((row,))
+
+    def add_rows(self, rows: Iterable[Dict[str, Any]]) -> "HashAggregator":
+        """累加多行"""
+        key_getters = self.key_getters
+        getters = self._getters
+        slots = self._slots
+        groups = self._groups
+        for row in rows:
+            key = lookup = tuple([getter(row) for getter in key_getters])
+            try:
+                state = groups.get(lookup)
+            except TypeError:
+                lookup = tuple([_hashable(value) for value in key])
+                state = groups.get(lookup)
+            if state is None:
+                state = groups[lookup] = self.new_state(row, key)
+            values = [getter(row) for getter in getters]
+            for slot, accumulator in zip(slots, state.accumulators):
+                accumulator.add(values[slot])
+        return self
+
+    def groups(self) -> Iterator[Tuple[Tuple[Any, ...], GroupState]]:
+        """按第一次出现的顺序返回分组键（第一行的原始值）和分组状态"""
+        return ((state.key, state) for state in self._groups.values())
+
+    def __len__(self) -> int:
+        return len(self._groups)
@@ -49,6 +49,11 @@ class ParseError(UQMBaseException):
     pass
 
 
+class ExpressionError(UQMBaseException):
+    """表达式异常"""
+    pass
+
+
 class TimeoutError(UQMBaseException):
     """超时异常"""
     pass
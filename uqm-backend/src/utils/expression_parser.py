@@ -11,9 +11,11 @@ import math
 import pandas as pd
 from typing import Any, Dict, List, Optional, Union, Callable, Tuple
 from datetime import datetime, date, timedelta
-from decimal import Decimal
+from decimal import Decimal, ROUND_HALF_UP
+from functools import lru_cache
 import logging
 
+from ..utils.aggregation import Measure
 from ..utils.exceptions import ExpressionError, ValidationError
 
 logger = logging.getLogger(__name__)
@@ -289,6 +291,698 @@ class SafeExpressionEvaluator(ast.NodeVisitor):
         raise ExpressionError(f"不支持的表达式节点类型: {type(node).__name__}")
 
 
+# SQL表达式词法单元
+SQL_TOKEN_PATTERN = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<string>'(?:[^']|'')*'|"(?:[^"]|"")*")
+  | (?P<quoted>`[^`]+`)
+  | (?P<number>(?:\d+\.\d*|\.\d+|\d+)(?:[eE][+-]?\d+)?)
+  | (?P<name>[A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)*)
+  | (?P<op><>|!=|>=|<=|==|\|\||[-+*/%(),<>=])
+""", re.VERBOSE)
+
+SQL_RESERVED_WORDS = {
+    'AND', 'OR', 'NOT', 'IS', 'IN', 'LIKE', 'BETWEEN', 'NULL', 'TRUE', 'FALSE',
+    'CASE', 'WHEN', 'THEN', 'ELSE', 'END', 'AS', 'DISTINCT',
+}
+
+SQL_AGGREGATE_FUNCTIONS = {'SUM', 'COUNT', 'AVG', 'MAX', 'MIN'}
+
+SQL_COMPARISON_OPERATORS = {
+    '=': ast.Eq, '==': ast.Eq, '<>': ast.NotEq, '!=': ast.NotEq,
+    '<': ast.Lt, '<=': ast.LtE, '>': ast.Gt, '>=': ast.GtE,
+}
+
+
+class SQLExpressionSyntax:
+    """
+    SQL标量表达式语法分析器
+
+    用递归下降把SQL表达式解析为Python AST，只生成SQLExpressionCompiler
+    支持的节点。字段引用生成Name节点（id保留原始字段名，可能带表别名），
+    CASE WHEN生成IfExp链，函数名统一转为大写。
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        self.tokens = self._tokenize(expression)
+        self.position = 0
+
+    def parse(self) -> ast.Expression:
+        """解析整个表达式"""
+        node = self._parse_or()
+        if self.position < len(self.tokens):
+            raise ExpressionError(f"无法解析的表达式内容: {self.tokens[self.position][1]}")
+        return ast.Expression(body=node)
+
+    @staticmethod
+    def _tokenize(expression: str) -> List[Tuple[str, str]]:
+        """把表达式切分为(类型, 文本)词法单元"""
+        tokens = []
+        position = 0
+        while position < len(expression):
+            match = SQL_TOKEN_PATTERN.match(expression, position)
+            if not match:
+                raise ExpressionError(f"无法识别的字符: {expression[position]}")
+            if match.lastgroup != 'space':
+                tokens.append((match.lastgroup, match.group()))
+            position = match.end()
+        return tokens
+
+    def _peek(self) -> Optional[Tuple[str, str]]:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def _next(self) -> Tuple[str, str]:
+        token = self._peek()
+        if token is None:
+            raise ExpressionError(f"表达式不完整: {self.expression}")
+        self.position += 1
+        return token
+
+    def _accept_keyword(self, keyword: str) -> bool:
+        token = self._peek()
+        if token is not None and token[0] == 'name' and token[1].upper() == keyword:
+            self.position += 1
+            return True
+        return False
+
+    def _accept_op(self, op: str) -> bool:
+        token = self._peek()
+        if token is not None and token[0] == 'op' and token[1] == op:
+            self.position += 1
+            return True
+        return False
+
+    def _expect_keyword(self, keyword: str) -> None:
+        if not self._accept_keyword(keyword):
+            raise ExpressionError(f"缺少关键字 {keyword}: {self.expression}")
+
+    def _expect_op(self, op: str) -> None:
+        if not self._accept_op(op):
+            raise ExpressionError(f"缺少符号 {op}: {self.expression}")
+
+    def _parse_or(self) -> ast.AST:
+        values = [self._parse_and()]
+        while self._accept_keyword('OR'):
+            values.append(self._parse_and())
+        return values[0] if len(values) == 1 else ast.BoolOp(op=ast.Or(), values=values)
+
+    def _parse_and(self) -> ast.AST:
+        values = [self._parse_not()]
+        while self._accept_keyword('AND'):
+            values.append(self._parse_not())
+        return values[0] if len(values) == 1 else ast.BoolOp(op=ast.And(), values=values)
+
+    def _parse_not(self) -> ast.AST:
+        if self._accept_keyword('NOT'):
+            return ast.UnaryOp(op=ast.Not(), operand=self._parse_not())
+        return self._parse_predicate()
+
+    def _parse_predicate(self) -> ast.AST:
+        left = self._parse_additive()
+
+        token = self._peek()
+        if token is not None and token[0] == 'op' and token[1] in SQL_COMPARISON_OPERATORS:
+            self.position += 1
+            right = self._parse_additive()
+            return ast.Compare(
+                left=left, ops=[SQL_COMPARISON_OPERATORS[token[1]]()], comparators=[right]
+            )
+
+        if self._accept_keyword('IS'):
+            negated = self._accept_keyword('NOT')
+            self._expect_keyword('NULL')
+            op = ast.IsNot() if negated else ast.Is()
+            return ast.Compare(left=left, ops=[op], comparators=[ast.Constant(value=None)])
+
+        negated = self._accept_keyword('NOT')
+        if self._accept_keyword('IN'):
+            self._expect_op('(')
+            items = ast.Tuple(elts=self._parse_arguments(), ctx=ast.Load())
+            op = ast.NotIn() if negated else ast.In()
+            return ast.Compare(left=left, ops=[op], comparators=[items])
+
+        if self._accept_keyword('BETWEEN'):
+            low = self._parse_additive()
+            self._expect_keyword('AND')
+            high = self._parse_additive()
+            node = ast.BoolOp(op=ast.And(), values=[
+                ast.Compare(left=left, ops=[ast.GtE()], comparators=[low]),
+                ast.Compare(left=left, ops=[ast.LtE()], comparators=[high]),
+            ])
+        elif self._accept_keyword('LIKE'):
+            node = self._call('LIKE', [left, self._parse_additive()])
+        elif negated:
+            raise ExpressionError(f"NOT 之后缺少 IN/BETWEEN/LIKE: {self.expression}")
+        else:
+            return left
+
+        return ast.UnaryOp(op=ast.Not(), operand=node) if negated else node
+
+    def _parse_additive(self) -> ast.AST:
+        node = self._parse_term()
+        while True:
+            if self._accept_op('+'):
+                node = ast.BinOp(left=node, op=ast.Add(), right=self._parse_term())
+            elif self._accept_op('-'):
+                node = ast.BinOp(left=node, op=ast.Sub(), right=self._parse_term())
+            elif self._accept_op('||'):
+                node = self._call('CONCAT', [node, self._parse_term()])
+            else:
+                return node
+
+    def _parse_term(self) -> ast.AST:
+        operators = {'*': ast.Mult, '/': ast.Div, '%': ast.Mod}
+        node = self._parse_unary()
+        while True:
+            token = self._peek()
+            if token is None or token[0] != 'op' or token[1] not in operators:
+                return node
+            self.position += 1
+            node = ast.BinOp(left=node, op=operators[token[1]](), right=self._parse_unary())
+
+    def _parse_unary(self) -> ast.AST:
+        if self._accept_op('-'):
+            return ast.UnaryOp(op=ast.USub(), operand=self._parse_unary())
+        if self._accept_op('+'):
+            return ast.UnaryOp(op=ast.UAdd(), operand=self._parse_unary())
+        return self._parse_primary()
+
+    def _parse_primary(self) -> ast.AST:
+        kind, text = self._next()
+
+        if kind == 'number':
+            is_float = any(char in text for char in '.eE')
+            return ast.Constant(value=float(text) if is_float else int(text))
+        if kind == 'string':
+            quote = text[0]
+            return ast.Constant(value=text[1:-1].replace(quote * 2, quote))
+        if kind == 'quoted':
+            return ast.Name(id=text[1:-1], ctx=ast.Load())
+        if kind == 'op' and text == '(':
+            node = self._parse_or()
+            self._expect_op(')')
+            return node
+
+        if kind == 'name':
+            upper = text.upper()
+            if upper == 'NULL':
+                return ast.Constant(value=None)
+            if upper in ('TRUE', 'FALSE'):
+                return ast.Constant(value=upper == 'TRUE')
+            if upper == 'CASE':
+                return self._parse_case()
+            if self._accept_op('('):
+                if upper == 'CAST':
+                    return self._parse_cast()
+                if upper in SQL_AGGREGATE_FUNCTIONS:
+                    return self._parse_aggregate(upper)
+                return self._call(upper, self._parse_arguments())
+            if upper in SQL_RESERVED_WORDS:
+                raise ExpressionError(f"意外的关键字 {text}: {self.expression}")
+            return ast.Name(id=text, ctx=ast.Load())
+
+        raise ExpressionError(f"意外的符号 {text}: {self.expression}")
+
+    def _parse_arguments(self) -> List[ast.AST]:
+        """解析左括号之后的参数列表（含右括号）"""
+        if self._accept_op(')'):
+            return []
+        arguments = [self._parse_or()]
+        while self._accept_op(','):
+            arguments.append(self._parse_or())
+        self._expect_op(')')
+        return arguments
+
+    def _parse_case(self) -> ast.AST:
+        """CASE [operand] WHEN ... THEN ... [ELSE ...] END"""
+        operand = None
+        token = self._peek()
+        if token is None or token[1].upper() != 'WHEN':
+            operand = self._parse_or()
+
+        branches = []
+        while self._accept_keyword('WHEN'):
+            condition = self._parse_or()
+            if operand is not None:
+                condition = ast.Compare(left=operand, ops=[ast.Eq()], comparators=[condition])
+            self._expect_keyword('THEN')
+            branches.append((condition, self._parse_or()))
+        if not branches:
+            raise ExpressionError(f"CASE 表达式缺少 WHEN 分支: {self.expression}")
+
+        node = self._parse_or() if self._accept_keyword('ELSE') else ast.Constant(value=None)
+        self._expect_keyword('END')
+
+        for condition, value in reversed(branches):
+            node = ast.IfExp(test=condition, body=value, orelse=node)
+        return node
+
+    def _parse_cast(self) -> ast.AST:
+        """CAST(expr AS type)，类型参数如DECIMAL(10,2)中的精度被忽略"""
+        operand = self._parse_or()
+        self._expect_keyword('AS')
+        kind, type_name = self._next()
+        if kind != 'name':
+            raise ExpressionError(f"CAST 缺少目标类型: {self.expression}")
+        while self._peek() is not None and self._peek()[0] == 'name':
+            self.position += 1
+        if self._accept_op('('):
+            self._parse_arguments()
+        self._expect_op(')')
+        return self._call('CAST', [operand, ast.Constant(value=type_name.upper())])
+
+    def _parse_aggregate(self, name: str) -> ast.AST:
+        """SUM/COUNT/AVG/MAX/MIN，支持COUNT(*)和DISTINCT"""
+        if self._accept_op('*'):
+            self._expect_op(')')
+            return self._call(name, [])
+        distinct = self._accept_keyword('DISTINCT')
+        argument = self._parse_or()
+        self._expect_op(')')
+        keywords = [ast.keyword(arg='distinct', value=ast.Constant(value=True))] if distinct else []
+        return self._call(name, [argument], keywords)
+
+    @staticmethod
+    def _call(name: str, args: List[ast.AST], keywords: List[ast.keyword] = None) -> ast.Call:
+        return ast.Call(func=ast.Name(id=name, ctx=ast.Load()), args=args, keywords=keywords or [])
+
+
+def _sql_number(value: Any) -> Any:
+    """算术运算前把Decimal转为float，与数据库驱动返回float时的结果保持一致"""
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def _sql_float(value: Any) -> Optional[float]:
+    """把值转为float，无法转换时返回None"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _null_safe(func: Callable) -> Callable:
+    """任一参数为None时返回None（SQL的NULL传播）"""
+    def wrapper(*args):
+        if any(arg is None for arg in args):
+            return None
+        return func(*args)
+    return wrapper
+
+
+def _sql_round(value: Any, digits: Any = 0) -> Any:
+    """ROUND按四舍五入（而不是Python的银行家舍入）"""
+    digits = int(digits)
+    rounded = Decimal(str(value)).quantize(Decimal(1).scaleb(-digits), rounding=ROUND_HALF_UP)
+    return int(rounded) if isinstance(value, int) and digits <= 0 else float(rounded)
+
+
+def _sql_cast(value: Any, type_name: str) -> Any:
+    """CAST(value AS type)"""
+    if value is None:
+        return None
+    if type_name in ('INT', 'INTEGER', 'BIGINT', 'SMALLINT', 'TINYINT', 'SIGNED', 'UNSIGNED'):
+        return int(float(value)) if isinstance(value, str) else int(value)
+    if type_name in ('DECIMAL', 'NUMERIC', 'FLOAT', 'DOUBLE', 'REAL'):
+        return float(value)
+    if type_name in ('VARCHAR', 'CHAR', 'TEXT', 'STRING'):
+        return str(value)
+    if type_name == 'DATE':
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, str):
+            return date.fromisoformat(value[:10])
+    return value
+
+
+@lru_cache(maxsize=256)
+def _like_pattern(pattern: str) -> re.Pattern:
+    """把LIKE模式转换为正则表达式"""
+    regex = ''.join(
+        '.*' if char == '%' else '.' if char == '_' else re.escape(char)
+        for char in pattern
+    )
+    return re.compile(regex, re.DOTALL)
+
+
+def _sql_like(value: Any, pattern: Any) -> Optional[bool]:
+    if value is None or pattern is None:
+        return None
+    return _like_pattern(str(pattern)).fullmatch(str(value)) is not None
+
+
+def _sql_concat(*values: Any) -> Optional[str]:
+    if any(value is None for value in values):
+        return None
+    return ''.join(str(value) for value in values)
+
+
+class CompiledExpression:
+    """编译后的表达式，可直接对行（或聚合模式下的行列表）求值"""
+
+    __slots__ = ('expression', 'function', 'aggregate')
+
+    def __init__(self, expression: str, function: Callable[[Any], Any], aggregate: bool = False):
+        self.expression = expression
+        self.function = function
+        self.aggregate = aggregate
+
+    def __call__(self, data: Any) -> Any:
+        return self.function(data)
+
+    def evaluate_rows(self, rows: List[Dict[str, Any]]) -> List[Any]:
+        """对每一行求值，返回与rows一一对应的结果列表"""
+        function = self.function
+        return [function(row) for row in rows]
+
+
+class AccumulatedExpression:
+    """
+    按累加方式编译的聚合表达式
+
+    measures是表达式中的各个聚合，由HashAggregator逐行累加；求值时传入各聚合
+    的结果和分组的第一行，聚合外的字段取第一行的值。
+    """
+
+    __slots__ = ('expression', 'function', 'measures')
+
+    def __init__(self, expression: str, function: Callable[[Any], Any], measures: List[Measure]):
+        self.expression = expression
+        self.function = function
+        self.measures = measures
+
+    def __call__(self, results: List[Any], first_row: Optional[Dict[str, Any]]) -> Any:
+        return self.function((results, first_row))
+
+
+class SQLExpressionCompiler(SafeExpressionEvaluator):
+    """
+    SQL表达式编译器
+
+    把步骤数据上的SQL表达式（算术、比较、CASE WHEN、COALESCE、NULLIF、CAST、
+    IN、LIKE等）解析一次，编译为闭包，之后每行只执行闭包，不再做字符串替换
+    和eval。运算遵循SQL的NULL语义：操作数为None或运算出错（如除零）时结果为None。
+
+    行模式下SUM(x)等聚合引用按字段x取当前行的值（聚合已在该行中算好）；
+    聚合模式下闭包的参数是行列表，聚合函数对所有行求值，聚合外的字段取第一行的值；
+    累加模式（compile_accumulated）下聚合函数由调用方逐行累加，不需要保存行列表。
+    """
+
+    SQL_FUNCTIONS = {
+        'COALESCE': lambda *values: next((value for value in values if value is not None), None),
+        'IFNULL': lambda value, default: default if value is None else value,
+        'NULLIF': lambda value, other: None if value == other else value,
+        'CAST': _sql_cast,
+        'CONCAT': _sql_concat,
+        'LIKE': _sql_like,
+        'ABS': _null_safe(lambda value: abs(_sql_number(value))),
+        'ROUND': _null_safe(_sql_round),
+        'CEIL': _null_safe(math.ceil),
+        'CEILING': _null_safe(math.ceil),
+        'FLOOR': _null_safe(math.floor),
+        'UPPER': _null_safe(lambda value: str(value).upper()),
+        'LOWER': _null_safe(lambda value: str(value).lower()),
+        'TRIM': _null_safe(lambda value: str(value).strip()),
+        'LENGTH': _null_safe(lambda value: len(str(value))),
+        'GREATEST': _null_safe(max),
+        'LEAST': _null_safe(min),
+    }
+
+    def __init__(self, column_getter: Callable[[str], Callable[[Dict[str, Any]], Any]] = None):
+        """
+        初始化编译器
+
+        Args:
+            column_getter: 根据字段名生成取值函数的工厂，默认按字段名取值，
+                找不到带表别名的字段时去掉别名再取
+        """
+        super().__init__()
+        self.column_getter = column_getter or self.make_column_getter
+        self._aggregate_mode = False
+        # 累加模式下收集到的聚合，其他模式下为None
+        self._measures: Optional[List[Measure]] = None
+        self._cache: Dict[Tuple[str, bool], CompiledExpression] = {}
+        self._accumulated_cache: Dict[str, AccumulatedExpression] = {}
+
+    @staticmethod
+    def make_column_getter(name: str) -> Callable[[Dict[str, Any]], Any]:
+        """默认的字段取值函数"""
+        short_name = name.split('.')[-1] if '.' in name else None
+
+        def get_column(row: Dict[str, Any]) -> Any:
+            if name in row:
+                return row[name]
+            return row.get(short_name) if short_name is not None else None
+
+        return get_column
+
+    def compile(self, expression: str, aggregate: bool = False) -> CompiledExpression:
+        """
+        编译表达式，同一表达式只编译一次
+
+        Args:
+            expression: SQL表达式
+            aggregate: 是否按聚合模式编译（闭包参数为行列表）
+
+        Returns:
+            编译后的表达式
+
+        Raises:
+            ExpressionError: 表达式语法错误或包含不支持的函数
+        """
+        key = (expression, aggregate)
+        compiled = self._cache.get(key)
+        if compiled is None:
+            tree = SQLExpressionSyntax(expression).parse()
+            self._aggregate_mode = aggregate
+            try:
+                function = self.visit(tree.body)
+            finally:
+                self._aggregate_mode = False
+            compiled = CompiledExpression(expression, function, aggregate)
+            self._cache[key] = compiled
+        return compiled
+
+    def compile_accumulated(self, expression: str) -> AccumulatedExpression:
+        """
+        按累加方式编译聚合表达式，同一表达式只编译一次
+
+        结果与聚合模式相同，但表达式中的每个聚合编译为一个Measure，由调用方
+        逐行累加后把各聚合的结果传给编译结果求值。
+
+        Args:
+            expression: SQL聚合表达式
+
+        Returns:
+            编译后的表达式
+
+        Raises:
+            ExpressionError: 表达式语法错误或包含不支持的函数
+        """
+        compiled = self._accumulated_cache.get(expression)
+        if compiled is None:
+            tree = SQLExpressionSyntax(expression).parse()
+            measures: List[Measure] = []
+            self._aggregate_mode = True
+            self._measures = measures
+            try:
+                function = self.visit(tree.body)
+            finally:
+                self._aggregate_mode = False
+                self._measures = None
+            compiled = AccumulatedExpression(expression, function, measures)
+            self._accumulated_cache[expression] = compiled
+        return compiled
+
+    def evaluate(self, expression: str, row: Dict[str, Any] = None) -> Any:
+        """编译（或复用已编译的）表达式并对一行求值"""
+        return self.compile(expression)(self.context if row is None else row)
+
+    def visit_Constant(self, node):
+        value = node.value
+        return lambda row: value
+
+    def visit_Name(self, node):
+        get_column = self.column_getter(node.id)
+        if self._aggregate_mode and self._measures is not None:
+            return lambda state: get_column(state[1]) if state[1] is not None else None
+        if self._aggregate_mode:
+            return lambda rows: get_column(rows[0]) if rows else None
+        return get_column
+
+    def visit_BinOp(self, node):
+        op_type = type(node.op)
+        if op_type not in self.ALLOWED_OPERATORS:
+            raise ExpressionError(f"不允许的操作符: {op_type.__name__}")
+        op = self.ALLOWED_OPERATORS[op_type]
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+
+        def binary(row):
+            a = left(row)
+            if a is None:
+                return None
+            b = right(row)
+            if b is None:
+                return None
+            try:
+                return op(_sql_number(a), _sql_number(b))
+            except (TypeError, ValueError, ArithmeticError):
+                return None
+
+        return binary
+
+    def visit_UnaryOp(self, node):
+        operand = self.visit(node.operand)
+        if isinstance(node.op, ast.Not):
+            def negate(row):
+                value = operand(row)
+                return None if value is None else not value
+
+            return negate
+
+        op_type = type(node.op)
+        if op_type not in (ast.USub, ast.UAdd):
+            raise ExpressionError(f"不允许的一元操作符: {op_type.__name__}")
+        op = self.ALLOWED_OPERATORS[op_type]
+
+        def unary(row):
+            value = operand(row)
+            if value is None:
+                return None
+            try:
+                return op(_sql_number(value))
+            except TypeError:
+                return None
+
+        return unary
+
+    def visit_Compare(self, node):
+        left = self.visit(node.left)
+        op = node.ops[0]
+
+        if isinstance(op, (ast.Is, ast.IsNot)):
+            expect_null = isinstance(op, ast.Is)
+            return lambda row: (left(row) is None) == expect_null
+
+        if isinstance(op, (ast.In, ast.NotIn)):
+            items = [self.visit(item) for item in node.comparators[0].elts]
+            negated = isinstance(op, ast.NotIn)
+
+            def contains(row):
+                value = left(row)
+                if value is None:
+                    return None
+                return (value in [item(row) for item in items]) != negated
+
+            return contains
+
+        op_type = type(op)
+        if op_type not in self.ALLOWED_OPERATORS:
+            raise ExpressionError(f"不允许的比较操作符: {op_type.__name__}")
+        compare = self.ALLOWED_OPERATORS[op_type]
+        right = self.visit(node.comparators[0])
+
+        def comparison(row):
+            a = left(row)
+            b = right(row)
+            if a is None or b is None:
+                return None
+            try:
+                return compare(a, b)
+            except TypeError:
+                return None
+
+        return comparison
+
+    def visit_BoolOp(self, node):
+        values = [self.visit(value) for value in node.values]
+        # 三值逻辑：AND遇到False、OR遇到True即可确定结果，否则有NULL时结果为NULL
+        short_circuit = isinstance(node.op, ast.Or)
+
+        def boolean(row):
+            unknown = False
+            for value in values:
+                result = value(row)
+                if result is None:
+                    unknown = True
+                elif bool(result) == short_circuit:
+                    return short_circuit
+            return None if unknown else not short_circuit
+
+        return boolean
+
+    def visit_IfExp(self, node):
+        test = self.visit(node.test)
+        body = self.visit(node.body)
+        orelse = self.visit(node.orelse)
+        return lambda row: body(row) if test(row) else orelse(row)
+
+    def visit_Call(self, node):
+        name = node.func.id
+        if name in SQL_AGGREGATE_FUNCTIONS:
+            return self._compile_aggregate(node)
+
+        function = self.SQL_FUNCTIONS.get(name)
+        if function is None:
+            raise ExpressionError(f"不支持的函数: {name}")
+        args = [self.visit(arg) for arg in node.args]
+
+        def call(row):
+            try:
+                return function(*[arg(row) for arg in args])
+            except (TypeError, ValueError, ArithmeticError):
+                return None
+
+        return call
+
+    def _compile_aggregate(self, node):
+        """编译SUM/COUNT/AVG/MAX/MIN"""
+        name = node.func.id
+
+        if not self._aggregate_mode:
+            # 行模式：聚合结果已经是当前行的字段
+            argument = node.args[0] if node.args else None
+            if isinstance(argument, ast.Name):
+                return self.column_getter(argument.id)
+            return lambda row: None
+
+        self._aggregate_mode = False
+        try:
+            argument = self.visit(node.args[0]) if node.args else None
+        finally:
+            self._aggregate_mode = True
+        distinct = any(keyword.arg == 'distinct' for keyword in node.keywords)
+
+        if self._measures is not None:
+            index = len(self._measures)
+            self._measures.append(Measure(name, argument, distinct))
+            return lambda state: state[0][index]
+
+        def aggregate(rows):
+            if argument is None:
+                return len(rows)
+            values = [value for value in map(argument, rows) if value is not None]
+            if distinct:
+                values = list(dict.fromkeys(values))
+
+            if name == 'COUNT':
+                return len(values)
+            if name in ('SUM', 'AVG'):
+                numbers = [number for number in map(_sql_float, values) if number is not None]
+                if name == 'SUM':
+                    return sum(numbers)
+                return sum(numbers) / len(numbers) if numbers else None
+            if not values:
+                return None
+            try:
+                return max(values) if name == 'MAX' else min(values)
+            except TypeError:
+                return None
+
+        return aggregate
+
+
 class ExpressionParser:
     """表达式解析器"""
     
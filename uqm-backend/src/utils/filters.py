@@ -0,0 +1,322 @@
+"""
+步骤数据过滤条件编译模块
+
+把filters/having条件树一次编译为行谓词：日期表达式在编译时求值，字面日期预先
+解析，LIKE预编译为锚定正则，IN列表转为集合，之后每行只做字段取值和比较。
+"""
+
+import calendar
+import operator
+import re
+from datetime import date, datetime, timedelta
+from functools import lru_cache, reduce
+from typing import Any, Callable, Dict, List, Optional
+
+from src.utils.expression_parser import _like_pattern
+from src.utils.logging import LoggerMixin
+
+Predicate = Callable[[Dict[str, Any]], bool]
+
+DATE_FORMATS = ("%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y/%m/%d", "%m/%d/%Y")
+
+# 两种最常见的格式先用fromisoformat解析，其他写法再逐个尝试DATE_FORMATS
+_ISO_DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}(?: \d{2}:\d{2}:\d{2})?")
+
+_INTERVAL_PATTERN = re.compile(r"INTERVAL\s+(\d+)\s+(MONTH|DAY|YEAR)")
+
+# 每个日期比较条件最多记住多少个字符串的比较结果
+STRING_RESULT_CACHE_SIZE = 65536
+
+COMPARISON_OPERATORS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+}
+
+
+@lru_cache(maxsize=65536)
+def parse_date(text: str) -> Optional[datetime]:
+    """
+    按DATE_FORMATS依次尝试把字符串解析为日期
+
+    Args:
+        text: 字符串
+
+    Returns:
+        解析得到的日期，不是日期时返回None
+    """
+    if not text[:1].isdigit():
+        return None
+    if _ISO_DATE_PATTERN.fullmatch(text):
+        try:
+            return datetime.fromisoformat(text)
+        except ValueError:
+            pass
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def subtract_interval(day: date, value: int, unit: str) -> date:
+    """
+    计算日期减去时间间隔后的日期，与MySQL的DATE_SUB一致：按月、年相减时
+    目标月份没有这一天则取该月最后一天
+
+    Args:
+        day: 起始日期
+        value: 间隔数量
+        unit: 间隔单位，MONTH/DAY/YEAR
+
+    Returns:
+        相减后的日期
+    """
+    if unit == "DAY":
+        return day - timedelta(days=value)
+
+    months = value * 12 if unit == "YEAR" else value
+    year, month_index = divmod(day.year * 12 + day.month - 1 - months, 12)
+    month = month_index + 1
+    last_day = calendar.monthrange(year, month)[1]
+    return day.replace(year=year, month=month, day=min(day.day, last_day))
+
+
+def evaluate_date_expression(expression: str) -> Any:
+    """
+    计算日期表达式，支持DATE_SUB(CURDATE(), INTERVAL n MONTH/DAY/YEAR)和CURDATE()
+
+    Args:
+        expression: 日期表达式
+
+    Returns:
+        YYYY-MM-DD格式的日期字符串，无法解析时返回原表达式
+    """
+    upper = expression.upper()
+    if "DATE_SUB" in upper:
+        interval_match = _INTERVAL_PATTERN.search(upper)
+        if interval_match:
+            interval_value = int(interval_match.group(1))
+            interval_unit = interval_match.group(2)
+            result_date = subtract_interval(datetime.now().date(), interval_value, interval_unit)
+            return result_date.strftime("%Y-%m-%d")
+
+    if "CURDATE" in upper or "CURRENT_DATE" in upper:
+        return datetime.now().date().strftime("%Y-%m-%d")
+
+    return expression
+
+
+def compute_filter_value(value: Any) -> Any:
+    """
+    计算过滤值，字符串形式的日期函数表达式会被求值
+
+    Args:
+        value: 过滤条件中的值
+
+    Returns:
+        计算后的值
+    """
+    if not isinstance(value, str):
+        return value
+
+    upper = value.upper()
+    if "DATE_SUB" in upper or "CURDATE" in upper or "CURRENT_DATE" in upper:
+        return evaluate_date_expression(value)
+
+    if any(func in upper for func in ["NOW()", "CURRENT_TIMESTAMP", "UNIX_TIMESTAMP"]):
+        return evaluate_date_expression(value)
+
+    return value
+
+
+def _always_true(row: Dict[str, Any]) -> bool:
+    return True
+
+
+def _both(left: Predicate, right: Predicate) -> Predicate:
+    return lambda row: left(row) and right(row)
+
+
+def _either(left: Predicate, right: Predicate) -> Predicate:
+    return lambda row: left(row) or right(row)
+
+
+class FilterCompiler(LoggerMixin):
+    """
+    过滤条件编译器
+
+    条件树中的每个节点编译为一个闭包，过滤值在编译时计算；
+    无法识别的条件和操作符在编译时记录一次警告，并视为恒真。
+    """
+
+    def compile(self, filters: List[Dict[str, Any]]) -> Predicate:
+        """
+        编译过滤条件列表，各条件之间为AND关系
+
+        Args:
+            filters: 过滤条件列表
+
+        Returns:
+            行谓词
+        """
+        return self._compile_all(
+            [self._compile_condition(condition) for condition in filters or []]
+        )
+
+    def _compile_condition(self, filter_config: Dict[str, Any]) -> Predicate:
+        """编译单个过滤条件（支持嵌套逻辑）"""
+        if isinstance(filter_config, dict):
+            if "logic" in filter_config and "conditions" in filter_config:
+                return self._compile_logical(filter_config)
+            if "field" in filter_config and "operator" in filter_config:
+                return self._compile_single(
+                    filter_config.get("field"),
+                    filter_config.get("operator"),
+                    filter_config.get("value")
+                )
+
+        self.log_warning(f"未识别的过滤条件格式: {filter_config}")
+        return _always_true
+
+    def _compile_logical(self, logical_config: Dict[str, Any]) -> Predicate:
+        """编译逻辑条件（AND/OR）"""
+        logic = logical_config.get("logic", "AND").upper()
+        conditions = logical_config.get("conditions", [])
+
+        if not conditions:
+            return _always_true
+
+        if logic not in ("AND", "OR"):
+            self.log_warning(f"不支持的逻辑操作符: {logic}")
+            return _always_true
+
+        predicates = [self._compile_condition(condition) for condition in conditions]
+        if logic == "AND":
+            return self._compile_all(predicates)
+        if _always_true in predicates:
+            return _always_true
+        return reduce(_either, predicates)
+
+    @staticmethod
+    def _compile_all(predicates: List[Predicate]) -> Predicate:
+        """多个谓词的AND组合"""
+        predicates = [predicate for predicate in predicates if predicate is not _always_true]
+        if not predicates:
+            return _always_true
+        return reduce(_both, predicates)
+
+    def _compile_single(self, field: str, operator_name: str, value: Any) -> Predicate:
+        """编译单个字段条件"""
+        value = compute_filter_value(value)
+
+        if operator_name == "=":
+            return lambda row: row.get(field) == value
+        if operator_name == "!=":
+            return lambda row: row.get(field) != value
+        if operator_name in COMPARISON_OPERATORS:
+            return self._compile_comparison(field, COMPARISON_OPERATORS[operator_name], value)
+        if operator_name == "IN":
+            return self._compile_membership(field, value, negate=False)
+        if operator_name == "NOT IN":
+            return self._compile_membership(field, value, negate=True)
+        if operator_name == "IS NULL":
+            return lambda row: row.get(field) is None
+        if operator_name == "IS NOT NULL":
+            return lambda row: row.get(field) is not None
+        if operator_name == "LIKE":
+            return self._compile_like(field, value)
+
+        self.log_warning(f"不支持的过滤操作符: {operator_name}")
+        return _always_true
+
+    @staticmethod
+    def _compile_comparison(
+        field: str, compare: Callable[[Any, Any], Any], value: Any
+    ) -> Predicate:
+        """
+        编译大小比较条件
+
+        两边都是可解析的日期字符串时按日期比较，否则直接比较，无法比较时为False。
+        """
+        value_date = parse_date(value) if isinstance(value, str) else None
+
+        def compare_value(row_value: Any) -> bool:
+            try:
+                return compare(row_value, value)
+            except Exception:
+                return False
+
+        if value_date is None:
+            def predicate(row: Dict[str, Any]) -> bool:
+                row_value = row.get(field)
+                return row_value is not None and compare_value(row_value)
+
+            return predicate
+
+        # 字符串的比较结果只与字符串本身有关，重复出现的日期只解析一次
+        string_results: Dict[str, bool] = {}
+
+        def compare_string(row_value: str) -> bool:
+            row_date = parse_date(row_value)
+            if row_date is not None:
+                result = compare(row_date, value_date)
+            else:
+                result = compare_value(row_value)
+            if len(string_results) < STRING_RESULT_CACHE_SIZE:
+                string_results[row_value] = result
+            return result
+
+        def date_predicate(row: Dict[str, Any]) -> bool:
+            row_value = row.get(field)
+            if row_value is None:
+                return False
+            if isinstance(row_value, str):
+                result = string_results.get(row_value)
+                return compare_string(row_value) if result is None else result
+            return compare_value(row_value)
+
+        return date_predicate
+
+    @staticmethod
+    def _compile_membership(field: str, value: Any, negate: bool) -> Predicate:
+        """编译IN/NOT IN条件，值不是列表时IN恒假、NOT IN恒真"""
+        if not isinstance(value, list):
+            return _always_true if negate else (lambda row: False)
+
+        try:
+            members = set(value)
+        except TypeError:
+            # 列表中有不可哈希的值，只能逐个比较
+            members = value
+
+        def contains(row: Dict[str, Any]) -> bool:
+            row_value = row.get(field)
+            try:
+                return row_value in members
+            except TypeError:
+                return row_value in value
+
+        def excludes(row: Dict[str, Any]) -> bool:
+            row_value = row.get(field)
+            try:
+                return row_value not in members
+            except TypeError:
+                return row_value not in value
+
+        return excludes if negate else contains
+
+    @staticmethod
+    def _compile_like(field: str, value: Any) -> Predicate:
+        """编译LIKE条件：%匹配任意字符串，_匹配单个字符，匹配整个值"""
+        match = _like_pattern(str(value)).fullmatch
+
+        def predicate(row: Dict[str, Any]) -> bool:
+            row_value = row.get(field)
+            if row_value is None:
+                return False
+            return match(str(row_value)) is not None
+
+        return predicate
@@ -0,0 +1,70 @@
+"""
+keyset分页游标工具
+把上一页最后一行的排序键值编码为不透明的游标，下一页请求时解码为定位条件的参数
+"""
+
+import base64
+import binascii
+import json
+from typing import Any, List, Tuple
+
+from src.utils.exceptions import ValidationError
+
+
+# 分页模式
+OFFSET_MODE = "offset"
+KEYSET_MODE = "keyset"
+PAGINATION_MODES = (OFFSET_MODE, KEYSET_MODE)
+
+# 分页总数的计算方式
+COUNT_EXACT = "exact"
+COUNT_CACHED = "cached"
+COUNT_ESTIMATED = "estimated"
+COUNT_NONE = "none"
+COUNT_MODES = (COUNT_EXACT, COUNT_CACHED, COUNT_ESTIMATED, COUNT_NONE)
+
+# 只注入分页目标步骤、并且会改变查询结果的执行选项
+PAGINATION_OPTION_KEYS = ("page", "page_size", "pagination_mode", "cursor", "count_mode")
+
+
+def encode_cursor(columns: List[Tuple[str, bool]], values: List[Any]) -> str:
+    """
+    编码keyset分页游标
+
+    游标中同时保存排序列和方向，排序改变后旧游标会被拒绝，而不是静默地
+    返回错位的数据。日期、Decimal等值按字符串保存，与绑定参数的处理一致。
+
+    Args:
+        columns: 按排序优先级排列的(列名, 是否降序)列表
+        values: 最后一行的排序键值
+
+    Returns:
+        URL安全的游标字符串
+    """
+    payload = {"k": [[name, descending] for name, descending in columns], "v": list(values)}
+    data = json.dumps(payload, separators=(",", ":"), ensure_ascii=False, default=str)
+    return base64.urlsafe_b64encode(data.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: List[Tuple[str, bool]]) -> List[Any]:
+    """
+    解码keyset分页游标
+
+    Args:
+        cursor: encode_cursor生成的游标
+        columns: 当前查询的(列名, 是否降序)列表
+
+    Returns:
+        排序键值列表，与columns一一对应
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        keys = [(name, bool(descending)) for name, descending in payload["k"]]
+        values = payload["v"]
+    except (binascii.Error, UnicodeError, ValueError, TypeError, KeyError, AttributeError) as e:
+        raise ValidationError(f"无效的分页游标: {e}")
+
+    if keys != list(columns) or not isinstance(values, list) or len(values) != len(keys):
+        raise ValidationError("分页游标与当前查询的排序不匹配")
+    return values
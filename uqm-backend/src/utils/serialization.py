@@ -0,0 +1,141 @@
+"""
+结果数据序列化工具
+把查询结果中的NaN/NA/NaT规范化为None，numpy标量转换为Python原生类型
+"""
+
+import math
+from datetime import date, datetime, time
+from decimal import Decimal
+from itertools import chain
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+# 可以直接序列化、无需检查的值类型（float需要额外检查NaN）
+CLEAN_TYPES = frozenset({type(None), str, int, bool, Decimal, datetime, date, time})
+
+
+def is_missing(value: Any) -> bool:
+    """
+    判断值是否是NaN/NA/NaT等缺失值
+
+    Args:
+        value: 任意值
+
+    Returns:
+        是否是缺失值
+    """
+    if value is None or value is pd.NA or value is pd.NaT:
+        return True
+    if isinstance(value, (float, np.floating)):
+        return math.isnan(value)
+    return False
+
+
+def sanitize_value(value: Any) -> Any:
+    """
+    规范化单个值：缺失值转换为None，numpy标量转换为Python原生类型
+
+    Args:
+        value: 任意值
+
+    Returns:
+        规范化后的值
+    """
+    if value.__class__ in CLEAN_TYPES:
+        return value
+    if is_missing(value):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, dict):
+        return {key: sanitize_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [sanitize_value(item) for item in value]
+    return value
+
+
+def _sanitize_values(values: List[Any], types: set) -> List[int]:
+    """原地规范化一列值，返回被修改的位置"""
+    changed = []
+    if types <= CLEAN_TYPES | {float}:
+        # 只有float需要检查，NaN是唯一不等于自身的float
+        for index, value in enumerate(values):
+            if value != value:
+                values[index] = None
+                changed.append(index)
+        return changed
+
+    for index, value in enumerate(values):
+        if value.__class__ not in CLEAN_TYPES:
+            sanitized = sanitize_value(value)
+            if sanitized is not value:
+                values[index] = sanitized
+                changed.append(index)
+    return changed
+
+
+def sanitize_column(values: List[Any]) -> List[Any]:
+    """
+    原地规范化一列值，只有包含需要处理的类型时才逐个检查
+
+    Args:
+        values: 同一列的值列表
+
+    Returns:
+        规范化后的值列表（即传入的列表）
+    """
+    types = set(map(type, values))
+    if not types <= CLEAN_TYPES:
+        _sanitize_values(values, types)
+    return values
+
+
+def sanitize_rows(rows: Optional[List[Dict[str, Any]]]) -> Optional[List[Dict[str, Any]]]:
+    """
+    按列原地规范化字典列表中的值
+
+    先按列收集值并检查类型，只修改确实包含NaN/NA/NaT或numpy标量的单元格，
+    不复制行，也不为每个值递归。
+
+    Args:
+        rows: 字典列表
+
+    Returns:
+        规范化后的字典列表（即传入的列表）
+    """
+    if not rows:
+        return rows
+
+    for name in dict.fromkeys(chain.from_iterable(rows)):
+        values = [row.get(name) for row in rows]
+        types = set(map(type, values))
+        if types <= CLEAN_TYPES:
+            continue
+
+        for index in _sanitize_values(values, types):
+            rows[index][name] = values[index]
+
+    return rows
+
+
+def sanitize_series(series: pd.Series) -> List[Any]:
+    """
+    把一列DataFrame数据转换为Python列表，缺失值为None
+
+    Args:
+        series: DataFrame的一列
+
+    Returns:
+        值列表
+    """
+    values = series.tolist()
+    mask = series.isna().to_numpy()
+    if mask.any():
+        for index in np.flatnonzero(mask):
+            values[index] = None
+    if series.dtype == object:
+        sanitize_column(values)
+    return values
@@ -3,13 +3,34 @@ SQL查询构建工具
 提供构建各种SQL查询的功能
 """
 
-from typing import Any, Dict, List, Optional, Union
+import re
+from typing import Any, Dict, List, Optional, Tuple, Union
 from enum import Enum
 
 from src.utils.logging import LoggerMixin
 from src.utils.exceptions import ValidationError
 
 
+# 步骤配置中保存嵌入SQL文本的UQM参数值的键，SQL文本中只保留对应的参数标记
+BOUND_PARAMETERS_KEY = "bound_parameters"
+
+# 嵌入SQL文本的UQM参数标记，构建查询时作为绑定参数（或转义后内联）
+TEMPLATE_MARKER_PATTERN = re.compile(r"\x00\$(\w+)\x00")
+
+
+def template_marker(key: str) -> str:
+    """
+    生成UQM参数标记
+
+    Args:
+        key: 参数值在步骤配置bound_parameters中的键
+
+    Returns:
+        SQL文本中的参数标记
+    """
+    return f"\x00${key}\x00"
+
+
 class SQLDialect(Enum):
     """SQL方言枚举"""
     STANDARD = "standard"
@@ -18,6 +39,66 @@ class SQLDialect(Enum):
     SQLITE = "sqlite"
 
 
+class BindParameters:
+    """
+    SQL绑定参数收集器
+    
+    构建查询时把条件中的值收集为命名参数，SQL文本中只保留占位符，值通过
+    execute_query(query, params)传给数据库驱动，由驱动负责类型转换和转义；
+    结构相同的查询SQL文本相同，数据库可以复用预编译的执行计划。
+    
+    paramstyle与DB-API一致：named（:name，sqlite3）或pyformat（%(name)s，
+    pymysql/psycopg2）。pyformat下SQL文本中原有的%会转义为%%。
+    """
+    
+    # 构建过程中使用的占位符标记，渲染时替换为驱动的占位符
+    _MARKER_PATTERN = re.compile(r"\x00(p\d+)\x00")
+    
+    def __init__(self, paramstyle: str = "named"):
+        """
+        初始化绑定参数收集器
+        
+        Args:
+            paramstyle: 参数占位符风格，named或pyformat
+        """
+        if paramstyle not in ("named", "pyformat"):
+            raise ValidationError(f"不支持的参数占位符风格: {paramstyle}")
+        self.paramstyle = paramstyle
+        self.values: Dict[str, Any] = {}
+    
+    def add(self, value: Any) -> str:
+        """
+        添加参数值
+        
+        Args:
+            value: 参数值，非标量值按字符串绑定（与内联时一致）
+            
+        Returns:
+            SQL文本中的占位符标记
+        """
+        if value is not None and not isinstance(value, (str, bool, int, float)):
+            value = str(value)
+        name = f"p{len(self.values)}"
+        self.values[name] = value
+        return f"\x00{name}\x00"
+    
+    def render(self, query: str) -> str:
+        """
+        把占位符标记替换为驱动的占位符
+        
+        Args:
+            query: 包含占位符标记的SQL
+            
+        Returns:
+            可以与values一起传给驱动执行的SQL
+        """
+        if not self.values:
+            return query
+        if self.paramstyle == "pyformat":
+            return self._MARKER_PATTERN.sub(r"%(\1)s", query.replace("%", "%%"))
+        return self._MARKER_PATTERN.sub(r":\1", query)
+
+
 class SQLBuilder(LoggerMixin):
     """SQL查询构建器"""
     
@@ -39,7 +120,10 @@ class SQLBuilder(LoggerMixin):
                           having: Optional[List[Dict[str, Any]]] = None,
                           order_by: Optional[List[Union[str, Dict[str, Any]]]] = None,
                           limit: Optional[int] = None,
-                          offset: Optional[int] = None) -> str:
+                          offset: Optional[int] = None,
+                          params: Optional[BindParameters] = None,
+                          render: bool = True,
+                          bound_values: Optional[Dict[str, Any]] = None) -> str:
         """
         构建SELECT查询
         
@@ -53,6 +137,9 @@ class SQLBuilder(LoggerMixin):
             order_by: ORDER BY字段列表
             limit: 限制行数
             offset: 偏移量
+            params: 绑定参数收集器，提供时条件中的值作为绑定参数，否则内联到SQL中
+            render: 是否渲染占位符标记，嵌入其他查询（如CTE）时为False，由外层查询统一渲染
+            bound_values: 字段、条件等SQL文本中UQM参数标记对应的参数值
             
         Returns:
             SQL查询语句
@@ -76,7 +163,7 @@ class SQLBuilder(LoggerMixin):
             
             # WHERE子句
             if where_conditions:
-                where_clause = self._build_where_clause(where_conditions)
+                where_clause = self._build_where_clause(where_conditions, params)
                 if where_clause:
                     query_parts.append(where_clause)
             
@@ -87,7 +174,7 @@ class SQLBuilder(LoggerMixin):
             
             # HAVING子句
             if having:
-                having_clause = self._build_having_clause(having)
+                having_clause = self._build_having_clause(having, params)
                 if having_clause:
                     query_parts.append(having_clause)
             
@@ -105,6 +192,10 @@ class SQLBuilder(LoggerMixin):
             
             # 组合查询
             query = "\n".join(query_parts)
+            query = self.bind_template_values(query, bound_values, params)
+            
+            if params is not None and render:
+                query = params.render(query)
             
             return query
             
@@ -112,6 +203,93 @@ class SQLBuilder(LoggerMixin):
             self.log_error("构建SELECT查询失败", error=str(e))
             raise ValidationError(f"构建SELECT查询失败: {e}")
     
+    def bind_template_values(self, query: str, bound_values: Optional[Dict[str, Any]],
+                             params: Optional[BindParameters] = None) -> str:
+        """
+        替换SQL文本中的UQM参数标记
+
+        Args:
+            query: SQL文本
+            bound_values: 参数标记对应的参数值
+            params: 绑定参数收集器，提供时参数值作为绑定参数，否则转义后内联到SQL中
+
+        Returns:
+            替换后的SQL文本
+        """
+        if not bound_values or "\x00$" not in query:
+            return query
+
+        def replace(match: "re.Match[str]") -> str:
+            key = match.group(1)
+            if key not in bound_values:
+                raise ValidationError(f"缺少参数标记的值: {key}")
+            value = bound_values[key]
+            return params.add(value) if params is not None else self._format_value(value)
+
+        return TEMPLATE_MARKER_PATTERN.sub(replace, query)
+    
+    def build_with_query(self, ctes: List[Tuple[str, str]], query: str,
+                         params: Optional[BindParameters] = None) -> str:
+        """
+        构建带公用表表达式（WITH）的查询
+        
+        Args:
+            ctes: 按依赖顺序排列的(名称, 查询)列表
+            query: 主查询
+            params: 绑定参数收集器，CTE和主查询都应未渲染，在这里统一渲染
+            
+        Returns:
+            SQL查询语句
+        """
+        if not ctes:
+            return params.render(query) if params is not None else query
+        
+        definitions = ",\n".join(f"{name} AS (\n{body}\n)" for name, body in ctes)
+        query = f"WITH {definitions}\n{query}"
+        
+        if params is not None:
+            query = params.render(query)
+        
+        return query
+    
+    def build_keyset_condition(self, columns: List[Tuple[str, bool]], values: List[Any],
+                               params: Optional[BindParameters] = None) -> str:
+        """
+        构建keyset分页的定位条件：排序键在上一页最后一行之后的行
+
+        所有列排序方向相同时，PostgreSQL和SQLite使用行值比较(a, b) > (x, y)，
+        可以直接利用(a, b)上的复合索引；MySQL的行值比较不能稳定地使用索引范围扫描，
+        与标准SQL及方向混合的情况一样展开为 a > x OR (a = x AND b > y)。
+
+        Args:
+            columns: 按排序优先级排列的(列名, 是否降序)列表
+            values: 上一页最后一行的排序键值，与columns一一对应
+            params: 绑定参数收集器，提供时键值作为绑定参数，否则内联到SQL中
+
+        Returns:
+            条件表达式
+        """
+        if not columns or len(columns) != len(values):
+            raise ValidationError("keyset分页的排序列与游标值不匹配")
+
+        format_value = params.add if params is not None else self._format_value
+        names = [name for name, _ in columns]
+        markers = [format_value(value) for value in values]
+        directions = {descending for _, descending in columns}
+
+        if (len(columns) > 1 and len(directions) == 1
+                and self.dialect in (SQLDialect.POSTGRESQL, SQLDialect.SQLITE)):
+            operator = "<" if columns[0][1] else ">"
+            return f"({', '.join(names)}) {operator} ({', '.join(markers)})"
+
+        terms = []
+        for i, (name, descending) in enumerate(columns):
+            parts = [f"{names[j]} = {markers[j]}" for j in range(i)]
+            parts.append(f"{name} {'<' if descending else '>'} {markers[i]}")
+            terms.append(parts[0] if len(parts) == 1 else f"({' AND '.join(parts)})")
+
+        return terms[0] if len(terms) == 1 else f"({' OR '.join(terms)})"
+
     def _build_select_clause(self, select_fields: List[str]) -> str:
         """构建SELECT子句"""
         if not select_fields:
@@ -143,14 +321,15 @@ class SQLBuilder(LoggerMixin):
         
         return "\n".join(join_parts)
     
-    def _build_where_clause(self, where_conditions: List[Dict[str, Any]]) -> str:
+    def _build_where_clause(self, where_conditions: List[Dict[str, Any]],
+                            params: Optional[BindParameters] = None) -> str:
         """构建WHERE子句"""
         if not where_conditions:
             return ""
         
         conditions = []
         for condition in where_conditions:
-            condition_str = self._build_condition(condition)
+            condition_str = self._build_condition(condition, params)
             if condition_str:
                 conditions.append(condition_str)
         
@@ -171,14 +350,15 @@ class SQLBuilder(LoggerMixin):
         
         return f"GROUP BY {', '.join(group_by)}"
     
-    def _build_having_clause(self, having: List[Dict[str, Any]]) -> str:
+    def _build_having_clause(self, having: List[Dict[str, Any]],
+                             params: Optional[BindParameters] = None) -> str:
         """构建HAVING子句"""
         if not having:
             return ""
         
         conditions = []
         for condition in having:
-            condition_str = self._build_condition(condition)
+            condition_str = self._build_condition(condition, params)
             if condition_str:
                 conditions.append(condition_str)
         
@@ -249,15 +429,16 @@ class SQLBuilder(LoggerMixin):
         
         return ""
     
-    def _build_condition(self, condition: Union[str, Dict[str, Any]]) -> str:
-        """构建条件表达式（支持嵌套逻辑）"""
+    def _build_condition(self, condition: Union[str, Dict[str, Any]],
+                         params: Optional[BindParameters] = None) -> str:
+        """构建条件表达式（支持嵌套逻辑），提供params时值作为绑定参数"""
         if isinstance(condition, str):
             return condition
         
         elif isinstance(condition, dict):
             # 检查是否是嵌套逻辑结构
             if "logic" in condition and "conditions" in condition:
-                return self._build_logical_condition(condition)
+                return self._build_logical_condition(condition, params)
             
             # 处理简单条件
             field = condition.get("field")
@@ -267,29 +448,32 @@ class SQLBuilder(LoggerMixin):
             if not field:
                 return ""
             
+            format_value = params.add if params is not None else self._format_value
+            
             # 处理不同的操作符
             if operator.upper() == "IN":
                 if isinstance(value, list):
-                    value_str = ", ".join([self._format_value(v) for v in value])
+                    value_str = ", ".join([format_value(v) for v in value])
                     return f"{field} IN ({value_str})"
                 else:
-                    return f"{field} IN ({self._format_value(value)})"
+                    return f"{field} IN ({format_value(value)})"
             
             elif operator.upper() == "NOT IN":
                 if isinstance(value, list):
-                    value_str = ", ".join([self._format_value(v) for v in value])
+                    value_str = ", ".join([format_value(v) for v in value])
                     return f"{field} NOT IN ({value_str})"
                 else:
-                    return f"{field} NOT IN ({self._format_value(value)})"
+                    return f"{field} NOT IN ({format_value(value)})"
             
             elif operator.upper() == "BETWEEN":
                 if isinstance(value, dict) and "min" in value and "max" in value:
-                    return f"{field} BETWEEN {self._format_value(value['min'])} AND {self._format_value(value['max'])}"
+                    low, high = format_value(value['min']), format_value(value['max'])
+                    return f"{field} BETWEEN {low} AND {high}"
                 elif isinstance(value, list) and len(value) == 2:
-                    return f"{field} BETWEEN {self._format_value(value[0])} AND {self._format_value(value[1])}"
+                    return f"{field} BETWEEN {format_value(value[0])} AND {format_value(value[1])}"
             
             elif operator.upper() == "LIKE":
-                return f"{field} LIKE {self._format_value(value)}"
+                return f"{field} LIKE {format_value(value)}"
             
             elif operator.upper() == "IS NULL":
                 return f"{field} IS NULL"
@@ -298,11 +482,12 @@ class SQLBuilder(LoggerMixin):
                 return f"{field} IS NOT NULL"
             
             else:
-                return f"{field} {operator} {self._format_value(value)}"
+                return f"{field} {operator} {format_value(value)}"
         
         return ""
     
-    def _build_logical_condition(self, logical_condition: Dict[str, Any]) -> str:
+    def _build_logical_condition(self, logical_condition: Dict[str, Any],
+                                 params: Optional[BindParameters] = None) -> str:
         """构建逻辑条件（AND/OR）"""
         logic = logical_condition.get("logic", "AND").upper()
         conditions = logical_condition.get("conditions", [])
@@ -312,7 +497,7 @@ class SQLBuilder(LoggerMixin):
         
         condition_strings = []
         for condition in conditions:
-            condition_str = self._build_condition(condition)
+            condition_str = self._build_condition(condition, params)
             if condition_str:
                 condition_strings.append(condition_str)
         
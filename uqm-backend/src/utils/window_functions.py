@@ -0,0 +1,316 @@
+"""
+窗口函数计算工具
+对内存中的步骤数据一次性完成分区、排序和窗口函数计算
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.utils.logging import LoggerMixin
+
+
+# 例如: RANK() OVER (PARTITION BY country ORDER BY total DESC)
+#       LAG(amount, 1, 0) OVER (ORDER BY order_date)
+WINDOW_FUNCTION_PATTERN = re.compile(
+    r'\b(ROW_NUMBER|RANK|DENSE_RANK|LAG|LEAD|SUM|AVG|COUNT|MIN|MAX)'
+    r'\s*\(([^()]*)\)\s*OVER\s*\(([^()]*)\)',
+    re.IGNORECASE
+)
+
+NUMERIC_STRING_PATTERN = re.compile(r'^-?\d+(\.\d+)?$')
+
+RANKING_FUNCTIONS = {"ROW_NUMBER", "RANK", "DENSE_RANK"}
+OFFSET_FUNCTIONS = {"LAG", "LEAD"}
+AGGREGATE_FUNCTIONS = {"SUM", "AVG", "COUNT", "MIN", "MAX"}
+
+
+@dataclass
+class WindowFunctionSpec:
+    """解析后的窗口函数定义"""
+    function: str
+    argument: Optional[str] = None
+    offset: int = 1
+    default: Any = None
+    partition_by: List[str] = field(default_factory=list)
+    order_by: List[Tuple[str, str]] = field(default_factory=list)
+
+
+class WindowFunctionEvaluator(LoggerMixin):
+    """
+    窗口函数计算器
+
+    每个窗口函数只解析一次表达式、分区一次、每个分区排序一次，然后在
+    一次遍历中为所有行计算结果。排序时None值总是排在最后。带ORDER BY的
+    聚合窗口按SQL默认窗口范围计算（从分区开始到当前行及其并列行）。
+    """
+
+    def is_window_expression(self, expression: str) -> bool:
+        """
+        判断表达式是否包含窗口函数
+
+        Args:
+            expression: 表达式
+
+        Returns:
+            是否为窗口函数表达式
+        """
+        return bool(expression) and WINDOW_FUNCTION_PATTERN.search(expression) is not None
+
+    def parse(self, expression: str) -> Optional[WindowFunctionSpec]:
+        """
+        解析窗口函数表达式
+
+        Args:
+            expression: 窗口函数表达式
+
+        Returns:
+            窗口函数定义，无法解析时返回None
+        """
+        match = WINDOW_FUNCTION_PATTERN.search(expression or "")
+        if not match:
+            return None
+
+        function = match.group(1).upper()
+        arguments = [arg.strip() for arg in match.group(2).split(",") if arg.strip()]
+        over_clause = match.group(3).strip()
+
+        spec = WindowFunctionSpec(function=function)
+
+        if function in OFFSET_FUNCTIONS or function in AGGREGATE_FUNCTIONS:
+            if not arguments:
+                self.log_warning(f"窗口函数缺少参数: {expression}")
+                return None
+            spec.argument = arguments[0]
+
+        if function in OFFSET_FUNCTIONS:
+            if len(arguments) > 1:
+                spec.offset = int(arguments[1])
+            if len(arguments) > 2:
+                spec.default = self._parse_literal(arguments[2])
+
+        partition_match = re.search(
+            r'PARTITION\s+BY\s+(.+?)(?:\s+ORDER\s+BY\s+|$)', over_clause, re.IGNORECASE
+        )
+        if partition_match:
+            spec.partition_by = [
+                name.strip() for name in partition_match.group(1).split(",") if name.strip()
+            ]
+
+        order_match = re.search(r'ORDER\s+BY\s+(.+)$', over_clause, re.IGNORECASE)
+        if order_match:
+            for part in order_match.group(1).split(","):
+                direction_match = re.match(
+                    r'^(.*?)(?:\s+(ASC|DESC))?$', part.strip(), re.IGNORECASE
+                )
+                name = direction_match.group(1).strip()
+                direction = (direction_match.group(2) or "ASC").upper()
+                if name:
+                    spec.order_by.append((name, direction))
+
+        return spec
+
+    def evaluate(self, spec: WindowFunctionSpec, rows: List[Dict[str, Any]]) -> List[Any]:
+        """
+        计算窗口函数
+
+        Args:
+            spec: 窗口函数定义
+            rows: 数据行
+
+        Returns:
+            与输入行一一对应的窗口函数结果
+        """
+        results: List[Any] = [None] * len(rows)
+
+        # 分区：保持行在原数据中的先后顺序
+        partitions: Dict[Tuple, List[int]] = {}
+        for index, row in enumerate(rows):
+            partition_key = tuple(self._get_value(row, name) for name in spec.partition_by)
+            partitions.setdefault(partition_key, []).append(index)
+
+        for indexes in partitions.values():
+            sort_keys = [self._order_key(rows[index], spec.order_by) for index in indexes]
+            ordered = self._sort_partition(indexes, sort_keys, spec.order_by)
+            key_of = dict(zip(indexes, sort_keys))
+
+            if spec.function in RANKING_FUNCTIONS:
+                self._assign_ranking(spec.function, ordered, key_of, results)
+            elif spec.function in OFFSET_FUNCTIONS:
+                self._assign_offset(spec, ordered, rows, results)
+            else:
+                self._assign_aggregate(spec, ordered, key_of, rows, results)
+
+        return results
+
+    def _assign_ranking(self, function: str, ordered: List[int],
+                        key_of: Dict[int, Tuple], results: List[Any]) -> None:
+        """计算ROW_NUMBER/RANK/DENSE_RANK"""
+        rank = 0
+        dense_rank = 0
+        previous_key = None
+
+        for position, index in enumerate(ordered, start=1):
+            current_key = key_of[index]
+            if position == 1 or current_key != previous_key:
+                rank = position
+                dense_rank += 1
+                previous_key = current_key
+
+            if function == "ROW_NUMBER":
+                results[index] = position
+            elif function == "RANK":
+                results[index] = rank
+            else:
+                results[index] = dense_rank
+
+    def _assign_offset(self, spec: WindowFunctionSpec, ordered: List[int],
+                       rows: List[Dict[str, Any]], results: List[Any]) -> None:
+        """计算LAG/LEAD"""
+        step = -spec.offset if spec.function == "LAG" else spec.offset
+
+        for position, index in enumerate(ordered):
+            target = position + step
+            if 0 <= target < len(ordered):
+                results[index] = self._get_value(rows[ordered[target]], spec.argument)
+            else:
+                results[index] = spec.default
+
+    def _assign_aggregate(self, spec: WindowFunctionSpec, ordered: List[int],
+                          key_of: Dict[int, Tuple], rows: List[Dict[str, Any]],
+                          results: List[Any]) -> None:
+        """计算累计SUM/AVG/COUNT/MIN/MAX，并列行共享同一个结果"""
+        total = 0
+        count = 0
+        minimum = None
+        maximum = None
+
+        position = 0
+        while position < len(ordered):
+            # 没有ORDER BY时整个分区为一个窗口；否则并列行属于同一窗口
+            if spec.order_by:
+                peer_end = position + 1
+                current_key = key_of[ordered[position]]
+                while peer_end < len(ordered) and key_of[ordered[peer_end]] == current_key:
+                    peer_end += 1
+            else:
+                peer_end = len(ordered)
+
+            for index in ordered[position:peer_end]:
+                if spec.function == "COUNT" and spec.argument == "*":
+                    count += 1
+                    continue
+
+                value = self._get_value(rows[index], spec.argument)
+                if value is None:
+                    continue
+
+                if spec.function in ("MIN", "MAX"):
+                    minimum = value if minimum is None or value < minimum else minimum
+                    maximum = value if maximum is None or value > maximum else maximum
+                    count += 1
+                    continue
+
+                if spec.function == "COUNT":
+                    count += 1
+                    continue
+
+                number = self._to_number(value)
+                if number is not None:
+                    total += number
+                    count += 1
+
+            if spec.function == "SUM":
+                value = total if count else None
+            elif spec.function == "AVG":
+                value = total / count if count else None
+            elif spec.function == "COUNT":
+                value = count
+            elif spec.function == "MIN":
+                value = minimum
+            else:
+                value = maximum
+
+            for index in ordered[position:peer_end]:
+                results[index] = value
+
+            position = peer_end
+
+    def _sort_partition(self, indexes: List[int], sort_keys: List[Tuple],
+                        order_by: List[Tuple[str, str]]) -> List[int]:
+        """按ORDER BY对分区内的行下标进行稳定排序"""
+        if not order_by:
+            return list(indexes)
+
+        ordered = list(range(len(indexes)))
+        try:
+            # 从次要字段到主要字段依次稳定排序，以支持混合排序方向
+            for position in reversed(range(len(order_by))):
+                descending = order_by[position][1] == "DESC"
+                ordered.sort(
+                    key=lambda i: self._null_last_key(sort_keys[i][position], descending),
+                    reverse=descending
+                )
+        except TypeError as e:
+            self.log_warning(f"窗口函数排序失败: {e}")
+            ordered = list(range(len(indexes)))
+
+        return [indexes[i] for i in ordered]
+
+    def _order_key(self, row: Dict[str, Any], order_by: List[Tuple[str, str]]) -> Tuple:
+        """提取行的排序键，数字字符串按数值比较"""
+        values = []
+        for name, _ in order_by:
+            value = self._get_value(row, name)
+            if isinstance(value, str):
+                number = self._to_number(value)
+                if number is not None:
+                    value = number
+            values.append(value)
+        return tuple(values)
+
+    @staticmethod
+    def _null_last_key(value: Any, descending: bool) -> Tuple:
+        """None值在升序和降序时都排在最后"""
+        if value is None:
+            return (0,) if descending else (1,)
+        return (1, value) if descending else (0, value)
+
+    @staticmethod
+    def _get_value(row: Dict[str, Any], name: str) -> Any:
+        """获取字段值，找不到带表别名的字段时尝试去掉别名"""
+        if name in row:
+            return row[name]
+        if "." in name:
+            return row.get(name.split(".")[-1])
+        return None
+
+    @staticmethod
+    def _to_number(value: Any) -> Optional[float]:
+        """把值转换为数字，只接受数值和形如数字的字符串，无法转换时返回None"""
+        if isinstance(value, bool):
+            return int(value)
+        if isinstance(value, (int, float)):
+            return value
+        if isinstance(value, str) and NUMERIC_STRING_PATTERN.match(value.strip()):
+            return float(value)
+        return None
+
+    @staticmethod
+    def _parse_literal(text: str) -> Any:
+        """解析LAG/LEAD默认值字面量"""
+        if text.upper() == "NULL":
+            return None
+        if len(text) >= 2 and text[0] == text[-1] and text[0] in ("'", '"'):
+            return text[1:-1]
+        try:
+            return int(text)
+        except ValueError:
+            try:
+                return float(text)
+            except ValueError:
+                return text
+
+
+# 全局窗口函数计算器实例
+window_function_evaluator = WindowFunctionEvaluator()
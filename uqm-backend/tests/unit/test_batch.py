@@ -0,0 +1,70 @@
+"""
+列式步骤数据单元测试
+"""
+
+import pandas as pd
+
+from src.core.batch import ColumnarBatch, as_rows
+from src.core.step_store import estimate_rows_size
+from src.steps.unpivot_step import UnpivotStep
+
+
+ROWS = [
+    {"order_id": 1, "amount": 10.5, "status": "paid"},
+    {"order_id": 2, "amount": None, "status": "refund"},
+    {"order_id": 3, "amount": 7.0, "status": None},
+]
+
+
+class TestColumnarBatch:
+    """列式批数据测试"""
+
+    def test_rows_round_trip(self):
+        """测试字典列表与列式数据互转"""
+        batch = ColumnarBatch.from_rows(ROWS)
+
+        assert len(batch) == 3
+        assert batch.columns["order_id"] == [1, 2, 3]
+        assert batch.to_rows() == ROWS
+        assert list(batch) == ROWS
+        assert batch[1] == ROWS[1] and batch[-1] == ROWS[2]
+        assert batch[1:] == ROWS[1:]
+        assert as_rows(batch) == ROWS
+
+    def test_from_dataframe_matches_records(self):
+        """测试由DataFrame创建的数据与to_dict('records')一致"""
+        df = pd.DataFrame(ROWS)
+
+        batch = ColumnarBatch.from_dataframe(df)
+
+        assert batch.to_rows()[0] == df.to_dict("records")[0]
+        assert type(batch.columns["order_id"][0]) is int
+        assert batch.to_dataframe().equals(df)
+
+    def test_estimate_size_for_store(self):
+        """测试步骤数据存储可以估算列式数据大小"""
+        batch = ColumnarBatch.from_rows(ROWS * 100)
+
+        assert 0 < estimate_rows_size(batch) < estimate_rows_size(ROWS * 100)
+
+
+class TestColumnarSteps:
+    """基于DataFrame的步骤直接产出列式数据"""
+
+    async def test_unpivot_reads_and_returns_batch(self):
+        """测试逆透视步骤读取列式数据并返回列式数据"""
+        source = ColumnarBatch.from_rows([{"id": 1, "a": 1, "b": 2}, {"id": 2, "a": 3, "b": 4}])
+        step = UnpivotStep({"source": "s", "id_vars": ["id"], "value_vars": ["a", "b"]})
+        requested = {}
+
+        def get_source_data(name, columnar=False):
+            requested[name] = columnar
+            return source
+
+        result = await step.execute({"get_source_data": get_source_data})
+
+        assert requested == {"s": True}
+        assert isinstance(result, ColumnarBatch)
+        assert result.columns == {
+            "id": [1, 2, 1, 2], "variable": ["a", "a", "b", "b"], "value": [1, 3, 2, 4]
+        }
@@ -0,0 +1,289 @@
+"""
+缓存管理器单元测试
+"""
+
+import json
+import pickle
+import time
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from src.core.batch import ColumnarBatch, to_columnar
+from src.core.cache import (
+    CacheCircuitBreaker, CacheEntry, MemoryCacheManager, RedisCacheManager, TieredCacheManager
+)
+from src.core.cache_codec import CODEC_MAGIC, COMPRESSORS, HEADER_SIZE, CacheCodec
+from src.utils.exceptions import CacheError
+
+
+class TestMemoryCacheManager:
+    """内存缓存LRU淘汰测试"""
+
+    async def test_lru_order_by_access(self):
+        """测试按访问顺序淘汰，命中的缓存项最后被淘汰"""
+        cache = MemoryCacheManager(max_size=3)
+        for key in ("a", "b", "c"):
+            await cache.set(key, key)
+        assert await cache.get("a") == "a"
+
+        await cache.set("d", "d")
+
+        assert list(cache.cache) == ["c", "a", "d"]
+        stats = await cache.stats()
+        assert stats["evictions"] == 1
+        assert stats["evictions_by_reason"]["max_size"] == 1
+
+    async def test_byte_budget(self):
+        """测试按序列化后的字节数淘汰，超过预算的单项不缓存"""
+        cache = MemoryCacheManager(max_size=100, max_bytes=3000, codec=CacheCodec("none"))
+        await cache.set("small", "x" * 100)
+        await cache.set("big1", "x" * 1200)
+        await cache.set("big2", "x" * 1200)
+
+        await cache.set("big3", "x" * 1200)
+
+        assert list(cache.cache) == ["big2", "big3"]
+        assert cache.total_bytes == sum(item["size"] for item in cache.cache.values())
+
+        assert await cache.set("huge", "x" * 5000) is False
+        assert await cache.get("huge") is None
+
+        stats = await cache.stats()
+        assert stats["evictions_by_reason"]["too_large"] == 1
+        assert stats["evictions_by_reason"]["max_bytes"] == 2
+        assert stats["largest_entries"][0]["size"] > 1200
+
+    async def test_invalidate_tags(self):
+        """测试按标签删除缓存项，淘汰或覆盖的缓存项从标签索引中移除"""
+        cache = MemoryCacheManager(max_size=3)
+        await cache.set("q1", 1, tags=["orders", "customers"])
+        await cache.set("q2", 2, tags=["customers"])
+        await cache.set("q3", 3, tags=["regions"])
+        await cache.set("q3", 3)
+
+        assert await cache.invalidate_tags(["orders", "regions"]) == ["q1"]
+        assert list(cache.cache) == ["q2", "q3"]
+        assert cache.tag_index == {"customers": {"q2"}}
+
+        await cache.delete("q2")
+        assert cache.tag_index == {}
+
+    async def test_expired_entries(self):
+        """测试过期项在读取或到达淘汰端时按过期原因淘汰"""
+        cache = MemoryCacheManager(max_size=2)
+        await cache.set("old", 1, ttl=60)
+        await cache.set("new", 2)
+        cache.cache["old"]["expire_time"] = time.time() - 1
+
+        await cache.set("newer", 3)
+
+        assert list(cache.cache) == ["new", "newer"]
+        assert cache.evictions_by_reason["expired"] == 1
+
+        await cache.set("new", 4)
+        assert cache.total_bytes == sum(item["size"] for item in cache.cache.values())
+        assert await cache.delete("new") is True
+        assert list(cache.cache) == ["newer"]
+
+
+class TestCacheEntry:
+    """软过期与提前刷新测试"""
+
+    def test_stale_after_soft_ttl(self):
+        """测试过了软TTL后为旧数据且需要刷新"""
+        entry = CacheEntry.create("v", soft_ttl=60, compute_time=0.5)
+
+        assert entry.is_stale() is False
+        assert entry.is_stale(now=entry.soft_expire_at) is True
+        assert entry.should_refresh(beta=0, now=entry.soft_expire_at + 1) is True
+        assert entry.should_refresh(beta=0) is False
+
+    def test_early_refresh_probability(self):
+        """测试越接近软过期、计算越慢，提前刷新的概率越大"""
+        entry = CacheEntry.create("v", soft_ttl=60, compute_time=2.0)
+
+        def refresh_rate(seconds_left):
+            now = entry.soft_expire_at - seconds_left
+            return sum(entry.should_refresh(beta=1.0, now=now) for _ in range(2000)) / 2000
+
+        assert refresh_rate(59) < 0.01
+        assert 0.2 < refresh_rate(2) < 0.5
+        assert refresh_rate(0.1) > 0.9
+
+
+class TestCacheCodec:
+    """缓存数据编解码测试"""
+
+    def test_round_trip_and_header(self):
+        """测试编码带压缩方式头部，小数据不压缩"""
+        codec = CacheCodec("zlib", min_compress_size=100)
+        rows = [
+            {"id": i, "amount": Decimal("1.50"), "day": datetime(2024, 1, 1)} for i in range(100)
+        ]
+
+        encoded = codec.encode(rows)
+        small = codec.encode({"a": 1})
+
+        assert encoded[:HEADER_SIZE] == CODEC_MAGIC + bytes((COMPRESSORS["zlib"].codec_id,))
+        assert small[:HEADER_SIZE] == CODEC_MAGIC + bytes((COMPRESSORS["none"].codec_id,))
+        assert codec.decode(encoded) == rows
+        assert codec.decode(small) == {"a": 1}
+        # 其他压缩方式写入的数据按头部解码，旧格式按pickle读取
+        assert CacheCodec("none").decode(encoded) == rows
+        assert codec.decode(pickle.dumps(rows)) == rows
+
+    def test_unknown_compression(self):
+        """测试不支持的压缩方式"""
+        with pytest.raises(CacheError):
+            CacheCodec("brotli")
+        with pytest.raises(CacheError):
+            CacheCodec().decode(CODEC_MAGIC + bytes((200,)) + b"x")
+
+    async def test_columnar_payload_is_smaller(self):
+        """测试列式保存的步骤数据编码后更小，命中时得到列式数据"""
+        cache = MemoryCacheManager()
+        rows = [{"order_id": i, "status": "paid", "amount": i * 0.5} for i in range(1000)]
+
+        await cache.set("rows", rows)
+        await cache.set("batch", to_columnar(rows))
+        cached = await cache.get("batch")
+
+        assert isinstance(cached, ColumnarBatch)
+        assert cached.to_rows() == rows
+        assert cache.cache["batch"]["size"] < cache.cache["rows"]["size"]
+
+
+class TestRedisCacheDegradation:
+    """Redis缓存熔断降级测试"""
+
+    def test_circuit_breaker_states(self):
+        """测试连续失败后断开，恢复时间后放行一次探测"""
+        breaker = CacheCircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+        assert breaker.record_failure("timeout") is False
+        assert breaker.record_failure("timeout") is True
+        assert breaker.allow_request() is False
+
+        time.sleep(0.06)
+        assert breaker.allow_request() is True
+        assert breaker.allow_request() is False
+        breaker.record_success()
+        assert breaker.get_status()["state"] == CacheCircuitBreaker.CLOSED
+
+    async def test_unreachable_redis_is_a_miss(self):
+        """测试Redis不可用时读取按未命中处理，写入跳过；按标签失效无法完成，抛出异常"""
+        cache = RedisCacheManager(
+            "redis://127.0.0.1:1/0", operation_timeout=0.5,
+            breaker=CacheCircuitBreaker(failure_threshold=2, reset_timeout=60)
+        )
+        await cache.initialize()
+
+        assert cache.breaker.state == CacheCircuitBreaker.OPEN
+        assert await cache.get("k") is None
+        assert await cache.set("k", 1) is False
+        assert await cache.get_many(["a", "b"]) == {}
+        with pytest.raises(CacheError):
+            await cache.invalidate_tags(["orders"])
+        assert await cache.clear() is False
+        stats = await cache.stats()
+        assert stats["short_circuited"] >= 5
+        assert stats["circuit_breaker"]["state"] == CacheCircuitBreaker.OPEN
+        await cache.close()
+
+
+
+class SharedCache(MemoryCacheManager):
+    """代替Redis的共享缓存，发布的失效通知直接投递给订阅的两级缓存"""
+
+    def __init__(self):
+        super().__init__()
+        self.subscribers = []
+
+    async def get_many_encoded(self, keys):
+        return {key: await self.get_encoded(key) for key in keys}
+
+    async def publish(self, channel, message):
+        for subscriber in self.subscribers:
+            await subscriber._apply_invalidation(json.loads(message))
+        return True
+
+
+class TestTieredCacheManager:
+    """两级缓存测试"""
+
+    def make_workers(self, count=2):
+        shared = SharedCache()
+        workers = [
+            TieredCacheManager(MemoryCacheManager(max_size=10), shared, l1_ttl=30)
+            for _ in range(count)
+        ]
+        shared.subscribers.extend(workers)
+        return shared, workers
+
+    async def test_l2_hit_is_promoted(self):
+        """测试L2命中后放入L1，之后的读取由L1命中"""
+        shared, (a, b) = self.make_workers()
+        await a.set("k", {"rows": [1, 2]}, ttl=600)
+
+        assert await b.get("k") == {"rows": [1, 2]}
+        assert await b.get("k") == {"rows": [1, 2]}
+        assert await b.get("missing") is None
+
+        stats = b.stats_data
+        assert (stats["l2_hits"], stats["l1_hits"], stats["misses"]) == (1, 1, 1)
+        assert b.stats_data["promotions"] == 1
+        # L1的TTL不超过l1_ttl
+        assert b.l1.cache["k"]["expire_time"] - time.time() <= 30
+
+    async def test_invalidation_across_workers(self):
+        """测试一个进程写入或删除后，其他进程L1中的旧数据失效"""
+        shared, (a, b) = self.make_workers()
+        await a.set("k", 1)
+        assert await b.get("k") == 1
+
+        await a.set("k", 2)
+        assert "k" not in b.l1.cache
+        assert await b.get("k") == 2
+
+        await a.delete("k")
+        assert await b.get("k") is None
+        assert b.stats_data["invalidations_received"] == 3
+
+    async def test_invalidate_tags_across_workers(self):
+        """测试按标签失效时删除两级缓存，其他进程L1中带该标签的数据也被删除"""
+        shared, (a, b) = self.make_workers()
+        await a.set("q1", 1, tags=["orders"])
+        await a.set("q2", 2, tags=["customers"])
+        assert await b.get("q1") == 1
+
+        assert await a.invalidate_tags(["orders"]) == ["q1"]
+
+        assert "q1" not in b.l1.cache
+        assert await b.get("q1") is None
+        assert await b.get("q2") == 2
+
+    async def test_invalidate_tags_l2_failure_reported(self):
+        """测试L2按标签失效失败时仍删除L1中的数据，并向调用方报告失败"""
+        shared, (a, b) = self.make_workers()
+        await a.set("q1", 1, tags=["orders"])
+
+        async def unavailable(tags):
+            raise CacheError("Redis缓存不可用")
+
+        shared.invalidate_tags = unavailable
+        with pytest.raises(CacheError):
+            await a.invalidate_tags(["orders"])
+
+        assert "q1" not in a.l1.cache
+
+    async def test_get_many_reads_l1_then_l2(self):
+        """测试批量读取先查L1，其余键从L2读取"""
+        shared, (a, b) = self.make_workers()
+        for key in ("x", "y"):
+            await a.set(key, key)
+        await b.get("x")
+
+        assert await b.get_many(["x", "y", "z"]) == {"x": "x", "y": "y"}
+        stats = b.stats_data
+        assert (stats["l1_hits"], stats["l2_hits"], stats["misses"]) == (1, 2, 1)
@@ -0,0 +1,163 @@
+"""
+数据库连接池单元测试
+"""
+
+import asyncio
+import sqlite3
+import time
+
+import pytest
+
+from src.connectors.base import DefaultConnectorManager
+from src.connectors.health import ConnectorHealthMonitor
+from src.connectors.pool import ConnectionPool
+from src.connectors.sqlite import SQLiteConnector
+from src.utils.exceptions import TimeoutError
+
+
+class FakeConnection:
+    """记录关闭状态的测试连接"""
+
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def slow_query(connection, seconds):
+    """模拟阻塞查询"""
+    time.sleep(seconds)
+    return seconds
+
+
+class TestConnectionPool:
+    """连接池测试"""
+
+    async def test_blocking_calls_do_not_block_event_loop(self):
+        """测试阻塞调用在线程中执行，不阻塞事件循环"""
+        pool = ConnectionPool("test", FakeConnection, max_size=2)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker_task = asyncio.create_task(ticker())
+        start = time.perf_counter()
+        await asyncio.gather(pool.run(slow_query, 0.2), pool.run(slow_query, 0.2))
+        elapsed = time.perf_counter() - start
+        ticker_task.cancel()
+
+        assert elapsed < 0.35
+        assert ticks >= 10
+        assert pool.get_stats()["size"] == 2
+        await pool.close()
+
+    async def test_acquire_timeout(self):
+        """测试连接耗尽时获取连接超时"""
+        pool = ConnectionPool("test", FakeConnection, max_size=1, acquire_timeout=0.05)
+        connection = await pool.acquire()
+
+        with pytest.raises(TimeoutError):
+            await pool.acquire()
+
+        await pool.release(connection)
+        stats = pool.get_stats()
+        assert stats["acquire_timeouts"] == 1
+        assert stats["idle"] == 1 and stats["in_use"] == 0
+
+    async def test_broken_connection_is_discarded(self):
+        """测试失效连接被丢弃"""
+        pool = ConnectionPool(
+            "test", FakeConnection, is_broken_func=lambda e: isinstance(e, OSError)
+        )
+
+        def fail(connection):
+            raise OSError("connection reset")
+
+        with pytest.raises(OSError):
+            await pool.run(fail)
+
+        stats = pool.get_stats()
+        assert stats["discarded"] == 1
+        assert stats["size"] == 0
+
+
+class TestSQLiteConnectorPool:
+    """SQLite连接器连接池测试"""
+
+    async def test_memory_database_uses_single_connection(self):
+        """测试内存数据库只使用单个连接"""
+        connector = SQLiteConnector("sqlite:///:memory:")
+        await connector.execute_query("CREATE TABLE t (id INTEGER)")
+        await asyncio.gather(*[
+            connector.execute_query("INSERT INTO t VALUES (?)", [i]) for i in range(5)
+        ])
+
+        result = await connector.execute_query("SELECT COUNT(*) AS n FROM t")
+
+        assert result == [{"n": 5}]
+        assert connector.get_pool_stats()["max_size"] == 1
+        await connector.close()
+
+    async def test_file_database_concurrent_queries(self, tmp_path):
+        """测试文件数据库并发查询"""
+        db_path = tmp_path / "pool.db"
+        with sqlite3.connect(db_path) as connection:
+            connection.execute("CREATE TABLE t (id INTEGER)")
+            connection.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(100)])
+
+        connector = SQLiteConnector(f"sqlite:///{db_path}")
+        results = await asyncio.gather(*[
+            connector.execute_query("SELECT COUNT(*) AS n FROM t WHERE id >= ?", [i])
+            for i in range(10)
+        ])
+
+        assert [result[0]["n"] for result in results] == [100 - i for i in range(10)]
+        assert connector.get_pool_stats()["acquired"] >= 10
+        await connector.close()
+
+
+class TestConnectorHealth:
+    """连接器健康状态缓存测试"""
+
+    async def test_default_connector_uses_cached_health(self, tmp_path, monkeypatch):
+        """测试获取默认连接器时复用缓存的健康状态"""
+        connector = SQLiteConnector(f"sqlite:///{tmp_path / 'health.db'}")
+        manager = DefaultConnectorManager()
+        manager.connectors.clear()
+        manager.register_connector("sqlite", connector)
+        monkeypatch.setattr(manager.settings, "DEFAULT_DB_TYPE", "sqlite")
+
+        probes = 0
+        original_test_connection = connector.test_connection
+
+        async def counting_test_connection():
+            nonlocal probes
+            probes += 1
+            return await original_test_connection()
+
+        connector.test_connection = counting_test_connection
+
+        for _ in range(5):
+            assert await manager.get_default_connector() is connector
+
+        assert probes == 1
+        assert manager.health_monitor.get_status()["sqlite"]["healthy"] is True
+        await connector.close()
+
+    def test_passive_failures_mark_unhealthy(self):
+        """测试连续连接错误后标记为不可用，成功查询后恢复"""
+        monitor = ConnectorHealthMonitor({}, failure_threshold=2)
+        monitor.record_success("mysql")
+        monitor.record_failure("mysql", "gone away")
+        assert monitor.is_healthy("mysql") is True
+
+        monitor.record_failure("mysql", "gone away")
+        assert monitor.is_healthy("mysql") is False
+
+        monitor.record_success("mysql")
+        assert monitor.is_healthy("mysql") is True
@@ -0,0 +1,368 @@
+"""
+步骤执行器单元测试
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List
+
+import pytest
+
+from src.core.cache import MemoryCacheManager
+from src.core.executor import Executor
+from src.core.parser import get_step_dependencies, get_step_tables
+from src.core.refresh import get_background_refresher
+from src.core.step_store import StepDataStore
+from src.steps.base import BaseStep
+from src.utils.exceptions import ExecutionError
+
+
+class SleepStep(BaseStep):
+    """按配置休眠后返回上游数据行数的测试步骤"""
+
+    active = 0
+    peak = 0
+    started: List[str] = []
+
+    async def execute(self, context: Dict[str, Any]) -> List[Dict[str, Any]]:
+        cls = SleepStep
+        cls.active += 1
+        cls.peak = max(cls.peak, cls.active)
+        cls.started.append(self.step_name)
+        try:
+            await asyncio.sleep(self.config.get("delay", 0.01))
+            if self.config.get("fail"):
+                raise RuntimeError("boom")
+            upstream = self.config.get("sources", [])
+            total = sum(len(context["get_source_data"](name)) for name in upstream)
+            return [{"step": self.step_name, "upstream_rows": total}]
+        finally:
+            cls.active -= 1
+
+    def validate(self) -> None:
+        pass
+
+
+def make_executor(steps: List[Dict[str, Any]], **options) -> Executor:
+    """构造使用测试步骤的执行器"""
+    executor = Executor(
+        steps, connector_manager=None, cache_manager=MemoryCacheManager(), options=options
+    )
+    executor.step_classes = {"sleep": SleepStep}
+    return executor
+
+
+def make_step(name: str, sources: List[str] = None, **config) -> Dict[str, Any]:
+    """构造测试步骤配置"""
+    step_config = {"name": name, "sources": sources or []}
+    step_config.update(config)
+    return {"name": name, "type": "sleep", "config": step_config}
+
+
+@pytest.fixture(autouse=True)
+def reset_sleep_step():
+    SleepStep.active = 0
+    SleepStep.peak = 0
+    SleepStep.started = []
+
+
+class TestStepDependencies:
+    """步骤依赖推断测试"""
+
+    def test_dependencies_from_sources_and_joins(self):
+        """测试从source/sources/data_source/joins中推断依赖"""
+        steps = [
+            {"name": "a", "type": "query", "config": {"data_source": "orders"}},
+            {"name": "b", "type": "query", "config": {"data_source": "customers"}},
+            {"name": "c", "type": "query", "config": {
+                "data_source": "a o",
+                "joins": [{"type": "INNER", "table": "b c", "on": "o.id = c.id"}]
+            }},
+            {"name": "d", "type": "union", "config": {"sources": ["a", "c"]}},
+            {"name": "e", "type": "enrich", "config": {"source": "d", "lookup": "b"}},
+        ]
+
+        assert get_step_dependencies(steps) == {
+            "a": [],
+            "b": [],
+            "c": ["a", "b"],
+            "d": ["a", "c"],
+            "e": ["d", "b"],
+        }
+
+    def test_tables_include_upstream_steps(self):
+        """测试步骤读取的表包括joins、lookup.table和上游步骤读取的表"""
+        steps = [
+            {"name": "a", "type": "query", "config": {
+                "data_source": "Sales.Orders o",
+                "joins": [{"type": "LEFT", "table": "`customers` c", "on": "o.cid = c.id"}]
+            }},
+            {"name": "b", "type": "enrich", "config": {
+                "source": "a", "lookup": {"table": "regions", "columns": ["id"]}, "on": "region_id"
+            }},
+            {"name": "c", "type": "query", "config": {"data_source": "b"}},
+        ]
+
+        tables = get_step_tables(steps)
+
+        assert tables["a"] == ["customers", "orders", "sales.orders"]
+        assert tables["b"] == ["customers", "orders", "regions", "sales.orders"]
+        assert tables["c"] == tables["b"]
+
+
+class TestExecutorScheduling:
+    """执行器并发调度测试"""
+
+    async def test_independent_steps_run_concurrently(self):
+        """测试互不依赖的步骤并发执行"""
+        steps = [
+            make_step("a", delay=0.05),
+            make_step("b", delay=0.05),
+            make_step("c", delay=0.05),
+            make_step("d", sources=["a", "b", "c"]),
+        ]
+
+        result = await make_executor(steps, max_parallel_steps=3).execute()
+
+        assert SleepStep.peak == 3
+        assert SleepStep.started[-1] == "d"
+        assert result.step_data["d"] == [{"step": "d", "upstream_rows": 3}]
+        assert list(result.step_results) == ["a", "b", "c", "d"]
+
+    async def test_max_parallel_steps_limits_concurrency(self):
+        """测试max_parallel_steps限制并发度"""
+        steps = [make_step(name) for name in "abcde"]
+
+        await make_executor(steps, max_parallel_steps=2).execute()
+
+        assert SleepStep.peak == 2
+
+    async def test_failure_stops_execution(self):
+        """测试步骤失败时终止执行"""
+        steps = [make_step("a", fail=True), make_step("b", sources=["a"])]
+
+        with pytest.raises(ExecutionError):
+            await make_executor(steps).execute()
+
+        assert "b" not in SleepStep.started
+
+    async def test_continue_on_error_skips_dependents(self):
+        """测试continue_on_error时跳过失败步骤的下游步骤"""
+        steps = [
+            make_step("a", fail=True),
+            make_step("b"),
+            make_step("c", sources=["a"]),
+            make_step("d", sources=["b"]),
+        ]
+
+        result = await make_executor(steps, continue_on_error=True).execute()
+
+        assert result.step_results["a"]["status"] == "failed"
+        assert result.step_results["c"]["status"] == "skipped"
+        assert result.step_results["d"]["status"] == "completed"
+        assert "c" not in SleepStep.started
+
+
+class TestStepDataStore:
+    """步骤数据生命周期测试"""
+
+    def test_release_after_last_consumer(self):
+        """测试最后一个下游步骤结束后释放数据"""
+        store = StepDataStore({"a": [], "b": ["a"], "c": ["a", "b"]}, retained_steps=["c"])
+
+        store["a"] = [{"x": 1}]
+        store.acquire("b")
+        store["b"] = [{"y": 2}]
+        store.release("b")
+        assert "a" in store
+
+        store.acquire("c")
+        store["c"] = [{"z": 3}]
+        store.release("c")
+
+        assert "a" not in store
+        assert "b" not in store
+        assert store["c"] == [{"z": 3}]
+        assert store.get_stats()["released_steps"] == ["a", "b"]
+
+    def test_spill_to_disk(self):
+        """测试超过阈值时溢写未被使用的数据"""
+        rows = [{"id": i, "name": f"row_{i}"} for i in range(1000)]
+        store = StepDataStore({"a": [], "b": [], "c": ["a", "b"]}, retained_steps=["c"],
+                              spill_threshold_bytes=1)
+
+        store["a"] = rows
+        store["b"] = list(rows)
+
+        stats = store.get_stats()
+        assert stats["spilled_steps"] == ["a", "b"]
+        assert stats["current_bytes"] == 0
+        assert stats["peak_bytes"] > 0
+        assert store["a"] == rows
+
+        store.release("c", acquired=False)
+        assert "a" not in store and "b" not in store
+
+    def test_spill_file_name_sanitized(self, tmp_path):
+        """测试步骤名称中的路径分隔符不会进入溢写文件名，close后删除溢写文件"""
+        store = StepDataStore({"../a b": [], "c": ["../a b"]}, retained_steps=["c"],
+                              spill_threshold_bytes=1, spill_dir=str(tmp_path))
+
+        store["../a b"] = [{"id": 1}]
+
+        assert [path.name.startswith("uqm_step____a_b_") for path in tmp_path.iterdir()] == [True]
+        store.close()
+        assert list(tmp_path.iterdir()) == []
+
+    async def test_spill_files_removed_when_cancelled(self, tmp_path):
+        """测试请求被取消时也删除溢写文件"""
+        steps = [make_step("a"), make_step("b", sources=["a"], delay=10)]
+        executor = Executor(steps, connector_manager=None, cache_manager=MemoryCacheManager(),
+                            output_step="b")
+        executor.step_classes = {"sleep": SleepStep}
+        executor.step_data = StepDataStore(executor.run_dependencies, retained_steps=["b"],
+                                           spill_threshold_bytes=1, spill_dir=str(tmp_path))
+
+        task = asyncio.create_task(executor.execute())
+        while "b" not in SleepStep.started:
+            await asyncio.sleep(0.01)
+        assert list(tmp_path.iterdir())
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert list(tmp_path.iterdir()) == []
+
+    async def test_executor_reports_memory(self):
+        """测试执行器只保留输出步骤数据并报告内存统计"""
+        steps = [make_step("a"), make_step("b", sources=["a"]), make_step("c", sources=["b"])]
+        executor = Executor(steps, connector_manager=None, cache_manager=MemoryCacheManager(),
+                            output_step="c")
+        executor.step_classes = {"sleep": SleepStep}
+
+        result = await executor.execute()
+
+        assert list(result.step_data) == ["c"]
+        assert result.memory_stats["released_steps"] == ["a", "b"]
+        assert result.memory_stats["peak_bytes"] >= result.memory_stats["current_bytes"] > 0
+
+
+class CountingCacheManager(MemoryCacheManager):
+    """记录批量读取次数的内存缓存"""
+
+    def __init__(self):
+        super().__init__()
+        self.get_many_calls = []
+
+    async def get_many(self, keys):
+        self.get_many_calls.append(list(keys))
+        return await super().get_many(keys)
+
+
+class TestExecutorCachePrefetch:
+    """执行器批量预读步骤缓存测试"""
+
+    async def test_steps_prefetched_in_one_call(self):
+        """测试所有步骤（包括依赖其他步骤的步骤）在执行前一次批量读取缓存"""
+        cache = CountingCacheManager()
+        steps = [make_step("a"), make_step("b"), make_step("c", ["a", "b"])]
+
+        first = make_executor(steps, cache_enabled=True)
+        first.cache_manager = cache
+        await first.execute()
+
+        second = make_executor(steps, cache_enabled=True)
+        second.cache_manager = cache
+        result = await second.execute()
+
+        assert [len(keys) for keys in cache.get_many_calls] == [3, 3]
+        assert all(result.step_results[name]["cache_hit"] for name in ("a", "b", "c"))
+        assert result.get_step_data("c") == [{"step": "c", "upstream_rows": 2}]
+
+
+class TestStepCacheKeys:
+    """步骤缓存键测试"""
+
+    def test_dependent_key_chains_upstream_key(self):
+        """测试依赖步骤的缓存键随上游步骤配置变化，不需要上游数据"""
+        steps = [make_step("a"), make_step("c", ["a"])]
+        changed = [make_step("a", variant=2), make_step("c", ["a"])]
+
+        key = make_executor(steps)._get_cache_key("c")
+
+        assert key.startswith("step_cache:c:")
+        assert make_executor(steps)._get_cache_key("c") == key
+        assert make_executor(changed)._get_cache_key("c") != key
+        upstream_key = make_executor(steps)._get_cache_key("a")
+        assert make_executor(changed)._get_cache_key("a") != upstream_key
+
+
+class TestExecutorCoalescing:
+    """相同步骤合并执行测试"""
+
+    async def test_identical_steps_run_once(self):
+        """测试两个请求同时执行相同步骤时只执行一次，结果相同"""
+        steps = [make_step("shared", delay=0.05)]
+
+        results = await asyncio.gather(
+            make_executor(steps).execute(), make_executor(steps).execute()
+        )
+
+        assert SleepStep.started == ["shared"]
+        assert results[0].get_step_data("shared") == results[1].get_step_data("shared")
+
+    async def test_different_upstream_data_not_coalesced(self):
+        """测试配置或上游不同的同名步骤分别执行"""
+        first = [make_step("a", delay=0.01), make_step("c", ["a"], delay=0.05)]
+        second = [make_step("a", delay=0.01, variant=2), make_step("b", delay=0.01),
+                  make_step("c", ["a"], delay=0.05)]
+        second[2]["config"]["sources"] = ["a", "b"]
+
+        await asyncio.gather(make_executor(first).execute(), make_executor(second).execute())
+
+        assert sorted(SleepStep.started) == ["a", "a", "b", "c", "c"]
+
+
+class TestStaleWhileRevalidate:
+    """步骤缓存旧数据返回与后台刷新测试"""
+
+    async def make_stale(self, cache, executor, step):
+        """把步骤缓存改为已过软过期时间"""
+        key = executor._generate_cache_key(step)
+        entry = await cache.get(key)
+        entry.soft_expire_at = time.time() - 1
+        await cache.set(key, entry)
+
+    async def test_stale_root_step_served_and_refreshed(self):
+        """测试没有依赖的步骤返回旧数据，并在后台重新执行"""
+        cache = MemoryCacheManager()
+        step = make_step("a")
+        first = make_executor([step], cache_enabled=True)
+        first.cache_manager = cache
+        await first.execute()
+        await self.make_stale(cache, first, step)
+
+        second = make_executor([step], cache_enabled=True)
+        second.cache_manager = cache
+        result = await second.execute()
+        assert result.step_results["a"]["cache_hit"] is True
+
+        await get_background_refresher().wait()
+        assert SleepStep.started == ["a", "a"]
+        assert (await cache.get(first._generate_cache_key(step))).is_stale() is False
+
+    async def test_stale_dependent_step_recomputed(self):
+        """测试依赖其他步骤的步骤过了软过期时间按未命中处理"""
+        cache = MemoryCacheManager()
+        steps = [make_step("a"), make_step("c", ["a"])]
+        first = make_executor(steps, cache_enabled=True)
+        first.cache_manager = cache
+        await first.execute()
+        await self.make_stale(cache, first, steps[1])
+
+        second = make_executor(steps, cache_enabled=True)
+        second.cache_manager = cache
+        result = await second.execute()
+
+        assert [result.step_results[name]["cache_hit"] for name in ("a", "c")] == [True, False]
+        assert SleepStep.started == ["a", "c", "c"]
@@ -11,6 +11,7 @@ from src.utils.expression_parser import (
     ExpressionParser,
     DataFrameExpressionParser,
     SQLExpressionParser,
+    SQLExpressionCompiler,
     expression_parser,
     dataframe_expression_parser,
     sql_expression_parser
@@ -304,6 +305,58 @@ class TestSQLExpressionParser:
         assert "不能为空" in msg
 
 
+class TestSQLExpressionCompiler:
+    """SQL表达式编译器测试"""
+    
+    def test_case_when_and_functions(self):
+        """测试多分支CASE WHEN、COALESCE、NULLIF和CAST"""
+        compiler = SQLExpressionCompiler()
+        level = compiler.compile(
+            "CASE WHEN amount >= 300 THEN 'high' WHEN amount >= 100 THEN 'mid' ELSE 'low' END"
+        )
+        
+        rows = [{"amount": 500}, {"amount": 150}, {"amount": 5}]
+        assert level.evaluate_rows(rows) == ["high", "mid", "low"]
+        assert compiler.evaluate("COALESCE(discount, 0) + 1", {"discount": None}) == 1
+        assert compiler.evaluate("amount / NULLIF(qty, 0)", {"amount": 10, "qty": 0}) is None
+        assert compiler.evaluate("CAST(amount AS DECIMAL(10, 2)) / 4", {"amount": "10"}) == 2.5
+        assert compiler.evaluate("o.status IN ('paid', 'done') AND name LIKE 'a%'",
+                                 {"status": "paid", "name": "alice"}) is True
+    
+    def test_null_semantics(self):
+        """测试NULL传播和三值逻辑"""
+        compiler = SQLExpressionCompiler()
+        
+        assert compiler.evaluate("amount * 2", {"amount": None}) is None
+        assert compiler.evaluate("amount > 1 OR flag = 1", {"amount": None, "flag": 1}) is True
+        assert compiler.evaluate("amount > 1 AND flag = 1", {"amount": None, "flag": 1}) is None
+        assert compiler.evaluate("amount IS NULL", {"amount": None}) is True
+    
+    def test_compiled_once(self):
+        """测试同一表达式只编译一次"""
+        compiler = SQLExpressionCompiler()
+        
+        assert compiler.compile("a + 1") is compiler.compile("a + 1")
+    
+    def test_aggregate_mode(self):
+        """测试聚合模式下对行列表计算聚合表达式"""
+        compiler = SQLExpressionCompiler()
+        rows = [{"amount": 10, "id": 1}, {"amount": 30, "id": 2}, {"amount": None, "id": 2}]
+        
+        assert compiler.compile("SUM(amount) / COUNT(*)", aggregate=True)(rows) == 40 / 3
+        assert compiler.compile("COUNT(DISTINCT id)", aggregate=True)(rows) == 2
+        assert compiler.compile("MAX(amount) - MIN(amount)", aggregate=True)(rows) == 20
+    
+    def test_rejects_python_code(self):
+        """测试不执行任意Python代码"""
+        compiler = SQLExpressionCompiler()
+        
+        with pytest.raises(ExpressionError):
+            compiler.compile("__import__('os').system('ls')")
+        with pytest.raises(ExpressionError):
+            compiler.compile("UNKNOWN_FUNC(a)")
+
+
 class TestGlobalParsers:
     """测试全局解析器实例"""
     
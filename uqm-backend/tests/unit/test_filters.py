@@ -0,0 +1,109 @@
+"""
+过滤条件编译器单元测试
+"""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from src.utils.filters import FilterCompiler, compute_filter_value, parse_date, subtract_interval
+
+
+ROWS = [
+    {"id": 1, "name": "Alice", "order_date": "2024-03-01", "amount": 120, "tags": ["a"]},
+    {"id": 2, "name": "alfred", "order_date": "2024/02/15", "amount": 80, "tags": ["b"]},
+    {"id": 3, "name": "Bob", "order_date": "03/10/2024", "amount": None, "tags": None},
+    {"id": 4, "name": None, "order_date": "2024-01-20 08:30:00", "amount": "n/a", "tags": ["a"]},
+]
+
+
+def matching_ids(filters):
+    predicate = FilterCompiler().compile(filters)
+    return [row["id"] for row in ROWS if predicate(row)]
+
+
+class TestFilterCompiler:
+    """过滤条件编译测试"""
+
+    def test_date_comparison_across_formats(self):
+        """测试两边都是日期字符串时按日期比较，不论日期写法"""
+        after = {"field": "order_date", "operator": ">=", "value": "2024-02-15"}
+        before = {"field": "order_date", "operator": "<", "value": "2024/02/01"}
+        assert matching_ids([after]) == [1, 2, 3]
+        assert matching_ids([before]) == [4]
+
+    def test_date_expression_folded(self):
+        """测试日期函数表达式在编译时求值"""
+        expected = (date.today() - timedelta(days=30)).strftime("%Y-%m-%d")
+        assert compute_filter_value("DATE_SUB(CURDATE(), INTERVAL 30 DAY)") == expected
+        assert compute_filter_value("CURDATE()") == date.today().strftime("%Y-%m-%d")
+        assert compute_filter_value(42) == 42
+
+    @pytest.mark.parametrize("day, value, unit, expected", [
+        (date(2026, 10, 17), 11, "MONTH", date(2025, 11, 17)),
+        (date(2026, 10, 17), 13, "MONTH", date(2025, 9, 17)),
+        (date(2026, 10, 17), 23, "MONTH", date(2024, 11, 17)),
+        (date(2026, 1, 15), 1, "MONTH", date(2025, 12, 15)),
+        (date(2026, 3, 31), 1, "MONTH", date(2026, 2, 28)),
+        (date(2024, 3, 31), 1, "MONTH", date(2024, 2, 29)),
+        (date(2024, 2, 29), 1, "YEAR", date(2023, 2, 28)),
+        (date(2026, 10, 17), 2, "YEAR", date(2024, 10, 17)),
+        (date(2026, 1, 1), 1, "DAY", date(2025, 12, 31)),
+    ])
+    def test_interval_subtraction(self, day, value, unit, expected):
+        """测试按月、年相减跨年时的月份，以及目标月份没有这一天时取月末"""
+        assert subtract_interval(day, value, unit) == expected
+
+    def test_month_and_year_expressions_folded(self):
+        """测试MONTH/YEAR间隔的日期表达式按当天求值"""
+        today = date.today()
+        for value, unit in ((11, "MONTH"), (13, "MONTH"), (23, "MONTH"), (1, "YEAR")):
+            expected = subtract_interval(today, value, unit).strftime("%Y-%m-%d")
+            assert compute_filter_value(f"DATE_SUB(CURDATE(), INTERVAL {value} {unit})") == expected
+
+    def test_incomparable_values(self):
+        """测试None和无法比较的值不满足大小比较"""
+        assert matching_ids([{"field": "amount", "operator": ">", "value": 100}]) == [1]
+
+    def test_like_is_anchored(self):
+        """测试LIKE匹配整个值，_匹配单个字符"""
+        assert matching_ids([{"field": "name", "operator": "LIKE", "value": "Al%"}]) == [1]
+        assert matching_ids([{"field": "name", "operator": "LIKE", "value": "%o_"}]) == [3]
+        assert matching_ids([{"field": "name", "operator": "LIKE", "value": "lic"}]) == []
+
+    def test_membership(self):
+        """测试IN/NOT IN，包括不可哈希的行值"""
+        assert matching_ids([{"field": "id", "operator": "IN", "value": [1, 3]}]) == [1, 3]
+        assert matching_ids([{"field": "id", "operator": "NOT IN", "value": [1, 3]}]) == [2, 4]
+        assert matching_ids([{"field": "tags", "operator": "IN", "value": [["a"]]}]) == [1, 4]
+        assert matching_ids([{"field": "id", "operator": "IN", "value": 1}]) == []
+
+    def test_nested_logic(self):
+        """测试嵌套AND/OR条件"""
+        filters = [
+            {"logic": "OR", "conditions": [
+                {"field": "amount", "operator": ">", "value": 100},
+                {"logic": "AND", "conditions": [
+                    {"field": "name", "operator": "IS NULL"},
+                    {"field": "order_date", "operator": "<", "value": "2024-02-01"}
+                ]}
+            ]},
+            {"field": "id", "operator": "!=", "value": 2}
+        ]
+        assert matching_ids(filters) == [1, 4]
+
+    def test_unsupported_conditions_pass(self):
+        """测试无法识别的条件和操作符视为恒真"""
+        assert matching_ids([{"field": "id", "operator": "REGEXP", "value": "x"}]) == [1, 2, 3, 4]
+        equals_two = {"field": "id", "operator": "=", "value": 2}
+        assert matching_ids([{"unknown": True}, equals_two]) == [2]
+        assert matching_ids([{"logic": "OR", "conditions": [
+            equals_two, {"field": "id", "operator": "REGEXP", "value": "x"}
+        ]}]) == [1, 2, 3, 4]
+
+    def test_parse_date(self):
+        """测试日期解析"""
+        assert parse_date("2024-01-20 08:30:00") == datetime(2024, 1, 20, 8, 30)
+        assert parse_date("2024-1-5") == datetime(2024, 1, 5)
+        assert parse_date("2024-02-30") is None
+        assert parse_date("paid") is None
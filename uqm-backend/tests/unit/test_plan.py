@@ -0,0 +1,182 @@
+"""
+查询计划缓存单元测试
+"""
+
+import json
+
+import pytest
+
+from src.core.plan import CompiledPlan, PlanCache
+from src.steps.query_step import QueryStep
+from src.utils.exceptions import ValidationError
+from src.utils.sql_builder import BindParameters
+
+
+TEMPLATE = {
+    "steps": [
+        {
+            "name": "orders",
+            "type": "query",
+            "config": {
+                "data_source": "orders",
+                "dimensions": ["status"],
+                "filters": [
+                    {"field": "status", "operator": "IN", "value": "$statuses"},
+                    {"field": "amount", "operator": ">", "value": "${min_amount}"},
+                    {"field": "note", "operator": "=", "value": "ID-$min_amount"}
+                ],
+                "limit": 10
+            }
+        }
+    ],
+    "output": "orders"
+}
+
+
+def query_step(**config):
+    return {"name": "s", "type": "query", "config": {"data_source": "orders", **config}}
+
+
+def legacy_substitute(uqm_data, parameters):
+    """原实现：在整个UQM的JSON文本上替换占位符"""
+    uqm_str = json.dumps(uqm_data, ensure_ascii=False)
+    for name, value in parameters.items():
+        replacement = json.dumps(value, ensure_ascii=False)
+        uqm_str = uqm_str.replace(f'"${{{name}}}"', replacement)
+        uqm_str = uqm_str.replace(f"${{{name}}}", replacement)
+        uqm_str = uqm_str.replace(f'"${name}"', replacement)
+        uqm_str = uqm_str.replace(f"${name}", replacement)
+    return json.loads(uqm_str)
+
+
+class TestBindParameters:
+    """参数绑定测试"""
+
+    @pytest.mark.parametrize("parameters", [
+        {},
+        {"statuses": ["paid", "shipped"], "min_amount": 100},
+        {"statuses": None, "min_amount": 1.5},
+        {"min_amount": True},
+    ])
+    def test_matches_text_replacement(self, parameters):
+        """测试与原来在JSON文本上替换的结果一致，整个字符串是占位符时得到原类型的值"""
+        plan = CompiledPlan.compile("fp", TEMPLATE)
+        assert plan.bind(parameters) == legacy_substitute(TEMPLATE, parameters)
+
+    def test_template_not_modified(self):
+        """测试每次绑定返回独立副本，修改结果不影响模板"""
+        plan = CompiledPlan.compile("fp", TEMPLATE)
+        bound = plan.bind({"statuses": ["paid"], "min_amount": 5})
+        bound["steps"][0]["config"]["limit"] = 1
+        bound["steps"][0]["config"]["filters"].clear()
+
+        assert plan.template == TEMPLATE
+        assert plan.bind({}) == TEMPLATE
+
+    def test_placeholders_resolved_by_name(self):
+        """测试按参数名替换：前缀相同的参数互不影响，嵌入的字符串参数按原文插入"""
+        plan = CompiledPlan.compile("fp", {
+            "a": "$region",
+            "b": "$regions",
+            "c": "${region}-$regions/$missing",
+            "conditional": {"type": "expression", "expression": "$region != null"}
+        })
+        bound = plan.bind({"region": "east", "regions": ["east", "west"]})
+
+        assert bound == {
+            "a": "east",
+            "b": ["east", "west"],
+            "c": 'east-["east", "west"]/$missing',
+            "conditional": {"type": "expression", "expression": "$region != null"}
+        }
+
+
+    def test_embedded_sql_values_bound(self):
+        """测试嵌在SQL表达式和条件中的参数作为绑定参数，破坏引号的值不会拼接到SQL中"""
+        plan = CompiledPlan.compile("fp", {"steps": [query_step(
+            dimensions=[{
+                "expression": "(SELECT COUNT(*) FROM orders WHERE country = '$country')",
+                "alias": "n"
+            }],
+            filters=["amount > $min_amount"]
+        )]})
+        country = "X' OR '1'='1"
+        config = plan.bind({"country": country, "min_amount": 5})["steps"][0]["config"]
+
+        params = BindParameters()
+        query = QueryStep(config).build_query(params)
+
+        assert country not in query
+        assert query == (
+            "SELECT (SELECT COUNT(*) FROM orders WHERE country = :p0) AS n\n"
+            "FROM orders\n"
+            "WHERE amount > :p1"
+        )
+        assert params.values == {"p0": country, "p1": 5}
+        assert QueryStep(config).build_query() == (
+            "SELECT (SELECT COUNT(*) FROM orders WHERE country = 'X'' OR ''1''=''1') AS n\n"
+            "FROM orders\n"
+            "WHERE amount > 5"
+        )
+
+    @pytest.mark.parametrize("config", [
+        {"filters": ["name LIKE '%$country%'"]},
+        {"data_source": "orders_$country"},
+        {"order_by": [{"field": "amount_$country", "direction": "DESC"}]},
+        {"filters": ["amount > $limits"]},
+    ])
+    def test_unbindable_embedding_rejected(self, config):
+        """测试嵌在字符串字面量、标识符中或非标量的参数无法绑定，拒绝替换"""
+        plan = CompiledPlan.compile("fp", {"steps": [query_step(**config)]})
+        with pytest.raises(ValidationError, match="参数替换失败"):
+            plan.bind({"country": "X' OR '1'='1", "limits": [1, 2]})
+
+
+class TestPlanCache:
+    """查询计划缓存测试"""
+
+    def test_compiles_once_per_fingerprint(self):
+        """测试同一指纹只编译一次，缓存的模板与请求数据相互独立"""
+        cache = PlanCache(max_size=4)
+        calls = []
+        source = {"steps": []}
+
+        def compile_func():
+            calls.append(1)
+            return source
+
+        first = cache.get_or_compile("a", compile_func)
+        second = cache.get_or_compile("a", compile_func)
+        source["steps"].append("changed")
+
+        assert second is first
+        assert first.template == {"steps": []}
+        assert len(calls) == 1
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_evicts_least_recently_used(self):
+        """测试超过容量时淘汰最久未使用的计划"""
+        cache = PlanCache(max_size=2)
+        cache.get_or_compile("a", dict)
+        cache.get_or_compile("b", dict)
+        cache.get_or_compile("a", dict)
+        cache.get_or_compile("c", dict)
+
+        assert list(cache.plans) == ["a", "c"]
+        assert cache.stats()["evictions"] == 1
+
+    def test_compile_error_not_cached(self):
+        """测试编译失败时抛出异常且不缓存，容量为0时不缓存"""
+        cache = PlanCache(max_size=2)
+
+        def fail():
+            raise ValidationError("invalid")
+
+        with pytest.raises(ValidationError):
+            cache.get_or_compile("a", fail)
+        assert "a" not in cache.plans
+
+        disabled = PlanCache(max_size=0)
+        disabled.get_or_compile("a", dict)
+        assert disabled.stats()["size"] == 0
@@ -0,0 +1,195 @@
+"""
+查询下推单元测试
+"""
+
+import sqlite3
+
+import pytest
+
+from src.connectors.base import DefaultConnectorManager
+from src.connectors.sqlite import SQLiteConnector
+from src.core.cache import MemoryCacheManager
+from src.core.executor import Executor
+from src.core.parser import get_step_dependencies
+from src.core.pushdown import plan_pushdown
+from src.steps.query_step import QueryStep
+from src.utils.sql_builder import BindParameters
+
+
+def query(name, **config):
+    return {"name": name, "type": "query", "config": config}
+
+
+def plan(steps, retained_steps=None, runtime_steps=None):
+    return plan_pushdown(steps, get_step_dependencies(steps), retained_steps, runtime_steps)
+
+
+ORDERS = query("o", data_source="orders", dimensions=["id", "region", "amount"])
+TOTALS = query(
+    "t", data_source="o", dimensions=["region"],
+    metrics=[{"name": "amount", "aggregation": "SUM", "alias": "total"}],
+    filters=[{"field": "amount", "operator": ">", "value": 1}], group_by=["region"]
+)
+
+
+class TestPushdownPlan:
+    """查询下推规划测试"""
+
+    def test_chain_merged_and_upstream_inlined(self):
+        """测试query步骤链合并为CTE，只被合并步骤读取的上游步骤不单独执行"""
+        top = query(
+            "top", data_source="t x", dimensions=["region", "total"], order_by=["total"], limit=1
+        )
+        result = plan([ORDERS, TOTALS, top], retained_steps=["top"])
+
+        assert result.sources == {
+            "t": {"o": ORDERS["config"]},
+            "top": {"o": ORDERS["config"], "t": TOTALS["config"]},
+        }
+        assert result.inlined == {"o", "t"}
+        assert result.run_dependencies(get_step_dependencies([ORDERS, TOTALS, top]))["top"] == []
+
+    def test_other_readers_keep_upstream(self):
+        """测试上游步骤还被其他类型的步骤读取、或需要保留时照常执行"""
+        union = {"name": "u", "type": "union", "config": {"sources": ["o", "t"]}}
+        result = plan([ORDERS, TOTALS, union], retained_steps=["u"])
+        assert set(result.sources) == {"t"}
+        assert result.inlined == set()
+
+        assert plan([ORDERS, TOTALS], retained_steps=None).inlined == set()
+
+    @pytest.mark.parametrize("config", [
+        {"joins": [{"type": "INNER", "table": "customers c", "on": "x.id = c.id"}]},
+        {"filters": [
+            {"field": "day", "operator": ">=", "value": "DATE_SUB(CURDATE(), INTERVAL 7 DAY)"}
+        ]},
+        {"metrics": [{"name": "amount", "aggregation": "SUM", "alias": "total"}],
+         "calculated_fields": [{"alias": "half", "expression": "total / 2"}]},
+    ])
+    def test_unsupported_configs_stay_in_memory(self, config):
+        """测试SQL与内存计算结果不同的配置不合并"""
+        step = query("s", data_source="o x", dimensions=["region"], **config)
+        assert plan([ORDERS, step], retained_steps=["s"]).sources == {}
+
+    def test_runtime_option_steps_not_recomputed(self):
+        """测试结果取决于运行时选项（如分页）的步骤不作为CTE重新计算"""
+        top = query("top", data_source="t x", dimensions=["region", "total"])
+        result = plan([ORDERS, TOTALS, top], retained_steps=["top", "t"], runtime_steps=["t"])
+
+        assert result.sources == {"t": {"o": ORDERS["config"]}}
+        assert result.inlined == {"o"}
+
+    def test_analysis_error_falls_back_to_memory(self, monkeypatch):
+        """测试分析步骤时出现任何异常都不合并，而不是让整个请求在规划时失败"""
+        def broken(self):
+            raise ValueError("month must be in 1..12")
+
+        monkeypatch.setattr(QueryStep, "supports_pushdown", broken)
+        step = query("s", data_source="o x", dimensions=["region"],
+                     filters=[{"field": "day", "operator": ">=",
+                               "value": "DATE_SUB(CURDATE(), INTERVAL 11 MONTH)"}])
+
+        result = plan([ORDERS, step], retained_steps=["s"])
+
+        assert result.sources == {}
+        assert result.inlined == set()
+
+    def test_step_named_like_table_not_merged(self):
+        """测试与读取的数据库表同名的步骤不能作为CTE"""
+        orders = query("orders", data_source="orders", dimensions=["id"])
+        step = query("s", data_source="orders", dimensions=["id"])
+        assert plan([orders, step], retained_steps=["s"]).sources == {}
+
+
+class TestPushdownQuery:
+    """合并后的SQL测试"""
+
+    def test_with_query_renders_once(self):
+        """测试CTE与主查询共用绑定参数，pyformat下CTE中原有的%也被转义"""
+        upstream = QueryStep({"data_source": "users", "dimensions": ["id"],
+                              "filters": ["name LIKE 'A%'"]})
+        step = QueryStep({"data_source": "u", "dimensions": ["id"],
+                          "filters": [{"field": "id", "operator": "=", "value": 3}]})
+        params = BindParameters("pyformat")
+        ctes = [("u", upstream.build_query(params, render=False))]
+
+        query = step.build_query(params, ctes)
+
+        assert query == (
+            "WITH u AS (\nSELECT id\nFROM users\nWHERE name LIKE 'A%%'\n)\n"
+            "SELECT id\nFROM u\nWHERE id = %(p0)s"
+        )
+        assert params.values == {"p0": 3}
+
+    async def test_executor_runs_chain_in_database(self, tmp_path, monkeypatch):
+        """测试执行器把query步骤链作为一条SQL执行，结果与内存计算一致"""
+        db_path = tmp_path / "pushdown.db"
+        with sqlite3.connect(db_path) as connection:
+            connection.execute("CREATE TABLE orders (id INTEGER, region TEXT, amount REAL)")
+            connection.executemany("INSERT INTO orders VALUES (?, ?, ?)", [
+                (1, "east", 5), (2, "east", 7), (3, "west", 1), (4, "west", 9), (5, "north", 2)
+            ])
+
+        manager = DefaultConnectorManager()
+        manager.connectors.clear()
+        manager.register_connector("sqlite", SQLiteConnector(f"sqlite:///{db_path}"))
+        monkeypatch.setattr(manager.settings, "DEFAULT_DB_TYPE", "sqlite")
+
+        top = query("top", data_source="t x", dimensions=["region", "total"],
+                    order_by=[{"field": "total", "direction": "DESC"}])
+        results = {}
+        try:
+            for pushdown in (True, False):
+                executor = Executor([ORDERS, TOTALS, top], connector_manager=manager,
+                                    cache_manager=MemoryCacheManager(),
+                                    options={"query_pushdown": pushdown}, output_step="top")
+                result = await executor.execute()
+                results[pushdown] = (
+                    result.get_step_data("top"),
+                    {name: step["status"] for name, step in result.step_results.items()}
+                )
+        finally:
+            await manager.close_all()
+
+        assert results[True][0] == results[False][0] == [
+            {"region": "east", "total": 12.0},
+            {"region": "west", "total": 9.0},
+            {"region": "north", "total": 2.0},
+        ]
+        assert results[True][1] == {"o": "inlined", "t": "inlined", "top": "completed"}
+        assert results[False][1] == {"o": "completed", "t": "completed", "top": "completed"}
+
+    async def test_paginated_upstream_not_recomputed(self, tmp_path, monkeypatch):
+        """测试下游步骤读取分页目标步骤的当前页，与不合并执行的结果一致"""
+        db_path = tmp_path / "pagination.db"
+        with sqlite3.connect(db_path) as connection:
+            connection.execute("CREATE TABLE orders (id INTEGER, region TEXT, amount REAL)")
+            connection.executemany("INSERT INTO orders VALUES (?, ?, ?)", [
+                (1, "east", 5), (2, "east", 7), (3, "west", 1), (4, "west", 9), (5, "north", 2)
+            ])
+
+        manager = DefaultConnectorManager()
+        manager.connectors.clear()
+        manager.register_connector("sqlite", SQLiteConnector(f"sqlite:///{db_path}"))
+        monkeypatch.setattr(manager.settings, "DEFAULT_DB_TYPE", "sqlite")
+
+        paged = query("paged", data_source="orders", dimensions=["id", "region"],
+                      order_by=[{"field": "id", "direction": "ASC"}])
+        counts = query("counts", data_source="paged", dimensions=["region"],
+                       metrics=[{"name": "id", "aggregation": "COUNT", "alias": "n"}],
+                       group_by=["region"])
+        results = {}
+        try:
+            for pushdown in (True, False):
+                executor = Executor([paged, counts], connector_manager=manager,
+                                    cache_manager=MemoryCacheManager(),
+                                    options={"query_pushdown": pushdown},
+                                    pagination_target_step="paged",
+                                    pagination_options={"page": 1, "page_size": 2},
+                                    output_step="counts")
+                result = await executor.execute()
+                results[pushdown] = result.get_step_data("counts")
+        finally:
+            await manager.close_all()
+
+        assert results[True] == results[False] == [{"region": "east", "n": 2}]
@@ -0,0 +1,247 @@
+"""
+查询步骤（步骤数据路径）单元测试
+"""
+
+import pytest
+
+from src.steps.query_step import QueryStep
+
+
+@pytest.fixture
+def step():
+    """只用于调用步骤数据处理方法的查询步骤"""
+    return QueryStep({"data_source": "orders", "dimensions": ["order_id"]})
+
+
+ORDERS = [
+    {"order_id": 1, "customer_id": 10, "region": "east", "amount": 100},
+    {"order_id": 2, "customer_id": 20, "region": "west", "amount": 200},
+    {"order_id": 3, "customer_id": 10, "region": "west", "amount": 300},
+    {"order_id": 4, "customer_id": 99, "region": "east", "amount": 400},
+]
+
+ON_CUSTOMER = "o.customer_id = c.customer_id"
+
+CUSTOMERS = [
+    {"customer_id": 10, "region": "east", "name": "alice"},
+    {"customer_id": 20, "region": "west", "name": "bob"},
+    {"customer_id": 30, "region": "east", "name": "carol"},
+]
+
+
+class TestStepDataJoin:
+    """步骤数据哈希连接测试"""
+
+    def test_inner_join_row_shape(self, step):
+        """测试INNER JOIN输出同时包含带前缀和不带前缀的字段"""
+        result = step._perform_step_data_join(ORDERS, CUSTOMERS, ON_CUSTOMER, "INNER", "c")
+
+        assert [row["order_id"] for row in result] == [1, 2, 3]
+        assert result[0] == {
+            "o.order_id": 1, "order_id": 1,
+            "o.customer_id": 10, "customer_id": 10,
+            "o.region": "east", "region": "east",
+            "o.amount": 100, "amount": 100,
+            "c.customer_id": 10, "c.region": "east", "c.name": "alice", "name": "alice",
+        }
+
+    def test_left_join_keeps_unmatched_rows(self, step):
+        """测试LEFT JOIN保留未匹配的左表行"""
+        result = step._perform_step_data_join(ORDERS, CUSTOMERS, ON_CUSTOMER, "LEFT", "c")
+
+        assert [row["order_id"] for row in result] == [1, 2, 3, 4]
+        assert "name" not in result[3]
+
+    def test_right_and_full_join(self, step):
+        """测试RIGHT/FULL JOIN追加未匹配的右表行"""
+        right = step._perform_step_data_join(ORDERS, CUSTOMERS, ON_CUSTOMER, "RIGHT", "c")
+        full = step._perform_step_data_join(ORDERS, CUSTOMERS, ON_CUSTOMER, "FULL OUTER", "c")
+
+        assert [row.get("order_id") for row in right] == [1, 2, 3, None]
+        assert right[-1]["c.name"] == "carol"
+        assert [row.get("order_id") for row in full] == [1, 2, 3, 4, None]
+
+    def test_composite_key_and_reversed_condition(self, step):
+        """测试复合连接键以及反向书写的连接条件"""
+        result = step._perform_step_data_join(
+            ORDERS, CUSTOMERS,
+            "c.customer_id = o.customer_id AND o.region = c.region",
+            "INNER", "c"
+        )
+
+        assert [row["order_id"] for row in result] == [1, 2]
+        assert result[0]["o.order_id"] == 1
+        assert result[0]["c.name"] == "alice"
+
+    def test_build_side_does_not_change_order(self, step):
+        """测试哈希表建立在较小一侧时输出顺序不变"""
+        duplicates = [{"customer_id": 10, "region": "north", "name": f"dup{i}"} for i in range(10)]
+
+        result = step._perform_step_data_join(
+            ORDERS[:2], CUSTOMERS + duplicates, ON_CUSTOMER, "INNER", "c"
+        )
+
+        assert [row["c.name"] for row in result] == (
+            ["alice"] + [f"dup{i}" for i in range(10)] + ["bob"]
+        )
+
+
+SALES = [
+    {"country": "CN", "rep": "a", "total": 300},
+    {"country": "US", "rep": "b", "total": 100},
+    {"country": "CN", "rep": "c", "total": 500},
+    {"country": "CN", "rep": "d", "total": 300},
+    {"country": "US", "rep": "e", "total": None},
+    {"country": "CN", "rep": "f", "total": 200},
+]
+
+
+def window_column(step, expression):
+    """计算单个窗口函数列"""
+    result = step._add_calculated_fields(SALES, [{"alias": "w", "expression": expression}])
+    return {row["rep"]: row["w"] for row in result}
+
+
+class TestWindowFunctions:
+    """窗口函数计算测试"""
+
+    def test_ranking_functions(self, step):
+        """测试ROW_NUMBER/RANK/DENSE_RANK及并列处理"""
+        over = "OVER (PARTITION BY country ORDER BY total DESC)"
+
+        assert window_column(step, f"ROW_NUMBER() {over}") == {
+            "c": 1, "a": 2, "d": 3, "f": 4, "b": 1, "e": 2
+        }
+        assert window_column(step, f"RANK() {over}") == {
+            "c": 1, "a": 2, "d": 2, "f": 4, "b": 1, "e": 2
+        }
+        assert window_column(step, f"DENSE_RANK() {over}") == {
+            "c": 1, "a": 2, "d": 2, "f": 3, "b": 1, "e": 2
+        }
+
+    def test_null_sorts_last_in_both_directions(self, step):
+        """测试None值在升序和降序中都排在最后"""
+        window = "PARTITION BY country ORDER BY total"
+        assert window_column(step, f"ROW_NUMBER() OVER ({window} ASC)")["e"] == 2
+        assert window_column(step, f"ROW_NUMBER() OVER ({window} DESC)")["e"] == 2
+
+    def test_lag_and_lead(self, step):
+        """测试LAG/LEAD及默认值"""
+        over = "OVER (PARTITION BY country ORDER BY rep)"
+
+        assert window_column(step, f"LAG(total) {over}") == {
+            "a": None, "c": 300, "d": 500, "f": 300, "b": None, "e": 100
+        }
+        assert window_column(step, f"LEAD(total, 2, 0) {over}") == {
+            "a": 300, "c": 200, "d": 0, "f": 0, "b": 0, "e": 0
+        }
+
+    def test_running_aggregates(self, step):
+        """测试累计SUM/AVG，并列行共享结果"""
+        over = "OVER (PARTITION BY country ORDER BY total DESC)"
+
+        assert window_column(step, f"SUM(total) {over}") == {
+            "c": 500, "a": 1100, "d": 1100, "f": 1300, "b": 100, "e": 100
+        }
+        assert window_column(step, "AVG(total) OVER (PARTITION BY country)")["f"] == 325
+
+
+class TestStepDataExpressions:
+    """步骤数据表达式测试"""
+
+    def test_calculated_fields_use_compiled_expressions(self, step):
+        """测试计算字段支持多分支CASE WHEN和带表别名的字段"""
+        result = step._add_calculated_fields(ORDERS, [
+            {"alias": "level", "expression": (
+                "CASE WHEN o.amount > 250 THEN 'high' WHEN amount > 150 THEN 'mid' ELSE 'low' END"
+            )},
+            {"alias": "half", "expression": "amount / 2"},
+        ])
+
+        assert [row["level"] for row in result] == ["low", "mid", "high", "high"]
+        assert [row["half"] for row in result] == [50, 100, 150, 200]
+
+    def test_invalid_expression_returns_none(self, step):
+        """测试无法编译的表达式返回None，不执行任意代码"""
+        assert step._evaluate_expression("__import__('os').getcwd()", ORDERS[0]) is None
+        assert step._evaluate_expression("amount +", ORDERS[0]) is None
+
+    def test_aggregate_references_in_row_context(self, step):
+        """测试聚合后的行中SUM(x)引用该行已计算的字段"""
+        row = {"amount": 300, "order_id": 3}
+        assert step._evaluate_expression("SUM(amount) / COUNT(order_id)", row) == 100
+
+    def test_complex_aggregate_expression(self, step):
+        """测试复杂聚合表达式对所有行计算"""
+        result = step._aggregate_expression("SUM(amount) / NULLIF(COUNT(order_id), 0)", ORDERS)
+
+        assert result == 250
+
+
+class TestHashAggregation:
+    """步骤数据流式哈希聚合测试"""
+
+    def test_group_by_prefixed_field(self, step):
+        """测试分组字段带表别名前缀时按第一次出现的顺序分组聚合"""
+        rows = [
+            {"o.region": row["region"], "amount": row["amount"], "customer_id": row["customer_id"]}
+            for row in ORDERS
+        ]
+        result = step._apply_grouping_and_aggregation(rows, [], [
+            {"name": "amount", "aggregation": "SUM", "alias": "total"},
+            {"name": "amount", "aggregation": "MAX", "alias": "largest"},
+            {"name": "customer_id", "aggregation": "COUNT_DISTINCT", "alias": "customers"},
+            {"expression": "SUM(amount) / COUNT(*)", "alias": "average"},
+        ], ["region"])
+
+        assert result == [
+            {"region": "east", "total": 500.0, "largest": 400, "customers": 2, "average": 250.0},
+            {"region": "west", "total": 500.0, "largest": 300, "customers": 2, "average": 250.0},
+        ]
+
+    def test_null_values_skipped(self, step):
+        """测试None不参与聚合，全部为None时按字段聚合的结果为None"""
+        rows = [
+            {"region": "east", "amount": None},
+            {"region": "east", "amount": 5},
+            {"region": "west", "amount": None},
+        ]
+        result = step._apply_grouping_and_aggregation(rows, [], [
+            {"name": "amount", "aggregation": "COUNT", "alias": "n"},
+            {"name": "amount", "aggregation": "AVG", "alias": "avg"},
+            {"expression": "COUNT(*)", "alias": "rows"},
+        ], ["region"])
+
+        assert result == [
+            {"region": "east", "n": 1, "avg": 5.0, "rows": 2},
+            {"region": "west", "n": None, "avg": None, "rows": 1},
+        ]
+
+    def test_count_distinct_expression(self, step):
+        """测试COUNT(DISTINCT x)按去重后的值计数"""
+        assert step._aggregate_expression("COUNT(DISTINCT customer_id)", ORDERS) == 3
+
+    def test_unhashable_group_values(self, step):
+        """测试列表、字典等不可哈希的分组值按内容分组，输出原始值"""
+        rows = [
+            {"tags": ["a", "b"], "meta": {"x": 1}, "amount": 1},
+            {"tags": ["a", "b"], "meta": {"x": 1}, "amount": 2},
+            {"tags": ["b"], "meta": {"x": 1}, "amount": 4},
+        ]
+        result = step._apply_grouping_and_aggregation(rows, [], [
+            {"name": "amount", "aggregation": "SUM", "alias": "total"},
+        ], ["tags", "meta"])
+
+        assert result == [
+            {"tags": ["a", "b"], "meta": {"x": 1}, "total": 3},
+            {"tags": ["b"], "meta": {"x": 1}, "total": 4},
+        ]
+
+    def test_integer_sum_stays_integer(self, step):
+        """测试整数列的SUM结果为整数，出现浮点数后为浮点数"""
+        result = step._apply_grouping_and_aggregation([
+            {"region": "east", "amount": 1}, {"region": "east", "amount": 2},
+            {"region": "west", "amount": 1}, {"region": "west", "amount": 2.5},
+        ], [], [{"name": "amount", "aggregation": "SUM", "alias": "total"}], ["region"])
+
+        assert [(row["total"], type(row["total"])) for row in result] == [(3, int), (3.5, float)]
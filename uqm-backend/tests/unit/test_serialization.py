@@ -0,0 +1,58 @@
+"""
+结果数据序列化单元测试
+"""
+
+import math
+from datetime import datetime
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+from src.core.batch import ColumnarBatch
+from src.utils.serialization import sanitize_rows, sanitize_value
+
+
+class TestSanitizeRows:
+    """按列规范化测试"""
+
+    def test_missing_values_become_none(self):
+        """测试NaN/NA/NaT转换为None，numpy标量转换为原生类型"""
+        rows = [
+            {"a": 1.5, "b": np.int64(3), "c": pd.NaT, "d": [np.nan, 1]},
+            {"a": math.nan, "b": pd.NA, "c": datetime(2024, 1, 1), "d": None},
+        ]
+
+        result = sanitize_rows(rows)
+
+        assert result is rows
+        assert rows == [
+            {"a": 1.5, "b": 3, "c": None, "d": [None, 1]},
+            {"a": None, "b": None, "c": datetime(2024, 1, 1), "d": None},
+        ]
+        assert type(rows[0]["b"]) is int
+
+    def test_clean_columns_untouched(self):
+        """测试不需要处理的值保持原样，缺少的字段不会被补上"""
+        amount = Decimal("1.10")
+        rows = [{"id": 1, "amount": amount, "name": "a"}, {"id": 2, "score": math.nan}]
+
+        sanitize_rows(rows)
+
+        assert rows[0]["amount"] is amount
+        assert rows == [{"id": 1, "amount": amount, "name": "a"}, {"id": 2, "score": None}]
+        assert sanitize_value("x") == "x"
+
+    def test_columnar_batch_from_dataframe(self):
+        """测试由DataFrame创建列式数据时缺失值已转换为None"""
+        df = pd.DataFrame({
+            "amount": [1.0, np.nan],
+            "day": pd.to_datetime(["2024-01-01", None]),
+            "count": pd.array([1, None], dtype="Int64"),
+        })
+
+        batch = ColumnarBatch.from_dataframe(df)
+
+        assert batch.columns["amount"] == [1.0, None]
+        assert batch.columns["day"][1] is None
+        assert batch.columns["count"] == [1, None]
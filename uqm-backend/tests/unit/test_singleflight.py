@@ -0,0 +1,130 @@
+"""
+请求合并单元测试
+"""
+
+import asyncio
+
+import pytest
+
+from src.core.cache import MemoryCacheManager
+from src.core.singleflight import SingleFlight, fill_cache_once
+
+
+class TestSingleFlight:
+    """进程内请求合并测试"""
+
+    async def test_concurrent_calls_share_result(self):
+        """测试同时到达的相同键只执行一次，不同键分别执行"""
+        flight = SingleFlight("test")
+        calls = []
+
+        async def compute(key):
+            calls.append(key)
+            await asyncio.sleep(0.02)
+            return {"key": key}
+
+        results = await asyncio.gather(
+            *(flight.do("a", lambda: compute("a")) for _ in range(3)),
+            flight.do("b", lambda: compute("b"))
+        )
+
+        assert calls == ["a", "b"]
+        assert [shared for _, shared in results] == [False, True, True, False]
+        assert results[1][0] is results[0][0]
+        assert flight.stats()["in_flight"] == 0
+
+    async def test_exception_propagates_to_followers(self):
+        """测试leader失败时等待的调用收到同一异常，之后的调用重新执行"""
+        flight = SingleFlight("test")
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(
+            flight.do("k", fail), flight.do("k", fail), return_exceptions=True
+        )
+        assert [str(result) for result in results] == ["boom", "boom"]
+
+        async def succeed():
+            return 1
+
+        assert await flight.do("k", succeed) == (1, False)
+
+    async def test_follower_takes_over_cancelled_leader(self):
+        """测试leader被取消时等待的调用重新执行而不是失败"""
+        flight = SingleFlight("test")
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return len(calls)
+
+        leader = asyncio.create_task(flight.do("k", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("k", compute))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+
+        assert await follower == (2, False)
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+
+class LockingCache(MemoryCacheManager):
+    """模拟跨进程共享的缓存填充锁"""
+
+    def __init__(self):
+        super().__init__()
+        self.locks = {}
+
+    async def acquire_lock(self, key, timeout):
+        if key in self.locks:
+            return None
+        self.locks[key] = "token"
+        return "token"
+
+    async def release_lock(self, key, token):
+        return self.locks.pop(key, None) == token
+
+    async def is_locked(self, key):
+        return key in self.locks
+
+
+class TestFillCacheOnce:
+    """跨进程合并测试"""
+
+    async def test_waits_for_other_process(self):
+        """测试锁被其他进程持有时等待对方写入缓存并使用缓存结果"""
+        cache = LockingCache()
+        cache.locks["k"] = "other"
+
+        async def other_process():
+            await asyncio.sleep(0.05)
+            await cache.set("k", "from other")
+            del cache.locks["k"]
+
+        async def compute():
+            raise AssertionError("不应自行计算")
+
+        task = asyncio.create_task(other_process())
+        assert await fill_cache_once(cache, "k", compute, lock_timeout=1) == ("from other", True)
+        await task
+
+    async def test_computes_when_holder_fails(self):
+        """测试持有锁的进程没有写入缓存就释放锁时自行计算"""
+        cache = LockingCache()
+        cache.locks["k"] = "other"
+
+        async def other_process():
+            await asyncio.sleep(0.05)
+            del cache.locks["k"]
+
+        async def compute():
+            return "computed"
+
+        task = asyncio.create_task(other_process())
+        assert await fill_cache_once(cache, "k", compute, lock_timeout=1) == ("computed", False)
+        await task
+        assert cache.locks == {}
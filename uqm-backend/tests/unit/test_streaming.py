@@ -0,0 +1,127 @@
+"""
+流式响应单元测试
+"""
+
+import json
+import math
+import sqlite3
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from src.api.streaming import encode_csv, encode_ndjson, get_stream_format
+from src.connectors.base import DefaultConnectorManager
+from src.connectors.sqlite import SQLiteConnector
+from src.core.engine import UQMEngine
+from src.utils.exceptions import ValidationError
+
+
+@pytest.fixture
+def connector(tmp_path):
+    """包含25行订单数据的SQLite文件数据库连接器"""
+    db_path = tmp_path / "stream.db"
+    with sqlite3.connect(db_path) as connection:
+        connection.execute("CREATE TABLE orders (order_id INTEGER, amount REAL)")
+        connection.executemany(
+            "INSERT INTO orders VALUES (?, ?)", [(i, i * 1.5) for i in range(25)]
+        )
+    return SQLiteConnector(f"sqlite:///{db_path}")
+
+
+async def collect(chunks):
+    """读取异步迭代器的全部数据块"""
+    return [chunk async for chunk in chunks]
+
+
+async def body(encoded):
+    """拼接编码后的字节流"""
+    return b"".join([block async for block in encoded]).decode("utf-8")
+
+
+async def as_chunks(*chunks):
+    """把数据块包装为异步迭代器"""
+    for chunk in chunks:
+        yield chunk
+
+
+class TestStreamQuery:
+    """连接器流式查询测试"""
+
+    async def test_server_cursor_chunks(self, connector):
+        """测试通过游标按块读取并在读完后归还连接"""
+        sql = "SELECT order_id FROM orders ORDER BY order_id"
+        chunks = await collect(connector.stream_query(sql, chunk_size=10))
+
+        assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+        assert chunks[2][-1] == {"order_id": 24}
+        assert connector.get_pool_stats()["in_use"] == 0
+        await connector.close()
+
+    async def test_early_close_releases_connection(self, connector):
+        """测试提前停止读取时关闭游标并归还连接"""
+        stream = connector.stream_query("SELECT * FROM orders", chunk_size=10)
+        first = await stream.__anext__()
+        await stream.aclose()
+
+        assert len(first) == 10
+        assert connector.get_pool_stats()["in_use"] == 0
+        await connector.close()
+
+    async def test_engine_streams_pure_query_step(self, connector, monkeypatch):
+        """测试只有一个数据库查询步骤时由引擎直接按块输出"""
+        manager = DefaultConnectorManager()
+        manager.connectors.clear()
+        manager.register_connector("sqlite", connector)
+        monkeypatch.setattr(manager.settings, "DEFAULT_DB_TYPE", "sqlite")
+        engine = UQMEngine()
+        engine.connector_manager = manager
+
+        uqm = {
+            "metadata": {"name": "stream"},
+            "steps": [{"name": "orders", "type": "query", "config": {
+                "data_source": "orders", "dimensions": ["order_id", "amount"]
+            }}],
+            "output": "orders",
+        }
+        chunks = await collect(await engine.open_stream(uqm, options={"stream_chunk_size": 20}))
+
+        assert [len(chunk) for chunk in chunks] == [20, 5]
+        assert chunks[0][1] == {"order_id": 1, "amount": 1.5}
+        await connector.close()
+
+
+class TestStreamEncoders:
+    """流式响应编码测试"""
+
+    def test_stream_format_option(self):
+        """测试stream选项的取值"""
+        assert get_stream_format({}) is None
+        assert get_stream_format({"stream": True}) == "ndjson"
+        assert get_stream_format({"stream": "CSV"}) == "csv"
+        with pytest.raises(ValidationError):
+            get_stream_format({"stream": "xml"})
+
+    async def test_ndjson(self):
+        """测试NDJSON每行一个对象，NaN输出为null"""
+        text = await body(encode_ndjson(as_chunks(
+            [{"id": 1, "value": math.nan, "day": date(2024, 1, 2)}],
+            [],
+            [{"id": 2, "value": Decimal("1.5"), "name": "张三"}],
+        )))
+
+        lines = text.splitlines()
+        assert [json.loads(line) for line in lines] == [
+            {"id": 1, "value": None, "day": "2024-01-02"},
+            {"id": 2, "value": 1.5, "name": "张三"},
+        ]
+        assert "张三" in lines[1]
+
+    async def test_csv_header_written_once(self):
+        """测试CSV只写一次表头，缺失值为空"""
+        text = await body(encode_csv(as_chunks(
+            [{"id": 1, "name": "a,b"}],
+            [{"id": 2, "name": None}],
+        )))
+
+        assert text.splitlines() == ["id,name", '1,"a,b"', "2,"]